@@ -0,0 +1,8 @@
+"""
+Package header for the benchmarks namespace
+Provides the performance benchmarks for the solvers and the helper functions.
+"""
+
+__author__ = 'Moin Ahmed'
+__copyright__ = 'Copywrite 2023 by Moin Ahmed. All rights reserved.'
+__status__ = 'development'
@@ -0,0 +1,295 @@
+"""
+Benchmark suite for the solvers, observers, and the Solution I/O. Each benchmark is run for a set of parameters (e.g.,
+time step or problem size) and the best and median wall times are reported. The results can be saved as a JSON file and
+used as a baseline for later runs. Run from the repository root as:
+
+    python -m benchmarks.suite run --save benchmarks/baseline.json
+    python -m benchmarks.suite compare benchmarks/baseline.json --threshold 0.1
+
+The compare command runs the suite (or reads a second JSON file) and exits with status 1 if any benchmark is slower than
+the baseline by more than the threshold (relative to the baseline time).
+"""
+
+__author__ = 'Moin Ahmed'
+__copywrite__ = 'Copywrite 2023 by Moin Ahmed. All rights reserved.'
+__status__ = 'development'
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional
+
+import numpy as np
+
+from parameter_sets import Calce123
+from src import ParameterSet, BatteryCell, DischargeStep, ChargeStep, RestStep, CustomStep, DTSolver, Solution, \
+    SolutionRecorder
+from src.calc_helpers.ode_solvers import batch_TDMAsolver
+from src.parameter_estimations.ocv_fit import fit_chebyshev, fit_monotone_cubic
+from benchmarks.tdma_benchmark import create_systems
+
+A123_CSV_FILEPATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 'tests', 'test_solvers', 'A1-A123-Dynamics.csv')
+
+
+@dataclass
+class Benchmark:
+    """
+    Stores a benchmark. The setup function takes a parameter value and returns the workload, a callable with no
+    arguments, which is then timed. The setup is not included in the timings.
+    """
+    name: str
+    setup: Callable[[Any], Callable[[], Any]]
+    param_name: str
+    params: tuple
+
+    def cases(self) -> Iterator[tuple[str, Callable[[], Callable[[], Any]]]]:
+        for param in self.params:
+            yield f'{self.name}[{self.param_name}={param}]', (lambda p=param: self.setup(p))
+
+
+def _create_param() -> ParameterSet:
+    return ParameterSet(R0=Calce123.R0, R1=Calce123.R1, C1=Calce123.C1, Q=Calce123.Q,
+                        func_SOC_OCV=Calce123.func_SOC_OCV, func_eta=Calce123.func_eta)
+
+
+def _read_a123(num_rows: Optional[int] = None) -> Solution:
+    sol_exp = Solution.read_from_csv_file(filepath=A123_CSV_FILEPATH)
+    if num_rows is not None:
+        sol_exp = Solution(array_t=sol_exp.array_t[:num_rows], array_I=sol_exp.array_I[:num_rows],
+                           array_V=sol_exp.array_V[:num_rows])
+    return sol_exp
+
+
+def _setup_dtsolver(cycling_step, soc_init: float, dt: float) -> Callable[[], Solution]:
+    param = _create_param()
+
+    def workload():
+        return DTSolver(battery_cell=BatteryCell(param=param, soc_init=soc_init)).solve(cycling_step=cycling_step,
+                                                                                        dt=dt)
+    return workload
+
+
+def setup_dtsolver_discharge(dt: float) -> Callable[[], Solution]:
+    return _setup_dtsolver(DischargeStep(discharge_current=Calce123.Q, V_min=2.5, SOC_LIB_min=0.0, SOC_LIB=0.9),
+                           soc_init=0.9, dt=dt)
+
+
+def setup_dtsolver_charge(dt: float) -> Callable[[], Solution]:
+    return _setup_dtsolver(ChargeStep(charge_current=Calce123.Q, V_max=3.6, SOC_LIB_max=1.0, SOC_LIB=0.2),
+                           soc_init=0.2, dt=dt)
+
+
+def setup_dtsolver_rest(dt: float) -> Callable[[], Solution]:
+    return _setup_dtsolver(RestStep(rest_time=3600.0, SOC_LIB=0.5), soc_init=0.5, dt=dt)
+
+
+def setup_dtsolver_custom(dt: float) -> Callable[[], Solution]:
+    sol_exp = _read_a123(num_rows=2000)
+    return _setup_dtsolver(CustomStep(array_t=sol_exp.array_t, array_I=sol_exp.array_I, V_min=2.5, V_max=4.0,
+                                      SOC_LIB_min=0.0, SOC_LIB_max=1.0, SOC_LIB=0.38775),
+                           soc_init=0.38775, dt=dt)
+
+
+def setup_spkf(num_rows: int, trusted: bool = False) -> Callable[[], Solution]:
+    param = _create_param()
+    sol_exp = _read_a123(num_rows=num_rows)
+
+    def workload():
+        solver = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.38775))
+        return solver.solveSPKF(sol_exp=sol_exp, cov_soc=1e-6, cov_current=1e-6, cov_sensor=1e-6, cov_process=1e-6,
+                                V_min=1, V_max=4, SOC_LIB_min=0.0, SOC_LIB_max=1.0, SOC_LIB=0.38775, trusted=trusted)
+    return workload
+
+
+def setup_spkf_trusted(num_rows: int) -> Callable[[], Solution]:
+    return setup_spkf(num_rows=num_rows, trusted=True)
+
+
+def setup_read_csv(param: str) -> Callable[[], Solution]:
+    return lambda: Solution.read_from_csv_file(filepath=A123_CSV_FILEPATH)
+
+
+def setup_update_arrays(num_points: int) -> Callable[[], Solution]:
+    def workload():
+        sol = Solution()
+        for k in range(num_points):
+            sol.update_arrays(t=float(k), i_app=1.0, soc=0.5, v=3.3, cap_discharge=0.0)
+        return sol
+    return workload
+
+
+def setup_recorder(num_points: int) -> Callable[[], Solution]:
+    def workload():
+        recorder = SolutionRecorder()
+        for k in range(num_points):
+            recorder.record(t=float(k), i_app=1.0, soc=0.5, v=3.3, cap_discharge=0.0)
+        return recorder.stop()
+    return workload
+
+
+def setup_mse(num_points: int) -> Callable[[], float]:
+    rng = np.random.default_rng(0)
+    array_t = np.arange(num_points, dtype=float)
+    sol_sim = Solution(array_t=array_t, array_V=3.3 + 0.01 * rng.standard_normal(num_points))
+    sol_exp = Solution(array_t=array_t + 0.5, array_V=3.3 + 0.01 * rng.standard_normal(num_points))
+    return lambda: sol_sim.mse(sol_exp=sol_exp)
+
+
+def setup_tdma(num_systems: int) -> Callable[[], np.ndarray]:
+    systems = create_systems(num_systems=num_systems, n=20)
+    return lambda: batch_TDMAsolver(*systems)
+
+
+def setup_ocv(kind: str) -> Callable[[], Any]:
+    array_soc = np.linspace(0.0, 1.0, 2001)
+    if kind == 'chebyshev':
+        func_SOC_OCV = fit_chebyshev(array_soc, Calce123.func_SOC_OCV(array_soc), degree=12, check_monotone=False)
+    elif kind == 'monotone_cubic':
+        func_SOC_OCV = fit_monotone_cubic(array_soc, Calce123.func_SOC_OCV(array_soc), num_points=101)
+    else:
+        func_SOC_OCV = Calce123.func_SOC_OCV
+    array_soc = np.random.default_rng(0).uniform(0.0, 1.0, 100000)
+    list_soc = array_soc[:10000].tolist()
+
+    def workload():
+        for soc in list_soc:  # scalar evaluations, as in DTSolver
+            func_SOC_OCV(soc)
+        return func_SOC_OCV(array_soc)  # array evaluation, as in PackSolver
+    return workload
+
+
+BENCHMARKS = [
+    Benchmark(name='dtsolver_discharge', setup=setup_dtsolver_discharge, param_name='dt', params=(0.1, 1.0)),
+    Benchmark(name='dtsolver_charge', setup=setup_dtsolver_charge, param_name='dt', params=(0.1, 1.0)),
+    Benchmark(name='dtsolver_rest', setup=setup_dtsolver_rest, param_name='dt', params=(0.1, 1.0)),
+    Benchmark(name='dtsolver_custom', setup=setup_dtsolver_custom, param_name='dt', params=(0.1, 1.0)),
+    Benchmark(name='spkf_a123', setup=setup_spkf, param_name='num_rows', params=(1000, 5000)),
+    Benchmark(name='spkf_a123_trusted', setup=setup_spkf_trusted, param_name='num_rows', params=(1000, 5000)),
+    Benchmark(name='solution_read_csv', setup=setup_read_csv, param_name='file', params=('a123',)),
+    Benchmark(name='solution_update_arrays', setup=setup_update_arrays, param_name='num_points', params=(1000, 10000)),
+    Benchmark(name='solution_recorder', setup=setup_recorder, param_name='num_points', params=(1000, 10000)),
+    Benchmark(name='solution_mse', setup=setup_mse, param_name='num_points', params=(10000, 1000000)),
+    Benchmark(name='ocv_eval', setup=setup_ocv, param_name='kind',
+              params=('calce_polynomial', 'chebyshev', 'monotone_cubic')),
+    Benchmark(name='batch_tdma', setup=setup_tdma, param_name='num_systems', params=(100, 10000)),
+]
+
+
+def run(pattern: Optional[str] = None, repeat: int = 3, verbose: bool = True) -> dict:
+    """
+    Runs the benchmarks.
+    :param pattern: only the benchmark cases whose names contain the pattern are run. All are run if None.
+    :param repeat: number of timing repeats for each benchmark case
+    :param verbose: prints the timings as they are obtained if True
+    :return: dictionary with the metadata and the results (best and median wall times [s]) for every benchmark case
+    """
+    results = {}
+    for benchmark in BENCHMARKS:
+        for case_name, setup in benchmark.cases():
+            if (pattern is not None) and (pattern not in case_name):
+                continue
+            workload = setup()
+            array_time = timeit.repeat(workload, number=1, repeat=repeat)
+            results[case_name] = {'min': min(array_time), 'median': statistics.median(array_time), 'repeat': repeat}
+            if verbose:
+                print(f'{case_name:<40} {results[case_name]["min"] * 1e3:>12.3f} ms')
+    metadata = {'date': datetime.datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+                'numpy': np.__version__, 'platform': platform.platform()}
+    return {'metadata': metadata, 'results': results}
+
+
+def save(results: dict, filepath: str) -> None:
+    with open(filepath, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def load(filepath: str) -> dict:
+    with open(filepath) as f:
+        return json.load(f)
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> list[dict]:
+    """
+    Compares the best wall times of the current results against the baseline.
+    :param baseline: baseline results (see run)
+    :param current: current results (see run)
+    :param threshold: relative slow-down (or speed-up) beyond which a benchmark case is flagged
+    :return: list with a row for every benchmark case. The status of each row is one of 'regression', 'improvement',
+    'ok', 'new' (not in the baseline), or 'missing' (not in the current results).
+    """
+    base_results, curr_results = baseline['results'], current['results']
+    rows = []
+    for case_name in list(base_results) + [name for name in curr_results if name not in base_results]:
+        t_base = base_results[case_name]['min'] if case_name in base_results else None
+        t_curr = curr_results[case_name]['min'] if case_name in curr_results else None
+        if t_base is None:
+            status, ratio = 'new', None
+        elif t_curr is None:
+            status, ratio = 'missing', None
+        else:
+            ratio = t_curr / t_base
+            if ratio > 1 + threshold:
+                status = 'regression'
+            elif ratio < 1 - threshold:
+                status = 'improvement'
+            else:
+                status = 'ok'
+        rows.append({'name': case_name, 'baseline': t_base, 'current': t_curr, 'ratio': ratio, 'status': status})
+    return rows
+
+
+def print_comparison(rows: list[dict]) -> None:
+    print(f"{'benchmark':<40} {'baseline [ms]':>14} {'current [ms]':>14} {'ratio':>7}  status")
+    for row in rows:
+        t_base = f"{row['baseline'] * 1e3:.3f}" if row['baseline'] is not None else '-'
+        t_curr = f"{row['current'] * 1e3:.3f}" if row['current'] is not None else '-'
+        ratio = f"{row['ratio']:.2f}" if row['ratio'] is not None else '-'
+        print(f"{row['name']:<40} {t_base:>14} {t_curr:>14} {ratio:>7}  {row['status']}")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite', description=__doc__.splitlines()[1])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    parser_run = subparsers.add_parser('run', help='runs the benchmarks')
+    parser_run.add_argument('-k', dest='pattern', default=None, help='only runs the cases containing the pattern')
+    parser_run.add_argument('--repeat', type=int, default=3)
+    parser_run.add_argument('--save', default=None, help='path of the JSON file for the results')
+
+    parser_compare = subparsers.add_parser('compare', help='compares the results against a baseline')
+    parser_compare.add_argument('baseline', help='path of the baseline JSON file')
+    parser_compare.add_argument('current', nargs='?', default=None,
+                                help='path of the JSON file with the current results. The suite is run if omitted.')
+    parser_compare.add_argument('-k', dest='pattern', default=None, help='only runs the cases containing the pattern')
+    parser_compare.add_argument('--repeat', type=int, default=3)
+    parser_compare.add_argument('--threshold', type=float, default=0.1)
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        results = run(pattern=args.pattern, repeat=args.repeat)
+        if args.save is not None:
+            save(results=results, filepath=args.save)
+        return 0
+
+    baseline = load(filepath=args.baseline)
+    if args.current is not None:
+        current = load(filepath=args.current)
+    else:
+        current = run(pattern=args.pattern, repeat=args.repeat, verbose=False)
+        if args.pattern is not None:
+            baseline = {'results': {name: result for name, result in baseline['results'].items()
+                                    if args.pattern in name}}
+    rows = compare(baseline=baseline, current=current, threshold=args.threshold)
+    print_comparison(rows)
+    return 1 if any(row['status'] == 'regression' for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
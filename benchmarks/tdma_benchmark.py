@@ -0,0 +1,53 @@
+"""
+Benchmarks the batched Thomas algorithm (batch_TDMAsolver) against scipy.linalg.solve_banded, which solves one system
+per call, for many tridiagonal systems. Run from the repository root as:
+
+    python -m benchmarks.tdma_benchmark
+"""
+
+__author__ = 'Moin Ahmed'
+__copywrite__ = 'Copywrite 2023 by Moin Ahmed. All rights reserved.'
+__status__ = 'development'
+
+import timeit
+
+import numpy as np
+import scipy.linalg
+
+from src.calc_helpers.ode_solvers import batch_TDMAsolver
+
+
+def create_systems(num_systems: int, n: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    l_diag = rng.uniform(-1.0, 0.0, (num_systems, n - 1))
+    u_diag = rng.uniform(-1.0, 0.0, (num_systems, n - 1))
+    diag = rng.uniform(2.5, 3.0, (num_systems, n))
+    col_vec = rng.uniform(-1.0, 1.0, (num_systems, n))
+    return l_diag, diag, u_diag, col_vec
+
+
+def solve_banded_loop(l_diag, diag, u_diag, col_vec) -> np.ndarray:
+    num_systems, n = col_vec.shape
+    result = np.empty((num_systems, n))
+    ab = np.zeros((3, n))
+    for i in range(num_systems):
+        ab[0, 1:] = u_diag[i]
+        ab[1] = diag[i]
+        ab[2, :-1] = l_diag[i]
+        result[i] = scipy.linalg.solve_banded((1, 1), ab, col_vec[i])
+    return result
+
+
+def main(sizes=((1, 20), (100, 20), (10000, 20), (1000, 200))) -> None:
+    print(f"{'systems':>10} {'n':>6} {'batch_TDMA [ms]':>16} {'solve_banded [ms]':>18} {'speed-up':>9}")
+    for num_systems, n in sizes:
+        systems = create_systems(num_systems=num_systems, n=n)
+        assert np.allclose(batch_TDMAsolver(*systems), solve_banded_loop(*systems))
+        num_repeat = 5
+        t_tdma = min(timeit.repeat(lambda: batch_TDMAsolver(*systems), number=1, repeat=num_repeat)) * 1e3
+        t_banded = min(timeit.repeat(lambda: solve_banded_loop(*systems), number=1, repeat=num_repeat)) * 1e3
+        print(f'{num_systems:>10} {n:>6} {t_tdma:>16.3f} {t_banded:>18.3f} {t_banded / t_tdma:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -2,12 +2,17 @@
 Thevenein 1RC parameters for CalceA123 battery cell
 """
 
+import numpy as np
+
+from src.core.parameter_functions import array_safe
+
 R0: float = 0.225
 R1: float = 0.001
 C1: float = 0.03
 Q: float = 1.1
 
 
+@array_safe
 def func_SOC_OCV(soc):
     a, b, c, d, e, f, g, h, i, j, k, l, m = \
     [3.39803735e+04, -1.86083253e+05, 4.40650925e+05, -5.86500338e+05,
@@ -21,5 +26,7 @@ def func_SOC_OCV(soc):
            j * soc ** 3 + k * soc ** 2 + l * soc + m
 
 
+@array_safe
 def func_eta(i):
-    return 1 if i <= 0 else 0.9995
\ No newline at end of file
+    eta = np.where(i <= 0, 1.0, 0.9995)  # Columbic efficiency of one for the charge (negative) currents
+    return eta if np.ndim(eta) else float(eta)
\ No newline at end of file
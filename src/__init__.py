@@ -4,18 +4,27 @@ Provides classes and functionality for performing and visualizing simulation res
 """
 
 __all__ = ['core', 'solvers', 'visualization', 'observers',
-           'ParameterSet', 'BatteryCell',
-           'DischargeStep', 'ChargeStep', 'RestStep', 'CustomStep', 'DTSolver',
-           'Solution']
+           'ParameterSet', 'CompiledParameterSet', 'ParameterTable', 'BatteryCell', 'BatteryPack',
+           'DischargeStep', 'ChargeStep', 'RestStep', 'CustomStep', 'LoadProfile', 'DTSolver', 'PackSolver',
+           'SolutionCache', 'AgingSolver', 'PowerLawDegradation',
+           'Solution', 'SolutionRecorder', 'Instrumentation', 'array_safe']
 
 __author__ = 'Moin Ahmed'
 __copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
 __status__ = 'development'
 
-from src.core.battery_objects import BatteryCell, ParameterSet
+from src.core.battery_objects import BatteryCell, BatteryPack, CompiledParameterSet, ParameterSet
+from src.core.parameter_tables import ParameterTable
+from src.core.parameter_functions import array_safe
 from src.core.cycling_steps import DischargeStep, ChargeStep, RestStep, CustomStep
+from src.core.load_profiles import LoadProfile
 from src.solvers.ecm_solvers import DTSolver
+from src.solvers.pack_solvers import PackSolver
+from src.solvers.solution_cache import SolutionCache
+from src.solvers.aging_solvers import AgingSolver, PowerLawDegradation
 from src.visualization.sol_and_plot_objects import Solution
+from src.visualization.recorders import SolutionRecorder
+from src.calc_helpers.instrumentation import Instrumentation
 
 from src.observers.random_variables import NormalRandomVector
 from src.observers.kalman_filter import SPKF
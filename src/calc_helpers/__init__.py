@@ -3,4 +3,4 @@ Package-header for the src/calc_helpers namespace.
 Provides classes and functionality for various calculations.
 """
 
-__all__ = ['ode_solvers']
\ No newline at end of file
+__all__ = ['ode_solvers', 'instrumentation']
\ No newline at end of file
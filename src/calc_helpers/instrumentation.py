@@ -0,0 +1,182 @@
+""" instrumentation
+Contains the classes for the opt-in timing and profiling of the solver loops.
+
+The solvers time the phases of each time step (e.g., current lookup, OCV evaluation, state update) through an
+instrumentation object. By default, the NULL_INSTRUMENTATION object is used, whose methods do nothing, so the cost of
+the disabled instrumentation is that of a few empty method calls per time step. Pass an Instrumentation instance to the
+solver to collect the timings, which are returned as an InstrumentationReport attached to the Solution object.
+"""
+
+__all__ = ['Instrumentation', 'NullInstrumentation', 'InstrumentationReport', 'NULL_INSTRUMENTATION']
+
+__author__ = 'Moin Ahmed'
+__copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
+__status__ = 'development'
+
+import cProfile
+import io
+import pstats
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # resource module is not available on Windows
+    resource = None
+
+
+@dataclass
+class InstrumentationReport:
+    """
+    Stores the results of the instrumentation of a solver run.
+    """
+    phase_times: dict[str, float] = field(default_factory=dict)  # cumulative time for each phase [s]
+    counters: dict[str, int] = field(default_factory=dict)  # number of calls for each phase or event
+    num_steps: int = 0  # number of time steps
+    wall_time: float = 0.0  # total time of the solver run [s]
+    peak_memory: Optional[int] = None  # peak memory allocated during the run [bytes] (with trace_memory only)
+    peak_rss: Optional[int] = None  # peak resident set size of the process [bytes] (if available)
+    profile: Optional[str] = None  # cProfile statistics (with profile only)
+
+    @property
+    def steps_per_second(self) -> float:
+        return self.num_steps / self.wall_time if self.wall_time > 0 else 0.0
+
+    def summary(self) -> str:
+        """
+        Returns the formatted table of the phase times and counters.
+        """
+        lines = [f'{"phase":<20} {"time [s]":>12} {"calls":>10} {"% of total":>11}']
+        for phase, phase_time in sorted(self.phase_times.items(), key=lambda item: -item[1]):
+            percent = 100 * phase_time / self.wall_time if self.wall_time > 0 else 0.0
+            lines.append(f'{phase:<20} {phase_time:>12.6f} {self.counters.get(phase, 0):>10} {percent:>11.1f}')
+        for counter, count in self.counters.items():
+            if counter not in self.phase_times:
+                lines.append(f'{counter:<20} {"":>12} {count:>10}')
+        lines.append(f'steps: {self.num_steps}, wall time: {self.wall_time:.6f} s, '
+                     f'steps per second: {self.steps_per_second:.1f}')
+        if self.peak_memory is not None:
+            lines.append(f'peak traced memory: {self.peak_memory / 1024 ** 2:.3f} MiB')
+        if self.peak_rss is not None:
+            lines.append(f'peak RSS: {self.peak_rss / 1024 ** 2:.3f} MiB')
+        return '\n'.join(lines)
+
+    def __str__(self) -> str:
+        return self.summary()
+
+
+class NullInstrumentation:
+    """
+    Instrumentation object that does nothing. It is used by the solvers when the instrumentation is not requested.
+    """
+    enabled = False
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        return None
+
+    def tic(self) -> float:
+        return 0.0
+
+    def toc(self, phase: str, t_start: float) -> float:
+        return 0.0
+
+    def count(self, counter: str, num: int = 1) -> None:
+        pass
+
+    def step(self) -> None:
+        pass
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
+
+
+class Instrumentation(NullInstrumentation):
+    """
+    Collects the cumulative times and call counts of the solver phases. The timing of a phase is done as:
+
+    t_start = instrumentation.tic()
+    ...  # phase code
+    t_start = instrumentation.toc('phase name', t_start)
+
+    where toc returns the current time so that consecutive phases can be chained.
+    """
+    enabled = True
+
+    def __init__(self, profile: bool = False, trace_memory: bool = False) -> None:
+        """
+        Class constructor.
+        :param profile: if True, the solver run is also profiled using cProfile
+        :param trace_memory: if True, the peak memory allocated during the solver run is traced using tracemalloc. Note
+        that tracemalloc slows down the execution significantly.
+        """
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.phase_times = {}
+        self.counters = {}
+        self.num_steps = 0
+        self.__t_start = 0.0
+        self.__profiler = None
+        self.__started_tracing = False  # True if tracemalloc was started by this instance (and not by the caller)
+
+    def start(self) -> None:
+        """
+        Resets the timers and counters and starts the timing (and profiling, if requested) of the solver run.
+        """
+        self.phase_times = {}
+        self.counters = {}
+        self.num_steps = 0
+        if self.trace_memory:
+            self.__started_tracing = not tracemalloc.is_tracing()
+            if self.__started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        if self.profile:
+            self.__profiler = cProfile.Profile()
+            self.__profiler.enable()
+        self.__t_start = time.perf_counter()
+
+    def stop(self) -> InstrumentationReport:
+        """
+        Stops the timing of the solver run. The tracing of the memory allocations is stopped only if it was started by
+        this instance, so that the tracing started by the caller keeps running.
+        :return: (InstrumentationReport) report of the solver run
+        """
+        wall_time = time.perf_counter() - self.__t_start
+        report = InstrumentationReport(phase_times=dict(self.phase_times), counters=dict(self.counters),
+                                       num_steps=self.num_steps, wall_time=wall_time)
+        if self.profile:
+            self.__profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(self.__profiler, stream=stream).sort_stats('cumulative').print_stats(30)
+            report.profile = stream.getvalue()
+            self.__profiler = None
+        if self.trace_memory:
+            report.peak_memory = tracemalloc.get_traced_memory()[1]
+            if self.__started_tracing:
+                tracemalloc.stop()
+            self.__started_tracing = False
+        if resource is not None:
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            report.peak_rss = max_rss if sys.platform == 'darwin' else max_rss * 1024  # ru_maxrss is in KiB on Linux
+        return report
+
+    def tic(self) -> float:
+        return time.perf_counter()
+
+    def toc(self, phase: str, t_start: float) -> float:
+        t_end = time.perf_counter()
+        self.phase_times[phase] = self.phase_times.get(phase, 0.0) + t_end - t_start
+        self.counters[phase] = self.counters.get(phase, 0) + 1
+        return t_end
+
+    def count(self, counter: str, num: int = 1) -> None:
+        self.counters[counter] = self.counters.get(counter, 0) + num
+
+    def step(self) -> None:
+        self.num_steps += 1
@@ -2,14 +2,14 @@
 contains classes and functionailties for solving odes
 """
 
-__all__ = ['euler', 'rk4', 'TDMAsolver']
+__all__ = ['euler', 'rk4', 'rk45', 'integrate_fixed_step', 'integrate_rk45', 'TDMAsolver', 'batch_TDMAsolver']
 
 __author__ = 'Moin Ahmed'
 __copywrite__ = 'Copywrite 2023 by Moin Ahmed. All rights reserved.'
 __status__ = 'deployed'
 
 
-from typing import Callable
+from typing import Callable, Optional
 
 import numpy as np
 import numpy.typing as npt
@@ -36,6 +36,120 @@ def rk4(func: Callable, t_prev: float, y_prev: float, step_size: float):
     return y_prev + (1/6.0) * (k1 + 2*k2 + 2*k3 + k4) * step_size
 
 
+# Dormand-Prince 5(4) Butcher tableau
+_DP_C = np.array([0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0, 1.0])
+_DP_A = [np.array([]),
+         np.array([1 / 5]),
+         np.array([3 / 40, 9 / 40]),
+         np.array([44 / 45, -56 / 15, 32 / 9]),
+         np.array([19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729]),
+         np.array([9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656]),
+         np.array([35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84])]
+_DP_B = np.array([35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84, 0.0])  # 5th order weights
+_DP_E = _DP_B - np.array([5179 / 57600, 0.0, 7571 / 16695, 393 / 640, -92097 / 339200, 187 / 2100, 1 / 40])
+
+
+def rk45(func: Callable, t_prev: float, y_prev: npt.ArrayLike, step_size: float) \
+        -> tuple[npt.ArrayLike, npt.ArrayLike]:
+    """
+    Advances the ODE, dy/dt = f(y,t), by one step using the embedded Dormand-Prince 5(4) Runge-Kutta pair.
+    :param func: (Callable) function that takes y and t as its input arguments (in that order). For batches of
+    independent states, it needs to accept and return numpy arrays of the same shape as y.
+    :param t_prev: The value of time in the previous time step [s]
+    :param y_prev: The value(s) of y in the previous time step
+    :param step_size: the difference in time between the current and previous time steps [s]
+    :return: tuple containing the (5th order) value(s) of y at the next time step and the local error estimate(s)
+    """
+    y_prev = np.asarray(y_prev, dtype=float)
+    k = np.empty((7,) + y_prev.shape)
+    k[0] = func(y_prev, t_prev)
+    for i in range(1, 7):
+        y_stage = y_prev + step_size * np.tensordot(_DP_A[i], k[:i], axes=1)
+        k[i] = func(y_stage, t_prev + _DP_C[i] * step_size)
+    y_next = y_prev + step_size * np.tensordot(_DP_B, k, axes=1)
+    error = step_size * np.tensordot(_DP_E, k, axes=1)
+    return y_next, error
+
+
+def integrate_fixed_step(func: Callable, array_t: npt.ArrayLike, y_init: npt.ArrayLike, method: str = 'rk4',
+                         out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Integrates the ODE, dy/dt = f(y,t), over the full time grid using a fixed-step method. The time steps are the
+    differences in the time grid. Any number of independent states can be advanced at once if func is vectorized.
+    :param func: (Callable) function that takes y and t as its input arguments (in that order) and returns an array of
+    the same shape as y.
+    :param array_t: time grid [s]
+    :param y_init: value(s) of y at the first time in the time grid
+    :param method: 'euler' or 'rk4'
+    :param out: (optional) preallocated output array of shape (len(array_t),) + shape of y_init.
+    :return: array of y at the time grid of shape (len(array_t),) + shape of y_init
+    """
+    if method == 'euler':
+        step = euler
+    elif method == 'rk4':
+        step = rk4
+    else:
+        raise ValueError("method needs to be either 'euler' or 'rk4'.")
+    array_t = np.asarray(array_t, dtype=float)
+    y_init = np.asarray(y_init, dtype=float)
+    if out is None:
+        out = np.empty((len(array_t),) + y_init.shape)
+    out[0] = y_init
+    for i in range(1, len(array_t)):
+        out[i] = step(func, array_t[i - 1], out[i - 1], array_t[i] - array_t[i - 1])
+    return out
+
+
+def integrate_rk45(func: Callable, array_t: npt.ArrayLike, y_init: npt.ArrayLike, rtol: float = 1e-6,
+                   atol: float = 1e-9, out: Optional[np.ndarray] = None, max_steps: int = 100000) -> np.ndarray:
+    """
+    Integrates the ODE, dy/dt = f(y,t), over the full time grid using the adaptive Dormand-Prince 5(4) method. The
+    solver takes as many internal steps as needed between the grid points. For batches of independent states, a
+    common step size is used that satisfies the error tolerance of every state, so that the whole batch is advanced
+    with a single (vectorized) call of func per stage.
+    :param func: (Callable) function that takes y and t as its input arguments (in that order) and returns an array of
+    the same shape as y.
+    :param array_t: time grid [s]
+    :param y_init: value(s) of y at the first time in the time grid
+    :param rtol: relative tolerance
+    :param atol: absolute tolerance
+    :param out: (optional) preallocated output array of shape (len(array_t),) + shape of y_init.
+    :param max_steps: maximum number of internal steps
+    :return: array of y at the time grid of shape (len(array_t),) + shape of y_init
+    """
+    array_t = np.asarray(array_t, dtype=float)
+    y = np.array(y_init, dtype=float)
+    if out is None:
+        out = np.empty((len(array_t),) + y.shape)
+    out[0] = y
+    if len(array_t) < 2:
+        return out
+
+    t = array_t[0]
+    step_size = array_t[1] - array_t[0]
+    num_steps = 0
+    for i in range(1, len(array_t)):
+        t_end = array_t[i]
+        while t < t_end:
+            is_last_step = step_size >= t_end - t
+            h = t_end - t if is_last_step else step_size
+            y_next, error = rk45(func=func, t_prev=t, y_prev=y, step_size=h)
+            scale = atol + rtol * np.maximum(np.abs(y), np.abs(y_next))
+            error_norm = np.max(np.abs(error) / scale) if y.size else 0.0
+            factor = 5.0 if error_norm == 0.0 else min(5.0, max(0.2, 0.9 * error_norm ** -0.2))
+            if error_norm <= 1.0:
+                t = t_end if is_last_step else t + h
+                y = y_next
+                step_size = max(step_size, h * factor) if is_last_step else h * factor
+            else:
+                step_size = h * factor
+            num_steps += 1
+            if num_steps > max_steps:
+                raise RuntimeError('maximum number of steps exceeded in integrate_rk45.')
+        out[i] = y
+    return out
+
+
 def TDMAsolver(l_diag: npt.ArrayLike, diag: npt.ArrayLike, u_diag: npt.ArrayLike, col_vec: npt.ArrayLike) \
         -> npt.ArrayLike:
     '''
@@ -43,16 +157,41 @@ def TDMAsolver(l_diag: npt.ArrayLike, diag: npt.ArrayLike, u_diag: npt.ArrayLike
     Code Modified from:
     https://gist.github.com/cbellei/8ab3ab8551b8dfc8b081c518ccd9ada9?permalink_comment_id=3109807
     '''
-    nf = len(col_vec)  # number of equations
-    c_l_diag, c_diag, c_u_diag, c_col_vec = map(np.array, (l_diag, diag, u_diag, col_vec))  # copy arrays
-    for it in range(1, nf):
-        mc = c_l_diag[it - 1] / c_diag[it - 1]
-        c_diag[it] = c_diag[it] - mc * c_u_diag[it - 1]
-        c_col_vec[it] = c_col_vec[it] - mc * c_col_vec[it - 1]
+    return batch_TDMAsolver(l_diag=l_diag, diag=diag, u_diag=u_diag, col_vec=col_vec)
 
-    xc = c_diag
-    xc[-1] = c_col_vec[-1] / c_diag[-1]
 
+def batch_TDMAsolver(l_diag: npt.ArrayLike, diag: npt.ArrayLike, u_diag: npt.ArrayLike, col_vec: npt.ArrayLike) \
+        -> np.ndarray:
+    """
+    Thomas algorithm for many tridiagonal systems of equations at once. The last axis of the inputs runs along the
+    equations of a system and all the leading axes are batch axes (e.g., battery cells or time steps), which are swept
+    through in a vectorized manner. Hence, the Python loops only run over the number of equations in a system.
+
+    The inputs are broadcast against each other, so, for example, the same matrix can be used for many right-hand side
+    vectors.
+    :param l_diag: lower diagonal of shape (..., n-1)
+    :param diag: main diagonal of shape (..., n)
+    :param u_diag: upper diagonal of shape (..., n-1)
+    :param col_vec: right-hand side vector of shape (..., n)
+    :return: solution of shape (..., n)
+    """
+    l_diag, diag, u_diag, col_vec = (np.asarray(array_, dtype=float) for array_ in (l_diag, diag, u_diag, col_vec))
+    batch_shape = np.broadcast_shapes(l_diag.shape[:-1], diag.shape[:-1], u_diag.shape[:-1], col_vec.shape[:-1])
+    nf = col_vec.shape[-1]  # number of equations
+    c_diag = np.empty(batch_shape + (nf,))
+    c_col_vec = np.empty(batch_shape + (nf,))
+
+    # forward sweep
+    c_diag[..., 0] = diag[..., 0]
+    c_col_vec[..., 0] = col_vec[..., 0]
+    for it in range(1, nf):
+        mc = l_diag[..., it - 1] / c_diag[..., it - 1]
+        c_diag[..., it] = diag[..., it] - mc * u_diag[..., it - 1]
+        c_col_vec[..., it] = col_vec[..., it] - mc * c_col_vec[..., it - 1]
+
+    # backward substitution
+    xc = c_col_vec
+    xc[..., -1] = c_col_vec[..., -1] / c_diag[..., -1]
     for il in range(nf - 2, -1, -1):
-        xc[il] = (c_col_vec[il] - c_u_diag[il] * xc[il + 1]) / c_diag[il]
-    return xc
\ No newline at end of file
+        xc[..., il] = (c_col_vec[..., il] - u_diag[..., il] * xc[..., il + 1]) / c_diag[..., il]
+    return xc
@@ -3,7 +3,7 @@ Package-header for the src/core namespace.
 Provides classes and functionality for basic battery simulation objects
 """
 
-__all__ = ['battery_objects']
+__all__ = ['battery_objects', 'cycling_steps', 'parameter_tables', 'parameter_functions', 'load_profiles']
 
 __author__ = 'Moin Ahmed'
 __copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
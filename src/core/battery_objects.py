@@ -2,20 +2,54 @@
 Provides classes and functionality for the core objects used by the equivalent circuit solvers
 """
 
-__all__ = ['ParameterSet', 'BatteryCell']
+__all__ = ['ParameterSet', 'CompiledParameterSet', 'BatteryCell', 'BatteryPack']
 
 __author__ = 'Moin Ahmed'
 __copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
 __status__ = 'deployed'
 
-from typing import Optional, Callable
+from typing import Iterator, Optional, Callable, Sequence, Union, Self
 import abc
+import contextlib
+import functools
 from dataclasses import dataclass, field
 
 import numpy as np
 
 from src.exceptions_and_warnings.exceptions import CannotPerformCalculations
 from src.calc_helpers import constants
+from src.core.parameter_functions import is_array_safe
+from src.core.parameter_tables import ParameterTable
+
+# width of the temperature bins [K] and the number of cached bins of the Arrhenius factors (see calc_arrhenius_factor)
+TEMP_BIN_WIDTH = 0.01
+ARRHENIUS_CACHE_SIZE = 2 ** 14
+
+
+@functools.lru_cache(maxsize=ARRHENIUS_CACHE_SIZE)
+def _calc_arrhenius_factor_of_bin(Ea: float, T_ref: float, temp_bin: int, temp_bin_width: float) -> float:
+    return float(np.exp(Ea / constants.Constants.R * (1 / (temp_bin * temp_bin_width) - 1 / T_ref)))
+
+
+def calc_arrhenius_factor(Ea: Optional[float], T_ref: Optional[float], temp: float,
+                          temp_bin_width: float = TEMP_BIN_WIDTH) -> float:
+    """
+    Returns the Arrhenius factor, exp(Ea/R * (1/temp - 1/T_ref)), for the input activation energy. The resistances
+    decrease with the increase in temperature. The factor is evaluated at the centre of the temperature bin (of width
+    temp_bin_width) that contains temp, so that the exponential is evaluated only once per bin during a simulation.
+    Hence, the factor is evaluated at up to temp_bin_width / 2 (0.005 K by default) from temp, which gives the relative
+    error of up to about Ea / (R temp^2) * temp_bin_width / 2 (about 3e-4 for Ea = 50 kJ/mol at 298.15 K). The factors
+    of the most recently used ARRHENIUS_CACHE_SIZE bins are cached, so the memory used by the cache is bounded during
+    the long (e.g., aging) simulations.
+    :param Ea: activation energy [J/mol]. The factor is 1 if it is None.
+    :param T_ref: reference temperature [K]. The factor is 1 if it is None.
+    :param temp: temperature [K]
+    :param temp_bin_width: width of the temperature bins [K]
+    :return: Arrhenius factor
+    """
+    if (Ea is None) or (T_ref is None):
+        return 1.0
+    return _calc_arrhenius_factor_of_bin(Ea, T_ref, round(temp / temp_bin_width), temp_bin_width)
 
 
 def check_for_float_type(value: Optional[float]) -> None:
@@ -28,6 +62,47 @@ def check_for_float_type(value: Optional[float]) -> None:
         raise TypeError(f"inputted value needs to be a None or float type. Provided {value}")
 
 
+def check_for_float_or_array_type(value: Optional[Union[float, np.ndarray]]) -> None:
+    """
+    Checks that the input value is a float or a non-empty 1-D numpy array of floats and raise TypeError (ValueError)
+    if it is not.
+    :param value: input value
+    :return: None
+    """
+    if isinstance(value, np.ndarray):
+        if value.ndim != 1 or value.size == 0:
+            raise ValueError(f"inputted array needs to be a non-empty 1-D array. Provided {value}")
+        if not np.issubdtype(value.dtype, np.floating):
+            raise TypeError(f"inputted array needs to have a float dtype. Provided {value}")
+    else:
+        check_for_float_type(value=value)
+
+
+def check_for_parameter_type(value: Union[float, np.ndarray, ParameterTable], allow_array: bool = True) -> None:
+    """
+    Checks that the input value is a ParameterTable, a float, or (if allow_array) a non-empty 1-D numpy array of floats.
+    :param value: input value
+    :param allow_array: True if the arrays (for the n-RC models) are allowed
+    :return: None
+    """
+    if isinstance(value, ParameterTable):
+        return
+    if allow_array:
+        check_for_float_or_array_type(value=value)
+    else:
+        check_for_float_type(value=value)
+
+
+def _rc_shape(value: Union[float, np.ndarray, ParameterTable]) -> tuple:
+    """
+    Returns the shape of the RC pair axis of the parameter, i.e., () for the first-order and (num_rc,) for the n-RC
+    models.
+    """
+    if isinstance(value, ParameterTable):
+        return (value.num_rc,) if value.rc_axis else ()
+    return np.shape(value)
+
+
 def check_for_callable_type(func: Optional[Callable]) -> None:
     if not callable(func):
         raise TypeError
@@ -61,6 +136,9 @@ class ParameterSet:
 
     _func_docvdtemp = None
 
+    # width of the temperature bins [K] used to cache the Arrhenius factors of R0 and R1
+    temp_bin_width = TEMP_BIN_WIDTH
+
     def _get_Ea_R0(self) -> Optional[float]:
         return self._Ea_R0
 
@@ -113,9 +191,11 @@ class ParameterSet:
         return self._func_docvdtemp
 
     def _set_Ea_R0(self, Ea_R0: float) -> None:
+        check_for_float_type(Ea_R0)
         self._Ea_R0 = Ea_R0
 
     def _set_Ea_R1(self, Ea_R1: float) -> None:
+        check_for_float_type(Ea_R1)
         self._Ea_R1 = Ea_R1
 
     def _set_R0_ref(self, R0_ref: float) -> None:
@@ -124,25 +204,27 @@ class ParameterSet:
         :param R0: resistance value [ohms]
         :return: None
         """
-        check_for_float_type(value=R0_ref)
-        self._R0 = R0_ref
+        check_for_parameter_type(value=R0_ref, allow_array=False)
+        self._R0_ref = R0_ref
 
-    def _set_R1_ref(self, R1_ref: float) -> None:
+    def _set_R1_ref(self, R1_ref: Union[float, np.ndarray]) -> None:
         """
-        Sets the instance's R1 [ohms] value
+        Sets the instance's R1 [ohms] value. For models with more than one RC pair, it is an array with the resistance
+        of each RC pair.
         :param R1: resistance value [ohms]
         :return: None
         """
-        check_for_float_type(value=R1_ref)
-        self._R1 = R1_ref
+        check_for_parameter_type(value=R1_ref)
+        self._R1_ref = R1_ref
 
-    def _set_C1(self, C1: float) -> None:
+    def _set_C1(self, C1: Union[float, np.ndarray]) -> None:
         """
-        Sets the instance's C1 value
+        Sets the instance's C1 value. For models with more than one RC pair, it is an array with the capacitance of each
+        RC pair.
         :param C1: capacitance value [Farads]
         :return: None
         """
-        check_for_float_type(value=C1)
+        check_for_parameter_type(value=C1)
         self._C1 = C1
 
     def _set_Q(self, cap: float) -> None:
@@ -167,7 +249,7 @@ class ParameterSet:
 
     def _set_V_max(self, v_max: float) -> None:
         check_for_float_type(v_max)
-        self._V_min = v_max
+        self._V_max = v_max
 
     def _set_T_ref(self, temp_ref: float) -> None:
         check_for_float_type(temp_ref)
@@ -225,7 +307,7 @@ class ParameterSet:
         self._V_min = None
 
     def _del_V_max(self) -> None:
-        self._V_min = None
+        self._V_max = None
 
     def _del_T_ref(self) -> None:
         self._T_ref = None
@@ -248,8 +330,10 @@ class ParameterSet:
     def _del_func_docvdtemp(self) -> None:
         self._func_docvdtemp = None
 
-    R0_ref = property(_get_R0_ref, _set_R0_ref, _del_R0_ref, 'gets, sets, or deletes the R0.')
-    R1_ref = property(_get_R1_ref, _set_R1_ref, _del_R1_ref, 'gets, sets, or deletes the R1.')
+    R0_ref = property(_get_R0_ref, _set_R0_ref, _del_R0_ref, 'gets, sets, or deletes the R0 at the reference temp.')
+    R1_ref = property(_get_R1_ref, _set_R1_ref, _del_R1_ref, 'gets, sets, or deletes the R1 at the reference temp.')
+    R0 = property(_get_R0_ref, _set_R0_ref, _del_R0_ref, 'gets, sets, or deletes the R0.')
+    R1 = property(_get_R1_ref, _set_R1_ref, _del_R1_ref, 'gets, sets, or deletes the R1.')
     C1 = property(_get_C1, _set_C1, _del_C1, 'gets, sets, or deletes the C1.')
     Q = property(_get_cap, _set_Q, _del_cap, 'gets, sets, or deletes the battery cell capacity.')
     func_SOC_OCV = property(_get_func_SOC_OCV, _set_func_SOC_OCV, _del_func_SOC_OCV,
@@ -257,14 +341,15 @@ class ParameterSet:
     func_eta = property(_get_func_eta, _set_func_eta, _del_func_eta,
                         'gets, sets, or deletes the func_eta')
 
-    V_min = property(_get_V_min, _set_V_min, _del_V_min, 'gets, sets, or deletes the battery cell max. potential')
-    V_max = property(_get_V_max, _set_V_max, _del_V_max, 'gets, sets, or deletes the battery cell min. potential')
+    V_min = property(_get_V_min, _set_V_min, _del_V_min, 'gets, sets, or deletes the battery cell min. potential')
+    V_max = property(_get_V_max, _set_V_max, _del_V_max, 'gets, sets, or deletes the battery cell max. potential')
     T_ref = property(_get_T_ref, _set_T_ref, _del_T_ref, 'gets, sets, or deletes the battery cell reference '
                                                          'temperature.')
     Ea_R0 = property(_get_Ea_R0, _set_Ea_R0, _del_Ea_R0, 'get sets, or deletes the activation energy for R0.')
     Ea_R1 = property(_get_Ea_R1, _set_Ea_R1, _del_Ea_R1, 'gets, sets, or deletes the activation energy for R1.')
-    rho = property(_get_T_ref, _set_T_ref, _del_T_ref, 'gets, sets, or deletes the battery cell rho')
-    c_p = property(_get_rho, _set_rho, _del_rho, 'gets, sets, or deletes the battery cell specific heat capacity.')
+    rho = property(_get_rho, _set_rho, _del_rho, 'gets, sets, or deletes the battery cell rho')
+    vol = property(_get_vol, _set_vol, _del_vol, 'gets, sets, or deletes the battery cell volume')
+    c_p = property(_get_c_p, _set_c_p, _del_c_p, 'gets, sets, or deletes the battery cell specific heat capacity.')
     h = property(_get_h, _set_h, _del_h, 'gets, sets, or deletes the heat transfer co-efficient')
     A = property(_get_A, _set_A, _del_A, 'gets, sets, or deletes the battery cell surface area')
 
@@ -272,32 +357,301 @@ class ParameterSet:
                               'gets, sets, or deletes the function representing the change of battery cell ocv with'
                               'temp')
 
-    def __init__(self, r0_ref: float, r1_ref: float, c1: float, cap: float, func_SOC_OCV: Callable, func_eta: Callable,
-                 ea_r0: float, ea_r1: float, v_min: float, v_max: float, temp_ref: float,
-                 rho: float, c_p: float, h: float, area: float, func_dcvdtemp: float):
-        self._set_R0_ref(R0_ref=r0_ref)
-        self._set_R1_ref(R1_ref=r1_ref)
-        self._set_C1(C1=c1)
-        self._set_Q(cap=cap)
+    def __init__(self, R0: float, R1: float, C1: float, Q: float, func_SOC_OCV: Callable, func_eta: Callable,
+                 V_min: Optional[float] = None, V_max: Optional[float] = None, T_ref: Optional[float] = None,
+                 Ea_R0: Optional[float] = None, Ea_R1: Optional[float] = None,
+                 rho: Optional[float] = None, vol: Optional[float] = None, c_p: Optional[float] = None,
+                 h: Optional[float] = None, A: Optional[float] = None, func_docvdtemp: Optional[Callable] = None):
+        """
+        Class constructor. The parameters after func_eta are optional and only required for the thermal modelling.
+        :param R0: resistance of R0 at the reference temperature [ohms]
+        :param R1: resistance of R1 at the reference temperature [ohms]. For models with n RC pairs, it is a 1-D array
+        of length n.
+        :param C1: capacitance of C1 [F]. For models with n RC pairs, it is a 1-D array of length n.
+        R0, R1, and C1 can also be SOC- and temperature-dependent ParameterTable objects (see eval_parameters). The
+        tables with the RC pair axis are used for n-RC models. The Arrhenius relation is not applied to the tables.
+        :param Q: battery cell capacity [A hr]
+        :param func_SOC_OCV: function that takes the SOC and returns the open-circuit voltage [V]
+        :param func_eta: function that takes the applied current and returns the Columbic efficiency
+        :param V_min: battery cell minimum potential [V]
+        :param V_max: battery cell maximum potential [V]
+        :param T_ref: reference temperature [K]
+        :param Ea_R0: activation energy for R0 [J/mol]
+        :param Ea_R1: activation energy for R1 [J/mol]
+        :param rho: battery cell density [kg/m3]
+        :param vol: battery cell volume [m3]
+        :param c_p: battery cell specific heat capacity [J/(kg K)]
+        :param h: heat transfer coefficient [W/(m2 K)]
+        :param A: battery cell surface area [m2]
+        :param func_docvdtemp: function that takes the SOC and returns the change in OCV with temperature [V/K]
+        """
+        self._set_R0_ref(R0_ref=R0)
+        self._set_R1_ref(R1_ref=R1)
+        self._set_C1(C1=C1)
+        self._set_Q(cap=Q)
         self._set_func_SOC_OCV(func_SOC_OCV=func_SOC_OCV)
         self._set_func_eta(func_eta=func_eta)
+        if _rc_shape(R1) != _rc_shape(C1):
+            raise ValueError('R1 and C1 need to have the same number of RC pairs.')
 
-        self._set_Ea_R0(ea_r0=ea_r0)
-        self._set_Ea_R1(ea_r1=ea_r1)
-        self._set_V_min(v_min=v_min)
-        self._set_V_max(v_max=v_max)
-        self._set_T_ref(temp_ref=temp_ref)
-        self._set_rho(rho=rho)
-        self._set_c_p(c_p=c_p)
-        self._set_h(h=h)
-        self._set_A(area=area)
-        self._func_docvdtemp(func_dcvdtemp=func_dcvdtemp)
+        # the parameters below are optional
+        for setter, value in ((self._set_V_min, V_min), (self._set_V_max, V_max), (self._set_T_ref, T_ref),
+                              (self._set_Ea_R0, Ea_R0), (self._set_Ea_R1, Ea_R1), (self._set_rho, rho),
+                              (self._set_vol, vol), (self._set_c_p, c_p), (self._set_h, h), (self._set_A, A),
+                              (self._set_func_docvdtemp, func_docvdtemp)):
+            if value is not None:
+                setter(value)
 
-    def calc_R0(self, temp: float):
-        return self.R0_ref * np.exp(-1 * self.Ea_R0 / constants.Constants.R * (1 / temp - 1 / self.T_ref))
+    @property
+    def num_rc(self) -> int:
+        """
+        Number of RC pairs in the equivalent circuit model.
+        """
+        shape = _rc_shape(self._R1_ref)
+        return shape[0] if shape else 1
 
-    def calc_R1(self, temp: float):
-        return self.R0_ref * np.exp(-1 * self.Ea_R1 / constants.Constants.R * (1 / temp - 1 / self.T_ref))
+    @property
+    def is_array_safe(self) -> bool:
+        """
+        True if all the defined parameter functions (func_SOC_OCV, func_eta, and func_docvdtemp) are array-safe (see
+        parameter_functions.array_safe).
+        """
+        return all(is_array_safe(func) for func in (self._func_SOC_OCV, self._func_eta, self._func_docvdtemp)
+                   if func is not None)
+
+    @property
+    def is_tabulated(self) -> bool:
+        """
+        True if any of R0, R1, or C1 is a ParameterTable.
+        """
+        return any(isinstance(param, ParameterTable) for param in (self._R0_ref, self._R1_ref, self._C1))
+
+    @property
+    def is_temp_dependent_table(self) -> bool:
+        """
+        True if any of R0, R1, or C1 is a temperature-dependent ParameterTable.
+        """
+        return any(isinstance(param, ParameterTable) and param.is_temp_dependent
+                   for param in (self._R0_ref, self._R1_ref, self._C1))
+
+    @property
+    def is_thermal(self) -> bool:
+        """
+        True if all the parameters required for the lumped thermal modelling are defined.
+        """
+        return all(param is not None for param in (self._T_ref, self._rho, self._vol, self._c_p, self._h, self._A))
+
+    def _calc_arrhenius_factor(self, Ea: Optional[float], temp: float) -> float:
+        """
+        Returns the Arrhenius factor, exp(Ea/R * (1/temp - 1/T_ref)), for the input activation energy (see
+        calc_arrhenius_factor).
+        :param Ea: activation energy [J/mol]
+        :param temp: temperature [K]
+        :return: Arrhenius factor
+        """
+        return calc_arrhenius_factor(Ea=Ea, T_ref=self._T_ref, temp=temp, temp_bin_width=self.temp_bin_width)
+
+    def calc_R0(self, temp: float, soc: Optional[Union[float, np.ndarray]] = None) -> Union[float, np.ndarray]:
+        """
+        Calculates R0 at the input temperature using the Arrhenius relation. If R0 is a ParameterTable, it is
+        interpolated at the input SOC and temperature instead.
+        :param temp: temperature [K]
+        :param soc: battery cell SOC. Only required for the ParameterTables.
+        :return: R0 [ohms]
+        """
+        if isinstance(self._R0_ref, ParameterTable):
+            return self._R0_ref(soc, temp)
+        return self._R0_ref * self._calc_arrhenius_factor(Ea=self._Ea_R0, temp=temp)
+
+    def calc_R1(self, temp: float, soc: Optional[Union[float, np.ndarray]] = None) -> Union[float, np.ndarray]:
+        """
+        Calculates R1 at the input temperature using the Arrhenius relation. All the RC pairs use the same activation
+        energy. If R1 is a ParameterTable, it is interpolated at the input SOC and temperature instead.
+        :param temp: temperature [K]
+        :param soc: battery cell SOC. Only required for the ParameterTables.
+        :return: R1 [ohms]
+        """
+        if isinstance(self._R1_ref, ParameterTable):
+            return self._R1_ref(soc, temp)
+        return self._R1_ref * self._calc_arrhenius_factor(Ea=self._Ea_R1, temp=temp)
+
+    def calc_C1(self, temp: float, soc: Optional[Union[float, np.ndarray]] = None) -> Union[float, np.ndarray]:
+        """
+        Returns C1, which is interpolated at the input SOC and temperature if it is a ParameterTable.
+        :param temp: temperature [K]
+        :param soc: battery cell SOC. Only required for the ParameterTables.
+        :return: C1 [F]
+        """
+        if isinstance(self._C1, ParameterTable):
+            return self._C1(soc, temp)
+        return self._C1
+
+    def compile(self) -> 'CompiledParameterSet':
+        """
+        Returns the immutable snapshot of the parameter values, which is used by the solvers in their loops.
+        :return: (CompiledParameterSet) compiled parameter record
+        """
+        return CompiledParameterSet(**{name: getattr(self, name) for name in CompiledParameterSet.__slots__})
+
+
+class CompiledParameterSet:
+    """
+    Immutable, __slots__-based record of the ParameterSet values. The attributes are plain slots (instead of properties
+    with getter methods), which makes them faster to read in the solver loops. The solvers take a snapshot of the
+    ParameterSet, using ParameterSet.compile, once per solve.
+
+    The records are hashable and can be converted to and from the numpy structured arrays (see to_structured_array and
+    from_structured_array) so that the parameters of many battery cells can be stored compactly. For n-RC models, R1 and
+    C1 are read-only numpy arrays.
+    """
+    # the order of the slots is the same as that of the constructor arguments
+    __slots__ = ('R0', 'R1', 'C1', 'Q', 'func_SOC_OCV', 'func_eta', 'V_min', 'V_max', 'T_ref', 'Ea_R0', 'Ea_R1', 'rho',
+                 'vol', 'c_p', 'h', 'A', 'func_docvdtemp', 'temp_bin_width')
+    _FUNC_FIELDS = ('func_SOC_OCV', 'func_eta', 'func_docvdtemp')
+
+    def __init__(self, R0: float, R1: Union[float, np.ndarray], C1: Union[float, np.ndarray], Q: float,
+                 func_SOC_OCV: Callable, func_eta: Callable, V_min: Optional[float] = None,
+                 V_max: Optional[float] = None, T_ref: Optional[float] = None, Ea_R0: Optional[float] = None,
+                 Ea_R1: Optional[float] = None, rho: Optional[float] = None, vol: Optional[float] = None,
+                 c_p: Optional[float] = None, h: Optional[float] = None, A: Optional[float] = None,
+                 func_docvdtemp: Optional[Callable] = None, temp_bin_width: float = TEMP_BIN_WIDTH) -> None:
+        """
+        Class constructor. See the ParameterSet constructor for the description of the parameters, and
+        ParameterSet.temp_bin_width for temp_bin_width.
+        """
+        values = locals()
+        for name in self.__slots__:
+            value = values[name]
+            if isinstance(value, np.ndarray):
+                value = np.array(value, dtype=float)
+                value.flags.writeable = False
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value) -> None:
+        raise AttributeError(f'{type(self).__name__} is immutable.')
+
+    def __delattr__(self, name) -> None:
+        raise AttributeError(f'{type(self).__name__} is immutable.')
+
+    def __key(self) -> tuple:
+        return tuple(getattr(self, name).tobytes() if isinstance(getattr(self, name), np.ndarray)
+                     else getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CompiledParameterSet):
+            return NotImplemented
+        return self.__key() == other.__key()
+
+    def __hash__(self) -> int:
+        return hash(self.__key())
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(' + \
+            ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__) + ')'
+
+    def __reduce__(self):
+        return self.__class__, tuple(getattr(self, name) for name in self.__slots__)
+
+    @property
+    def num_rc(self) -> int:
+        shape = _rc_shape(self.R1)
+        return shape[0] if shape else 1
+
+    def calc_R0(self, temp: float, soc: Optional[Union[float, np.ndarray]] = None) -> Union[float, np.ndarray]:
+        """
+        Calculates R0 at the input temperature using the Arrhenius relation (see ParameterSet.calc_R0).
+        :param temp: temperature [K]
+        :param soc: battery cell SOC. Only required for the ParameterTables.
+        :return: R0 [ohms]
+        """
+        if isinstance(self.R0, ParameterTable):
+            return self.R0(soc, temp)
+        return self.R0 * calc_arrhenius_factor(Ea=self.Ea_R0, T_ref=self.T_ref, temp=temp,
+                                               temp_bin_width=self.temp_bin_width)
+
+    def calc_R1(self, temp: float, soc: Optional[Union[float, np.ndarray]] = None) -> Union[float, np.ndarray]:
+        """
+        Calculates R1 at the input temperature using the Arrhenius relation (see ParameterSet.calc_R1).
+        :param temp: temperature [K]
+        :param soc: battery cell SOC. Only required for the ParameterTables.
+        :return: R1 [ohms]
+        """
+        if isinstance(self.R1, ParameterTable):
+            return self.R1(soc, temp)
+        return self.R1 * calc_arrhenius_factor(Ea=self.Ea_R1, T_ref=self.T_ref, temp=temp,
+                                               temp_bin_width=self.temp_bin_width)
+
+    def calc_C1(self, temp: float, soc: Optional[Union[float, np.ndarray]] = None) -> Union[float, np.ndarray]:
+        """
+        Returns C1, which is interpolated at the input SOC and temperature if it is a ParameterTable.
+        :param temp: temperature [K]
+        :param soc: battery cell SOC. Only required for the ParameterTables.
+        :return: C1 [F]
+        """
+        if isinstance(self.C1, ParameterTable):
+            return self.C1(soc, temp)
+        return self.C1
+
+    def to_parameter_set(self) -> ParameterSet:
+        """
+        Returns the (mutable) ParameterSet with the same parameter values, including the temperature bin width.
+        """
+        param = ParameterSet(**{name: np.array(getattr(self, name)) if isinstance(getattr(self, name), np.ndarray)
+                                else getattr(self, name) for name in self.__slots__ if name != 'temp_bin_width'})
+        param.temp_bin_width = self.temp_bin_width
+        return param
+
+    @classmethod
+    def structured_dtype(cls, num_rc: int = 1) -> np.dtype:
+        """
+        Returns the dtype of the structured arrays. The functions are not stored in the structured arrays and the
+        undefined (None) parameters are stored as NaN.
+        :param num_rc: number of RC pairs
+        """
+        return np.dtype([(name, float, (num_rc,)) if (name in ('R1', 'C1')) and (num_rc > 1) else (name, float)
+                         for name in cls.__slots__ if name not in cls._FUNC_FIELDS])
+
+    @classmethod
+    def to_structured_array(cls, records: Sequence[Self]) -> np.ndarray:
+        """
+        Converts the records into a numpy structured array.
+        :param records: sequence of the CompiledParameterSet objects, which need to have the same number of RC pairs
+        :return: structured array of shape (len(records),)
+        """
+        if any(isinstance(getattr(record, name), ParameterTable) for record in records for name in ('R0', 'R1', 'C1')):
+            raise ValueError('The records with ParameterTables cannot be converted into a structured array.')
+        num_rc = records[0].num_rc if len(records) > 0 else 1
+        if any(record.num_rc != num_rc for record in records):
+            raise ValueError('All the records need to have the same number of RC pairs.')
+        dtype = cls.structured_dtype(num_rc=num_rc)
+        array_ = np.empty(len(records), dtype=dtype)
+        for name in dtype.names:
+            array_[name] = [np.nan if getattr(record, name) is None else getattr(record, name) for record in records]
+        return array_
+
+    @classmethod
+    def from_structured_array(cls, array_: np.ndarray, func_SOC_OCV: Callable, func_eta: Callable,
+                              func_docvdtemp: Optional[Callable] = None) -> list[Self]:
+        """
+        Converts the numpy structured array into the records. The functions are shared by all the records.
+        :param array_: structured array (see to_structured_array)
+        :param func_SOC_OCV: function that takes the SOC and returns the open-circuit voltage [V]
+        :param func_eta: function that takes the applied current and returns the Columbic efficiency
+        :param func_docvdtemp: function that takes the SOC and returns the change in OCV with temperature [V/K]
+        :return: list of the CompiledParameterSet objects
+        """
+        records = []
+        for row in array_:
+            values = {}
+            for name in array_.dtype.names:
+                value = row[name]
+                if np.ndim(value) > 0:
+                    values[name] = np.array(value, dtype=float)
+                else:
+                    values[name] = None if np.isnan(value) else float(value)
+            records.append(cls(func_SOC_OCV=func_SOC_OCV, func_eta=func_eta, func_docvdtemp=func_docvdtemp,
+                               **values))
+        return records
 
 
 class BatteryCell:
@@ -306,6 +660,8 @@ class BatteryCell:
     """
     _param = None
     _SOC = None
+    _temp = None
+    _trusted = False  # if True, the SOC and temperature setters skip their checks (see trusted)
 
     def _get_param(self) -> Optional[ParameterSet]:
         return self._param
@@ -313,6 +669,9 @@ class BatteryCell:
     def _get_SOC(self) -> Optional[float]:
         return self._SOC
 
+    def _get_temp(self) -> Optional[float]:
+        return self._temp
+
     def _set_param(self, param: ParameterSet) -> None:
         """
         Sets the class param variable to the inputed param object
@@ -323,19 +682,35 @@ class BatteryCell:
 
     def _set_SOC(self, soc: float) -> None:
         """
-        Sets the class instances SOC to the SOC
+        Sets the class instances SOC to the SOC. The numpy floating-point scalars are converted into floats.
         :param SOC: state-of-charge of the battery cell
         :return:
         """
-        check_for_float_type(soc)
+        if not self._trusted:
+            soc = float(soc) if isinstance(soc, np.floating) else soc
+            check_for_float_type(soc)
         self._SOC = soc
 
+    def _set_temp(self, temp: float) -> None:
+        """
+        Sets the class instance's temperature. The numpy floating-point scalars are converted into floats.
+        :param temp: battery cell temperature [K]
+        :return: None
+        """
+        if not self._trusted:
+            temp = float(temp) if isinstance(temp, np.floating) else temp
+            check_for_float_type(temp)
+        self._temp = temp
+
     def _del_param(self) -> None:
         self._param = None
 
     def _del_SOC(self) -> None:
         self._SOC = None
 
+    def _del_temp(self) -> None:
+        self._temp = None
+
     @property
     def ocv(self) -> Optional[float]:
         """
@@ -352,11 +727,122 @@ class BatteryCell:
 
     param = property(_get_param, _set_param, _del_param, 'gets, sets, or deletes the instance param object.')
     soc = property(_get_SOC, _set_SOC, _del_SOC, 'gets, sets, or deletes the instance soc.')
+    temp = property(_get_temp, _set_temp, _del_temp, 'gets, sets, or deletes the instance temperature [K].')
 
-    def __init__(self, param: ParameterSet, soc_init: float):
+    @contextlib.contextmanager
+    def trusted(self) -> Iterator[Self]:
+        """
+        Context manager in which the SOC and temperature setters skip their type checks. It is meant for the solver
+        loops, which set the SOC and the temperature computed from the validated initial values at every time step.
+        The checks are restored on exit (also if an exception is raised).
+        :return: the battery cell itself
+        """
+        trusted_prev = self._trusted
+        self._trusted = True
+        try:
+            yield self
+        finally:
+            self._trusted = trusted_prev
+
+    def __init__(self, param: ParameterSet, soc_init: float, temp_init: Optional[float] = None):
+        """
+        Class constructor.
+        :param param: ParameterSet object
+        :param soc_init: initial battery cell SOC
+        :param temp_init: initial battery cell temperature [K]. If None, the reference temperature of the param is used.
+        """
         self._set_param(param=param)
         self._set_SOC(soc=soc_init)
         self.soc_init = soc_init
+        if temp_init is None:
+            temp_init = param.T_ref
+        if temp_init is not None:
+            self._set_temp(temp=temp_init)
+        self.temp_init = temp_init
+
+
+class BatteryPack:
+    """
+    Contains the battery cells of a battery pack with num_series groups connected in series, where each group has
+    num_parallel battery cells connected in parallel. All the battery cells share the ParameterSet, except for R0, Q,
+    and the SOC, which can vary from cell-to-cell. These are stored as arrays of shape (num_series, num_parallel).
+    """
+    def __init__(self, param: ParameterSet, num_series: int, num_parallel: int,
+                 soc_init: Union[float, np.ndarray], R0: Optional[Union[float, np.ndarray]] = None,
+                 Q: Optional[Union[float, np.ndarray]] = None) -> None:
+        """
+        Class constructor.
+        :param param: ParameterSet object of the nominal battery cell
+        :param num_series: number of the battery cell groups in series
+        :param num_parallel: number of the battery cells in parallel in each group
+        :param soc_init: initial SOC of the battery cells. Either a float or an array of shape (num_series,
+        num_parallel).
+        :param R0: R0 of the battery cells [ohms]. Either a float or an array of shape (num_series, num_parallel). If
+        None, R0 of the param is used.
+        :param Q: capacity of the battery cells [A hr]. Either a float or an array of shape (num_series,
+        num_parallel). If None, Q of the param is used.
+        """
+        if not isinstance(param, ParameterSet):
+            raise TypeError('param needs to be a ParameterSet type.')
+        if param.is_tabulated:
+            raise ValueError('BatteryPack does not support the ParameterTables for R0, R1, and C1.')
+        if (not isinstance(num_series, int)) or (not isinstance(num_parallel, int)) or \
+                (num_series < 1) or (num_parallel < 1):
+            raise ValueError('num_series and num_parallel need to be positive integers.')
+        self.param = param
+        self.num_series = num_series
+        self.num_parallel = num_parallel
+
+        self.R0 = self.__to_cell_array(param.R0 if R0 is None else R0, name='R0')
+        self.Q = self.__to_cell_array(param.Q if Q is None else Q, name='Q')
+        self.soc_init = self.__to_cell_array(soc_init, name='soc_init')
+        self.soc = self.soc_init.copy()
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.num_series, self.num_parallel
+
+    @property
+    def num_cells(self) -> int:
+        return self.num_series * self.num_parallel
+
+    def __to_cell_array(self, value: Union[float, np.ndarray], name: str) -> np.ndarray:
+        """
+        Broadcasts the input value to an array of shape (num_series, num_parallel).
+        """
+        array_ = np.asarray(value, dtype=float)
+        try:
+            return np.broadcast_to(array_, self.shape).copy()
+        except ValueError:
+            raise ValueError(f'{name} needs to be a float or an array of shape {self.shape}.')
+
+    @classmethod
+    def sample(cls, param: ParameterSet, num_series: int, num_parallel: int, soc_init: float,
+               std_R0: float = 0.0, std_Q: float = 0.0, std_soc: float = 0.0, seed: Optional[int] = None) -> Self:
+        """
+        Creates the battery pack with the cell-to-cell variations in R0, Q, and SOC sampled from normal distributions.
+        :param param: ParameterSet object of the nominal battery cell
+        :param num_series: number of the battery cell groups in series
+        :param num_parallel: number of the battery cells in parallel in each group
+        :param soc_init: mean initial SOC
+        :param std_R0: standard deviation of R0 relative to the nominal R0
+        :param std_Q: standard deviation of Q relative to the nominal Q
+        :param std_soc: standard deviation of the initial SOC
+        :param seed: seed of the random number generator
+        :return: BatteryPack object
+        """
+        rng = np.random.default_rng(seed)
+        shape = (num_series, num_parallel)
+        R0 = param.R0 * (1 + std_R0 * rng.standard_normal(shape))
+        Q = param.Q * (1 + std_Q * rng.standard_normal(shape))
+        soc = soc_init + std_soc * rng.standard_normal(shape)
+        return cls(param=param, num_series=num_series, num_parallel=num_parallel, soc_init=soc, R0=R0, Q=Q)
+
+    def reset(self) -> None:
+        """
+        Resets the battery cell SOC to their initial values.
+        """
+        self.soc = self.soc_init.copy()
 
 
 if __name__ == '__main__':
@@ -14,7 +14,6 @@ from dataclasses import dataclass, field
 from typing import Optional
 
 import numpy as np
-import scipy.interpolate
 
 
 @dataclass
@@ -105,11 +104,12 @@ class CustomStep(BaseCyclingStep):
     def get_current(self, step_name: str, t: float) -> float:
         """
         Finds the current at a given time using interpolation. The interpolation outputs the current from the previous
-        time step.
+        time step. Times before the first (after the last) time value return the first (last) current value.
         :param step_name: The cycling step name
         :param t: the time value [s]
         :returns: the current value [A]
         """
-        return scipy.interpolate.interp1d(self.array_t, self.array_I, kind='previous', fill_value='extrapolate')(t)
+        idx = np.searchsorted(self.array_t, t, side='right') - 1
+        return self.array_I[np.clip(idx, 0, len(self.array_t) - 1)]
 
 
@@ -0,0 +1,306 @@
+""" load_profiles
+Contains the LoadProfile class and the generators of the synthetic current profiles (pulse trains, HPPC sequences, CC-CV
+shapes, and randomized drive-like profiles) for the CustomStep.
+
+A LoadProfile is a piecewise-constant (zero-order hold) current: array_I[k] [A] is applied from array_t[k] to
+array_t[k + 1] [s], which is how CustomStep.get_current looks up the current. As in the CustomStep, the discharge
+current is positive. The piecewise-constant profiles are stored only at their breakpoints, so e.g. a train of 10^4
+pulses has 2 * 10^4 + 1 points independent of the solver time step, and the profiles are built using the numpy array
+operations (no Python loops over the time points).
+
+The long randomized profiles can be generated lazily as chunks (iter_random_drive), which are identical to the
+corresponding parts of the profile generated at once (random_drive) with the same seed.
+"""
+
+__all__ = ['LoadProfile', 'constant_current', 'pulse_train', 'hppc', 'cccv', 'random_drive', 'iter_random_drive']
+
+__author__ = 'Moin Ahmed'
+__copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
+__status__ = 'development'
+
+from typing import Iterable, Iterator, Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+import scipy.signal
+
+from src.core.cycling_steps import CustomStep
+
+
+class LoadProfile:
+    """
+    Piecewise-constant current profile, where array_I[k] is the current [A] from array_t[k] to array_t[k + 1] [s]. The
+    last current value is the current at (and after) the end of the profile.
+    """
+    def __init__(self, array_t: npt.ArrayLike, array_I: npt.ArrayLike) -> None:
+        """
+        Class constructor.
+        :param array_t: strictly increasing times [s]
+        :param array_I: currents [A] (positive for discharge)
+        """
+        array_t = np.asarray(array_t, dtype=float)
+        array_I = np.asarray(array_I, dtype=float)
+        if (array_t.ndim != 1) or (array_t.shape != array_I.shape) or (array_t.size < 2):
+            raise ValueError('array_t and array_I need to be 1-D arrays of the same size with at least two values.')
+        if np.any(np.diff(array_t) <= 0):
+            raise ValueError('array_t needs to be strictly increasing.')
+        self.array_t = array_t
+        self.array_I = array_I
+
+    @classmethod
+    def from_segments(cls, durations: npt.ArrayLike, currents: npt.ArrayLike, t_start: float = 0.0) -> 'LoadProfile':
+        """
+        Creates the profile from the constant-current segments. The segments with zero duration are skipped.
+        :param durations: durations of the segments [s]
+        :param currents: currents of the segments [A]
+        :param t_start: start time of the profile [s]
+        :return: (LoadProfile) load profile
+        """
+        durations = np.asarray(durations, dtype=float)
+        currents = np.broadcast_to(np.asarray(currents, dtype=float), durations.shape)
+        if np.any(durations < 0):
+            raise ValueError('The segment durations cannot be negative.')
+        is_nonzero = durations > 0
+        durations, currents = durations[is_nonzero], currents[is_nonzero]
+        if durations.size == 0:
+            raise ValueError('At least one segment with a positive duration is required.')
+        return cls(array_t=t_start + np.concatenate(([0.0], np.cumsum(durations))),
+                   array_I=np.concatenate((currents, currents[-1:])))
+
+    @classmethod
+    def concatenate(cls, profiles: Iterable['LoadProfile']) -> 'LoadProfile':
+        """
+        Joins the profiles, each starting at the end of the previous one.
+        :param profiles: load profiles
+        :return: (LoadProfile) joined load profile
+        """
+        profiles = list(profiles)
+        if not profiles:
+            raise ValueError('At least one profile is required.')
+        durations = np.array([profile.duration for profile in profiles])
+        t_offsets = profiles[0].t_start + np.concatenate(([0.0], np.cumsum(durations[:-1])))
+        list_t = [profile.array_t[:-1] - profile.t_start + t_offset for profile, t_offset in zip(profiles, t_offsets)]
+        list_I = [profile.array_I[:-1] for profile in profiles]
+        return cls(array_t=np.concatenate(list_t + [[t_offsets[-1] + durations[-1]]]),
+                   array_I=np.concatenate(list_I + [profiles[-1].array_I[-1:]]))
+
+    def __add__(self, other: 'LoadProfile') -> 'LoadProfile':
+        return LoadProfile.concatenate([self, other])
+
+    def __len__(self) -> int:
+        return self.array_t.size
+
+    @property
+    def t_start(self) -> float:
+        return float(self.array_t[0])
+
+    @property
+    def t_end(self) -> float:
+        return float(self.array_t[-1])
+
+    @property
+    def duration(self) -> float:
+        return self.t_end - self.t_start
+
+    @property
+    def charge_throughput(self) -> float:
+        """
+        Total charge throughput (integral of the absolute current) [A hr].
+        """
+        return float(np.sum(np.abs(self.array_I[:-1]) * np.diff(self.array_t)) / 3600)
+
+    def get_current(self, t: npt.ArrayLike) -> Union[float, np.ndarray]:
+        """
+        Returns the current at the time(s), using the same lookup as CustomStep.get_current.
+        :param t: time(s) [s]
+        :return: current(s) [A]
+        """
+        idx = np.searchsorted(self.array_t, t, side='right') - 1
+        return self.array_I[np.clip(idx, 0, self.array_t.size - 1)]
+
+    def repeat(self, num_repeats: int) -> 'LoadProfile':
+        """
+        Returns the profile repeated num_repeats times.
+        :param num_repeats: number of repetitions
+        :return: (LoadProfile) repeated load profile
+        """
+        if num_repeats < 1:
+            raise ValueError('num_repeats needs to be positive.')
+        t_offsets = self.duration * np.arange(num_repeats)
+        array_t = (self.array_t[:-1][np.newaxis, :] + t_offsets[:, np.newaxis]).ravel()
+        array_I = np.tile(self.array_I[:-1], num_repeats)
+        return LoadProfile(array_t=np.append(array_t, self.t_start + num_repeats * self.duration),
+                           array_I=np.append(array_I, self.array_I[-1]))
+
+    def scale(self, factor: float) -> 'LoadProfile':
+        """
+        Returns the profile with the currents multiplied by the factor, e.g., to scale the profile to a C-rate.
+        :param factor: scaling factor
+        :return: (LoadProfile) scaled load profile
+        """
+        return LoadProfile(array_t=self.array_t.copy(), array_I=factor * self.array_I)
+
+    def resample(self, dt: float) -> 'LoadProfile':
+        """
+        Returns the profile sampled on the uniform time grid, e.g., for plotting or for the measurement-like arrays.
+        :param dt: time interval [s]
+        :return: (LoadProfile) resampled load profile
+        """
+        array_t = np.append(self.t_start + dt * np.arange(int(np.ceil(self.duration / dt - 1e-9))), self.t_end)
+        return LoadProfile(array_t=array_t, array_I=self.get_current(array_t))
+
+    def chunks(self, chunk_duration: float) -> Iterator['LoadProfile']:
+        """
+        Yields the consecutive parts of the profile with the duration of (at most) chunk_duration, e.g., to solve a long
+        profile as a sequence of the CustomStep objects.
+        :param chunk_duration: duration of the chunks [s]
+        :return: (Iterator) load profiles of the chunks
+        """
+        if chunk_duration <= 0:
+            raise ValueError('chunk_duration needs to be positive.')
+        num_chunks = max(int(np.ceil(self.duration / chunk_duration - 1e-9)), 1)
+        for k in range(num_chunks):
+            t0 = self.t_start + k * chunk_duration
+            t1 = self.t_end if k == num_chunks - 1 else t0 + chunk_duration
+            is_inside = (self.array_t > t0) & (self.array_t < t1)
+            array_t = np.concatenate(([t0], self.array_t[is_inside], [t1]))
+            yield LoadProfile(array_t=array_t, array_I=self.get_current(array_t))
+
+    def to_custom_step(self, V_min: float, V_max: float, SOC_LIB_min: float = 0.0, SOC_LIB_max: float = 1.0,
+                       SOC_LIB: float = 1.0) -> CustomStep:
+        """
+        Returns the CustomStep of the profile, with the times starting at zero. The CustomStep can be solved using the
+        DTSolver or the PackSolver.
+        :param V_min: minimum voltage [V]
+        :param V_max: maximum voltage [V]
+        :param SOC_LIB_min: minimum SOC
+        :param SOC_LIB_max: maximum SOC
+        :param SOC_LIB: initial SOC
+        :return: (CustomStep) cycling step
+        """
+        return CustomStep(array_t=self.array_t - self.t_start, array_I=self.array_I.copy(), V_min=V_min, V_max=V_max,
+                          SOC_LIB_min=SOC_LIB_min, SOC_LIB_max=SOC_LIB_max, SOC_LIB=SOC_LIB)
+
+
+def constant_current(current: float, duration: float) -> LoadProfile:
+    """
+    Returns the constant-current profile.
+    :param current: current [A]
+    :param duration: duration [s]
+    :return: (LoadProfile) load profile
+    """
+    return LoadProfile.from_segments(durations=[duration], currents=[current])
+
+
+def pulse_train(I_pulse: float, t_pulse: float, t_rest: float, num_pulses: int, I_rest: float = 0.0) -> LoadProfile:
+    """
+    Returns the train of the current pulses, each followed by a rest (or the base current, I_rest).
+    :param I_pulse: pulse current [A]
+    :param t_pulse: pulse duration [s]
+    :param t_rest: rest duration after each pulse [s]
+    :param num_pulses: number of pulses
+    :param I_rest: current between the pulses [A]
+    :return: (LoadProfile) load profile
+    """
+    return LoadProfile.from_segments(durations=np.tile([t_pulse, t_rest], num_pulses),
+                                     currents=np.tile([I_pulse, I_rest], num_pulses))
+
+
+def hppc(I_discharge: float, I_charge: float, t_discharge: float = 10.0, t_between: float = 40.0,
+         t_charge: float = 10.0, t_rest: float = 3600.0, num_repeats: int = 1, I_soc_step: float = 0.0,
+         t_soc_step: float = 0.0) -> LoadProfile:
+    """
+    Returns the hybrid pulse power characterization (HPPC) sequence. Each repetition consists of the discharge pulse,
+    rest (t_between), charge pulse, and rest (t_rest). If I_soc_step and t_soc_step are provided, each repetition is
+    followed by the constant-current discharge to the next SOC and another rest (t_rest).
+    :param I_discharge: discharge pulse current [A]
+    :param I_charge: charge pulse current [A] (positive)
+    :param t_discharge: discharge pulse duration [s]
+    :param t_between: rest between the discharge and charge pulses [s]
+    :param t_charge: charge pulse duration [s]
+    :param t_rest: rest after the pulses (and after the SOC step) [s]
+    :param num_repeats: number of repetitions (e.g., the number of the SOC levels)
+    :param I_soc_step: discharge current of the SOC step [A]
+    :param t_soc_step: duration of the SOC step [s]
+    :return: (LoadProfile) load profile
+    """
+    t_soc_rest = t_rest if t_soc_step > 0 else 0.0
+    durations = [t_discharge, t_between, t_charge, t_rest, t_soc_step, t_soc_rest]
+    currents = [I_discharge, 0.0, -I_charge, 0.0, I_soc_step, 0.0]
+    return LoadProfile.from_segments(durations=np.tile(durations, num_repeats),
+                                     currents=np.tile(currents, num_repeats))
+
+
+def cccv(I_charge: float, t_cc: float, tau: float, I_cutoff: float, dt: float = 1.0) -> LoadProfile:
+    """
+    Returns the current shape of the constant-current constant-voltage (CC-CV) charge: the constant charge current for
+    t_cc, followed by the exponential taper of the current, I_charge * exp(-t / tau), sampled every dt until it falls
+    below I_cutoff. Note that the voltage is not controlled; the taper approximates the current of the CV phase.
+    :param I_charge: charge current [A] (positive)
+    :param t_cc: duration of the constant-current phase [s]
+    :param tau: time constant of the current taper [s]
+    :param I_cutoff: cut-off current of the CV phase [A] (positive)
+    :param dt: sampling interval of the taper [s]
+    :return: (LoadProfile) load profile with the negative (charge) currents
+    """
+    if not (0 < I_cutoff < I_charge):
+        raise ValueError('I_cutoff needs to be positive and less than I_charge.')
+    num_cv = int(np.ceil(tau * np.log(I_charge / I_cutoff) / dt))
+    currents_cv = -I_charge * np.exp(-dt * np.arange(num_cv) / tau)
+    return LoadProfile.from_segments(durations=np.concatenate(([t_cc], np.full(num_cv, dt))),
+                                     currents=np.concatenate(([-I_charge], currents_cv)))
+
+
+def iter_random_drive(duration: float, chunk_duration: float, dt: float = 1.0, I_mean: float = 1.0,
+                      I_std: float = 1.0, tau: float = 30.0, I_min: Optional[float] = None,
+                      I_max: Optional[float] = None,
+                      seed: Optional[Union[int, np.random.Generator]] = None) -> Iterator[LoadProfile]:
+    """
+    Yields the randomized drive-like profile in chunks. The current is sampled every dt as the stationary
+    Ornstein-Uhlenbeck (first-order autoregressive) process with the mean I_mean, standard deviation I_std, and
+    correlation time tau, which is clipped to [I_min, I_max] (e.g., to limit the regenerative braking current). The
+    chunks are identical to the corresponding parts of random_drive with the same seed.
+    :param duration: total duration [s]
+    :param chunk_duration: duration of the chunks [s] (rounded to a multiple of dt)
+    :param dt: sampling interval [s]
+    :param I_mean: mean current [A]
+    :param I_std: standard deviation of the current [A]
+    :param tau: correlation time [s]
+    :param I_min: minimum current [A]
+    :param I_max: maximum current [A]
+    :param seed: seed or the numpy random Generator
+    :return: (Iterator) load profiles of the chunks
+    """
+    if (duration <= 0) or (dt <= 0) or (tau <= 0):
+        raise ValueError('duration, dt, and tau need to be positive.')
+    rng = np.random.default_rng(seed)
+    num_samples = int(np.ceil(duration / dt - 1e-9))
+    samples_per_chunk = max(int(round(chunk_duration / dt)), 1)
+    a = np.exp(-dt / tau)
+    b = I_std * np.sqrt(1 - a ** 2)
+    zi = np.array([a * I_std * rng.standard_normal()])  # the stationary initial state
+    for k0 in range(0, num_samples, samples_per_chunk):
+        k1 = min(k0 + samples_per_chunk, num_samples)
+        x, zi = scipy.signal.lfilter([b], [1.0, -a], rng.standard_normal(k1 - k0), zi=zi)
+        array_I = np.clip(I_mean + x, I_min, I_max) if (I_min is not None or I_max is not None) else I_mean + x
+        t_end = duration if k1 == num_samples else k1 * dt
+        yield LoadProfile(array_t=np.append(dt * np.arange(k0, k1), t_end), array_I=np.append(array_I, array_I[-1]))
+
+
+def random_drive(duration: float, dt: float = 1.0, I_mean: float = 1.0, I_std: float = 1.0, tau: float = 30.0,
+                 I_min: Optional[float] = None, I_max: Optional[float] = None,
+                 seed: Optional[Union[int, np.random.Generator]] = None) -> LoadProfile:
+    """
+    Returns the randomized drive-like profile (see iter_random_drive).
+    :param duration: total duration [s]
+    :param dt: sampling interval [s]
+    :param I_mean: mean current [A]
+    :param I_std: standard deviation of the current [A]
+    :param tau: correlation time [s]
+    :param I_min: minimum current [A]
+    :param I_max: maximum current [A]
+    :param seed: seed or the numpy random Generator
+    :return: (LoadProfile) load profile
+    """
+    return LoadProfile.concatenate(iter_random_drive(duration=duration, chunk_duration=duration, dt=dt, I_mean=I_mean,
+                                                     I_std=I_std, tau=tau, I_min=I_min, I_max=I_max, seed=seed))
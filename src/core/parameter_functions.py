@@ -0,0 +1,89 @@
+""" parameter_functions
+Provides the protocol for the parameter functions of the ParameterSet (func_SOC_OCV, func_eta, and func_docvdtemp).
+
+A parameter function takes a float (the SOC or the applied current) and returns a float. It is array-safe if it also
+takes a numpy array and returns the array of the element-wise results, e.g., when it is written using numpy operations
+(np.where instead of if-else). The array-safe functions declare so with the array_safe decorator:
+
+    @array_safe
+    def func_eta(i):
+        return np.where(i <= 0, 1.0, 0.9995)
+
+The batch engines (e.g., PackSolver) evaluate the parameter functions on arrays. The scalar-only functions are adapted
+using vectorize_parameter_function, which evaluates them element-wise (at a significant cost) and warns the user.
+"""
+
+__all__ = ['array_safe', 'is_array_safe', 'vectorize_parameter_function']
+
+__author__ = 'Moin Ahmed'
+__copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
+__status__ = 'development'
+
+import functools
+import time
+import warnings
+from typing import Callable, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from src.exceptions_and_warnings.warnings import ScalarOnlyFunctionWarning
+
+
+def array_safe(func: Callable) -> Callable:
+    """
+    Decorator that marks the parameter function as array-safe.
+    :param func: parameter function that accepts both floats and numpy arrays
+    :return: the same function
+    """
+    func.array_safe = True
+    return func
+
+
+def is_array_safe(func: Optional[Callable]) -> bool:
+    """
+    Returns True if the parameter function is declared as array-safe (see array_safe). The numpy ufuncs and the objects
+    with the array_safe attribute set to True (e.g., ParameterTable) are array-safe as well.
+    :param func: parameter function
+    :return: (bool) True if the function is array-safe
+    """
+    if isinstance(func, np.ufunc):
+        return True
+    return bool(getattr(func, 'array_safe', False))
+
+
+def vectorize_parameter_function(func: Callable, name: str = 'parameter function',
+                                 array_probe: Optional[npt.ArrayLike] = None) -> Callable:
+    """
+    Returns the array-safe version of the parameter function. The array-safe functions are returned as is. The
+    scalar-only functions are wrapped so that they are evaluated element-wise on the arrays, and a
+    ScalarOnlyFunctionWarning is raised with the measured cost per element.
+    :param func: parameter function
+    :param name: name of the parameter function used in the warning message
+    :param array_probe: input values used to measure the cost of the element-wise evaluation. By default, 1000 values
+    between 0 and 1 are used.
+    :return: array-safe parameter function
+    """
+    if is_array_safe(func):
+        return func
+
+    func_elementwise = np.vectorize(func, otypes=[float])
+
+    @functools.wraps(func)
+    def func_vectorized(x, *args, **kwargs):
+        if np.ndim(x) == 0:
+            return func(x, *args, **kwargs)
+        return func_elementwise(x, *args, **kwargs)
+    func_vectorized.array_safe = True
+
+    array_probe = np.linspace(0.0, 1.0, 1000) if array_probe is None else np.asarray(array_probe, dtype=float)
+    try:
+        t_start = time.perf_counter()
+        func_elementwise(array_probe)
+        penalty = f'{(time.perf_counter() - t_start) / array_probe.size * 1e6:.3f} us per element'
+    except Exception:  # the cost cannot be measured if the function does not accept the probe values
+        penalty = 'unknown cost'
+    warnings.warn(f'The {name} ({getattr(func, "__qualname__", func)}) is not array-safe and is evaluated element-wise '
+                  f'on arrays ({penalty}). Use numpy operations in the function and decorate it with array_safe.',
+                  ScalarOnlyFunctionWarning, stacklevel=2)
+    return func_vectorized
@@ -0,0 +1,153 @@
+""" parameter_tables
+Provides the class for the SOC- and temperature-dependent battery cell parameters (e.g., R0, R1, and C1) defined on a
+grid.
+"""
+
+__all__ = ['ParameterTable']
+
+__author__ = 'Moin Ahmed'
+__copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
+__status__ = 'development'
+
+from typing import Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+
+
+def _check_uniform_grid(array_: np.ndarray, name: str) -> tuple[float, float]:
+    """
+    Checks that the grid is a 1-D, increasing, and uniformly spaced array and returns its first value and spacing.
+    """
+    if (array_.ndim != 1) or (array_.size < 2):
+        raise ValueError(f'{name} needs to be a 1-D array with at least two values.')
+    spacing = np.diff(array_)
+    if np.any(spacing <= 0) or (not np.allclose(spacing, spacing[0], rtol=1e-9, atol=0.0)):
+        raise ValueError(f'{name} needs to be increasing and uniformly spaced.')
+    return float(array_[0]), float((array_[-1] - array_[0]) / (array_.size - 1))
+
+
+class ParameterTable:
+    """
+    Battery cell parameter tabulated on a uniform SOC (and, optionally, temperature) grid. Since the grid spacings are
+    uniform, the grid cell containing the (SOC, temperature) point is found with index arithmetic, i.e., in O(1), and
+    the parameter value is obtained using the bilinear (linear for SOC-only tables) interpolation. Outside the grid, the
+    parameter values at the grid boundaries are used.
+
+    The table is called as table(soc, temp). The SOC and temperature can be floats (e.g., in DTSolver) or numpy arrays
+    (e.g., for the sigma points in the SPKF or for many battery cells), which are broadcast together. For the tables
+    of the n-RC models, the values have a trailing axis with the parameter of each RC pair, and the output has the
+    trailing axis of size num_rc.
+    """
+    array_safe = True  # see parameter_functions
+
+    def __init__(self, array_soc: npt.ArrayLike, values: npt.ArrayLike, array_temp: Optional[npt.ArrayLike] = None,
+                 rc_axis: bool = False) -> None:
+        """
+        Class constructor.
+        :param array_soc: uniformly spaced SOC grid
+        :param values: parameter values with shape (len(array_soc), len(array_temp)), or (len(array_soc),) for the
+        SOC-only tables. If rc_axis is True, the values have an additional trailing axis for the RC pairs.
+        :param array_temp: uniformly spaced temperature grid [K]. If None, the table only depends on the SOC.
+        :param rc_axis: True if the values have the trailing axis for the RC pairs (for R1 and C1 of n-RC models)
+        """
+        self.array_soc = np.array(array_soc, dtype=float)
+        self.array_temp = None if array_temp is None else np.array(array_temp, dtype=float)
+        self.values = np.array(values, dtype=float)
+        self.rc_axis = rc_axis
+
+        self._soc_min, self._dsoc = _check_uniform_grid(self.array_soc, name='array_soc')
+        shape = (self.array_soc.size,)
+        if self.array_temp is not None:
+            self._temp_min, self._dtemp = _check_uniform_grid(self.array_temp, name='array_temp')
+            shape += (self.array_temp.size,)
+        if self.values.shape[:len(shape)] != shape or self.values.ndim != len(shape) + int(rc_axis):
+            raise ValueError(f'values need to have the shape {shape}' + (' + (num_rc,).' if rc_axis else '.'))
+        if rc_axis and self.values.shape[-1] < 1:
+            raise ValueError('values need at least one RC pair.')
+
+        # the values are stored with the temperature axis of length two or more for the interpolation. SOC-only tables
+        # use a dummy temperature axis with identical values.
+        if self.array_temp is None:
+            self._temp_min, self._dtemp = 0.0, 1.0
+            self._values = np.stack([self.values, self.values], axis=1)
+        else:
+            self._values = self.values
+        self._n_soc, self._n_temp = self._values.shape[:2]
+        self._inv_dsoc = 1 / self._dsoc
+        self._inv_dtemp = 1 / self._dtemp
+        self._list_values = self._values.tolist() if not rc_axis else None  # nested lists for the scalar evaluations
+
+    @property
+    def num_rc(self) -> int:
+        return self.values.shape[-1] if self.rc_axis else 1
+
+    @property
+    def is_temp_dependent(self) -> bool:
+        return self.array_temp is not None
+
+    def __repr__(self) -> str:
+        temp_info = f', {self.array_temp.size} temperatures' if self.is_temp_dependent else ''
+        return f'ParameterTable({self.array_soc.size} SOC{temp_info}, num_rc={self.num_rc})'
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ParameterTable):
+            return NotImplemented
+        return (self.rc_axis == other.rc_axis) and np.array_equal(self.array_soc, other.array_soc) and \
+            np.array_equal(self.values, other.values) and \
+            ((self.array_temp is None and other.array_temp is None) or
+             (self.array_temp is not None and other.array_temp is not None and
+              np.array_equal(self.array_temp, other.array_temp)))
+
+    def __hash__(self) -> int:
+        return hash((self.rc_axis, self.array_soc.tobytes(), self.values.shape, self.values.tobytes(),
+                     None if self.array_temp is None else self.array_temp.tobytes()))
+
+    def __call__(self, soc: Union[float, npt.ArrayLike], temp: Optional[Union[float, npt.ArrayLike]] = None) \
+            -> Union[float, np.ndarray]:
+        """
+        Interpolates the parameter value.
+        :param soc: battery cell SOC
+        :param temp: battery cell temperature [K]. It is required for the temperature-dependent tables and ignored
+        otherwise.
+        :return: interpolated parameter value(s)
+        """
+        if self.array_temp is None:
+            temp = 0.0
+        elif temp is None:
+            raise ValueError('temp is required for the temperature-dependent tables.')
+
+        if isinstance(soc, (float, int)) and isinstance(temp, (float, int)):
+            # index of the grid interval and the fractional position in it, along the SOC and temperature axes
+            x = (soc - self._soc_min) * self._inv_dsoc
+            if x <= 0.0:
+                i, fx = 0, 0.0
+            elif x >= self._n_soc - 1:
+                i, fx = self._n_soc - 2, 1.0
+            else:
+                i = int(x)
+                fx = x - i
+            y = (temp - self._temp_min) * self._inv_dtemp
+            if y <= 0.0:
+                j, fy = 0, 0.0
+            elif y >= self._n_temp - 1:
+                j, fy = self._n_temp - 2, 1.0
+            else:
+                j = int(y)
+                fy = y - j
+            values = self._list_values if self._list_values is not None else self._values
+            row0, row1 = values[i], values[i + 1]
+            return (row0[j] + (row0[j + 1] - row0[j]) * fy) * (1.0 - fx) + \
+                (row1[j] + (row1[j + 1] - row1[j]) * fy) * fx
+
+        x, y = np.broadcast_arrays(np.asarray(soc, dtype=float), np.asarray(temp, dtype=float))
+        x = np.clip((x - self._soc_min) * self._inv_dsoc, 0.0, self._n_soc - 1)
+        y = np.clip((y - self._temp_min) * self._inv_dtemp, 0.0, self._n_temp - 1)
+        i = np.minimum(x.astype(int), self._n_soc - 2)
+        j = np.minimum(y.astype(int), self._n_temp - 2)
+        fx, fy = x - i, y - j
+        if self.rc_axis:
+            fx, fy = fx[..., np.newaxis], fy[..., np.newaxis]
+        v = self._values
+        return (v[i, j] + (v[i, j + 1] - v[i, j]) * fy) * (1.0 - fx) + \
+            (v[i + 1, j] + (v[i + 1, j + 1] - v[i + 1, j]) * fy) * fx
@@ -0,0 +1,15 @@
+"""
+Contains the warnings raised by the package.
+"""
+
+
+class ScalarOnlyFunctionWarning(UserWarning):
+    """
+    Defines the warning which is raised when a parameter function that only accepts scalars is vectorized element-wise.
+    """
+
+
+class NonMonotoneOCVWarning(UserWarning):
+    """
+    Defines the warning which is raised when the fitted open-circuit voltage does not increase monotonically with SOC.
+    """
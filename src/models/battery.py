@@ -2,13 +2,16 @@
 contains the classes and functionalities to calculate the battery cell SOC and terminal voltage
 """
 
-__all__ = ['Thevenin1RC']
+__all__ = ['Thevenin1RC', 'TheveninNRC']
 
 __author__ = 'Moin Ahmed'
 __copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
 __status__ = 'deployed'
 
+from typing import Union
+
 import numpy as np
+import numpy.typing as npt
 
 
 class Thevenin1RC:
@@ -88,4 +91,89 @@ class Thevenin1RC:
         :param i_app: (float) applied current at current time step, k
         :return: (float) terminal voltage at the current time step, k
         """
-        return OCV - R1 * i_R1 - R0 * i_app
\ No newline at end of file
+        return OCV - R1 * i_R1 - R0 * i_app
+
+
+class TheveninNRC(Thevenin1RC):
+    """
+    This class creates an n-th order Thevenin model object, i.e., with n RC pairs in series, for a lithium-ion battery
+    cell. The set of differential and algebraic equations are:
+
+    dz/dt = -eta(t) * i_app(t) / capacity
+    di_Rj/dt = -i_Rj/(Rj*Cj) + i_app(t)/(Rj*Cj),     j = 1, ..., n
+    v(t) = OCV(z(t)) - sum_j(Rj*i_Rj(t)) - R0*i_app(t)
+
+    The RC pairs are uncoupled, so the currents through the RC pairs form a state vector with a diagonal state matrix.
+    After the time discretization, the set of algebraic equations are:
+
+    z[k+1] = z[k] - delta_t*eta[k]*i_app[k]/capacity
+    i_R[k+1] = a * i_R[k] + b * i_app[k],     a = exp(-delta_t/(R*C)),   b = 1 - a
+    v[k] = OCV(z[k]) - R . i_R[k] - R0*i_app[k]
+
+    where R, C, a, b, and i_R are vectors of length n and the operations are element-wise. The discrete-time
+    coefficients (a and b) only depend on delta_t, so they are computed once per delta_t using the discretize method.
+
+    Code Notes:
+    1. The currents through the RC pairs are stored in the last axis of i_R. The leading axes can be used for batches
+    of battery cells, with i_app of the shape of the leading axes. Hence, additional RC pairs only increase the vector
+    width.
+    2. Discharge currrent is positve and charge current is negative by convention.
+    """
+    @classmethod
+    def discretize(cls, dt: Union[float, npt.ArrayLike], R: npt.ArrayLike, C: npt.ArrayLike) \
+            -> tuple[np.ndarray, np.ndarray]:
+        """
+        Calculates the discrete-time coefficients of the RC pairs.
+        :param dt: time difference between the current and the previous time step [s]. If dt is an array, the
+        coefficients for each dt are stacked along the leading axes.
+        :param R: resistances of the RC pairs [ohms]
+        :param C: capacitances of the RC pairs [F]
+        :return: tuple containing the coefficient vectors, a and b.
+        """
+        a = np.exp(-np.asarray(dt)[..., np.newaxis] / (np.asarray(R) * np.asarray(C)))
+        return a, 1 - a
+
+    @classmethod
+    def discretize_state(cls, dt: Union[float, npt.ArrayLike], R: npt.ArrayLike, C: npt.ArrayLike, Q: float) \
+            -> tuple[np.ndarray, np.ndarray]:
+        """
+        Calculates the diagonal discrete-time coefficients of the state vector, x = [z, i_R1, ..., i_Rn], such that
+        x[k+1] = m1 * x[k] + m2 * i_app[k], with the Coulombic efficiency of one. These are used by the state equations
+        of the Kalman filters.
+        :param dt: time difference between the current and the previous time step [s]. If dt is an array, the
+        coefficients for each dt are stacked along the leading axes.
+        :param R: resistances of the RC pairs [ohms]
+        :param C: capacitances of the RC pairs [F]
+        :param Q: battery cell capacity [A hr]
+        :return: tuple containing the coefficient vectors, m1 and m2, of length n + 1 along the last axis.
+        """
+        a, b = cls.discretize(dt=dt, R=R, C=C)
+        m1 = np.concatenate([np.ones(a.shape[:-1] + (1,)), a], axis=-1)
+        m2 = np.concatenate([(-np.asarray(dt, dtype=float) / (3600 * Q))[..., np.newaxis], b], axis=-1)
+        return m1, m2
+
+    @classmethod
+    def i_R_next(cls, a: npt.ArrayLike, b: npt.ArrayLike, i_app: Union[float, npt.ArrayLike],
+                 i_R_prev: npt.ArrayLike) -> np.ndarray:
+        """
+        Measures the currents through the RC pairs at the next time step.
+        :param a: discrete-time coefficients, exp(-delta_t/(R*C))
+        :param b: discrete-time coefficients, 1 - exp(-delta_t/(R*C))
+        :param i_app: applied current [A]
+        :param i_R_prev: currents through the RC pairs at the previous time step [A]
+        :return: currents through the RC pairs at the current time step [A]
+        """
+        return a * i_R_prev + b * np.asarray(i_app)[..., np.newaxis]
+
+    @classmethod
+    def v(cls, i_app, OCV: float, R0: float, R: npt.ArrayLike, i_R: npt.ArrayLike):
+        """
+        This method calculates the cell terminal voltage at the current time step.
+        :param i_app: applied current at current time step, k [A]
+        :param OCV: open-circuit voltage [V]
+        :param R0: resistance of R0 [ohms]
+        :param R: resistances of the RC pairs [ohms]
+        :param i_R: currents through the RC pairs [A]
+        :return: terminal voltage at the current time step, k [V]
+        """
+        return OCV - np.sum(np.asarray(R) * i_R, axis=-1) - R0 * i_app
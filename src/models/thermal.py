@@ -2,28 +2,67 @@
 Contains classes and functionality for thermal battery cell model
 """
 
-__all__ = ['ECMLumped']
+__all__ = ['ECMLumped', 'ECMRadial']
 
 __author__ = 'Moin Ahmed'
 __copywrite__ = 'Copywrite 2023 by Moin Ahmed. All rights reserved.'
 __status__ = 'developement'
 
-from typing import Callable
+from typing import Callable, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from src.calc_helpers.ode_solvers import batch_TDMAsolver
 
 
 class ECMLumped:
     """
-    Contains equations for conducting the lumped thermal battery cell model
+    Contains equations for conducting the lumped thermal battery cell model. The heat balance is given by:
+
+    rho * vol * c_p * dT/dt = i_app * (OCV - v) - i_app * T * dOCV/dT - h * A * (T - T_amb)
+
+    where the first and the second terms on the right-hand side are the irreversible (ohmic and polarization) and
+    reversible (entropic) heat generations, respectively. The last term is the convective heat flux to the surroundings.
+    The convention that the discharge current is positive is used.
+
+    For constant i_app, v, and OCV over a time step, the heat balance is linear in T:
+
+    dT/dt = a * T + b,      a = -(i_app * dOCV/dT + h * A) / (rho * vol * c_p),
+                            b = (i_app * (OCV - v) + h * A * T_amb) / (rho * vol * c_p)
+
+    and it is integrated exactly over the time step as:
+
+    T[k+1] = T[k] + (a * T[k] + b) * (exp(a * delta_t) - 1) / a
+
+    All the methods below accept floats or numpy arrays (for batches of battery cells).
     """
-    def reversible_heat(self, i_app: float, temp: float, docvdtemp: float) -> float:
-        return i_app * temp * docvdtemp
+    @classmethod
+    def reversible_heat(cls, i_app: float, temp: float, docvdtemp: float) -> float:
+        return -i_app * temp * docvdtemp
 
-    def irreversible_heat(self, i_app: float, v: float, ocv: float) -> float:
-        return i_app * (v - ocv)
+    @classmethod
+    def irreversible_heat(cls, i_app: float, v: float, ocv: float) -> float:
+        return i_app * (ocv - v)
 
-    def heat_flux(self, temp: float, h: float, area: float, temp_amb: float):
+    @classmethod
+    def heat_flux(cls, temp: float, h: float, area: float, temp_amb: float):
         return h * area * (temp - temp_amb)
 
+    @classmethod
+    def heat_generation(cls, i_app: float, temp: float, v: float, ocv: float, docvdtemp: float) -> float:
+        """
+        Calculates the total heat generated in the battery cell.
+        :param i_app: applied current [A]
+        :param temp: battery cell temperature [K]
+        :param v: battery cell terminal voltage [V]
+        :param ocv: open-circuit voltage [V]
+        :param docvdtemp: change of OCV with respect to the change in temperature [V/K]
+        :return: heat generated [W]
+        """
+        return cls.reversible_heat(i_app=i_app, temp=temp, docvdtemp=docvdtemp) + \
+            cls.irreversible_heat(i_app=i_app, v=v, ocv=ocv)
+
     def heat_balance(self, v: float, i_app: float, rho: float, vol: float, c_p: float,
                      ocv: float, docvdtemp, h, area, temp_amb) -> Callable:
         def func_heat_balance(temp: float, t: float) -> float:
@@ -31,4 +70,145 @@ class ECMLumped:
             return main_coeff * (self.reversible_heat(i_app=i_app, temp=temp, docvdtemp=docvdtemp) + \
                                  self.irreversible_heat(i_app=i_app, v=v, ocv=ocv) - \
                                  self.heat_flux(temp=temp, h=h, area=area, temp_amb=temp_amb))
-        return func_heat_balance
\ No newline at end of file
+        return func_heat_balance
+
+    @classmethod
+    def temp_next(cls, dt: float, temp_prev: Union[float, npt.ArrayLike], i_app: Union[float, npt.ArrayLike],
+                  v: Union[float, npt.ArrayLike], ocv: Union[float, npt.ArrayLike],
+                  docvdtemp: Union[float, npt.ArrayLike], rho: float, vol: float, c_p: float, h: float, area: float,
+                  temp_amb: float) -> Union[float, npt.ArrayLike]:
+        """
+        Calculates the battery cell temperature at the next time step using the exact (exponential integrator) solution
+        of the lumped heat balance.
+        :param dt: time difference between the current and previous time steps [s]
+        :param temp_prev: temperature at the previous time step [K]
+        :param i_app: applied current [A]
+        :param v: battery cell terminal voltage [V]
+        :param ocv: open-circuit voltage [V]
+        :param docvdtemp: change of OCV with respect to the change in temperature [V/K]
+        :param rho: battery cell density [kg/m3]
+        :param vol: battery cell volume [m3]
+        :param c_p: specific heat capacity [J/(kg K)]
+        :param h: heat transfer coefficient [W/(m2 K)]
+        :param area: battery cell surface area [m2]
+        :param temp_amb: ambient temperature [K]
+        :return: temperature at the next time step [K]
+        """
+        m_c_p = rho * vol * c_p
+        a = -(i_app * docvdtemp + h * area) / m_c_p
+        b = (i_app * (ocv - v) + h * area * temp_amb) / m_c_p
+        a_dt = a * dt
+        with np.errstate(divide='ignore', invalid='ignore'):
+            phi = np.where(a_dt == 0.0, 1.0, np.expm1(a_dt) / a_dt)  # phi -> 1 as a*dt -> 0
+        temp_next = temp_prev + (a * temp_prev + b) * phi * dt
+        return temp_next if np.ndim(temp_next) else float(temp_next)
+
+
+class ECMRadial:
+    """
+    Contains the equations for the 1-D radial (core-to-surface) thermal model of a cylindrical battery cell. The heat
+    equation in the radial direction is given by:
+
+    rho * c_p * dT/dt = k / r * d/dr(r * dT/dr) + q
+
+    with the symmetry condition, dT/dr = 0, at the core (r = 0) and the convective boundary condition,
+    -k * dT/dr = h * (T - T_amb), at the surface (r = radius). The heat generation, q [W/m3], is assumed to be uniform
+    in the battery cell and is obtained from the ECM (see ECMLumped.heat_generation) divided by the cell volume.
+
+    The battery cell radius is divided into num_nodes control volumes of equal thickness, with the nodes at their
+    centres. The time discretization uses the implicit (backward) Euler method, which results in a tridiagonal system
+    of equations for every time step:
+
+    (rho*c_p*V_i/delta_t + G_(i-1/2) + G_(i+1/2)) * T_i[k+1] - G_(i-1/2) * T_(i-1)[k+1] - G_(i+1/2) * T_(i+1)[k+1]
+        = rho*c_p*V_i/delta_t * T_i[k] + q * V_i
+
+    where V_i is the volume (per unit length) of the i-th control volume and G are the conductances (per unit length)
+    between the neighbouring nodes. The conductance of the outermost node also includes the convective heat transfer
+    to the ambient. The temperature arrays have shape (..., num_nodes), where the leading axes are the battery cells,
+    and all the battery cells are solved in a single vectorized sweep of the Thomas algorithm.
+    """
+    def __init__(self, radius: float, k: float, rho: float, c_p: float, h: float, num_nodes: int = 10) -> None:
+        """
+        Class constructor.
+        :param radius: battery cell radius [m]
+        :param k: radial thermal conductivity [W/(m K)]
+        :param rho: battery cell density [kg/m3]
+        :param c_p: specific heat capacity [J/(kg K)]
+        :param h: heat transfer coefficient at the battery cell surface [W/(m2 K)]
+        :param num_nodes: number of nodes in the radial direction
+        """
+        if num_nodes < 2:
+            raise ValueError('num_nodes needs to be at least 2.')
+        self.radius = radius
+        self.k = k
+        self.rho = rho
+        self.c_p = c_p
+        self.h = h
+        self.num_nodes = num_nodes
+
+        dr = radius / num_nodes
+        self.array_r = (np.arange(num_nodes) + 0.5) * dr  # node locations [m]
+        r_faces = np.arange(num_nodes + 1) * dr
+        self._array_vol = np.pi * (r_faces[1:] ** 2 - r_faces[:-1] ** 2)  # control volumes per unit length [m2]
+        self._array_G = 2 * np.pi * k * r_faces[1:-1] / dr  # internal conductances per unit length [W/(m K)]
+        # conduction from the outermost node to the surface in series with the convection to the ambient
+        self._G_surf = 1 / (dr / 2 / (2 * np.pi * radius * k) + 1 / (2 * np.pi * radius * h))
+        self._matrix_cache = {}
+
+    def __get_matrix(self, dt: float) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the lower, main, and upper diagonals and the node heat capacities divided by dt. These only depend on
+        dt and are cached.
+        """
+        try:
+            return self._matrix_cache[dt]
+        except KeyError:
+            capacity = self.rho * self.c_p * self._array_vol / dt
+            diag = capacity.copy()
+            diag[:-1] += self._array_G
+            diag[1:] += self._array_G
+            diag[-1] += self._G_surf
+            matrices = (-self._array_G, diag, -self._array_G, capacity)
+            self._matrix_cache[dt] = matrices
+            return matrices
+
+    def temp_next(self, dt: float, temp_prev: npt.ArrayLike, heat_gen: Union[float, npt.ArrayLike], vol: float,
+                  temp_amb: Union[float, npt.ArrayLike]) -> np.ndarray:
+        """
+        Calculates the node temperatures at the next time step.
+        :param dt: time difference between the current and previous time steps [s]
+        :param temp_prev: node temperatures at the previous time step [K], with shape (..., num_nodes)
+        :param heat_gen: total heat generated in the battery cell(s) [W], with shape (...)
+        :param vol: battery cell volume [m3]
+        :param temp_amb: ambient temperature [K]
+        :return: node temperatures at the next time step [K], with shape (..., num_nodes)
+        """
+        l_diag, diag, u_diag, capacity = self.__get_matrix(dt=dt)
+        q = np.asarray(heat_gen, dtype=float)[..., np.newaxis] / vol  # volumetric heat generation [W/m3]
+        col_vec = capacity * np.asarray(temp_prev, dtype=float) + q * self._array_vol
+        col_vec[..., -1] += self._G_surf * np.asarray(temp_amb, dtype=float)
+        return batch_TDMAsolver(l_diag=l_diag, diag=diag, u_diag=u_diag, col_vec=col_vec)
+
+    def surface_temp(self, temp: npt.ArrayLike, temp_amb: Union[float, npt.ArrayLike]) -> np.ndarray:
+        """
+        Calculates the battery cell surface temperature from the node temperatures.
+        :param temp: node temperatures [K], with shape (..., num_nodes)
+        :param temp_amb: ambient temperature [K]
+        :return: surface temperature [K], with shape (...)
+        """
+        temp_outer = np.asarray(temp)[..., -1]
+        heat_flux = self._G_surf * (temp_outer - temp_amb)
+        return temp_amb + heat_flux / (2 * np.pi * self.radius * self.h)
+
+    @classmethod
+    def core_temp(cls, temp: npt.ArrayLike) -> np.ndarray:
+        """
+        Returns the temperature of the innermost node [K].
+        """
+        return np.asarray(temp)[..., 0]
+
+    def avg_temp(self, temp: npt.ArrayLike) -> np.ndarray:
+        """
+        Returns the volume-averaged battery cell temperature [K].
+        """
+        return np.asarray(temp) @ self._array_vol / np.sum(self._array_vol)
@@ -3,7 +3,7 @@ Package-header for the observer namespace.
 Provides classes and functionality for solving the applying the observers during LIB operations
 """
 
-__all__ = ['random_variables', 'kalman_filter']
+__all__ = ['random_variables', 'kalman_filter', 'spkf_tuning', 'particle_filter', 'realtime']
 
 __author__ = 'Moin Ahmed'
 __copywrite__ = 'Copywrite 2023 by Moin Ahmed. All rights reserved.'
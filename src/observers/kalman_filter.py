@@ -1,15 +1,16 @@
 """ kalman_filter
-Contains the classes and functionalities for the implementing kalman filter
+Contains the classes and functionalities for the implementing kalman filter and the Rauch-Tung-Striebel (RTS) smoother
 """
 
-__all__ = ['InvalidKFMethodType', 'SPKF']
+__all__ = ['InvalidKFMethodType', 'SPKF', 'CDKF_H', 'cdkf_weights', 'rts_smooth']
 
 __author__ = 'Moin Ahmed'
 __copywrite__ = 'Copywrite 2023 by Moin Ahmed. All rights reserved.'
 __status__ = 'Development'
 
 
-from typing import Callable
+import contextlib
+from typing import Callable, Iterator
 
 import numpy as np
 import numpy.typing as npt
@@ -18,6 +19,19 @@ import matplotlib.pyplot as plt
 
 from src.observers.random_variables import NormalRandomVector
 
+CDKF_H = np.sqrt(3)  # tuning parameter, h, of the central difference Kalman filter (CDKF) for Gaussian distributions
+
+
+def cdkf_weights(L: int, h: float = CDKF_H) -> np.ndarray:
+    """
+    Returns the weights of the sigma points of the central difference Kalman filter (CDKF), which are the same for the
+    mean and the covariance.
+    :param L: dimensions of the augmented state vector
+    :param h: CDKF tuning parameter
+    :return: (np.ndarray) weights of the 2L + 1 sigma points, with the weight of the mean first
+    """
+    return np.append((h ** 2 - L) / h ** 2, np.full(2 * L, 1 / (2 * h ** 2)))
+
 
 class InvalidKFMethodType(Exception):
     def __init__(self):
@@ -52,6 +66,36 @@ class SPKF:
             raise InvalidKFMethodType
         self.method_type = method_type
 
+        # cross-covariance of the state before and after the last prediction, which is used by the RTS smoother
+        self.cross_cov = None
+        # Kalman gain of the last measurement update, which is reused by update_mean
+        self.gain = None
+        # weights, square root, and mean of the augmented state used by the trusted mode (see trusted)
+        self.__trusted_cache = None
+
+    @contextlib.contextmanager
+    def trusted(self) -> Iterator['SPKF']:
+        """
+        Context manager in which the filter runs its fast path, e.g., for the repeated calls of predict and update in
+        the solver loops. The random vectors of the filter (x, w, and v) skip the checks of their setters (see
+        NormalRandomVector.trusted), and the process and sensor noises are taken as fixed inside: the square roots of
+        their covariances and the sigma-point weights are computed once on entry. Each prediction then factorizes only
+        the state covariance, once, without the finiteness checks, and builds the sigma points without tiling, instead
+        of factorizing the augmented covariance for both the state and the sensor noise sigma points. The results are
+        the same up to round-off.
+        :return: the SPKF object itself
+        """
+        with self.x.trusted(), self.w.trusted(), self.v.trusted():
+            trusted_cache_prev = self.__trusted_cache
+            sqrt_aug = np.zeros((self.L, self.L))
+            sqrt_aug[self.Nx:, self.Nx:] = self.gamma * scipy.linalg.block_diag(
+                self.calc_sqrt_matrix(self.w.get_cov()), self.calc_sqrt_matrix(self.v.get_cov()))
+            self.__trusted_cache = (self.array_alpha_m, sqrt_aug, np.array(self.aug_vector, dtype=float))
+            try:
+                yield self
+            finally:
+                self.__trusted_cache = trusted_cache_prev
+
     @classmethod
     def calc_sqrt_matrix(cls, matrix: npt.ArrayLike) -> npt.ArrayLike:
         return scipy.linalg.cholesky(matrix, lower=True)
@@ -100,7 +144,7 @@ class SPKF:
         :return: the turning parameter
         """
         if self.method_type == 'CDKF':
-            return np.sqrt(3)
+            return CDKF_H
         else:
             raise InvalidKFMethodType
 
@@ -111,7 +155,7 @@ class SPKF:
         :return: h tunning parameter
         """
         if self.method_type == 'CDKF':
-            return np.sqrt(3)
+            return CDKF_H
         else:
             raise InvalidKFMethodType
 
@@ -135,8 +179,7 @@ class SPKF:
         Row vector of all alpha_m entries.
         :return:
         """
-        alpha_m_vec = np.array(np.tile(self.alpha_m, self.p))  # vector of all alpha_m, excluding alpha_c_0
-        return np.append(self.alpha_m_0, alpha_m_vec).reshape(-1, 1)
+        return cdkf_weights(L=self.L, h=self.h).reshape(-1, 1)
 
     @property
     def alpha_c_0(self) -> float:
@@ -157,8 +200,7 @@ class SPKF:
         """
         row vector for all the entries in alpha c
         """
-        array_ = np.array(np.tile(self.alpha_c, self.p))
-        return np.append(self.alpha_c_0, array_).reshape(-1, 1)
+        return cdkf_weights(L=self.L, h=self.h).reshape(-1, 1)
 
     @property
     def x_sp(self) -> npt.ArrayLike:
@@ -191,8 +233,12 @@ class SPKF:
         element is in the numpy matrix form and hence need indexing to extract its individual elements.
         """
         # Pass the input elements of the sigma point into the state function. Then the mean estimate is calculated
-        Xx = self.func_f(self.x_sp_x, u, self.x_sp_w)
+        x_sp = self.x_sp
+        Xx_prior = x_sp[0: self.Nx, :]
+        Xs_prior = Xx_prior - self.x.get_vector()
+        Xx = self.func_f(Xx_prior, u, x_sp[self.Nx: self.Nx + self.Nw, :])
         self.x.set_vector(Xx @ self.array_alpha_m)  # outputs are augmented xhat matrix and state estimate vector
+        self.cross_cov = (Xs_prior * self.array_alpha_c.reshape(1, -1)) @ (Xx - self.x.get_vector()).transpose()
         return Xx
 
     def __cov_prediction(self, Xx: npt.ArrayLike) -> npt.ArrayLike:
@@ -237,12 +283,123 @@ class SPKF:
     def __cov_measurement_update(self, Lx, SigmaY) -> None:
         self.x.set_cov(self.x.get_cov() - Lx @ SigmaY @ Lx.transpose())
 
-    def solve(self, u: float, y_true: float) -> None:
+    def __predict_trusted(self, u: float, u_h: float) -> tuple[npt.ArrayLike, npt.ArrayLike, npt.ArrayLike]:
+        """
+        Performs the prediction steps (steps 1a to 1c) in the trusted mode (see trusted). The sigma points are computed
+        once, and their sensor noise rows are reused for the output estimate.
+        """
+        alpha, sqrt_aug, mean_aug = self.__trusted_cache
+        x_prev = self.x.get_vector()
+        sqrt_aug[:self.Nx, :self.Nx] = self.gamma * np.linalg.cholesky(self.x.get_cov())
+        mean_aug[:self.Nx] = x_prev
+        x_sp = np.concatenate((mean_aug, mean_aug + sqrt_aug, mean_aug - sqrt_aug), axis=1)
+        Xx_prior = x_sp[:self.Nx, :]
+        Xx = self.func_f(Xx_prior, u, x_sp[self.Nx: self.Nx + self.Nw, :])  # Step 1a
+        x_hat = Xx @ alpha
+        Xs = Xx - x_hat
+        self.x.set_vector(x_hat)
+        self.cross_cov = ((Xx_prior - x_prev) * alpha.T) @ Xs.transpose()
+        self.x.set_cov((Xs * alpha.T) @ Xs.transpose())  # Step 1b
+        y = self.func_h(Xx, u_h, x_sp[self.Nx + self.Nw:, :])  # Step 1c
+        return Xs, y, y @ alpha
+
+    def __update_trusted(self, y_true: float, Xs: npt.ArrayLike, y: npt.ArrayLike, y_hat: npt.ArrayLike) -> None:
+        """
+        Performs the measurement update steps (steps 2a to 2c) in the trusted mode (see trusted).
+        """
+        alpha_T = self.__trusted_cache[0].T
+        Ys = np.reshape(y, (self.y_dim, -1)) - np.reshape(y_hat, (-1, 1))
+        SigmaY = (Ys * alpha_T) @ Ys.transpose()
+        Lx = ((Xs * alpha_T) @ Ys.transpose()) @ np.linalg.inv(SigmaY)  # Step 2a
+        self.gain = Lx
+        self.__state_update(L=Lx, ytrue=y_true, yhat=y_hat)  # Step 2b
+        self.__cov_measurement_update(Lx=Lx, SigmaY=SigmaY)  # Step 2c
+
+    def predict(self, u: float, u_h: float = 0.0) -> tuple[npt.ArrayLike, npt.ArrayLike, npt.ArrayLike]:
+        """
+        Performs the prediction steps (steps 1a to 1c).
+        :param u: The process input.
+        :param u_h: The input of the output function, e.g., the applied current at the time of the measurement.
+        :return: tuple containing the state sigma-point deviations, the output sigma points, and the output estimate,
+        which are required by the update method.
+        """
+        if self.__trusted_cache is not None:
+            return self.__predict_trusted(u=u, u_h=u_h)
         Xx = self.__state_prediction(u=u)  # Step 1a
         Xs = self.__cov_prediction(Xx=Xx)  # Step 1b
-        y, y_hat = self.__output_estimate(Xx=Xx, u=0)  # Step 1c
+        y, y_hat = self.__output_estimate(Xx=Xx, u=u_h)  # Step 1c
+        return Xs, y, y_hat
 
+    def update(self, y_true: float, Xs: npt.ArrayLike, y: npt.ArrayLike, y_hat: npt.ArrayLike) -> None:
+        """
+        Performs the measurement update steps (steps 2a to 2c).
+        :param y_true: The measured output.
+        :param Xs: state sigma-point deviations from the predict method
+        :param y: output sigma points from the predict method
+        :param y_hat: output estimate from the predict method
+        """
+        if self.__trusted_cache is not None:
+            return self.__update_trusted(y_true, Xs=Xs, y=y, y_hat=y_hat)
         SigmaY, Lx = self.__estimator_gain_matrix(y=y, yhat=y_hat, xs=Xs)  # Step 2a
+        self.gain = Lx
         self.__state_update(L=Lx, ytrue=y_true, yhat=y_hat)  # Step 2b
         self.__cov_measurement_update(Lx=Lx, SigmaY=SigmaY)  # Step 2c
 
+    def predict_mean(self, u: float) -> None:
+        """
+        Propagates only the state mean through the state function, with the mean process noise, while the state
+        covariance is not updated. It is much cheaper than predict, since the sigma points are not needed, and is used
+        for the open-loop prediction, e.g., when a real-time observer falls behind the schedule.
+        :param u: The process input.
+        """
+        self.x.set_vector(self.func_f(self.x.get_vector(), u, self.w.get_vector()))
+
+    def update_mean(self, y_true: float, u_h: float = 0.0) -> None:
+        """
+        Corrects the state mean using the Kalman gain of the last measurement update, while the state covariance and
+        the gain are not updated. It follows predict_mean.
+        :param y_true: The measured output.
+        :param u_h: The input of the output function.
+        """
+        if self.gain is None:
+            raise ValueError('The Kalman gain is not available before the first measurement update.')
+        y_hat = self.func_h(self.x.get_vector(), u_h, self.v.get_vector())
+        self.x.set_vector(self.x.get_vector() + (self.gain @ np.reshape(y_true - y_hat, (-1, 1))).reshape(-1, 1))
+
+    def solve(self, u: float, y_true: float) -> None:
+        self.update(y_true, *self.predict(u=u))
+
+
+def rts_smooth(array_x: npt.ArrayLike, array_cov: npt.ArrayLike, array_x_pred: npt.ArrayLike,
+               array_cov_pred: npt.ArrayLike, array_cross_cov: npt.ArrayLike) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Performs the backward pass of the sigma-point Rauch-Tung-Striebel smoother, using the stored quantities of the
+    forward Kalman filter pass with n time steps and Nx states. The smoother gains of all the time steps are calculated
+    at once, and only the backward recursion of the smoothed states and covariances is sequential.
+    :param array_x: filtered states, shape (n, Nx)
+    :param array_cov: filtered state covariances, shape (n, Nx, Nx)
+    :param array_x_pred: predicted states, shape (n, Nx). The k-th row is the prediction of the k-th state from the
+    (k-1)-th filtered state (the first row is not used).
+    :param array_cov_pred: predicted state covariances, shape (n, Nx, Nx)
+    :param array_cross_cov: cross-covariances of the (k-1)-th filtered state and the k-th predicted state (see
+    SPKF.cross_cov), shape (n, Nx, Nx)
+    :return: (tuple) smoothed states, shape (n, Nx), and smoothed state covariances, shape (n, Nx, Nx)
+    """
+    array_x = np.asarray(array_x, dtype=float)
+    array_cov = np.asarray(array_cov, dtype=float)
+    array_x_pred = np.asarray(array_x_pred, dtype=float)
+    array_cov_pred = np.asarray(array_cov_pred, dtype=float)
+    # smoother gains, G[k] = C[k+1] @ inv(P_pred[k+1]), calculated as the solution of P_pred[k+1] @ G[k].T = C[k+1].T
+    array_gain = np.linalg.solve(array_cov_pred[1:], np.swapaxes(array_cross_cov[1:], 1, 2)).swapaxes(1, 2)
+    array_gain_T = array_gain.swapaxes(1, 2)
+
+    array_x_smooth = np.empty_like(array_x)
+    array_cov_smooth = np.empty_like(array_cov)
+    x_smooth, cov_smooth = array_x[-1], array_cov[-1]
+    array_x_smooth[-1], array_cov_smooth[-1] = x_smooth, cov_smooth
+    for k in range(array_x.shape[0] - 2, -1, -1):
+        gain = array_gain[k]
+        x_smooth = array_x[k] + gain @ (x_smooth - array_x_pred[k + 1])
+        cov_smooth = array_cov[k] + gain @ (cov_smooth - array_cov_pred[k + 1]) @ array_gain_T[k]
+        array_x_smooth[k], array_cov_smooth[k] = x_smooth, cov_smooth
+    return array_x_smooth, array_cov_smooth
@@ -0,0 +1,121 @@
+""" particle_filter
+Contains the class for the sequential importance resampling (bootstrap) particle filter.
+
+The particles are stored as the columns of the (Nx, num_particles) array and are propagated, weighted, and resampled
+using the numpy array operations, so the state and output functions receive all the particles at once (as the sigma
+points in SPKF). Unlike the SPKF, the particle filter does not assume that the state distribution is Gaussian, e.g., the
+initial SOC can be uniformly distributed or multimodal.
+"""
+
+__all__ = ['ParticleFilter']
+
+__author__ = 'Moin Ahmed'
+__copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
+__status__ = 'development'
+
+from typing import Callable, Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+import scipy.special
+
+from src.observers.random_variables import NormalRandomVector
+
+
+class ParticleFilter:
+    """
+    The class for the bootstrap particle filter. The process noise is sampled for each particle, and the particles are
+    weighted by the likelihood of the measurement using the normally distributed sensor noise. The particles are
+    resampled (systematic resampling) when the effective sample size falls below resample_threshold * num_particles.
+    """
+    def __init__(self, particles: npt.ArrayLike, w: NormalRandomVector, v: NormalRandomVector,
+                 func_f: Callable, func_h: Callable, resample_threshold: float = 0.5,
+                 seed: Optional[Union[int, np.random.Generator]] = None) -> None:
+        """
+        Class constructor
+        :param particles: initial particles as the columns of the (Nx, num_particles) array
+        :param w: process noise
+        :param v: sensor noise
+        :param func_f: state function, func_f(x_k, u_k, w_k), of the particles x_k and the process noise samples w_k
+        :param func_h: output function, func_h(x_k, u_k, v_k), of the particles x_k and the sensor noise v_k
+        :param resample_threshold: fraction of the number of particles below which the effective sample size triggers
+        the resampling
+        :param seed: seed or the numpy random Generator used for the process noise and the resampling
+        """
+        particles = np.asarray(particles, dtype=float)
+        if particles.ndim != 2:
+            raise ValueError('particles need to be a (Nx, num_particles) array.')
+        self.particles = particles
+        self.log_weights = np.full(particles.shape[1], -np.log(particles.shape[1]))
+        self.w = w
+        self.v = v
+        self.func_f = func_f
+        self.func_h = func_h
+        self.resample_threshold = resample_threshold
+        self.rng = np.random.default_rng(seed)
+        self.num_resamples = 0
+
+    @property
+    def num_particles(self) -> int:
+        return self.particles.shape[1]
+
+    @property
+    def weights(self) -> np.ndarray:
+        return np.exp(self.log_weights)
+
+    @property
+    def effective_sample_size(self) -> float:
+        return float(1 / np.sum(self.weights ** 2))
+
+    @property
+    def x_mean(self) -> np.ndarray:
+        """
+        Weighted mean of the particles as the (Nx, 1) column vector.
+        """
+        return (self.particles @ self.weights).reshape(-1, 1)
+
+    @property
+    def x_cov(self) -> np.ndarray:
+        """
+        Weighted covariance of the particles.
+        """
+        deviations = self.particles - self.x_mean
+        return (deviations * self.weights) @ deviations.transpose()
+
+    def predict(self, u: Union[float, npt.ArrayLike]) -> None:
+        """
+        Propagates the particles through the state function with the sampled process noise.
+        :param u: The process input.
+        """
+        self.particles = self.func_f(self.particles, u, self.w.sample(num_samples=self.num_particles, rng=self.rng))
+
+    def update(self, y_true: Union[float, npt.ArrayLike], u: Union[float, npt.ArrayLike] = 0.0) -> None:
+        """
+        Weights the particles by the measurement likelihood and resamples them if needed.
+        :param y_true: The measured output.
+        :param u: The input of the output function.
+        """
+        y = np.atleast_2d(self.func_h(self.particles, u, np.zeros((self.v.dim, 1))))
+        innovations = np.asarray(y_true, dtype=float).reshape(-1, 1) - y - self.v.get_vector()
+        log_likelihood = -0.5 * np.sum(innovations * np.linalg.solve(self.v.get_cov(), innovations), axis=0)
+        log_weights = self.log_weights + log_likelihood
+        self.log_weights = log_weights - scipy.special.logsumexp(log_weights)
+        if self.effective_sample_size < self.resample_threshold * self.num_particles:
+            self.resample()
+
+    def resample(self) -> None:
+        """
+        Resamples the particles using the systematic resampling, after which the particles have equal weights.
+        """
+        n = self.num_particles
+        positions = (self.rng.random() + np.arange(n)) / n
+        cumulative_weights = np.cumsum(self.weights)
+        indices = np.minimum(np.searchsorted(cumulative_weights, positions), n - 1)
+        self.particles = self.particles[:, indices]
+        self.log_weights = np.full(n, -np.log(n))
+        self.num_resamples += 1
+
+    def solve(self, u: Union[float, npt.ArrayLike], y_true: Union[float, npt.ArrayLike],
+              u_h: Union[float, npt.ArrayLike] = 0.0) -> None:
+        self.predict(u=u)
+        self.update(y_true=y_true, u=u_h)
@@ -8,7 +8,8 @@ __author__ = 'Moin Ahmed'
 __copywrite__ = 'Copywrite 2023 by Moin Ahmed. All rights reserved.'
 __status__ = 'Development'
 
-from typing import Optional
+import contextlib
+from typing import Iterator, Optional, Union
 
 import numpy as np
 import numpy.typing as npt
@@ -16,16 +17,25 @@ import numpy.typing as npt
 
 class NormalRandomVector:
     """
-    Class for the normally distributed random vector
+    Class for the normally distributed random vector. The samples are drawn in batches using the numpy random Generator
+    of the instance and the Cholesky factor of the covariance matrix, which is cached until the covariance is changed.
+
+    The vector and the covariance matrix are validated when they are set, except in the trusted mode (see trusted),
+    which is used by the filter loops that set the (already validated) arrays at every time step.
     """
-    def __init__(self, vector_init: npt.ArrayLike, cov_init: npt.ArrayLike) -> None:
+    def __init__(self, vector_init: npt.ArrayLike, cov_init: npt.ArrayLike,
+                 seed: Optional[Union[int, np.random.Generator]] = None) -> None:
         """
         Class constructor
         :param vector_init: row vector representing the mean
         :param cov_init: covariance matrix
+        :param seed: seed or the numpy random Generator used for sampling
         """
         self._vector = None
         self._cov = None
+        self._cov_sqrt = None
+        self._trusted = False
+        self.rng = np.random.default_rng(seed)
         self.set_vector(vector_new=vector_init)
         self.set_cov(cov_new=cov_init)
 
@@ -41,13 +51,66 @@ class NormalRandomVector:
                     raise ValueError('row vector needs to have a single column')
 
     @classmethod
-    def create_unit_normal_rv_sample(cls, vector_size: int) -> npt.ArrayLike:
-        return np.array([np.random.normal(loc=0.0, scale=1.0) for i in range(vector_size)]).reshape(-1, 1)
+    def create_unit_normal_rv_sample(cls, vector_size: int, num_samples: int = 1,
+                                     rng: Optional[np.random.Generator] = None) -> npt.ArrayLike:
+        """
+        Returns the samples of the standard normal random vector.
+        :param vector_size: size of the random vector
+        :param num_samples: number of samples
+        :param rng: numpy random Generator. A new unseeded Generator is used if None.
+        :return: samples as the columns of the (vector_size, num_samples) array
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        return rng.standard_normal((vector_size, num_samples))
+
+    @classmethod
+    def calc_sqrt_cov(cls, cov: npt.ArrayLike) -> np.ndarray:
+        """
+        Returns the lower-triangular Cholesky factor of the covariance matrix, or, for the positive semi-definite
+        (singular) covariance matrices, the square root from the eigendecomposition.
+        :param cov: covariance matrix
+        :return: (np.ndarray) matrix square root, A, such that A @ A.T = cov
+        """
+        try:
+            return np.linalg.cholesky(cov)
+        except np.linalg.LinAlgError:
+            eigvals, eigvecs = np.linalg.eigh(cov)
+            return eigvecs * np.sqrt(np.clip(eigvals, 0.0, None))
+
+    @classmethod
+    def create_normal_rv_sample(cls, mean: npt.ArrayLike, cov: npt.ArrayLike, num_samples: int = 1,
+                                rng: Optional[np.random.Generator] = None) -> npt.ArrayLike:
+        """
+        Returns the samples of the normal random vector with the mean and the covariance.
+        :param mean: mean (column) vector
+        :param cov: covariance matrix
+        :param num_samples: number of samples
+        :param rng: numpy random Generator. A new unseeded Generator is used if None.
+        :return: samples as the columns of the (vector size, num_samples) array
+        """
+        mean = np.asarray(mean, dtype=float).reshape(-1, 1)
+        return mean + cls.calc_sqrt_cov(cov) @ cls.create_unit_normal_rv_sample(vector_size=mean.shape[0],
+                                                                                 num_samples=num_samples, rng=rng)
+
+    @property
+    def cov_sqrt(self) -> np.ndarray:
+        """
+        Cached matrix square root (Cholesky factor) of the covariance matrix.
+        """
+        if self._cov_sqrt is None:
+            self._cov_sqrt = self.calc_sqrt_cov(self._cov)
+        return self._cov_sqrt
 
-    # @classmethod
-    # def create_normal_rv_sample(cls, mean: npt.ArrayLike, cov: npt.ArrayLike) -> npt.ArrayLike:
-    #     a = np.linalg.cholesky(cov)
-    #     return mean + a @ cls.create_unit_normal_rv_sample(vector_size=mean.shape[0])
+    def sample(self, num_samples: int = 1, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """
+        Returns the samples of the random vector.
+        :param num_samples: number of samples
+        :param rng: numpy random Generator. The Generator of the instance is used if None.
+        :return: samples as the columns of the (dim, num_samples) array
+        """
+        rng = self.rng if rng is None else rng
+        return self._vector + self.cov_sqrt @ self.create_unit_normal_rv_sample(vector_size=self.dim,
+                                                                               num_samples=num_samples, rng=rng)
 
     def get_vector(self) -> Optional[npt.ArrayLike]:
         return self._vector
@@ -56,18 +119,37 @@ class NormalRandomVector:
         return self._cov
 
     def set_vector(self, vector_new: npt.ArrayLike) -> None:
-        self._check_for_row_vector(row_vector=vector_new)
+        if not self._trusted:
+            self._check_for_row_vector(row_vector=vector_new)
         self._vector = vector_new
 
     def set_cov(self, cov_new: npt.ArrayLike) -> None:
-        self._check_for_matrix(cov_new)
+        if not self._trusted:
+            self._check_for_matrix(cov_new)
         self._cov = cov_new
+        self._cov_sqrt = None
+
+    @contextlib.contextmanager
+    def trusted(self) -> Iterator['NormalRandomVector']:
+        """
+        Context manager in which set_vector and set_cov skip the type and shape checks of their inputs. It is meant for
+        the solver loops, whose inputs are validated when the random vector is created and which then only set the
+        arrays of the same shapes. The checks are restored on exit (also if an exception is raised).
+        :return: the random vector itself
+        """
+        trusted_prev = self._trusted
+        self._trusted = True
+        try:
+            yield self
+        finally:
+            self._trusted = trusted_prev
 
     def _del_vector(self) -> None:
         self._vector = None
 
     def _del_cov(self) -> None:
         self._cov = None
+        self._cov_sqrt = None
 
     vector = property(get_vector, set_vector, _del_vector, 'vector containing expected values')
     cov = property(get_cov, set_cov, _del_cov, 'covariance matrix')
@@ -0,0 +1,141 @@
+""" realtime
+Contains the classes for running the observers in real time, e.g., as a battery management system (BMS) would, and for
+measuring their step latencies against the deadlines.
+
+The RealTimeHarness releases the observer steps at a fixed rate (e.g., 10 Hz) from a clock. The measurements come from a
+recorded replay, which stands in for the sensors. Each step has to complete before its deadline (by default, the period
+after its release). The latency of a step is measured from its release to its completion, so it includes the time
+that the step waited for the previous steps. If the harness falls behind the schedule, e.g., after a slow step, it runs
+the cheaper degraded steps until it catches up:
+
+skip_covariance: the state mean is propagated and corrected using the last Kalman gain, while the state covariance and
+the gain are not updated (see SPKF.predict_mean and SPKF.update_mean).
+open_loop: the state mean is only propagated using the model (open-loop prediction), without the measurement.
+"""
+
+__all__ = ['DEGRADATION_MODES', 'RealTimeReport', 'RealTimeHarness']
+
+__author__ = 'Moin Ahmed'
+__copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
+__status__ = 'development'
+
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import numpy as np
+
+DEGRADATION_MODES = ('skip_covariance', 'open_loop')
+
+
+@dataclass
+class RealTimeReport:
+    """
+    Stores the step latencies and the deadline misses of a real-time run.
+    """
+    period: float  # time between the step releases [s]
+    deadline: float  # time after the release by which each step has to be completed [s]
+    array_latency: np.ndarray = field(default_factory=lambda: np.array([]))  # release to completion time of the steps
+    # [s]
+    array_exec_time: np.ndarray = field(default_factory=lambda: np.array([]))  # execution times of the steps [s]
+    array_missed: np.ndarray = field(default_factory=lambda: np.array([], dtype=bool))  # True for the steps that
+    # missed their deadlines
+    array_degraded: np.ndarray = field(default_factory=lambda: np.array([], dtype=bool))  # True for the degraded steps
+
+    @property
+    def num_steps(self) -> int:
+        return self.array_latency.size
+
+    @property
+    def num_deadline_misses(self) -> int:
+        return int(np.count_nonzero(self.array_missed))
+
+    @property
+    def num_degraded_steps(self) -> int:
+        return int(np.count_nonzero(self.array_degraded))
+
+    @property
+    def p50(self) -> float:
+        return float(np.percentile(self.array_latency, 50)) if self.num_steps else 0.0
+
+    @property
+    def p99(self) -> float:
+        return float(np.percentile(self.array_latency, 99)) if self.num_steps else 0.0
+
+    @property
+    def max_latency(self) -> float:
+        return float(np.max(self.array_latency)) if self.num_steps else 0.0
+
+    def summary(self) -> str:
+        """
+        Returns the formatted summary of the latencies and the deadline misses.
+        """
+        return '\n'.join([
+            f'steps: {self.num_steps}, period: {self.period * 1e3:.3f} ms, deadline: {self.deadline * 1e3:.3f} ms',
+            f'latency p50: {self.p50 * 1e3:.3f} ms, p99: {self.p99 * 1e3:.3f} ms, max: {self.max_latency * 1e3:.3f} ms',
+            f'deadline misses: {self.num_deadline_misses}, degraded steps: {self.num_degraded_steps}'])
+
+    def __str__(self) -> str:
+        return self.summary()
+
+
+class RealTimeHarness:
+    """
+    Runs the observer steps at a fixed rate and measures their latencies (see the module docstring). The steps are
+    given as the functions of the step index. A step is degraded if it starts later than max_lag after its release,
+    i.e., if the harness is behind the schedule.
+    """
+
+    def __init__(self, func_step: Callable[[int], None], func_degraded_step: Optional[Callable[[int], None]] = None,
+                 rate: float = 10.0, deadline: Optional[float] = None, max_lag: Optional[float] = None,
+                 clock: Callable[[], float] = time.perf_counter, sleep: Callable[[float], None] = time.sleep) -> None:
+        """
+        Class constructor.
+        :param func_step: function performing the full observer step for the step index
+        :param func_degraded_step: function performing the degraded observer step for the step index. If None, the
+        steps are never degraded.
+        :param rate: rate of the step releases [Hz]
+        :param deadline: time after the release by which each step has to be completed [s]. By default, the period.
+        :param max_lag: maximum delay of the step start after its release [s] for the full step. By default, a tenth of
+        the period.
+        :param clock: function returning the current time [s]
+        :param sleep: function that waits for the given time [s]
+        """
+        if rate <= 0:
+            raise ValueError('rate needs to be positive.')
+        self.func_step = func_step
+        self.func_degraded_step = func_degraded_step
+        self.period = 1 / rate
+        self.deadline = self.period if deadline is None else deadline
+        self.max_lag = 0.1 * self.period if max_lag is None else max_lag
+        self.clock = clock
+        self.sleep = sleep
+
+    def run(self, num_steps: int, start: int = 0) -> RealTimeReport:
+        """
+        Runs the steps with the indices start, start + 1, ..., start + num_steps - 1.
+        :param num_steps: number of steps
+        :param start: index of the first step
+        :return: (RealTimeReport) latencies and deadline misses of the steps
+        """
+        array_latency = np.empty(num_steps)
+        array_exec_time = np.empty(num_steps)
+        array_degraded = np.zeros(num_steps, dtype=bool)
+        t_first = self.clock()
+        for k in range(num_steps):
+            t_release = t_first + k * self.period
+            t_wait = t_release - self.clock()
+            if t_wait > 0:
+                self.sleep(t_wait)
+            t_start = self.clock()
+            if (self.func_degraded_step is not None) and (t_start - t_release > self.max_lag):
+                array_degraded[k] = True
+                self.func_degraded_step(start + k)
+            else:
+                self.func_step(start + k)
+            t_end = self.clock()
+            array_latency[k] = t_end - t_release
+            array_exec_time[k] = t_end - t_start
+        return RealTimeReport(period=self.period, deadline=self.deadline, array_latency=array_latency,
+                              array_exec_time=array_exec_time, array_missed=array_latency > self.deadline,
+                              array_degraded=array_degraded)
@@ -0,0 +1,229 @@
+""" spkf_tuning
+Contains the functionality for tuning the covariances of DTSolver.solveSPKF (cov_soc, cov_current, cov_process, and
+cov_sensor) using the grid or random search.
+
+All the candidate covariance settings are evaluated in a single replay of the experimental data using a batch SPKF,
+where each candidate is filtered as an independent battery cell along the leading axis of the numpy arrays. The batch
+SPKF performs the same CDKF steps as SPKF (and DTSolver.solveSPKF), with the same sigma-point weights (cdkf_weights) and
+state equation coefficients (TheveninNRC.discretize_state), so the estimates of each candidate are the same as those of
+its sequential replay, except that the first time interval is taken from array_t (solveSPKF measures it from zero,
+which only differs if array_t does not start at zero).
+
+Each candidate is scored by the root mean square error (RMSE) of the SOC (if the reference SOC is available, e.g., from
+the Coulomb counting of a well-characterized test) or of the voltage innovations (measured voltage minus the predicted
+voltage), and by the consistency of the normalized innovation squared (NIS), whose mean is one if the filter
+covariances match the actual errors. The score is
+
+score = ln(rmse / rmse_best) + consistency_weight * |ln(nis_mean)|
+
+where rmse_best is the lowest RMSE of the candidates, so that the lowest score is the best candidate.
+"""
+
+__all__ = ['TUNING_DTYPE', 'TuningResult', 'grid_search_candidates', 'random_search_candidates', 'tune_spkf']
+
+__author__ = 'Moin Ahmed'
+__copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
+__status__ = 'development'
+
+import itertools
+from dataclasses import dataclass
+from typing import Iterator, Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from src.core.battery_objects import BatteryCell
+from src.core.parameter_functions import vectorize_parameter_function
+from src.exceptions_and_warnings.exceptions import CannotPerformCalculations
+from src.models.battery import TheveninNRC
+from src.observers.kalman_filter import CDKF_H, cdkf_weights
+from src.visualization.sol_and_plot_objects import Solution
+
+COV_NAMES = ('cov_soc', 'cov_current', 'cov_process', 'cov_sensor')
+
+TUNING_DTYPE = np.dtype([('cov_soc', np.float64), ('cov_current', np.float64), ('cov_process', np.float64),
+                         ('cov_sensor', np.float64), ('rmse_soc', np.float64), ('rmse_V', np.float64),
+                         ('nis_mean', np.float64), ('score', np.float64), ('diverged', np.bool_)])
+
+
+@dataclass
+class TuningResult:
+    """
+    Stores the results of the SPKF tuning: the table of the candidates (TUNING_DTYPE) ranked by their scores (best
+    first), and the covariances of the best candidate, which can be passed to DTSolver.solveSPKF as the keyword
+    arguments.
+    """
+    table: np.ndarray
+    best: dict[str, float]
+
+
+def _to_candidates(**covs: npt.ArrayLike) -> np.ndarray:
+    arrays = np.broadcast_arrays(*(np.asarray(covs[name], dtype=float) for name in COV_NAMES))
+    candidates = np.zeros(arrays[0].size, dtype=TUNING_DTYPE)
+    for name, array_ in zip(COV_NAMES, arrays):
+        if np.any(array_ <= 0):
+            raise ValueError(f'{name} needs to be positive.')
+        candidates[name] = array_.ravel()
+    return candidates
+
+
+def grid_search_candidates(cov_soc: npt.ArrayLike, cov_current: npt.ArrayLike, cov_process: npt.ArrayLike,
+                           cov_sensor: npt.ArrayLike) -> np.ndarray:
+    """
+    Returns the candidates of all the combinations of the covariance values.
+    :param cov_soc: values of the SOC covariance
+    :param cov_current: values of the RC pair current covariance
+    :param cov_process: values of the process covariance
+    :param cov_sensor: values of the voltage sensor covariance
+    :return: (np.ndarray) candidates as the TUNING_DTYPE structured array
+    """
+    grid = np.array(list(itertools.product(*(np.atleast_1d(values) for values in
+                                              (cov_soc, cov_current, cov_process, cov_sensor)))), dtype=float)
+    return _to_candidates(**{name: grid[:, k] for k, name in enumerate(COV_NAMES)})
+
+
+def random_search_candidates(num_candidates: int, cov_soc: tuple[float, float], cov_current: tuple[float, float],
+                             cov_process: tuple[float, float], cov_sensor: tuple[float, float],
+                             seed: Optional[Union[int, np.random.Generator]] = None) -> np.ndarray:
+    """
+    Returns the candidates with the covariances sampled log-uniformly between their bounds.
+    :param num_candidates: number of candidates
+    :param cov_soc: lower and upper bounds of the SOC covariance
+    :param cov_current: lower and upper bounds of the RC pair current covariance
+    :param cov_process: lower and upper bounds of the process covariance
+    :param cov_sensor: lower and upper bounds of the voltage sensor covariance
+    :param seed: seed or the numpy random Generator
+    :return: (np.ndarray) candidates as the TUNING_DTYPE structured array
+    """
+    rng = np.random.default_rng(seed)
+    bounds = np.log(np.array([cov_soc, cov_current, cov_process, cov_sensor], dtype=float))
+    samples = np.exp(rng.uniform(bounds[:, 0], bounds[:, 1], size=(num_candidates, 4)))
+    return _to_candidates(**{name: samples[:, k] for k, name in enumerate(COV_NAMES)})
+
+
+def _iter_batch_spkf(battery_cell: BatteryCell, sol_exp: Solution, candidates: np.ndarray) -> \
+        Iterator[tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Replays the experimental data with the batch SPKF and yields, for each time step k (from 1), the filtered states of
+    the candidates, shape (M, Nx), their voltage innovations and innovation variances, shape (M,), and their divergence
+    flags. The sigma-point weights and the state equation coefficients are the same as those of SPKF and
+    DTSolver.solveSPKF (see cdkf_weights and TheveninNRC.discretize_state).
+    """
+    param = battery_cell.param.compile()
+    func_SOC_OCV = vectorize_parameter_function(param.func_SOC_OCV, name='func_SOC_OCV')
+    R1, C1 = np.atleast_1d(param.R1), np.atleast_1d(param.C1)
+    array_t = np.asarray(sol_exp.array_t, dtype=float)
+    array_I = np.asarray(sol_exp.array_I, dtype=float)
+    array_y = np.asarray(sol_exp.array_V, dtype=float)
+
+    # CDKF weights and the dimensions, as in SPKF
+    M, Nx = candidates.size, 1 + R1.size
+    L = Nx + 2  # augmented with the process and sensor noise
+    gamma = CDKF_H
+    alpha = cdkf_weights(L=L)
+
+    # discrete-time coefficients of the state equation of each time step
+    m1, m2 = TheveninNRC.discretize_state(dt=np.diff(array_t), R=R1, C=C1, Q=param.Q)
+
+    x_init = np.append(battery_cell.soc, np.zeros(Nx - 1))
+    x = np.tile(x_init, (M, 1))
+    P = np.zeros((M, Nx, Nx))
+    P[:, 0, 0] = candidates['cov_soc']
+    P[:, range(1, Nx), range(1, Nx)] = candidates['cov_current'][:, np.newaxis]
+    sqrt_w, sqrt_v = np.sqrt(candidates['cov_process']), np.sqrt(candidates['cov_sensor'])
+    sqrt_aug = np.zeros((M, L, L))
+    sqrt_aug[:, Nx, Nx], sqrt_aug[:, Nx + 1, Nx + 1] = sqrt_w, sqrt_v
+
+    diverged = np.zeros(M, dtype=bool)
+    for k in range(1, array_t.size):
+        # sigma points of the augmented state (with zero mean process and sensor noise)
+        try:
+            sqrt_aug[:, :Nx, :Nx] = np.linalg.cholesky(P)
+        except np.linalg.LinAlgError:
+            # the candidates with the non-positive-definite covariances are flagged and then filtered with the dummy
+            # state so that the other candidates can continue
+            diverged |= ~np.all(np.isfinite(P.reshape(M, -1)), axis=1) | ~np.all(np.isfinite(x), axis=1)
+            P[diverged], x[diverged] = np.eye(Nx), x_init
+            diverged |= ~(np.linalg.eigvalsh(P)[:, 0] > 0)
+            P[diverged], x[diverged] = np.eye(Nx), x_init
+            sqrt_aug[:, :Nx, :Nx] = np.linalg.cholesky(P)
+        X = np.concatenate([np.zeros((M, L, 1)), sqrt_aug, -sqrt_aug], axis=2) * gamma
+        X[:, :Nx, :] += x[:, :, np.newaxis]
+
+        # prediction of the state and the output (the output is predicted with the zero input, as in SPKF.predict)
+        Xx = m1[k - 1][:, np.newaxis] * X[:, :Nx, :] + m2[k - 1][:, np.newaxis] * (array_I[k - 1] + X[:, Nx:Nx + 1, :])
+        x_pred = Xx @ alpha
+        Xs = Xx - x_pred[:, :, np.newaxis]
+        P_pred = (Xs * alpha) @ Xs.swapaxes(1, 2)
+        Y = func_SOC_OCV(Xx[:, 0, :]) - np.einsum('j,mjs->ms', R1, Xx[:, 1:, :]) + X[:, Nx + 1, :]
+        y_pred = Y @ alpha
+        Ys = Y - y_pred[:, np.newaxis]
+
+        # measurement update
+        S = np.einsum('ms,s,ms->m', Ys, alpha, Ys)
+        gain = np.einsum('mis,s,ms->mi', Xs, alpha, Ys) / S[:, np.newaxis]
+        e = array_y[k] - y_pred
+        x = x_pred + gain * e[:, np.newaxis]
+        P = P_pred - S[:, np.newaxis, np.newaxis] * gain[:, :, np.newaxis] * gain[:, np.newaxis, :]
+        yield k, x, e, S, diverged
+
+
+def _run_batch_spkf(battery_cell: BatteryCell, sol_exp: Solution, candidates: np.ndarray,
+                    array_soc_ref: Optional[np.ndarray]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Replays the experimental data with the batch SPKF and returns the SOC RMSE (nan without the reference SOC), the
+    voltage innovation RMSE, the mean NIS, and the divergence flag of each candidate.
+    """
+    M = candidates.size
+    x, diverged = np.full((M, 1), battery_cell.soc), np.zeros(M, dtype=bool)
+    sum_e_soc, sum_e_V, sum_nis = np.zeros(M), np.zeros(M), np.zeros(M)
+    for k, x, e, S, diverged in _iter_batch_spkf(battery_cell=battery_cell, sol_exp=sol_exp, candidates=candidates):
+        sum_e_V += e ** 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sum_nis += e ** 2 / S
+        if array_soc_ref is not None:
+            sum_e_soc += (x[:, 0] - array_soc_ref[k]) ** 2
+    num_steps = max(np.size(sol_exp.array_t) - 1, 1)
+    diverged = diverged | ~np.all(np.isfinite(x), axis=1)
+    rmse_soc = np.sqrt(sum_e_soc / num_steps) if array_soc_ref is not None else np.full(M, np.nan)
+    return rmse_soc, np.sqrt(sum_e_V / num_steps), sum_nis / num_steps, diverged
+
+
+def tune_spkf(battery_cell: BatteryCell, sol_exp: Solution, candidates: np.ndarray,
+              array_soc_ref: Optional[npt.ArrayLike] = None, consistency_weight: float = 0.5) -> TuningResult:
+    """
+    Evaluates the candidate covariance settings of DTSolver.solveSPKF on the experimental data and ranks them. Unlike
+    solveSPKF, the whole experimental data is replayed (the voltage cut-offs are not checked).
+    :param battery_cell: battery cell with the parameters and the initial SOC of the experiment
+    :param sol_exp: Solution object from the experimental data (array_t, array_I, and array_V)
+    :param candidates: candidate covariances, e.g., from grid_search_candidates or random_search_candidates
+    :param array_soc_ref: reference SOC at the experimental time values. If provided, the candidates are scored by the
+    SOC RMSE, and otherwise by the voltage innovation RMSE.
+    :param consistency_weight: weight of the NIS consistency in the score
+    :return: (TuningResult) ranked table and the best covariances
+    """
+    if battery_cell.param.is_tabulated:
+        raise CannotPerformCalculations('The SPKF tuning needs constant R0, R1, and C1.')
+    candidates = _to_candidates(**{name: candidates[name] for name in COV_NAMES})
+    if candidates.size == 0:
+        raise ValueError('At least one candidate is required.')
+    if array_soc_ref is not None:
+        array_soc_ref = np.asarray(array_soc_ref, dtype=float)
+        if array_soc_ref.shape != np.shape(sol_exp.array_t):
+            raise ValueError('array_soc_ref needs to have the same size as array_t of sol_exp.')
+
+    table = candidates
+    table['rmse_soc'], table['rmse_V'], table['nis_mean'], table['diverged'] = \
+        _run_batch_spkf(battery_cell=battery_cell, sol_exp=sol_exp, candidates=candidates,
+                        array_soc_ref=array_soc_ref)
+    array_rmse = table['rmse_V'] if array_soc_ref is None else table['rmse_soc']
+    is_valid = (~table['diverged']) & np.isfinite(array_rmse) & (array_rmse > 0) & (table['nis_mean'] > 0)
+    table['score'] = np.inf
+    if np.any(is_valid):
+        rmse_best = np.min(array_rmse[is_valid])
+        table['score'][is_valid] = np.log(array_rmse[is_valid] / rmse_best) + \
+            consistency_weight * np.abs(np.log(table['nis_mean'][is_valid]))
+    table = table[np.argsort(table['score'], kind='stable')]
+    if not np.isfinite(table['score'][0]):
+        raise CannotPerformCalculations('The SPKF diverged for all the candidates.')
+    return TuningResult(table=table, best={name: float(table[name][0]) for name in COV_NAMES})
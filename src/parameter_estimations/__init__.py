@@ -0,0 +1,10 @@
+"""
+Package-header for the src/parameter_estimations namespace.
+Provides classes and functionality for estimating the battery cell parameters from the experimental data
+"""
+
+__all__ = ['ocv_fit']
+
+__author__ = 'Moin Ahmed'
+__copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
+__status__ = 'development'
@@ -0,0 +1,364 @@
+""" ocv_fit
+Contains the classes and functionality for fitting the SOC-OCV relationship from the low-rate (pseudo-OCV) test data.
+
+The SOC-OCV data are fitted using either a Chebyshev series (ChebyshevOCV) or a monotone piecewise-cubic (PCHIP) table
+on a uniform SOC grid (MonotoneCubicOCV). Unlike the monomial polynomials (e.g., in parameter_sets/Calce123.py), the
+Chebyshev series is well-conditioned over the whole SOC range, and the piecewise-cubic table is monotone by
+construction. The fitted curves are callable, array-safe (see parameter_functions) objects with precomputed
+coefficients that can be used as func_SOC_OCV of the ParameterSet. They can be saved to (and loaded from) a .npz data
+file or written into a parameter set module.
+"""
+
+__all__ = ['OCVCurve', 'ChebyshevOCV', 'MonotoneCubicOCV', 'extract_ocv_data', 'fit_chebyshev',
+           'fit_monotone_cubic', 'load_ocv_curve', 'write_parameter_set_module']
+
+__author__ = 'Moin Ahmed'
+__copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
+__status__ = 'development'
+
+import os
+import warnings
+from typing import Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+import scipy.integrate
+import scipy.interpolate
+
+from src.exceptions_and_warnings.warnings import NonMonotoneOCVWarning
+from src.visualization.sol_and_plot_objects import Solution
+
+_MAX_POWER_SERIES_GROWTH = 1e3  # see ChebyshevOCV
+
+
+class OCVCurve:
+    """
+    Base class for the fitted SOC-OCV curves. The curve is called as curve(soc), where the SOC is a float or a numpy
+    array. Outside the fitted SOC range, the OCV values at the range boundaries are used.
+    """
+    array_safe = True  # see parameter_functions
+    kind = None
+
+    def __init__(self, soc_min: float, soc_max: float) -> None:
+        if not soc_min < soc_max:
+            raise ValueError('soc_min needs to be less than soc_max.')
+        self.soc_min = float(soc_min)
+        self.soc_max = float(soc_max)
+
+    def __call__(self, soc: Union[float, npt.ArrayLike]) -> Union[float, np.ndarray]:
+        raise NotImplementedError
+
+    def is_monotone(self, num_points: int = 10001) -> bool:
+        """
+        Checks that the OCV is non-decreasing with the SOC on a dense grid over the fitted SOC range.
+        :param num_points: number of the SOC grid points
+        :return: (bool) True if the OCV is non-decreasing
+        """
+        return bool(np.all(np.diff(self(np.linspace(self.soc_min, self.soc_max, num_points))) >= 0.0))
+
+    def check_monotone(self, num_points: int = 10001) -> None:
+        """
+        Raises a NonMonotoneOCVWarning if the OCV is not non-decreasing with the SOC (see is_monotone).
+        :param num_points: number of the SOC grid points
+        """
+        if not self.is_monotone(num_points=num_points):
+            warnings.warn(f'The fitted OCV ({self!r}) is not monotone over the SOC range [{self.soc_min}, '
+                          f'{self.soc_max}].', NonMonotoneOCVWarning, stacklevel=2)
+
+    def _data(self) -> dict:
+        """
+        Returns the arrays that define the curve.
+        """
+        raise NotImplementedError
+
+    def save(self, filepath: str) -> None:
+        """
+        Saves the curve to a .npz data file (see load_ocv_curve).
+        :param filepath: path of the .npz file
+        """
+        np.savez(filepath, kind=self.kind, soc_min=self.soc_min, soc_max=self.soc_max, **self._data())
+
+    def to_source(self) -> str:
+        """
+        Returns the Python expression that constructs the curve, e.g., for the parameter set modules.
+        """
+        args = ', '.join(f'{name}={np.asarray(value).tolist()!r}' for name, value in self._data().items())
+        return f'{type(self).__name__}({args}, soc_min={self.soc_min!r}, soc_max={self.soc_max!r})'
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return (self.soc_min, self.soc_max) == (other.soc_min, other.soc_max) and \
+            all(np.array_equal(value, other._data()[name]) for name, value in self._data().items())
+
+    def __hash__(self) -> int:
+        return hash((self.kind, self.soc_min, self.soc_max) +
+                    tuple(np.asarray(value).tobytes() for value in self._data().values()))
+
+
+class ChebyshevOCV(OCVCurve):
+    """
+    OCV as a Chebyshev series in the SOC mapped from [soc_min, soc_max] to [-1, 1]. For the low degrees, the series is
+    converted to the power series in the mapped SOC, which is evaluated with the Horner scheme. Since the mapped SOC is
+    within [-1, 1], the rounding errors of the power series stay small as long as its coefficients do not grow much
+    larger than the Chebyshev coefficients. Otherwise (e.g., for the high degrees), the Clenshaw recurrence is used.
+    """
+    kind = 'chebyshev'
+
+    def __init__(self, coeffs: npt.ArrayLike, soc_min: float = 0.0, soc_max: float = 1.0) -> None:
+        """
+        Class constructor.
+        :param coeffs: Chebyshev coefficients, from the lowest to the highest degree
+        :param soc_min: lower bound of the fitted SOC range
+        :param soc_max: upper bound of the fitted SOC range
+        """
+        super().__init__(soc_min=soc_min, soc_max=soc_max)
+        self.coeffs = np.array(coeffs, dtype=float)
+        if (self.coeffs.ndim != 1) or (self.coeffs.size < 2):
+            raise ValueError('coeffs needs to be a 1-D array with at least two values.')
+        self._scale = 2.0 / (self.soc_max - self.soc_min)
+        self._offset = -(self.soc_max + self.soc_min) / (self.soc_max - self.soc_min)
+        coeffs_power = np.polynomial.chebyshev.cheb2poly(self.coeffs)
+        if np.sum(np.abs(coeffs_power)) <= _MAX_POWER_SERIES_GROWTH * np.sum(np.abs(self.coeffs)):
+            self._list_power = coeffs_power[::-1].tolist()  # from the highest degree for the Horner scheme
+        else:
+            self._list_power = None
+        self._list_coeffs = self.coeffs[:0:-1].tolist()  # reversed, without the constant term, for the Clenshaw
+        self._c0 = float(self.coeffs[0])
+
+    @property
+    def degree(self) -> int:
+        return self.coeffs.size - 1
+
+    def __repr__(self) -> str:
+        return f'ChebyshevOCV(degree={self.degree}, soc_min={self.soc_min}, soc_max={self.soc_max})'
+
+    def _data(self) -> dict:
+        return {'coeffs': self.coeffs}
+
+    def __call__(self, soc: Union[float, npt.ArrayLike]) -> Union[float, np.ndarray]:
+        if isinstance(soc, (float, int)):
+            x = soc * self._scale + self._offset
+            x = -1.0 if x < -1.0 else (1.0 if x > 1.0 else x)
+            if self._list_power is not None:
+                y = 0.0
+                for c in self._list_power:
+                    y = y * x + c
+                return y
+            x2 = 2.0 * x
+            b1, b2 = 0.0, 0.0
+            for c in self._list_coeffs:
+                b1, b2 = x2 * b1 - b2 + c, b1
+            return self._c0 + x * b1 - b2
+        x = np.clip(np.asarray(soc, dtype=float) * self._scale + self._offset, -1.0, 1.0)
+        if self._list_power is None:
+            return np.polynomial.chebyshev.chebval(x, self.coeffs)
+        y = np.full_like(x, self._list_power[0])
+        for c in self._list_power[1:]:
+            y *= x
+            y += c
+        return y
+
+
+class MonotoneCubicOCV(OCVCurve):
+    """
+    OCV as a piecewise-cubic Hermite (PCHIP) interpolant of the OCV values on a uniform SOC grid. The interpolant is
+    monotone between the grid points if the OCV values are. Since the grid is uniform, the interval containing the SOC
+    is found with index arithmetic, and the cubic of the interval is evaluated with the precomputed coefficients.
+    """
+    kind = 'monotone_cubic'
+
+    def __init__(self, array_ocv: npt.ArrayLike, soc_min: float = 0.0, soc_max: float = 1.0,
+                 array_docvdsoc: Optional[npt.ArrayLike] = None) -> None:
+        """
+        Class constructor.
+        :param array_ocv: OCV values [V] at the uniform SOC grid between soc_min and soc_max
+        :param soc_min: SOC at the first grid point
+        :param soc_max: SOC at the last grid point
+        :param array_docvdsoc: OCV derivatives with respect to the SOC [V] at the grid points. If None, they are
+        calculated using the PCHIP (Fritsch-Carlson) scheme.
+        """
+        super().__init__(soc_min=soc_min, soc_max=soc_max)
+        self.array_ocv = np.array(array_ocv, dtype=float)
+        if (self.array_ocv.ndim != 1) or (self.array_ocv.size < 2):
+            raise ValueError('array_ocv needs to be a 1-D array with at least two values.')
+        self.array_soc = np.linspace(self.soc_min, self.soc_max, self.array_ocv.size)
+        if array_docvdsoc is None:
+            array_docvdsoc = scipy.interpolate.PchipInterpolator(self.array_soc, self.array_ocv).derivative()(
+                self.array_soc)
+        self.array_docvdsoc = np.array(array_docvdsoc, dtype=float)
+        if self.array_docvdsoc.shape != self.array_ocv.shape:
+            raise ValueError('array_docvdsoc needs to have the same shape as array_ocv.')
+
+        # coefficients of the cubic in the local coordinate, t in [0, 1], of each interval
+        dsoc = (self.soc_max - self.soc_min) / (self.array_ocv.size - 1)
+        y0, y1 = self.array_ocv[:-1], self.array_ocv[1:]
+        m0, m1 = dsoc * self.array_docvdsoc[:-1], dsoc * self.array_docvdsoc[1:]
+        self._coeffs = np.column_stack([y0, m0, 3 * (y1 - y0) - 2 * m0 - m1, 2 * (y0 - y1) + m0 + m1])
+        self._list_coeffs = self._coeffs.tolist()  # for the scalar path
+        self._num_intervals = self.array_ocv.size - 1
+        self._inv_dsoc = 1 / dsoc
+
+    def __repr__(self) -> str:
+        return f'MonotoneCubicOCV({self.array_ocv.size} points, soc_min={self.soc_min}, soc_max={self.soc_max})'
+
+    def _data(self) -> dict:
+        return {'array_ocv': self.array_ocv, 'array_docvdsoc': self.array_docvdsoc}
+
+    def __call__(self, soc: Union[float, npt.ArrayLike]) -> Union[float, np.ndarray]:
+        if isinstance(soc, (float, int)):
+            x = (soc - self.soc_min) * self._inv_dsoc
+            if x <= 0.0:
+                return self._list_coeffs[0][0]
+            if x >= self._num_intervals:
+                return float(self.array_ocv[-1])
+            i = int(x)
+            t = x - i
+            c0, c1, c2, c3 = self._list_coeffs[i]
+            return c0 + t * (c1 + t * (c2 + t * c3))
+        x = np.clip((np.asarray(soc, dtype=float) - self.soc_min) * self._inv_dsoc, 0.0, self._num_intervals)
+        i = np.minimum(x.astype(int), self._num_intervals - 1)
+        t = x - i
+        c = self._coeffs[i]
+        return c[..., 0] + t * (c[..., 1] + t * (c[..., 2] + t * c[..., 3]))
+
+
+def load_ocv_curve(filepath: str) -> OCVCurve:
+    """
+    Loads the curve saved using OCVCurve.save.
+    :param filepath: path of the .npz file
+    :return: (OCVCurve) ChebyshevOCV or MonotoneCubicOCV object
+    """
+    with np.load(filepath) as data:
+        kind = str(data['kind'])
+        soc_min, soc_max = float(data['soc_min']), float(data['soc_max'])
+        if kind == ChebyshevOCV.kind:
+            return ChebyshevOCV(coeffs=data['coeffs'], soc_min=soc_min, soc_max=soc_max)
+        if kind == MonotoneCubicOCV.kind:
+            return MonotoneCubicOCV(array_ocv=data['array_ocv'], soc_min=soc_min, soc_max=soc_max,
+                                    array_docvdsoc=data['array_docvdsoc'])
+    raise ValueError(f'Unknown OCV curve kind: {kind}.')
+
+
+def extract_ocv_data(sol: Solution, Q: Optional[float] = None, soc_init: Optional[float] = None,
+                     R0: float = 0.0) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Extracts the SOC-OCV data from the low-rate (pseudo-OCV) test results. If the Solution object does not contain the
+    SOC, it is calculated using the coulomb counting, with the negative currents discharging the battery cell (as in
+    the experimental data files). The OCV is approximated as the terminal voltage corrected for the ohmic overpotential.
+    :param sol: Solution object with the test results
+    :param Q: battery cell capacity [Ahr]. Required if the Solution object does not contain the SOC.
+    :param soc_init: battery cell SOC at the start of the test. Required if the Solution object does not contain the
+    SOC.
+    :param R0: ohmic resistance [ohm] used for the correction of the terminal voltage
+    :return: (tuple) arrays of the SOC and the OCV [V]
+    """
+    array_V = np.asarray(sol.array_V, dtype=float)
+    array_I = np.asarray(sol.array_I, dtype=float) if np.size(sol.array_I) > 0 else np.zeros_like(array_V)
+    if np.size(sol.array_soc) > 0:
+        array_soc = np.asarray(sol.array_soc, dtype=float)
+    else:
+        if (Q is None) or (soc_init is None):
+            raise ValueError('Q and soc_init are required when the Solution does not contain the SOC.')
+        array_soc = soc_init + scipy.integrate.cumulative_trapezoid(array_I, sol.array_t, initial=0.0) / (3600 * Q)
+    return array_soc, array_V - R0 * array_I
+
+
+def fit_chebyshev(array_soc: npt.ArrayLike, array_ocv: npt.ArrayLike, degree: int = 12,
+                  soc_min: Optional[float] = None, soc_max: Optional[float] = None,
+                  check_monotone: bool = True) -> ChebyshevOCV:
+    """
+    Fits the SOC-OCV data with a Chebyshev series using least squares.
+    :param array_soc: SOC data
+    :param array_ocv: OCV data [V]
+    :param degree: degree of the Chebyshev series
+    :param soc_min: lower bound of the SOC range. By default, the minimum SOC of the data.
+    :param soc_max: upper bound of the SOC range. By default, the maximum SOC of the data.
+    :param check_monotone: if True, a NonMonotoneOCVWarning is raised if the fitted OCV is not monotone
+    :return: (ChebyshevOCV) fitted curve
+    """
+    array_soc, array_ocv = np.asarray(array_soc, dtype=float), np.asarray(array_ocv, dtype=float)
+    soc_min = float(np.min(array_soc)) if soc_min is None else soc_min
+    soc_max = float(np.max(array_soc)) if soc_max is None else soc_max
+    series = np.polynomial.chebyshev.Chebyshev.fit(array_soc, array_ocv, deg=degree, domain=[soc_min, soc_max])
+    curve = ChebyshevOCV(coeffs=series.coef, soc_min=soc_min, soc_max=soc_max)
+    if check_monotone:
+        curve.check_monotone()
+    return curve
+
+
+def _isotonic(array_y: np.ndarray, array_w: np.ndarray) -> np.ndarray:
+    """
+    Returns the non-decreasing weighted least-squares fit to the values (pool-adjacent-violators algorithm).
+    """
+    list_y, list_w, list_n = [], [], []
+    for y, w in zip(array_y.tolist(), array_w.tolist()):
+        list_y.append(y)
+        list_w.append(w)
+        list_n.append(1)
+        while len(list_y) > 1 and list_y[-2] > list_y[-1]:
+            y1, w1, n1 = list_y.pop(), list_w.pop(), list_n.pop()
+            w_sum = list_w[-1] + w1
+            list_y[-1] = (list_y[-1] * list_w[-1] + y1 * w1) / w_sum
+            list_w[-1] = w_sum
+            list_n[-1] += n1
+    return np.repeat(list_y, list_n)
+
+
+def fit_monotone_cubic(array_soc: npt.ArrayLike, array_ocv: npt.ArrayLike, num_points: int = 101,
+                       soc_min: Optional[float] = None, soc_max: Optional[float] = None) -> MonotoneCubicOCV:
+    """
+    Fits the SOC-OCV data with the monotone piecewise-cubic table. The data are fitted with a line in each of the bins
+    centred on the uniform SOC grid points (the empty bins are linearly interpolated), the fitted values are made
+    non-decreasing using the isotonic regression, and the PCHIP interpolant of the resulting values is used.
+    :param array_soc: SOC data
+    :param array_ocv: OCV data [V]
+    :param num_points: number of the SOC grid points
+    :param soc_min: SOC of the first grid point. By default, the minimum SOC of the data.
+    :param soc_max: SOC of the last grid point. By default, the maximum SOC of the data.
+    :return: (MonotoneCubicOCV) fitted curve
+    """
+    if num_points < 2:
+        raise ValueError('num_points needs to be at least two.')
+    array_soc, array_ocv = np.asarray(array_soc, dtype=float), np.asarray(array_ocv, dtype=float)
+    soc_min = float(np.min(array_soc)) if soc_min is None else soc_min
+    soc_max = float(np.max(array_soc)) if soc_max is None else soc_max
+    grid = np.linspace(soc_min, soc_max, num_points)
+
+    # local linear least-squares fit in each bin, evaluated at the grid point, which (unlike the bin average) is not
+    # biased by the slope of the OCV in the half-bins at the ends of the SOC range
+    index = np.clip(np.rint((array_soc - soc_min) / (grid[1] - grid[0])).astype(int), 0, num_points - 1)
+    dx = array_soc - grid[index]
+    n = np.bincount(index, minlength=num_points).astype(float)
+    s_x, s_xx = np.bincount(index, dx, num_points), np.bincount(index, dx * dx, num_points)
+    s_y, s_xy = np.bincount(index, array_ocv, num_points), np.bincount(index, dx * array_ocv, num_points)
+    filled = n > 0
+    if np.count_nonzero(filled) < 2:
+        raise ValueError('The data need to cover at least two SOC grid points.')
+    det = n * s_xx - s_x * s_x
+    is_linear = det > 1e-12 * np.maximum(n * s_xx, 1e-300)
+    array_fit = np.divide(s_y, n, out=np.zeros(num_points), where=filled)
+    array_fit[is_linear] = (s_xx * s_y - s_x * s_xy)[is_linear] / det[is_linear]
+    array_fit = np.interp(grid, grid[filled], array_fit[filled])
+
+    array_weight = np.where(filled, n, 1.0)
+    return MonotoneCubicOCV(array_ocv=_isotonic(array_fit, array_weight), soc_min=soc_min, soc_max=soc_max)
+
+
+def write_parameter_set_module(filepath: str, ocv_curve: OCVCurve, description: str = '', **params: float) -> None:
+    """
+    Writes the parameter set module (similar to the ones in the parameter_sets directory) with the fitted OCV curve as
+    func_SOC_OCV.
+    :param filepath: path of the Python module
+    :param ocv_curve: fitted OCV curve
+    :param description: description of the parameter set written in the module docstring
+    :param params: other battery cell parameters written as module-level floats (e.g., R0=0.225, Q=1.1)
+    """
+    name = os.path.splitext(os.path.basename(filepath))[0]
+    lines = ['"""' + name, description, '"""', '',
+             f'from src.parameter_estimations.ocv_fit import {type(ocv_curve).__name__}', '']
+    if params:
+        lines += [f'{param_name}: float = {float(value)!r}' for param_name, value in params.items()] + ['']
+    lines += ['', f'func_SOC_OCV = {ocv_curve.to_source()}', '']
+    with open(filepath, 'w') as f:
+        f.write('\n'.join(lines))
@@ -3,7 +3,7 @@ Package-header for the src/solvers namespace.
 Provides classes and functionality for solving the ECM simulations
 """
 
-__all__ = ['ecm_solvers', 'thermal_solvers']
+__all__ = ['ecm_solvers', 'thermal_solvers', 'pack_solvers', 'solution_cache', 'aging_solvers']
 
 __author__ = 'Moin Ahmed'
 __copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
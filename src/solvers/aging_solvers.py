@@ -0,0 +1,294 @@
+""" aging_solvers
+Contains the classes and functionality for the cycle-life (aging) simulations, where the battery cell capacity and R0
+are degraded between the cycles using a degradation law, and only the summary of each cycle is kept.
+
+Each cycle is a sequence of cycling steps that is solved with the fastest available engine. The constant-current
+(discharge, charge, and rest) steps of the isothermal simulations with constant parameters and array-safe parameter
+functions (see parameter_functions) are solved in closed form over all the time steps at once (see
+solve_constant_current_step). The other steps (e.g., the CustomStep) are solved using the DTSolver.
+"""
+
+__all__ = ['DegradationLaw', 'PowerLawDegradation', 'AgingSolver', 'AgingSolution', 'solve_constant_current_step',
+           'CYCLE_SUMMARY_DTYPE']
+
+__author__ = 'Moin Ahmed'
+__copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
+__status__ = 'development'
+
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+import numpy as np
+
+from src.calc_helpers import constants
+from src.core.battery_objects import BatteryCell, CompiledParameterSet
+from src.core.cycling_steps import BaseCyclingStep, CustomStep
+from src.exceptions_and_warnings.exceptions import CannotPerformCalculations
+from src.models.battery import TheveninNRC
+from src.solvers.ecm_solvers import DTSolver
+from src.visualization.sol_and_plot_objects import Solution
+
+CYCLE_SUMMARY_DTYPE = np.dtype([
+    ('cycle', np.int64),  # cycle number, starting from 1
+    ('t', np.float64),  # total time at the end of the cycle [s]
+    ('cycle_time', np.float64),  # duration of the cycle [s]
+    ('Q', np.float64),  # battery cell capacity during the cycle [A hr]
+    ('R0', np.float64),  # R0 during the cycle [ohms]
+    ('cap_charge', np.float64),  # charge capacity [A hr]
+    ('cap_discharge', np.float64),  # discharge capacity [A hr]
+    ('energy_charge', np.float64),  # charge energy [W hr]
+    ('energy_discharge', np.float64),  # discharge energy [W hr]
+    ('V_end_of_charge', np.float64),  # terminal voltage at the end of the last charge step [V]
+    ('V_end_of_discharge', np.float64),  # terminal voltage at the end of the last discharge step [V]
+    ('soc', np.float64),  # battery cell SOC at the end of the cycle
+])
+
+
+class DegradationLaw:
+    """
+    Base class for the degradation laws. The law returns the remaining capacity fraction and the R0 growth factor, both
+    relative to the values at the start of the aging simulation, from the total (calendar) time and the total charge
+    throughput.
+    """
+    def __call__(self, t: float, charge_throughput: float, temp: Optional[float] = None) -> tuple[float, float]:
+        """
+        :param t: total time [s]
+        :param charge_throughput: total charge throughput (charge and discharge) [A hr]
+        :param temp: battery cell temperature [K]
+        :return: (tuple) remaining capacity fraction and R0 growth factor
+        """
+        raise NotImplementedError
+
+
+class PowerLawDegradation(DegradationLaw):
+    """
+    Semi-empirical degradation law with the calendar and cycle aging terms as the power laws of the time [days] and the
+    charge throughput [A hr], respectively:
+
+    Q / Q_init = 1 - k_cal_Q * f(T) * days ** z_cal - k_cyc_Q * Ah ** z_cyc
+    R0 / R0_init = 1 + k_cal_R0 * f(T) * days ** z_cal + k_cyc_R0 * Ah ** z_cyc
+
+    where f(T) = exp(-Ea / R * (1 / T - 1 / T_ref)) is the Arrhenius factor of the calendar aging (one if Ea is zero or
+    the temperature is not available).
+    """
+    def __init__(self, k_cal_Q: float = 0.0, k_cyc_Q: float = 0.0, k_cal_R0: float = 0.0, k_cyc_R0: float = 0.0,
+                 z_cal: float = 0.5, z_cyc: float = 1.0, Ea: float = 0.0, T_ref: float = 298.15) -> None:
+        """
+        Class constructor.
+        :param k_cal_Q: calendar capacity fade coefficient [1/day^z_cal]
+        :param k_cyc_Q: cycle capacity fade coefficient [1/(A hr)^z_cyc]
+        :param k_cal_R0: calendar R0 growth coefficient [1/day^z_cal]
+        :param k_cyc_R0: cycle R0 growth coefficient [1/(A hr)^z_cyc]
+        :param z_cal: exponent of the time
+        :param z_cyc: exponent of the charge throughput
+        :param Ea: activation energy of the calendar aging [J/mol]
+        :param T_ref: reference temperature of the calendar aging coefficients [K]
+        """
+        self.k_cal_Q, self.k_cyc_Q = k_cal_Q, k_cyc_Q
+        self.k_cal_R0, self.k_cyc_R0 = k_cal_R0, k_cyc_R0
+        self.z_cal, self.z_cyc = z_cal, z_cyc
+        self.Ea, self.T_ref = Ea, T_ref
+
+    def __call__(self, t: float, charge_throughput: float, temp: Optional[float] = None) -> tuple[float, float]:
+        f_temp = 1.0
+        if (self.Ea != 0.0) and (temp is not None):
+            f_temp = float(np.exp(-self.Ea / constants.Constants.R * (1 / temp - 1 / self.T_ref)))
+        calendar = f_temp * (t / 86400) ** self.z_cal
+        cycle = charge_throughput ** self.z_cyc
+        return 1 - self.k_cal_Q * calendar - self.k_cyc_Q * cycle, 1 + self.k_cal_R0 * calendar + self.k_cyc_R0 * cycle
+
+
+def solve_constant_current_step(param: CompiledParameterSet, soc_init: float, cycling_step: BaseCyclingStep,
+                                dt: float) -> Solution:
+    """
+    Solves the constant-current (discharge, charge, or rest) cycling step of the isothermal simulation with constant
+    parameters. Since the current is constant, the SOC is linear in time and the currents through the RC pairs are
+    i_R[k] = i_app * (1 - a ** k), so that the terminal voltage is evaluated for many time steps at once, and the time
+    step of the cut-off is then found. The Solution is the same as that of the DTSolver.solve (up to rounding).
+    :param param: compiled parameters with array-safe func_SOC_OCV
+    :param soc_init: battery cell SOC at the start of the cycling step
+    :param cycling_step: DischargeStep, ChargeStep, or RestStep object
+    :param dt: time step [s]
+    :return: (Solution) Solution object
+    """
+    step_name = cycling_step.cycle_step_name
+    i_app = float(cycling_step.get_current(step_name=step_name, t=0.0))
+    dsoc = dt * param.func_eta(i_app) * i_app / (3600 * param.Q)
+    R = np.atleast_1d(param.R1)
+    a = TheveninNRC.discretize(dt=dt, R=R, C=np.atleast_1d(param.C1))[0]
+    ocv_init = param.func_SOC_OCV(soc_init)
+
+    # the first block of the time steps ends where the SOC reaches zero or one, which bounds most of the cycling steps
+    if step_name == 'rest':
+        num_steps = int(np.floor(cycling_step.rest_time / dt)) + 1
+    elif dsoc == 0.0:
+        raise CannotPerformCalculations(f'The {step_name} step with zero current does not reach its cut-off voltage.')
+    else:
+        num_steps = int(np.ceil(((1.0 - soc_init) if dsoc < 0 else soc_init) / abs(dsoc))) + 1
+    k_start, num_steps = 0, min(max(num_steps, 16), 4096)
+    list_k, list_soc, list_v = [], [], []
+    while True:
+        array_k = np.arange(k_start + 1, k_start + num_steps + 1)
+        array_soc = soc_init - array_k * dsoc
+        if i_app == 0.0:  # the OCV does not change during the rest
+            array_v = np.full(array_k.size, ocv_init)
+        else:
+            array_i_R = i_app * (1 - a ** array_k[:, np.newaxis])
+            array_v = param.func_SOC_OCV(array_soc) - np.sum(R * array_i_R, axis=-1) - param.R0 * i_app
+        if step_name == 'rest':
+            array_done = array_k * dt > cycling_step.rest_time
+        elif step_name == 'charge':
+            array_done = array_v > cycling_step.V_max
+        else:
+            array_done = array_v < cycling_step.V_min
+        index = np.flatnonzero(array_done)
+        if index.size > 0:
+            list_k.append(array_k[:index[0] + 1])
+            list_soc.append(array_soc[:index[0] + 1])
+            list_v.append(array_v[:index[0] + 1])
+            break
+        if abs(array_soc[-1] - 0.5) > 1.0:
+            raise CannotPerformCalculations(f'The {step_name} step does not reach its cut-off voltage.')
+        list_k.append(array_k)
+        list_soc.append(array_soc)
+        list_v.append(array_v)
+        k_start += num_steps
+        num_steps *= 2
+
+    array_k = np.concatenate(list_k)
+    array_cap = (array_k * (abs(i_app) * dt / 3600)) if i_app < 0 else np.zeros(array_k.size)  # as in DTSolver
+    return Solution(array_t=np.concatenate(([0.0], array_k * dt)),
+                    array_I=np.concatenate(([0.0], np.full(array_k.size, -i_app))),
+                    array_soc=np.concatenate(([soc_init], *list_soc)),
+                    array_V=np.concatenate(([ocv_init], *list_v)),
+                    array_cap_discharge=np.concatenate(([0.0], array_cap)))
+
+
+@dataclass
+class AgingSolution:
+    """
+    Stores the results of the aging simulation: the summary row of each cycle (CYCLE_SUMMARY_DTYPE) and the full
+    Solution objects of the cycling steps of the sampled cycles.
+    """
+    summary: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=CYCLE_SUMMARY_DTYPE))
+    traces: dict[int, list[Solution]] = field(default_factory=dict)  # cycle number -> Solution of each cycling step
+
+    @property
+    def array_cycle(self) -> np.ndarray:
+        return self.summary['cycle']
+
+    @property
+    def array_capacity(self) -> np.ndarray:
+        return self.summary['Q']
+
+    @property
+    def array_cap_discharge(self) -> np.ndarray:
+        return self.summary['cap_discharge']
+
+
+class AgingSolver:
+    """
+    Solves the battery cell over many cycles, each consisting of the sequence of the cycling steps. After each cycle,
+    the battery cell capacity and R0 are updated using the degradation law. The ParameterSet of the battery cell is
+    copied at the construction so that the aging does not change the ParameterSet of the input battery cell.
+    """
+    def __init__(self, battery_cell: BatteryCell, cycling_steps: Sequence[BaseCyclingStep],
+                 degradation_law: DegradationLaw, isothermal: bool = True, temp_amb: Optional[float] = None) -> None:
+        """
+        Class constructor.
+        :param battery_cell: battery cell object with the initial SOC, capacity, and R0
+        :param cycling_steps: cycling steps of each cycle, e.g., [ChargeStep, RestStep, DischargeStep, RestStep]
+        :param degradation_law: degradation law
+        :param isothermal: if False, the battery cell temperature is also solved for (using the DTSolver)
+        :param temp_amb: ambient temperature [K] for the non-isothermal simulations (see DTSolver)
+        """
+        if battery_cell.param.is_tabulated:
+            raise CannotPerformCalculations('The aging simulations need constant R0, R1, and C1.')
+        if not cycling_steps:
+            raise ValueError('At least one cycling step is required.')
+        self.b_cell = BatteryCell(param=battery_cell.param.compile().to_parameter_set(), soc_init=battery_cell.soc,
+                                  temp_init=battery_cell.temp)
+        self.cycling_steps = list(cycling_steps)
+        self.degradation_law = degradation_law
+        self.isothermal = isothermal
+        self.solver = DTSolver(battery_cell=self.b_cell, isothermal=isothermal, temp_amb=temp_amb)
+        self.Q_init = self.b_cell.param.Q
+        self.R0_init = self.b_cell.param.R0
+
+    def __is_vectorizable(self, cycling_step: BaseCyclingStep) -> bool:
+        return self.isothermal and (not isinstance(cycling_step, CustomStep)) and self.b_cell.param.is_array_safe
+
+    def __solve_step(self, param: CompiledParameterSet, cycling_step: BaseCyclingStep, dt: float) -> Solution:
+        if self.__is_vectorizable(cycling_step=cycling_step):
+            sol = solve_constant_current_step(param=param, soc_init=self.b_cell.soc, cycling_step=cycling_step, dt=dt)
+            self.b_cell.soc = float(sol.array_soc[-1])
+            return sol
+        return self.solver.solve(cycling_step=cycling_step, dt=dt)
+
+    @staticmethod
+    def __summarize_step(sol: Solution, cycling_step: BaseCyclingStep) -> tuple[float, float, float, float, float]:
+        """
+        Returns the duration [s], charge and discharge capacities [A hr], and charge and discharge energies [W hr] of
+        the cycling step.
+        """
+        # applied current (discharge positive) of each time step; DTSolver records the negative of the applied current
+        # for the standard cycling steps
+        array_i = sol.array_I[1:] if isinstance(cycling_step, CustomStep) else -sol.array_I[1:]
+        array_dt = np.diff(sol.array_t)
+        array_q = array_i * array_dt / 3600
+        array_e = array_q * sol.array_V[1:]
+        is_discharge = array_i > 0
+        return float(sol.array_t[-1] - sol.array_t[0]), float(-np.sum(array_q[~is_discharge])), \
+            float(np.sum(array_q[is_discharge])), float(-np.sum(array_e[~is_discharge])), \
+            float(np.sum(array_e[is_discharge]))
+
+    def solve(self, num_cycles: int, dt: float = 1.0, trace_every: Optional[int] = None) -> AgingSolution:
+        """
+        Solves the cycles.
+        :param num_cycles: number of cycles
+        :param dt: time step [s]
+        :param trace_every: if provided, the Solution objects of every trace_every-th cycle (and of the first cycle)
+        are stored
+        :return: (AgingSolution) cycle summaries and the sampled traces
+        """
+        if (trace_every is not None) and (trace_every < 1):
+            raise ValueError('trace_every needs to be positive.')
+        param = self.b_cell.param
+        summary = np.zeros(num_cycles, dtype=CYCLE_SUMMARY_DTYPE)
+        traces = {}
+        t_total, charge_throughput = 0.0, 0.0
+        for cycle in range(1, num_cycles + 1):
+            compiled_param = param.compile()
+            row = summary[cycle - 1]
+            row['cycle'], row['Q'], row['R0'] = cycle, param.Q, param.R0
+            row['V_end_of_charge'] = row['V_end_of_discharge'] = np.nan
+            list_sol = []
+            for cycling_step in self.cycling_steps:
+                sol = self.__solve_step(param=compiled_param, cycling_step=cycling_step, dt=dt)
+                duration, cap_charge, cap_discharge, energy_charge, energy_discharge = \
+                    self.__summarize_step(sol=sol, cycling_step=cycling_step)
+                row['cycle_time'] += duration
+                row['cap_charge'] += cap_charge
+                row['cap_discharge'] += cap_discharge
+                row['energy_charge'] += energy_charge
+                row['energy_discharge'] += energy_discharge
+                if cycling_step.cycle_step_name == 'charge':
+                    row['V_end_of_charge'] = sol.array_V[-1]
+                elif cycling_step.cycle_step_name == 'discharge':
+                    row['V_end_of_discharge'] = sol.array_V[-1]
+                if (trace_every is not None) and ((cycle - 1) % trace_every == 0):
+                    list_sol.append(sol)
+            if list_sol:
+                traces[cycle] = list_sol
+            t_total += float(row['cycle_time'])
+            charge_throughput += float(row['cap_charge'] + row['cap_discharge'])
+            row['t'], row['soc'] = t_total, self.b_cell.soc
+
+            # degradation of the capacity and R0 for the next cycle
+            capacity_fraction, R0_factor = self.degradation_law(t=t_total, charge_throughput=charge_throughput,
+                                                                temp=self.b_cell.temp)
+            if capacity_fraction <= 0:
+                raise CannotPerformCalculations(f'The battery cell capacity is exhausted after cycle {cycle}.')
+            param.Q = float(self.Q_init * capacity_fraction)
+            param.R0 = float(self.R0_init * R0_factor)
+        return AgingSolution(summary=summary, traces=traces)
@@ -8,18 +8,28 @@ __author__ = 'Moin Ahmed'
 __copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
 __status__ = 'development'
 
-from typing import Optional, Union
+import contextlib
+import time
+from typing import Callable, Optional, Union
 
 import numpy as np
 import numpy.typing as npt
 
+from src.calc_helpers.instrumentation import Instrumentation, NULL_INSTRUMENTATION
 from src.core.battery_objects import BatteryCell
+from src.core.parameter_functions import vectorize_parameter_function
+from src.core.parameter_tables import ParameterTable
 from src.core.cycling_steps import BaseCyclingStep, CustomStep
-from src.models.battery import Thevenin1RC
+from src.exceptions_and_warnings.exceptions import CannotPerformCalculations
+from src.models.battery import Thevenin1RC, TheveninNRC
+from src.models.thermal import ECMLumped
+from src.visualization.recorders import SolutionRecorder
 from src.visualization.sol_and_plot_objects import Solution
 
 from src.observers.kalman_filter import NormalRandomVector
-from src.observers.kalman_filter import SPKF
+from src.observers.kalman_filter import SPKF, rts_smooth
+from src.observers.particle_filter import ParticleFilter
+from src.observers.realtime import DEGRADATION_MODES, RealTimeHarness
 
 
 class DTSolver:
@@ -34,47 +44,173 @@ class DTSolver:
     v[k] = OCV(z[k]) - R1*i_R1[k] - R0*i_app[k]
 
     Where k represents the time-point and delta_t represents the time-step between z[k+1] and z[k].
+
+    For battery cells with more than one RC pair (R1 and C1 of the ParameterSet are arrays), the n-th order Thevenin
+    model (TheveninNRC) is used, where i_R1 becomes the vector of the currents through the RC pairs.
+
+    For non-isothermal simulations, the battery cell temperature is co-integrated with the SOC and i_R1 using the
+    lumped thermal model (ECMLumped). R0 and R1 are evaluated at the temperature of the previous time step using the
+    Arrhenius relation, and the temperature is advanced using the exact solution of the (linear in temperature) heat
+    balance.
+
+    The solver takes an immutable snapshot of the ParameterSet (CompiledParameterSet) at the start of every solve, so
+    the changes to the ParameterSet during a solve do not affect it.
     """
 
-    def __init__(self, battery_cell: BatteryCell, isothermal: bool = True) -> None:
+    def __init__(self, battery_cell: BatteryCell, isothermal: bool = True, temp_amb: Optional[float] = None) -> None:
         """
         The class constructor for the solver object.
-        :params ECM_obj: (Thevenin1RC) ECM model object
-        :params isothermal: (bool)
-        :params t_app: (Numpy array) array of time.
-        :params i_app: (Numpy array) array of applied battery current associated with the time array.
-        :param v_exp: (Numpy array) array of experimental battery terminal voltage data.
+        :params battery_cell: (BatteryCell) battery cell object
+        :params isothermal: (bool) if False, the battery cell temperature is also solved for.
+        :params temp_amb: (float) ambient temperature [K]. If None, the reference temperature of the battery cell
+        parameters is used. Only used for non-isothermal simulations.
         """
         if not isinstance(battery_cell, BatteryCell):
             raise TypeError("battery_cell_instance needs to be a BatteryCell type.")
         self.b_cell = battery_cell
         self.__dt = 0.0  # delta_t is required for SPKF solver.
+        self.__rc_coeffs = {}  # discrete-time coefficients of the RC pairs for each dt (n-RC isothermal models only)
+        self.__state_coeffs = (None, {})  # parameter snapshot and the state equation coefficients for each dt (SPKF)
+        self.__instr = NULL_INSTRUMENTATION  # instrumentation of the solver loops (see the solve methods)
+        self.__recorder = SolutionRecorder()  # recorder of the solver outputs (see the solve methods)
+        self.__param = battery_cell.param.compile()  # snapshot of the parameters, retaken at the start of every solve
+        self.__param_tabulated = battery_cell.param.is_tabulated
 
         if isinstance(isothermal, bool):
             self.isothermal = isothermal
         else:
             raise TypeError('isothermal needs to be a bool type.')
 
-    def __calc_v(self, dt: float, i_app: float, i_r1_prev: float) -> tuple[float, float]:
-        i_r1_prev = Thevenin1RC.i_R1_next(dt=dt, i_app=i_app, i_R1_prev=i_r1_prev,
-                                          R1=self.b_cell.param.R1, C1=self.b_cell.param.C1)
-        v = Thevenin1RC.v(i_app=i_app, OCV=self.b_cell.param.func_SOC_OCV(self.b_cell.soc),
-                          R0=self.b_cell.param.R0, R1=self.b_cell.param.R1, i_R1=i_r1_prev)
+        if not self.isothermal:
+            if not self.b_cell.param.is_thermal:
+                raise CannotPerformCalculations('Thermal parameters (T_ref, rho, vol, c_p, h, and A) are required for '
+                                                'the non-isothermal simulations.')
+            self.temp_amb = self.b_cell.param.T_ref if temp_amb is None else temp_amb
+        else:
+            self.temp_amb = temp_amb
+
+    @property
+    def __table_temp(self) -> Optional[float]:
+        """
+        Temperature [K] at which the ParameterTables are evaluated: the battery cell temperature or, if it is not
+        defined, the ambient temperature.
+        """
+        return self.b_cell.temp if self.b_cell.temp is not None else self.temp_amb
+
+    def __check_tables(self) -> None:
+        if self.__param_tabulated and self.b_cell.param.is_temp_dependent_table and (self.__table_temp is None):
+            raise CannotPerformCalculations('The battery cell temperature (temp_init) or temp_amb is required for the '
+                                            'temperature-dependent ParameterTables.')
+
+    @classmethod
+    def __eval_table(cls, value: Union[float, np.ndarray, ParameterTable], soc: Union[float, np.ndarray],
+                     temp: Optional[float]) -> Union[float, np.ndarray]:
+        return value(soc, temp) if isinstance(value, ParameterTable) else value
+
+    @classmethod
+    def __rc_columns(cls, value: Union[float, np.ndarray], num_rc: int) -> np.ndarray:
+        """
+        Reshapes the RC pair parameter, evaluated for one or for each of the sigma points, into the shape (num_rc, 1) or
+        (num_rc, number of sigma points).
+        """
+        return np.reshape(value, (-1, num_rc)).T
+
+    def __calc_parameters(self) -> tuple[float, Union[float, np.ndarray], Union[float, np.ndarray]]:
+        """
+        Returns R0 [ohms], R1 [ohms], and C1 [F] from the parameter snapshot. The ParameterTables are evaluated at the
+        battery cell SOC and temperature. For non-isothermal simulations, the constant R0 and R1 are evaluated at the
+        battery cell temperature using the Arrhenius relation.
+        """
+        param, soc = self.__param, self.b_cell.soc
+        if self.isothermal:
+            temp = self.__table_temp
+            return self.__eval_table(param.R0, soc, temp), self.__eval_table(param.R1, soc, temp), \
+                self.__eval_table(param.C1, soc, temp)
+        temp = self.b_cell.temp
+        return param.calc_R0(temp=temp, soc=soc), param.calc_R1(temp=temp, soc=soc), param.calc_C1(temp=temp, soc=soc)
+
+    def __calc_rc_coeffs(self, dt: float, R1: np.ndarray, C1: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the discrete-time coefficients of the RC pairs for the n-RC model. For isothermal simulations with
+        constant parameters, R1 and C1 do not change and hence the coefficients are computed once per dt.
+        """
+        if (not self.isothermal) or self.__param_tabulated:
+            return TheveninNRC.discretize(dt=dt, R=R1, C=C1)
+        try:
+            return self.__rc_coeffs[dt]
+        except KeyError:
+            self.__rc_coeffs[dt] = TheveninNRC.discretize(dt=dt, R=R1, C=C1)
+            return self.__rc_coeffs[dt]
+
+    def __calc_v(self, dt: float, i_app: float, i_r1_prev: Union[float, np.ndarray], R0: Optional[float] = None,
+                 R1: Optional[Union[float, np.ndarray]] = None, C1: Optional[Union[float, np.ndarray]] = None,
+                 ocv: Optional[float] = None) -> tuple[Union[float, np.ndarray], float]:
+        if R0 is None and self.__param_tabulated:
+            R0, R1, C1 = self.__calc_parameters()
+        R0 = self.__param.R0 if R0 is None else R0
+        R1 = self.__param.R1 if R1 is None else R1
+        C1 = self.__param.C1 if C1 is None else C1
+        ocv = self.__param.func_SOC_OCV(self.b_cell.soc) if ocv is None else ocv
+        if isinstance(R1, np.ndarray):
+            a, b = self.__calc_rc_coeffs(dt=dt, R1=R1, C1=C1)
+            i_r1_prev = TheveninNRC.i_R_next(a=a, b=b, i_app=i_app, i_R_prev=i_r1_prev)
+            v = TheveninNRC.v(i_app=i_app, OCV=ocv, R0=R0, R=R1, i_R=i_r1_prev)
+            return i_r1_prev, v
+        i_r1_prev = Thevenin1RC.i_R1_next(dt=dt, i_app=i_app, i_R1_prev=i_r1_prev, R1=R1, C1=C1)
+        v = Thevenin1RC.v(i_app=i_app, OCV=ocv, R0=R0, R1=R1, i_R1=i_r1_prev)
+        return i_r1_prev, v
+
+    def __calc_temp(self, dt: float, i_app: float, v: float, ocv: float) -> float:
+        """
+        Calculates the battery cell temperature [K] at the next time step using the lumped thermal model.
+        """
+        param = self.__param
+        docvdtemp = param.func_docvdtemp(self.b_cell.soc) if param.func_docvdtemp is not None else 0.0
+        return ECMLumped.temp_next(dt=dt, temp_prev=self.b_cell.temp, i_app=i_app, v=v, ocv=ocv,
+                                   docvdtemp=docvdtemp, rho=param.rho, vol=param.vol, c_p=param.c_p, h=param.h,
+                                   area=param.A, temp_amb=self.temp_amb)
+
+    def __step(self, dt: float, i_app: float, i_r1_prev: float) -> tuple[float, float]:
+        """
+        Calculates the i_R1 [A] and terminal voltage [V] for the current time step, after the battery cell SOC has been
+        updated. For non-isothermal simulations, the battery cell temperature is updated as well.
+        """
+        t_start = self.__instr.tic()
+        ocv = self.__param.func_SOC_OCV(self.b_cell.soc)
+        t_start = self.__instr.toc('ocv', t_start)
+        if self.isothermal:
+            i_r1_prev, v = self.__calc_v(dt=dt, i_app=i_app, i_r1_prev=i_r1_prev, ocv=ocv)
+            self.__instr.toc('state_update', t_start)
+            return i_r1_prev, v
+        R0, R1, C1 = self.__calc_parameters()
+        i_r1_prev, v = self.__calc_v(dt=dt, i_app=i_app, i_r1_prev=i_r1_prev, R0=R0, R1=R1, C1=C1, ocv=ocv)
+        self.b_cell.temp = self.__calc_temp(dt=dt, i_app=i_app, v=v, ocv=ocv)
+        self.__instr.toc('state_update', t_start)
         return i_r1_prev, v
 
+    @property
+    def __temp(self) -> Optional[float]:
+        """
+        The battery cell temperature [K] to be stored in the Solution object (None for isothermal simulations).
+        """
+        return None if self.isothermal else self.b_cell.temp
+
     def __solve_standard_cycling_steps(self, cycling_step: BaseCyclingStep, dt: float = 0.1) -> Solution:
-        sol = Solution()  # initialize the solution object
-        sol.update_arrays(t=0.0, i_app=0.0, soc=self.b_cell.soc, v=self.b_cell.param.func_SOC_OCV(self.b_cell.soc),
-                          cap_discharge=0.0)
+        recorder = self.__recorder
+        recorder.record(t=0.0, i_app=0.0, soc=self.b_cell.soc, v=self.__param.func_SOC_OCV(self.b_cell.soc),
+                        cap_discharge=0.0, temp=self.__temp)
 
         t_prev = 0.0  # [s]
         i_r1_prev = 0.0  # [A]
         step_completed = False
         cap_discharge = 0.0  # [A hr]
+        instr = self.__instr
         while not step_completed:
+            t_start = instr.tic()
             t_curr = t_prev + dt
             i_app = cycling_step.get_current(step_name=cycling_step.cycle_step_name, t=t_curr)
             i_app_prev = cycling_step.get_current(step_name=cycling_step.cycle_step_name, t=t_prev)
+            t_start = instr.toc('current_lookup', t_start)
 
             # break condition for the rest cycling step
             if cycling_step.cycle_step_name == 'rest' and t_curr > cycling_step.rest_time:
@@ -82,9 +218,10 @@ class DTSolver:
 
             # Calculate the SOC (and update the battery cell attribute), i_R1 [A], and v[V] for the current time step
             self.b_cell.soc = Thevenin1RC.soc_next(dt=dt, i_app=i_app_prev, SOC_prev=self.b_cell.soc,
-                                                   Q=self.b_cell.param.Q,
-                                                   eta=self.b_cell.param.func_eta(self.b_cell.soc))
-            i_r1_prev, v = self.__calc_v(dt=dt, i_app=i_app, i_r1_prev=i_r1_prev)
+                                                   Q=self.__param.Q,
+                                                   eta=self.__param.func_eta(i_app_prev))
+            instr.toc('soc_update', t_start)
+            i_r1_prev, v = self.__step(dt=dt, i_app=i_app, i_r1_prev=i_r1_prev)
 
             # loop termination criteria
             if (cycling_step.cycle_step_name == "charge") and (v > cycling_step.V_max):
@@ -93,31 +230,39 @@ class DTSolver:
                 step_completed = True
 
             # update the sol object
-            cap_discharge = sol.calc_cap_discharge(cap_discharge_prev=cap_discharge, i_app=i_app, dt=dt)
-            sol.update_arrays(t=t_curr, i_app=-i_app, soc=self.b_cell.soc, v=v, cap_discharge=cap_discharge)
+            t_start = instr.tic()
+            cap_discharge = Solution.calc_cap_discharge(cap_discharge_prev=cap_discharge, i_app=i_app, dt=dt)
+            recorder.record(t=t_curr, i_app=-i_app, soc=self.b_cell.soc, v=v, cap_discharge=cap_discharge,
+                            temp=self.__temp)
+            instr.toc('solution_append', t_start)
+            instr.step()
             t_prev = t_curr
-        return sol
+        return recorder.stop()
 
     def __solve_custom_step(self, cycling_step: CustomStep, dt: float):
-        sol = Solution()  # initialize the solution object
-        sol.update_arrays(t=0.0, i_app=0.0, soc=self.b_cell.soc, v=self.b_cell.param.func_SOC_OCV(self.b_cell.soc),
-                          cap_discharge=0.0)
+        recorder = self.__recorder
+        recorder.record(t=0.0, i_app=0.0, soc=self.b_cell.soc, v=self.__param.func_SOC_OCV(self.b_cell.soc),
+                        cap_discharge=0.0, temp=self.__temp)
 
         t_prev = 0.0  # [s]
         i_r1_prev = 0.0  # [A]
         step_completed = False
         cap_discharge = 0.0  # [A hr]
 
+        instr = self.__instr
         while not step_completed:
+            t_start = instr.tic()
             t_curr = t_prev + dt
             i_app_prev = cycling_step.get_current(step_name=cycling_step.cycle_step_name, t=t_prev)
             i_app_curr = cycling_step.get_current(step_name=cycling_step.cycle_step_name, t=t_curr)
+            t_start = instr.toc('current_lookup', t_start)
 
             # Calculate the SOC (and update the battery cell attribute), i_R1 [A], and v[V] for the current time step
             self.b_cell.soc = Thevenin1RC.soc_next(dt=dt, i_app=i_app_prev, SOC_prev=self.b_cell.soc,
-                                                   Q=self.b_cell.param.Q,
-                                                   eta=self.b_cell.param.func_eta(self.b_cell.soc))
-            i_r1_prev, v = self.__calc_v(dt=dt, i_app=i_app_curr, i_r1_prev=i_r1_prev)
+                                                   Q=self.__param.Q,
+                                                   eta=self.__param.func_eta(i_app_prev))
+            instr.toc('soc_update', t_start)
+            i_r1_prev, v = self.__step(dt=dt, i_app=i_app_curr, i_r1_prev=i_r1_prev)
 
             # loop termination criteria
             if v > cycling_step.V_max:
@@ -128,31 +273,175 @@ class DTSolver:
                 step_completed = True
 
             # update the sol object
-            cap_discharge = sol.calc_cap_discharge(cap_discharge_prev=cap_discharge, i_app=i_app_curr, dt=dt)
-            sol.update_arrays(t=t_curr, i_app=i_app_curr, soc=self.b_cell.soc, v=v, cap_discharge=cap_discharge)
+            t_start = instr.tic()
+            cap_discharge = Solution.calc_cap_discharge(cap_discharge_prev=cap_discharge, i_app=i_app_curr, dt=dt)
+            recorder.record(t=t_curr, i_app=i_app_curr, soc=self.b_cell.soc, v=v, cap_discharge=cap_discharge,
+                            temp=self.__temp)
+            instr.toc('solution_append', t_start)
+            instr.step()
             t_prev = t_curr
+        return recorder.stop()
+
+    def __trusted(self, trusted: bool, *objects) -> contextlib.AbstractContextManager:
+        """
+        Returns the context manager in which the setters of the battery cell and of the other objects (e.g., the SPKF)
+        skip their checks, if trusted is True, and otherwise the context manager that does nothing.
+        """
+        if not trusted:
+            return contextlib.nullcontext()
+        stack = contextlib.ExitStack()
+        for obj in (self.b_cell,) + objects:
+            stack.enter_context(obj.trusted())
+        return stack
+
+    def __start_instrumentation(self, instrumentation: Optional[Instrumentation]) -> None:
+        self.__instr = NULL_INSTRUMENTATION if instrumentation is None else instrumentation
+        self.__instr.start()
+
+    def __start_recorder(self, recorder: Optional[SolutionRecorder]) -> None:
+        self.__recorder = SolutionRecorder() if recorder is None else recorder
+        self.__recorder.start()
+
+    def __stop_instrumentation(self, sol: Optional[Solution]) -> Optional[Solution]:
+        """
+        Stops the instrumentation and stores its report in the Solution object. It is called from the finally clause of
+        the solve methods, so that the profiling and the memory tracing are stopped also if the solve raises (sol is
+        None in that case).
+        """
+        report = self.__instr.stop()
+        self.__instr = NULL_INSTRUMENTATION
+        if sol is not None:
+            sol.report = report
         return sol
 
-    def solve(self, cycling_step: BaseCyclingStep, dt: float = 0.1) -> Solution:
-        if isinstance(cycling_step, CustomStep):
-            return self.__solve_custom_step(cycling_step=cycling_step, dt=dt)
-        else:
-            return self.__solve_standard_cycling_steps(cycling_step=cycling_step, dt=dt)
+    def solve(self, cycling_step: BaseCyclingStep, dt: float = 0.1,
+              instrumentation: Optional[Instrumentation] = None,
+              recorder: Optional[SolutionRecorder] = None, trusted: bool = False) -> Solution:
+        """
+        Solves the ECM model for the cycling step.
+        :param cycling_step: cycling step object
+        :param dt: time step [s]
+        :param instrumentation: (Instrumentation) if provided, the phases of the solver loop are timed and the
+        InstrumentationReport is stored in the report attribute of the returned Solution object.
+        :param recorder: (SolutionRecorder) if provided, it is used to record the results, e.g., to select the recorded
+        columns or to record them in float32. By default, all the columns are recorded in float64.
+        :param trusted: if True, the setters of the battery cell SOC and temperature skip their checks in the solver
+        loop (see BatteryCell.trusted). The results are the same.
+        :return: (Solution) Solution object containing the results from the simulations.
+        """
+        self.__rc_coeffs = {}
+        self.__param = self.b_cell.param.compile()
+        self.__param_tabulated = self.b_cell.param.is_tabulated
+        self.__check_tables()
+        self.__start_instrumentation(instrumentation=instrumentation)
+        sol = None
+        try:
+            self.__start_recorder(recorder=recorder)
+            with self.__trusted(trusted):
+                if isinstance(cycling_step, CustomStep):
+                    sol = self.__solve_custom_step(cycling_step=cycling_step, dt=dt)
+                else:
+                    sol = self.__solve_standard_cycling_steps(cycling_step=cycling_step, dt=dt)
+        finally:
+            self.__stop_instrumentation(sol=sol)
+        return sol
+
+    def solveZOH(self, cycling_step: CustomStep, instrumentation: Optional[Instrumentation] = None) -> Solution:
+        """
+        Solves the ECM model exactly on the time values of the custom cycling step, assuming that the applied current is
+        held constant between them (zero-order hold), i.e., the current array_I[k] is applied from array_t[k] to
+        array_t[k+1]. Unlike solve, no fixed time step is used and the results are at the time values of the cycling
+        step (1:1 with the experimental data), so the error metrics can be calculated without the interpolation.
+
+        The discrete-time coefficients of the RC pairs, exp(-delta_t/(R*C)), are calculated at once for all the time
+        intervals (which need not be uniform), as are the SOC and the terminal voltages. Only the recursion of the
+        currents through the RC pairs is sequential. The simulation stops at the first time value at which the
+        terminal voltage is outside of [V_min, V_max] (inclusive of that time value). Only the isothermal simulations
+        with the constant parameters (no ParameterTables) are supported.
+        :param cycling_step: (CustomStep) custom cycling step with the time [s] and current [A] arrays
+        :param instrumentation: (Instrumentation) if provided, the phases of the solve are timed and the
+        InstrumentationReport is stored in the report attribute of the returned Solution object.
+        :return: (Solution) Solution object at the time values of the cycling step.
+        """
+        if (not self.isothermal) or self.b_cell.param.is_tabulated:
+            raise CannotPerformCalculations('The zero-order hold solve supports only the isothermal simulations with '
+                                            'the constant parameters.')
+        self.__param = param = self.b_cell.param.compile()
+        self.__start_instrumentation(instrumentation=instrumentation)
+        sol = None
+        try:
+            instr = self.__instr
+            t_start = instr.tic()
+            func_SOC_OCV = vectorize_parameter_function(param.func_SOC_OCV, name='func_SOC_OCV')
+            func_eta = vectorize_parameter_function(param.func_eta, name='func_eta',
+                                                    array_probe=np.linspace(-1, 1, 1000))
+            array_t = np.asarray(cycling_step.array_t, dtype=float)
+            array_I = np.asarray(cycling_step.array_I, dtype=float)
+            array_dt = np.diff(array_t)
+            R1, C1 = np.atleast_1d(param.R1), np.atleast_1d(param.C1)
+            array_a, array_b = TheveninNRC.discretize(dt=array_dt, R=R1, C=C1)  # shape (n - 1, num_rc)
+            t_start = instr.toc('discretization', t_start)
+
+            array_charge = np.cumsum(array_dt * func_eta(array_I[:-1]) * array_I[:-1]) / 3600  # [A hr]
+            array_soc = self.b_cell.soc - np.append(0.0, array_charge) / param.Q
+            array_i_R = np.zeros((array_t.size, R1.size))
+            array_b_I = array_b * array_I[:-1, np.newaxis]
+            for k in range(array_dt.size):
+                array_i_R[k + 1] = array_a[k] * array_i_R[k] + array_b_I[k]
+            t_start = instr.toc('state_update', t_start)
+
+            array_V = func_SOC_OCV(array_soc) - array_i_R @ R1 - param.R0 * array_I
+            array_cap_discharge = np.append(0.0, np.cumsum(np.maximum(-array_I[:-1], 0.0) * array_dt)) / 3600
+            # the results are truncated at the first time value outside the voltage limits
+            array_outside = (array_V > cycling_step.V_max) | (array_V < cycling_step.V_min)
+            n = np.argmax(array_outside) + 1 if np.any(array_outside) else array_t.size
+            instr.toc('output', t_start)
+
+            self.b_cell.soc = float(array_soc[n - 1])
+            sol = Solution(array_t=array_t[:n], array_I=array_I[:n], array_soc=array_soc[:n], array_V=array_V[:n],
+                           array_cap_discharge=array_cap_discharge[:n])
+        finally:
+            self.__stop_instrumentation(sol=sol)
+        return sol
 
     def __func_f(self, x_k: npt.ArrayLike, u_k: Union[float, npt.ArrayLike], w_k: npt.ArrayLike):
         """
-        State Equation.
+        State Equation. The state vector contains the SOC followed by the currents through the RC pairs. Since the state
+        matrix is diagonal, it is applied as element-wise multiplication.
         :param x_k: the vector containing the system state.
         :param u_k: the input (applied current in case of isothermal condition) variable
         :param w_k: the vector representing the process noise.
         :return: the vector representing the state
         """
-        R1 = self.b_cell.param.R1
-        C1 = self.b_cell.param.C1
-        Q = self.b_cell.param.Q
-        m1 = np.array([[1, 0], [0, np.exp(-self.__dt / (R1 * C1))]])
-        m2 = np.array([[-self.__dt / (3600 * Q)], [1 - np.exp(-self.__dt / (R1 * C1))]])
-        return m1 @ x_k + m2 * (u_k + w_k)
+        param = self.__param
+        if self.__param_tabulated:
+            # the parameters are evaluated at the SOC of each sigma point
+            soc, temp = x_k[0, :], self.__table_temp
+            R1 = self.__rc_columns(self.__eval_table(param.R1, soc, temp), num_rc=param.num_rc)
+            C1 = self.__rc_columns(self.__eval_table(param.C1, soc, temp), num_rc=param.num_rc)
+            a, b = TheveninNRC.discretize(dt=self.__dt, R=R1, C=C1)
+            return np.vstack([x_k[:1, :] - self.__dt / (3600 * param.Q) * (u_k + w_k),
+                              a * x_k[1:, :] + b * (u_k + w_k)])
+        m1, m2 = self.__calc_state_coeffs(dt=self.__dt)
+        return m1 * x_k + m2 * (u_k + w_k)
+
+    def __calc_state_coeffs(self, dt: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the column vectors of the discrete-time coefficients of the state equation (see
+        TheveninNRC.discretize_state) for the parameter snapshot. They are computed once per dt and parameter snapshot,
+        since the filters call the state equation at every time step, mostly with the same dt.
+        """
+        param, coeffs = self.__state_coeffs
+        if param is not self.__param:
+            param, coeffs = self.__param, {}
+            self.__state_coeffs = (param, coeffs)
+        try:
+            return coeffs[dt]
+        except KeyError:
+            m1, m2 = TheveninNRC.discretize_state(dt=dt, R=np.atleast_1d(param.R1), C=np.atleast_1d(param.C1),
+                                                  Q=param.Q)
+            coeffs[dt] = (m1.reshape(-1, 1), m2.reshape(-1, 1))
+            return coeffs[dt]
 
     def __func_h(self, x_k: npt.ArrayLike, u_k: Union[float, npt.ArrayLike], v_k: npt.ArrayLike):
         """
@@ -162,36 +451,50 @@ class DTSolver:
         :param v_k: the vector representing the sensor noise
         :return: the system output vector
         """
-        return self.b_cell.param.func_SOC_OCV(x_k[0, :]) - self.b_cell.param.R1 * x_k[1, :] - \
-               self.b_cell.param.R0 * u_k + v_k
-
-    def solveSPKF(self, sol_exp: Solution, cov_soc: float, cov_current: float, cov_process: float, cov_sensor: float,
-                  V_min, V_max, SOC_LIB_min, SOC_LIB_max, SOC_LIB) -> Solution:
+        param = self.__param
+        if self.__param_tabulated:
+            soc, temp = x_k[0, :], self.__table_temp
+            R1 = self.__rc_columns(self.__eval_table(param.R1, soc, temp), num_rc=param.num_rc)
+            return param.func_SOC_OCV(soc) - np.sum(R1 * x_k[1:, :], axis=0) - \
+                self.__eval_table(param.R0, soc, temp) * u_k + v_k
+        return param.func_SOC_OCV(x_k[0, :]) - np.atleast_1d(param.R1) @ x_k[1:, :] - param.R0 * u_k + v_k
+
+    def __func_f_joint(self, x_k: npt.ArrayLike, u_k: Union[float, npt.ArrayLike], w_k: npt.ArrayLike):
         """
-        Performs the Thevenin equivalent circuit model using the sigma point kalman filter
-        :param sol_exp: Solution object from the experimental data.
-        :param cov_soc: covariance of the soc
-        :param cov_current: covariance of i_r1
-        :param cov_process: covariance of the system process
-        :param cov_sensor: covariance of the voltage sensor
-        :param V_min: threshold cell terminal voltage [V]
-        :param V_max: threshold cell terminal voltage [V]
-        :param SOC_LIB_min: minimum LIB SOC
-        :param SOC_LIB_max: maximum LIB SOC
-        :param SOC_LIB: LIB SOC
-        :return: (Solution) Solution object containing the results from the simulations.
+        State equation of the joint SPKF. The state vector contains the SOC, the currents through the RC pairs, R0, and
+        Q. The process noise contains the current noise, followed by the random-walk noises of R0 and Q.
+        :param x_k: the vector containing the system state.
+        :param u_k: the input (applied current) variable
+        :param w_k: the vector representing the process noise.
+        :return: the vector representing the state
         """
-        sol = Solution()  # initialize the solution object
-
-        cycling_step = CustomStep(sol_exp.array_t, sol_exp.array_I,
-                                  V_min, V_max, SOC_LIB_min, SOC_LIB_max,
-                                  SOC_LIB)  # current is added to the cycler object.
-        array_y_true = sol_exp.array_V  # y_true is extracted from the solution object
+        param = self.__param
+        i_app = u_k + w_k[:1, :]
+        a, b = TheveninNRC.discretize(dt=self.__dt, R=np.atleast_1d(param.R1), C=np.atleast_1d(param.C1))
+        return np.vstack([x_k[:1, :] - self.__dt / (3600 * x_k[-1:, :]) * i_app,
+                          a.reshape(-1, 1) * x_k[1:-2, :] + b.reshape(-1, 1) * i_app,
+                          x_k[-2:, :] + w_k[1:, :]])
+
+    def __func_h_joint(self, x_k: npt.ArrayLike, u_k: Union[float, npt.ArrayLike], v_k: npt.ArrayLike):
+        """
+        Output equation of the joint SPKF, with R0 taken from the state vector (see __func_f_joint).
+        :param x_k: the system state vector.
+        :param u_k: the applied current at the time of the measurement
+        :param v_k: the vector representing the sensor noise
+        :return: the system output vector
+        """
+        param = self.__param
+        return param.func_SOC_OCV(x_k[0, :]) - np.atleast_1d(param.R1) @ x_k[1:-2, :] - x_k[-2, :] * u_k + v_k
 
+    def __create_spkf(self, cov_soc: float, cov_current: float, cov_process: float, cov_sensor: float) -> SPKF:
+        """
+        Creates the SPKF with the state vector of the battery cell SOC and the currents through the RC pairs.
+        """
         # create Normal Random Variables below
+        num_rc = self.__param.num_rc
         i_r1_init = 0.0  # [A]
-        vector_x = np.array([[self.b_cell.soc], [i_r1_init]])
-        cov_x = np.array([[cov_soc, 0], [0, cov_current]])
+        vector_x = np.append(self.b_cell.soc, np.full(num_rc, i_r1_init)).reshape(-1, 1)
+        cov_x = np.diag(np.append(cov_soc, np.full(num_rc, cov_current)))
         vector_w = np.array([[0]])
         cov_w = np.array([[cov_process]])
         vector_v = np.array([[0]])
@@ -202,43 +505,379 @@ class DTSolver:
         v = NormalRandomVector(vector_init=vector_v, cov_init=cov_v)
 
         # Create SPKF variable below
-        instance_spkf = SPKF(x=x, w=w, v=v, y_dim=1, func_f=self.__func_f, func_h=self.__func_h)
-
-        # The solution loop is run below
-        t_prev = 0.0  # [s]
-        step_completed = False
-        # cap_discharge = 0.0  # [A hr]
-
-        i = 1
-        while not step_completed:
-            t_curr = cycling_step.array_t[i]
-            self.__dt = t_curr - t_prev
-            i_app_prev = cycling_step.array_I[i-1]
-            i_app_curr = cycling_step.array_I[i]
+        return SPKF(x=x, w=w, v=v, y_dim=1, func_f=self.__func_f, func_h=self.__func_h)
 
-            instance_spkf.solve(u=i_app_prev, y_true=array_y_true[i])
-
-            self.b_cell.soc = instance_spkf.x.get_vector()[0, 0]
-            i_r1 = instance_spkf.x.get_vector()[1, 0]
-            v = self.__calc_v(dt=self.__dt, i_app=i_app_curr, i_r1_prev=i_r1)[1]
-
-            # loop termination criteria
-            if v > cycling_step.V_max:
-                step_completed = True
-            if v < cycling_step.V_min:
-                step_completed = True
-            if t_curr > cycling_step.array_t[-1]:
-                step_completed = True
-            if i >= len(cycling_step.array_t) - 1:
-                step_completed = True
+    def solveSPKF(self, sol_exp: Solution, cov_soc: float, cov_current: float, cov_process: float, cov_sensor: float,
+                  V_min, V_max, SOC_LIB_min, SOC_LIB_max, SOC_LIB,
+                  instrumentation: Optional[Instrumentation] = None,
+                  recorder: Optional[SolutionRecorder] = None, trusted: bool = False) -> Solution:
+        """
+        Performs the Thevenin equivalent circuit model using the sigma point kalman filter
+        :param sol_exp: Solution object from the experimental data.
+        :param cov_soc: covariance of the soc
+        :param cov_current: covariance of i_r1 (of the current through each RC pair for n-RC models)
+        :param cov_process: covariance of the system process
+        :param cov_sensor: covariance of the voltage sensor
+        :param V_min: threshold cell terminal voltage [V]
+        :param V_max: threshold cell terminal voltage [V]
+        :param SOC_LIB_min: minimum LIB SOC
+        :param SOC_LIB_max: maximum LIB SOC
+        :param SOC_LIB: LIB SOC
+        :param instrumentation: (Instrumentation) if provided, the phases of the solver loop are timed and the
+        InstrumentationReport is stored in the report attribute of the returned Solution object.
+        :param recorder: (SolutionRecorder) if provided, it is used to record the results (see solve)
+        :param trusted: if True, the setters of the battery cell skip their checks and the SPKF runs its fast path
+        in the filter loop (see BatteryCell.trusted and SPKF.trusted). The results are the same up to round-off.
+        :return: (Solution) Solution object containing the results from the simulations.
+        """
+        self.__param = self.b_cell.param.compile()
+        self.__param_tabulated = self.b_cell.param.is_tabulated
+        self.__check_tables()
+        self.__start_instrumentation(instrumentation=instrumentation)
+        sol = None
+        try:
+            instr = self.__instr
+            self.__start_recorder(recorder=recorder)
+            recorder = self.__recorder
+
+            cycling_step = CustomStep(sol_exp.array_t, sol_exp.array_I,
+                                      V_min, V_max, SOC_LIB_min, SOC_LIB_max,
+                                      SOC_LIB)  # current is added to the cycler object.
+            array_y_true = sol_exp.array_V  # y_true is extracted from the solution object
+
+            num_rc = self.__param.num_rc
+            instance_spkf = self.__create_spkf(cov_soc=cov_soc, cov_current=cov_current, cov_process=cov_process,
+                                               cov_sensor=cov_sensor)
+
+            # The solution loop is run below
+            t_prev = 0.0  # [s]
+            step_completed = False
+            # cap_discharge = 0.0  # [A hr]
+
+            i = 1
+            with self.__trusted(trusted, instance_spkf):
+                while not step_completed:
+                    t_start = instr.tic()
+                    t_curr = cycling_step.array_t[i]
+                    self.__dt = t_curr - t_prev
+                    i_app_prev = cycling_step.array_I[i-1]
+                    i_app_curr = cycling_step.array_I[i]
+                    t_start = instr.toc('current_lookup', t_start)
+
+                    kf_prediction = instance_spkf.predict(u=i_app_prev)
+                    t_start = instr.toc('kf_predict', t_start)
+                    instance_spkf.update(array_y_true[i], *kf_prediction)
+                    t_start = instr.toc('kf_update', t_start)
+
+                    self.b_cell.soc = instance_spkf.x.get_vector()[0, 0]
+                    i_r1 = instance_spkf.x.get_vector()[1:, 0] if num_rc > 1 else instance_spkf.x.get_vector()[1, 0]
+                    v = self.__calc_v(dt=self.__dt, i_app=i_app_curr, i_r1_prev=i_r1)[1]
+                    instr.toc('state_update', t_start)
+
+                    # loop termination criteria
+                    if v > cycling_step.V_max:
+                        step_completed = True
+                    if v < cycling_step.V_min:
+                        step_completed = True
+                    if t_curr > cycling_step.array_t[-1]:
+                        step_completed = True
+                    if i >= len(cycling_step.array_t) - 1:
+                        step_completed = True
+
+                    # update sol attributes
+                    t_start = instr.tic()
+                    recorder.record(t=t_curr, i_app=i_app_curr, soc=self.b_cell.soc, v=v, cap_discharge=0.0)
+                    instr.toc('solution_append', t_start)
+                    instr.step()
+
+                    # update simulation parameters
+                    t_prev = t_curr
+                    i += 1
+
+            sol = recorder.stop()
+        finally:
+            self.__stop_instrumentation(sol=sol)
+        return sol
 
-            # update sol attributes
-            sol.update_arrays(t=t_curr, i_app=i_app_curr, soc=self.b_cell.soc, v=v, cap_discharge=0.0)
+    def smoothSPKF(self, sol_exp: Solution, cov_soc: float, cov_current: float, cov_process: float,
+                   cov_sensor: float, instrumentation: Optional[Instrumentation] = None,
+                   trusted: bool = False) -> Solution:
+        """
+        Reconstructs the battery cell SOC offline from the logged data using the forward SPKF pass followed by the
+        backward sigma-point Rauch-Tung-Striebel (RTS) smoother. Unlike solveSPKF, each state estimate uses all the
+        measurements (also the later ones), which reduces the estimation error. The forward pass stores only the
+        filtered and predicted states and covariances, and the cross-covariances, in preallocated arrays.
+        :param sol_exp: Solution object from the experimental data.
+        :param cov_soc: covariance of the soc
+        :param cov_current: covariance of i_r1 (of the current through each RC pair for n-RC models)
+        :param cov_process: covariance of the system process
+        :param cov_sensor: covariance of the voltage sensor
+        :param instrumentation: (Instrumentation) if provided, the phases of the forward and backward passes are timed
+        and the InstrumentationReport is stored in the report attribute of the returned Solution object.
+        :param trusted: if True, the setters of the battery cell skip their checks and the SPKF runs its fast path
+        in the forward pass (see BatteryCell.trusted and SPKF.trusted). The results are the same up to round-off.
+        :return: (Solution) Solution object at all the experimental time values, with the smoothed SOC, the terminal
+        voltage of the smoothed states, and the smoothed state covariances (array_cov, with the SOC first).
+        """
+        self.__param = self.b_cell.param.compile()
+        self.__param_tabulated = self.b_cell.param.is_tabulated
+        self.__check_tables()
+        self.__start_instrumentation(instrumentation=instrumentation)
+        sol = None
+        try:
+            instr = self.__instr
+
+            array_t = np.asarray(sol_exp.array_t, dtype=float)
+            array_I = np.asarray(sol_exp.array_I, dtype=float)
+            array_y_true = np.asarray(sol_exp.array_V, dtype=float)
+            instance_spkf = self.__create_spkf(cov_soc=cov_soc, cov_current=cov_current, cov_process=cov_process,
+                                               cov_sensor=cov_sensor)
+
+            # forward pass
+            n, num_states = array_t.size, instance_spkf.Nx
+            array_x = np.empty((n, num_states))
+            array_cov = np.empty((n, num_states, num_states))
+            array_x_pred = np.empty((n, num_states))
+            array_cov_pred = np.empty((n, num_states, num_states))
+            array_cross_cov = np.empty((n, num_states, num_states))
+            array_x[0], array_cov[0] = instance_spkf.x.get_vector()[:, 0], instance_spkf.x.get_cov()
+            array_x_pred[0], array_cov_pred[0], array_cross_cov[0] = array_x[0], array_cov[0], 0.0
+            with self.__trusted(trusted, instance_spkf):
+                for i in range(1, n):
+                    t_start = instr.tic()
+                    self.__dt = array_t[i] - array_t[i - 1]
+                    kf_prediction = instance_spkf.predict(u=array_I[i - 1])
+                    array_x_pred[i], array_cov_pred[i] = instance_spkf.x.get_vector()[:, 0], instance_spkf.x.get_cov()
+                    array_cross_cov[i] = instance_spkf.cross_cov
+                    t_start = instr.toc('kf_predict', t_start)
+                    instance_spkf.update(array_y_true[i], *kf_prediction)
+                    array_x[i], array_cov[i] = instance_spkf.x.get_vector()[:, 0], instance_spkf.x.get_cov()
+                    instr.toc('kf_update', t_start)
+                    instr.step()
+
+            # backward pass
+            t_start = instr.tic()
+            array_x_smooth, array_cov_smooth = rts_smooth(array_x=array_x, array_cov=array_cov,
+                                                          array_x_pred=array_x_pred, array_cov_pred=array_cov_pred,
+                                                          array_cross_cov=array_cross_cov)
+            t_start = instr.toc('rts_smooth', t_start)
+            array_V = self.__func_h(array_x_smooth.transpose(), array_I, 0.0)
+            instr.toc('output', t_start)
+            self.b_cell.soc = float(array_x_smooth[-1, 0])
+            sol = Solution(array_t=array_t, array_I=array_I, array_soc=array_x_smooth[:, 0], array_V=array_V,
+                           array_cov=array_cov_smooth)
+        finally:
+            self.__stop_instrumentation(sol=sol)
+        return sol
 
-            # update simulation parameters
-            t_prev = t_curr
-            i += 1
+    def solveJointSPKF(self, sol_exp: Solution, cov_soc: float, cov_current: float, cov_process: float,
+                       cov_sensor: float, cov_R0: float, cov_Q: float, cov_R0_process: float, cov_Q_process: float,
+                       R0_init: Optional[float] = None, Q_init: Optional[float] = None,
+                       instrumentation: Optional[Instrumentation] = None, trusted: bool = False) -> Solution:
+        """
+        Estimates the battery cell SOC together with R0 and the capacity, Q, from the experimental data using the joint
+        SPKF. The state vector of the SPKF is augmented with R0 and Q, which are modelled as random walks, i.e., they
+        are constant apart from the process noise with the covariances cov_R0_process and cov_Q_process. These set how
+        fast the parameter estimates can follow the changes (e.g., due to aging). Unlike solveSPKF, the output equation
+        uses the applied current at the time of the measurement, through which R0 is observed. Q is observed through
+        the SOC changes, i.e., it converges only if the SOC range of the data is large enough. The ParameterTables are
+        not supported.
+        :param sol_exp: Solution object from the experimental data.
+        :param cov_soc: covariance of the initial soc
+        :param cov_current: covariance of the initial i_r1 (of the current through each RC pair for n-RC models)
+        :param cov_process: covariance of the current (process) noise
+        :param cov_sensor: covariance of the voltage sensor
+        :param cov_R0: covariance of the initial R0 [ohms^2]
+        :param cov_Q: covariance of the initial Q [A^2 hr^2]
+        :param cov_R0_process: covariance of the random-walk noise of R0 per time step [ohms^2]
+        :param cov_Q_process: covariance of the random-walk noise of Q per time step [A^2 hr^2]
+        :param R0_init: initial estimate of R0 [ohms]. By default, R0 of the battery cell parameters is used.
+        :param Q_init: initial estimate of Q [A hr]. By default, Q of the battery cell parameters is used.
+        :param instrumentation: (Instrumentation) if provided, the phases of the filter loop are timed and the
+        InstrumentationReport is stored in the report attribute of the returned Solution object.
+        :param trusted: if True, the SPKF runs its fast path in the filter loop (see SPKF.trusted). The results are the
+        same up to round-off.
+        :return: (Solution) Solution object at all the experimental time values, with the estimated SOC, R0 (array_R0),
+        and Q (array_Q), the terminal voltage of the estimated states, and the state covariances (array_cov, with the
+        SOC first and R0 and Q last).
+        """
+        self.__param = self.b_cell.param.compile()
+        if self.b_cell.param.is_tabulated:
+            raise CannotPerformCalculations('The joint SPKF does not support the ParameterTables.')
+        self.__start_instrumentation(instrumentation=instrumentation)
+        sol = None
+        try:
+            instr = self.__instr
+            param = self.__param
+
+            array_t = np.asarray(sol_exp.array_t, dtype=float)
+            array_I = np.asarray(sol_exp.array_I, dtype=float)
+            array_y_true = np.asarray(sol_exp.array_V, dtype=float)
+
+            R0_init = param.R0 if R0_init is None else R0_init
+            Q_init = param.Q if Q_init is None else Q_init
+            num_rc = param.num_rc
+            x = NormalRandomVector(vector_init=np.append(np.append(self.b_cell.soc, np.zeros(num_rc)),
+                                                         [R0_init, Q_init]).reshape(-1, 1),
+                                   cov_init=np.diag(np.append(np.append(cov_soc, np.full(num_rc, cov_current)),
+                                                              [cov_R0, cov_Q])))
+            w = NormalRandomVector(vector_init=np.zeros((3, 1)),
+                                   cov_init=np.diag([cov_process, cov_R0_process, cov_Q_process]))
+            v = NormalRandomVector(vector_init=np.array([[0.0]]), cov_init=np.array([[cov_sensor]]))
+            instance_spkf = SPKF(x=x, w=w, v=v, y_dim=1, func_f=self.__func_f_joint, func_h=self.__func_h_joint)
+
+            n, num_states = array_t.size, instance_spkf.Nx
+            array_x = np.empty((n, num_states))
+            array_cov = np.empty((n, num_states, num_states))
+            array_x[0], array_cov[0] = x.get_vector()[:, 0], x.get_cov()
+            with self.__trusted(trusted, instance_spkf):
+                for i in range(1, n):
+                    t_start = instr.tic()
+                    self.__dt = array_t[i] - array_t[i - 1]
+                    kf_prediction = instance_spkf.predict(u=array_I[i - 1], u_h=array_I[i])
+                    t_start = instr.toc('kf_predict', t_start)
+                    instance_spkf.update(array_y_true[i], *kf_prediction)
+                    array_x[i], array_cov[i] = x.get_vector()[:, 0], x.get_cov()
+                    instr.toc('kf_update', t_start)
+                    instr.step()
+
+            array_V = self.__func_h_joint(array_x.transpose(), array_I, 0.0)
+            self.b_cell.soc = float(array_x[-1, 0])
+            sol = Solution(array_t=array_t, array_I=array_I, array_soc=array_x[:, 0], array_V=array_V,
+                           array_cov=array_cov, array_R0=array_x[:, -2], array_Q=array_x[:, -1])
+        finally:
+            self.__stop_instrumentation(sol=sol)
+        return sol
 
+    def solveRealTimeSPKF(self, sol_exp: Solution, cov_soc: float, cov_current: float, cov_process: float,
+                          cov_sensor: float, rate: float = 10.0, deadline: Optional[float] = None,
+                          degradation: Optional[str] = 'skip_covariance', max_lag: Optional[float] = None,
+                          clock: Callable[[], float] = time.perf_counter,
+                          sleep: Callable[[float], None] = time.sleep) -> Solution:
+        """
+        Runs the SPKF of solveSPKF in real time, as a battery management system would, using the RealTimeHarness. The
+        experimental data are replayed at the fixed rate, one measurement per step, regardless of their time values,
+        which are only used for the time differences of the model. If the harness falls behind the schedule, e.g., after
+        a slow step, the degraded steps are run until it catches up (see the realtime module). Without the overruns, the
+        results are the same as those of solveSPKF.
+        :param sol_exp: Solution object from the experimental data.
+        :param cov_soc: covariance of the soc
+        :param cov_current: covariance of i_r1 (of the current through each RC pair for n-RC models)
+        :param cov_process: covariance of the system process
+        :param cov_sensor: covariance of the voltage sensor
+        :param rate: rate of the steps [Hz]
+        :param deadline: time after the release by which each step has to be completed [s]. By default, the period.
+        :param degradation: 'skip_covariance' or 'open_loop' (see the realtime module). If None, the steps are never
+        degraded.
+        :param max_lag: maximum delay of the step start after its release [s] for the full step (see RealTimeHarness)
+        :param clock: function returning the current time [s]
+        :param sleep: function that waits for the given time [s]
+        :return: (Solution) Solution object at all the experimental time values, with the estimated SOC, the terminal
+        voltage of the estimated states, and the RealTimeReport in the realtime_report attribute.
+        """
+        if (degradation is not None) and (degradation not in DEGRADATION_MODES):
+            raise ValueError(f'degradation needs to be one of {DEGRADATION_MODES} or None.')
+        self.__param = self.b_cell.param.compile()
+        self.__param_tabulated = self.b_cell.param.is_tabulated
+        self.__check_tables()
+
+        array_t = np.asarray(sol_exp.array_t, dtype=float)
+        array_I = np.asarray(sol_exp.array_I, dtype=float)
+        array_y_true = np.asarray(sol_exp.array_V, dtype=float)
+        instance_spkf = self.__create_spkf(cov_soc=cov_soc, cov_current=cov_current, cov_process=cov_process,
+                                           cov_sensor=cov_sensor)
+        array_x = np.empty((array_t.size, instance_spkf.Nx))
+        array_x[0] = instance_spkf.x.get_vector()[:, 0]
+
+        def func_step(i: int) -> None:
+            self.__dt = array_t[i] - array_t[i - 1]
+            instance_spkf.solve(u=array_I[i - 1], y_true=array_y_true[i])
+            array_x[i] = instance_spkf.x.get_vector()[:, 0]
+
+        def func_degraded_step(i: int) -> None:
+            self.__dt = array_t[i] - array_t[i - 1]
+            instance_spkf.predict_mean(u=array_I[i - 1])
+            if (degradation == 'skip_covariance') and (instance_spkf.gain is not None):
+                instance_spkf.update_mean(y_true=array_y_true[i])
+            array_x[i] = instance_spkf.x.get_vector()[:, 0]
+
+        harness = RealTimeHarness(func_step=func_step,
+                                  func_degraded_step=None if degradation is None else func_degraded_step,
+                                  rate=rate, deadline=deadline, max_lag=max_lag, clock=clock, sleep=sleep)
+        report = harness.run(num_steps=array_t.size - 1, start=1)
+
+        self.b_cell.soc = float(array_x[-1, 0])
+        return Solution(array_t=array_t, array_I=array_I, array_soc=array_x[:, 0],
+                        array_V=self.__func_h(array_x.transpose(), array_I, 0.0), realtime_report=report)
+
+    def solvePF(self, sol_exp: Solution, num_particles: int, cov_soc: float, cov_current: float, cov_process: float,
+                cov_sensor: float, soc_samples: Optional[npt.ArrayLike] = None, resample_threshold: float = 0.5,
+                seed: Optional[Union[int, np.random.Generator]] = None,
+                instrumentation: Optional[Instrumentation] = None) -> Solution:
+        """
+        Estimates the battery cell SOC from the experimental data using the particle filter (see ParticleFilter), which
+        propagates all the particles at once at each time step. Unlike solveSPKF, the SOC uncertainty does not need
+        to be Gaussian, e.g., the initial SOC can be given as the samples of any distribution.
+        :param sol_exp: Solution object from the experimental data.
+        :param num_particles: number of particles
+        :param cov_soc: covariance of the initial soc (not used if soc_samples is provided)
+        :param cov_current: covariance of the initial i_r1 (of the current through each RC pair for n-RC models)
+        :param cov_process: covariance of the system process
+        :param cov_sensor: covariance of the voltage sensor
+        :param soc_samples: samples of the initial SOC distribution, which are drawn with replacement for the particles
+        :param resample_threshold: fraction of num_particles below which the effective sample size triggers the
+        resampling
+        :param seed: seed or the numpy random Generator
+        :param instrumentation: (Instrumentation) if provided, the phases of the filter loop are timed and the
+        InstrumentationReport is stored in the report attribute of the returned Solution object.
+        :return: (Solution) Solution object at all the experimental time values, with the mean SOC of the particles,
+        the terminal voltage of the mean state, and the state covariances of the particles (array_cov).
+        """
+        self.__param = self.b_cell.param.compile()
+        self.__param_tabulated = self.b_cell.param.is_tabulated
+        self.__check_tables()
+        self.__start_instrumentation(instrumentation=instrumentation)
+        sol = None
+        try:
+            instr = self.__instr
+
+            array_t = np.asarray(sol_exp.array_t, dtype=float)
+            array_I = np.asarray(sol_exp.array_I, dtype=float)
+            array_y_true = np.asarray(sol_exp.array_V, dtype=float)
+
+            # initial particles
+            rng = np.random.default_rng(seed)
+            num_rc = self.__param.num_rc
+            if soc_samples is None:
+                particles_soc = self.b_cell.soc + np.sqrt(cov_soc) * rng.standard_normal(num_particles)
+            else:
+                particles_soc = rng.choice(np.asarray(soc_samples, dtype=float).ravel(), size=num_particles)
+            particles_i_r = np.sqrt(cov_current) * rng.standard_normal((num_rc, num_particles))
+            w = NormalRandomVector(vector_init=np.array([[0.0]]), cov_init=np.array([[cov_process]]))
+            v = NormalRandomVector(vector_init=np.array([[0.0]]), cov_init=np.array([[cov_sensor]]))
+            pf = ParticleFilter(particles=np.vstack([particles_soc, particles_i_r]), w=w, v=v, func_f=self.__func_f,
+                                func_h=self.__func_h, resample_threshold=resample_threshold, seed=rng)
+
+            n = array_t.size
+            array_x = np.empty((n, num_rc + 1))
+            array_cov = np.empty((n, num_rc + 1, num_rc + 1))
+            array_x[0], array_cov[0] = pf.x_mean[:, 0], pf.x_cov
+            for i in range(1, n):
+                t_start = instr.tic()
+                self.__dt = array_t[i] - array_t[i - 1]
+                pf.predict(u=array_I[i - 1])
+                t_start = instr.toc('pf_predict', t_start)
+                pf.update(y_true=array_y_true[i], u=array_I[i])
+                array_x[i], array_cov[i] = pf.x_mean[:, 0], pf.x_cov
+                instr.toc('pf_update', t_start)
+                instr.step()
+
+            array_V = np.ravel(self.__func_h(array_x.transpose(), array_I, 0.0))
+            self.b_cell.soc = float(array_x[-1, 0])
+            sol = Solution(array_t=array_t, array_I=array_I, array_soc=array_x[:, 0], array_V=array_V,
+                           array_cov=array_cov)
+        finally:
+            self.__stop_instrumentation(sol=sol)
         return sol
 
     def solveHybridSPKF(self, dt: float):
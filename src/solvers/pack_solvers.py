@@ -0,0 +1,158 @@
+""" pack_solvers
+This module provides classes and functionality to solve for the battery cell SOC, current, and terminal voltage in a
+battery pack with series and parallel connected battery cells.
+"""
+
+__all__ = ['PackSolver']
+
+__author__ = 'Moin Ahmed'
+__copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
+__status__ = 'development'
+
+from typing import Optional
+
+import numpy as np
+
+from src.core.battery_objects import BatteryPack
+from src.core.parameter_functions import vectorize_parameter_function
+from src.core.cycling_steps import BaseCyclingStep, CustomStep
+from src.models.battery import TheveninNRC
+from src.visualization.recorders import SolutionRecorder
+from src.visualization.sol_and_plot_objects import Solution
+
+
+class PackSolver:
+    """
+    This is the class that solves the ECM model equations for all the battery cells of a BatteryPack. Each battery cell
+    is modelled using the Thevenin model (TheveninNRC), with the states stored as arrays of shape (num_series,
+    num_parallel) so that all the battery cells are advanced together.
+
+    The battery cells in a parallel group share the same terminal voltage, V_g, and their currents add up to the pack
+    current, I. After the discretization, the terminal voltage of the j-th battery cell in a group is linear in its
+    current:
+
+    V_g = e_j - r_j * i_j,      e_j = OCV(z_j[k+1]) - R . (a * i_R,j[k]),      r_j = R0_j + R . b
+
+    Hence, the current sharing in each group is the linear system {e_j - r_j * i_j = V_g for all j, sum_j i_j = I},
+    whose solution is:
+
+    V_g = (sum_j(e_j / r_j) - I) / sum_j(1 / r_j),      i_j = (e_j - V_g) / r_j
+
+    and it is solved for all the parallel groups at once. The pack voltage is the sum of the group voltages. The cycling
+    step is stopped when any (i.e., the weakest) battery cell crosses the voltage limits of the cycling step.
+
+    Code Notes:
+    1. The cycling step current is the pack current. Discharge currrent is positve and charge current is negative by
+    convention.
+    2. The OCV and Columbic efficiency functions are evaluated on the arrays of all the battery cells. The functions
+    that are not array-safe are evaluated element-wise (see parameter_functions.vectorize_parameter_function).
+    """
+    def __init__(self, battery_pack: BatteryPack) -> None:
+        """
+        The class constructor for the solver object.
+        :param battery_pack: (BatteryPack) battery pack object
+        """
+        if not isinstance(battery_pack, BatteryPack):
+            raise TypeError("battery_pack needs to be a BatteryPack type.")
+        self.b_pack = battery_pack
+        self.i_cells = np.zeros(battery_pack.shape)  # battery cell currents at the last time step [A]
+
+    @classmethod
+    def share_current(cls, i_pack: float, ocv: np.ndarray, i_R_prev: np.ndarray, R0: np.ndarray, R: np.ndarray,
+                      a: np.ndarray, b: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Solves for the current sharing between the parallel battery cells for all the parallel groups.
+        :param i_pack: pack current [A]
+        :param ocv: battery cell OCV [V], of shape (num_series, num_parallel)
+        :param i_R_prev: currents through the RC pairs at the previous time step [A], of shape (num_series,
+        num_parallel, num_rc)
+        :param R0: battery cell R0 [ohms], of shape (num_series, num_parallel)
+        :param R: resistances of the RC pairs [ohms]
+        :param a: discrete-time coefficients of the RC pairs, exp(-delta_t/(R*C))
+        :param b: discrete-time coefficients of the RC pairs, 1 - exp(-delta_t/(R*C))
+        :return: tuple containing the battery cell currents [A], of shape (num_series, num_parallel), and the parallel
+        group voltages [V], of shape (num_series,)
+        """
+        e = ocv - np.sum(R * a * i_R_prev, axis=-1)
+        g = 1 / (R0 + np.sum(R * b))  # battery cell conductances [S]
+        v_groups = (np.sum(e * g, axis=1) - i_pack) / np.sum(g, axis=1)
+        i_cells = (e - v_groups[:, np.newaxis]) * g
+        return i_cells, v_groups
+
+    def __is_completed(self, cycling_step: BaseCyclingStep, t_curr: float, v_groups: np.ndarray) -> bool:
+        """
+        Checks the termination criteria of the cycling step using the weakest battery cell.
+        """
+        if isinstance(cycling_step, CustomStep):
+            return (np.max(v_groups) > cycling_step.V_max) or (np.min(v_groups) < cycling_step.V_min) or \
+                (t_curr > cycling_step.array_t[-1])
+        step_name = cycling_step.cycle_step_name
+        if step_name == 'rest':
+            return t_curr > cycling_step.rest_time
+        if step_name == 'charge':
+            return np.max(v_groups) > cycling_step.V_max
+        if step_name == 'discharge':
+            return np.min(v_groups) < cycling_step.V_min
+        return False
+
+    def solve(self, cycling_step: BaseCyclingStep, dt: float = 0.1,
+              recorder: Optional[SolutionRecorder] = None) -> Solution:
+        """
+        Solves the battery pack for the cycling step. The battery cell SOC of the battery pack are updated.
+        :param cycling_step: cycling step object
+        :param dt: time step [s]
+        :param recorder: (SolutionRecorder) if provided, it is used to record the results (see DTSolver.solve)
+        :return: (Solution) Solution object with the pack current [A], mean battery cell SOC, and pack voltage [V].
+        """
+        b_pack = self.b_pack
+        param = b_pack.param.compile()
+        func_SOC_OCV = vectorize_parameter_function(param.func_SOC_OCV, name='func_SOC_OCV')
+        func_eta = vectorize_parameter_function(param.func_eta, name='func_eta', array_probe=np.linspace(-1, 1, 1000))
+        R = np.atleast_1d(param.R1)
+        a, b = TheveninNRC.discretize(dt=dt, R=R, C=np.atleast_1d(param.C1))
+        R0 = b_pack.R0
+        Q = b_pack.Q
+        is_custom = isinstance(cycling_step, CustomStep)
+        step_name = cycling_step.cycle_step_name
+        sign_I = 1.0 if is_custom else -1.0  # sign convention of the recorded current, as in DTSolver
+
+        soc = b_pack.soc
+        i_R = np.zeros(b_pack.shape + (len(R),))
+
+        # initial current sharing (no polarization in the RC pairs)
+        i_pack_init = float(cycling_step.get_current(step_name=step_name, t=0.0))
+        i_cells, v_groups = self.share_current(i_pack=i_pack_init, ocv=func_SOC_OCV(soc), i_R_prev=i_R, R0=R0, R=R,
+                                               a=np.ones_like(a), b=np.zeros_like(b))
+        v_groups_ocv = self.share_current(i_pack=0.0, ocv=func_SOC_OCV(soc), i_R_prev=i_R, R0=R0, R=R,
+                                          a=np.ones_like(a), b=np.zeros_like(b))[1]
+        recorder = SolutionRecorder() if recorder is None else recorder
+        recorder.start()
+        recorder.record(t=0.0, i_app=0.0, soc=np.mean(soc), v=np.sum(v_groups_ocv), cap_discharge=0.0)
+
+        t_prev = 0.0  # [s]
+        cap_discharge = 0.0  # [A hr]
+        step_completed = False
+        while not step_completed:
+            t_curr = t_prev + dt
+            i_pack = float(cycling_step.get_current(step_name=step_name, t=t_curr))
+
+            # SOC update using the battery cell currents of the previous time step
+            soc = soc - dt * func_eta(i_cells) * i_cells / (3600 * Q)
+
+            # current sharing and the RC pair update
+            i_cells, v_groups = self.share_current(i_pack=i_pack, ocv=func_SOC_OCV(soc), i_R_prev=i_R, R0=R0, R=R,
+                                                   a=a, b=b)
+            i_R = a * i_R + b * i_cells[..., np.newaxis]
+
+            step_completed = self.__is_completed(cycling_step=cycling_step, t_curr=t_curr, v_groups=v_groups)
+
+            # the internal current is passed, as in DTSolver, so that both solvers give the same cap_discharge
+            cap_discharge = Solution.calc_cap_discharge(cap_discharge_prev=cap_discharge, i_app=i_pack, dt=dt)
+            recorder.record(t=t_curr, i_app=sign_I * i_pack, soc=np.mean(soc), v=np.sum(v_groups),
+                            cap_discharge=cap_discharge)
+
+            t_prev = t_curr
+
+        b_pack.soc = soc
+        self.i_cells = i_cells
+        return recorder.stop()
@@ -0,0 +1,275 @@
+""" solution_cache
+Contains the classes and functionality for the on-disk caching of the simulation results.
+
+The simulation results are stored under a key that is the hash of all the inputs of the simulation: the battery cell
+parameter values, the OCV and eta functions (their code, constants, captured variables, and the module-level numbers,
+arrays, and helper functions they use, or the contents of the callable objects such as the parameter tables), the
+battery cell state, the cycling step definition (including the current arrays), the solver options, and dt. Hence,
+identical simulations share the same key across Python processes. The helper functions are hashed recursively only if
+they are defined in the same module as the function using them; the functions imported from other modules (e.g., of
+the installed libraries) are hashed by their names only, so changes to their code do not change the key.
+
+Each cached Solution is stored as a directory with one .npy file per array. The directory is first written under a
+temporary name and then renamed, which is atomic, so that the concurrent writers (e.g., workers of a process pool) and
+readers never see partially written entries. The cached arrays are returned memory-mapped (read-only). The cache size is
+capped and the least recently used entries (by the modification time of their directories) are evicted.
+"""
+
+__all__ = ['SolutionCache', 'hash_simulation_inputs']
+
+__author__ = 'Moin Ahmed'
+__copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
+__status__ = 'development'
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import types
+from dataclasses import fields
+from typing import Any, Optional
+
+import numpy as np
+
+from src.core.cycling_steps import BaseCyclingStep
+from src.solvers.ecm_solvers import DTSolver
+from src.visualization.sol_and_plot_objects import Solution
+
+CACHE_FORMAT_VERSION = 1
+_TEMP_PREFIX = '.tmp-'
+_TRASH_PREFIX = '.del-'
+_ARRAY_FIELDS = [f.name for f in fields(Solution) if f.name.startswith('array_')]
+
+
+def _global_names(code: types.CodeType) -> list[str]:
+    """
+    Returns the global names used by the code object and by the code objects nested in it (e.g., of the lambdas and
+    the inner functions).
+    """
+    names = list(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names.extend(name for name in _global_names(const) if name not in names)
+    return names
+
+
+def _update_hash(hasher, obj: Any, depth: int = 0, seen: Optional[set[int]] = None) -> None:
+    """
+    Updates the hasher with a stable (across Python processes) representation of the object.
+    :param hasher: hashlib hash object
+    :param obj: object to hash
+    :param depth: nesting depth of the object
+    :param seen: ids of the functions that have already been hashed, which are hashed by their names only when they
+    are referenced again (e.g., by the recursive functions or by the helper functions used by several functions).
+    """
+    seen = set() if seen is None else seen
+    if depth > 20:
+        raise TypeError('The object is too deeply nested to be hashed.')
+    if obj is None or isinstance(obj, (bool, int, float, complex, str, bytes)):
+        hasher.update(f'{type(obj).__name__}:{obj!r};'.encode())
+    elif isinstance(obj, np.generic):
+        _update_hash(hasher, obj.item(), depth + 1, seen)
+    elif isinstance(obj, np.ndarray):
+        hasher.update(f'ndarray:{obj.dtype.str}:{obj.shape};'.encode())
+        hasher.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (list, tuple)):
+        hasher.update(f'{type(obj).__name__}:{len(obj)};'.encode())
+        for item in obj:
+            _update_hash(hasher, item, depth + 1, seen)
+    elif isinstance(obj, dict):
+        hasher.update(f'dict:{len(obj)};'.encode())
+        for key in sorted(obj, key=repr):
+            _update_hash(hasher, key, depth + 1, seen)
+            _update_hash(hasher, obj[key], depth + 1, seen)
+    elif isinstance(obj, types.CodeType):
+        hasher.update(b'code;')
+        hasher.update(obj.co_code)
+        _update_hash(hasher, obj.co_consts, depth + 1, seen)
+        _update_hash(hasher, obj.co_names, depth + 1, seen)
+    elif isinstance(obj, types.FunctionType):
+        hasher.update(f'function:{obj.__module__}.{obj.__qualname__};'.encode())
+        if id(obj) in seen:
+            return
+        seen.add(id(obj))
+        _update_hash(hasher, obj.__code__, depth + 1, seen)
+        _update_hash(hasher, obj.__defaults__, depth + 1, seen)
+        if obj.__closure__ is not None:
+            _update_hash(hasher, [cell.cell_contents for cell in obj.__closure__], depth + 1, seen)
+        # module-level numbers and arrays (e.g., fitted coefficients) and the helper functions of the same module used
+        # by the function
+        for name in _global_names(obj.__code__):
+            value = obj.__globals__.get(name)
+            is_helper = isinstance(value, types.FunctionType) and value.__module__ == obj.__module__
+            if is_helper or (isinstance(value, (int, float, np.ndarray, np.generic)) and not isinstance(value, bool)):
+                _update_hash(hasher, name, depth + 1, seen)
+                _update_hash(hasher, value, depth + 1, seen)
+    elif isinstance(obj, types.BuiltinFunctionType) or isinstance(obj, np.ufunc):
+        hasher.update(f'builtin:{getattr(obj, "__module__", None)}.{obj.__name__};'.encode())
+    elif isinstance(obj, types.MethodType):
+        _update_hash(hasher, obj.__func__, depth + 1, seen)
+        _update_hash(hasher, obj.__self__, depth + 1, seen)
+    elif hasattr(obj, '__dict__'):
+        # callable objects (e.g., parameter tables) and other objects are hashed by their attributes
+        hasher.update(f'object:{type(obj).__module__}.{type(obj).__qualname__};'.encode())
+        _update_hash(hasher, {key: value for key, value in vars(obj).items() if 'cache' not in key}, depth + 1, seen)
+    else:
+        raise TypeError(f'Objects of type {type(obj).__name__} cannot be hashed for the SolutionCache.')
+
+
+def hash_simulation_inputs(solver: DTSolver, cycling_step: BaseCyclingStep, dt: float) -> str:
+    """
+    Returns the stable hash of the inputs of the DTSolver simulation.
+    :param solver: DTSolver object
+    :param cycling_step: cycling step object
+    :param dt: time step [s]
+    :return: (str) hexadecimal hash
+    """
+    b_cell = solver.b_cell
+    hasher = hashlib.sha256()
+    _update_hash(hasher, ['DTSolver', CACHE_FORMAT_VERSION])
+    _update_hash(hasher, b_cell.param)
+    _update_hash(hasher, [b_cell.soc, b_cell.temp, solver.isothermal, solver.temp_amb, float(dt)])
+    _update_hash(hasher, cycling_step)
+    return hasher.hexdigest()
+
+
+class SolutionCache:
+    """
+    On-disk cache of the Solution objects with the least recently used (LRU) eviction.
+    """
+    def __init__(self, cache_dir: str, max_size: int = 2 ** 30) -> None:
+        """
+        Class constructor.
+        :param cache_dir: directory of the cache. It is created if it does not exist.
+        :param max_size: maximum size of the cache [bytes]
+        """
+        if max_size <= 0:
+            raise ValueError('max_size needs to be positive.')
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.num_hits = 0
+        self.num_misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def __entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.isdir(self.__entry_dir(key))
+
+    def get(self, key: str) -> Optional[Solution]:
+        """
+        Returns the cached Solution object, whose arrays are read-only memory-maps, or None if the key is not in the
+        cache.
+        :param key: hash of the simulation inputs
+        :return: (Solution) cached Solution object or None
+        """
+        entry_dir = self.__entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, 'meta.json')) as f:
+                meta = json.load(f)
+            arrays = {}
+            for field_name in _ARRAY_FIELDS:
+                if field_name in meta['arrays']:
+                    arrays[field_name] = np.load(os.path.join(entry_dir, f'{field_name}.npy'), mmap_mode='r')
+            os.utime(entry_dir)  # marks the entry as recently used
+        except (FileNotFoundError, NotADirectoryError):  # not cached or evicted by another process
+            self.num_misses += 1
+            return None
+        self.num_hits += 1
+        return Solution(**arrays)
+
+    def put(self, key: str, sol: Solution) -> None:
+        """
+        Stores the Solution object in the cache. If the key is already in the cache (e.g., stored by another process),
+        the existing entry is kept.
+        :param key: hash of the simulation inputs
+        :param sol: Solution object
+        """
+        temp_dir = tempfile.mkdtemp(prefix=_TEMP_PREFIX, dir=self.cache_dir)
+        try:
+            array_names = []
+            for field_name in _ARRAY_FIELDS:
+                array = np.asarray(getattr(sol, field_name))
+                if array.size > 0:  # empty arrays cannot be memory-mapped
+                    np.save(os.path.join(temp_dir, f'{field_name}.npy'), array)
+                    array_names.append(field_name)
+            with open(os.path.join(temp_dir, 'meta.json'), 'w') as f:
+                json.dump({'version': CACHE_FORMAT_VERSION, 'arrays': array_names}, f)
+            os.rename(temp_dir, self.__entry_dir(key))
+        except OSError:
+            if key not in self:
+                raise
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        self.evict()
+
+    def __list_entries(self) -> list[tuple[float, int, str]]:
+        """
+        Returns the list of the (modification time, size, path) of the cache entries.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.startswith((_TEMP_PREFIX, _TRASH_PREFIX)):
+                continue
+            entry_dir = os.path.join(self.cache_dir, name)
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(entry_dir))
+                entries.append((os.stat(entry_dir).st_mtime, size, entry_dir))
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+        return entries
+
+    @property
+    def size(self) -> int:
+        """
+        Total size of the cache entries [bytes].
+        """
+        return sum(size for _, size, _ in self.__list_entries())
+
+    def __remove(self, entry_dir: str) -> None:
+        # the entry is renamed first so that it disappears atomically for the other processes
+        trash_dir = os.path.join(self.cache_dir, f'{_TRASH_PREFIX}{os.path.basename(entry_dir)}-{time.time_ns()}')
+        try:
+            os.rename(entry_dir, trash_dir)
+        except (FileNotFoundError, OSError):
+            return
+        shutil.rmtree(trash_dir, ignore_errors=True)
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used entries until the cache size is within max_size.
+        """
+        entries = sorted(self.__list_entries())
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in entries:
+            if total_size <= self.max_size:
+                break
+            self.__remove(entry_dir)
+            total_size -= size
+
+    def clear(self) -> None:
+        for _, _, entry_dir in self.__list_entries():
+            self.__remove(entry_dir)
+
+    def solve(self, solver: DTSolver, cycling_step: BaseCyclingStep, dt: float = 0.1) -> Solution:
+        """
+        Returns the Solution of DTSolver.solve from the cache, or runs the simulation and stores its Solution if it is
+        not cached. As with DTSolver.solve, the battery cell SOC (and temperature) is updated to its final value.
+        :param solver: DTSolver object
+        :param cycling_step: cycling step object
+        :param dt: time step [s]
+        :return: (Solution) Solution object
+        """
+        key = hash_simulation_inputs(solver=solver, cycling_step=cycling_step, dt=dt)
+        sol = self.get(key)
+        if sol is None:
+            sol = solver.solve(cycling_step=cycling_step, dt=dt)
+            self.put(key, sol)
+            return sol
+        solver.b_cell.soc = float(sol.array_soc[-1])
+        if sol.array_temp.size > 0:
+            solver.b_cell.temp = float(sol.array_temp[-1])
+        return sol
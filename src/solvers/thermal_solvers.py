@@ -6,14 +6,18 @@ __author__ = 'Moin Ahmed'
 __copywrite__ = 'Copywrite 2023 by Moin Ahmed. All rights are reserved.'
 __status__ = 'developement'
 
-from src.calc_helpers.ode_solvers import rk4
-from src.models.thermal import ECMLumped
+import numpy as np
+import numpy.typing as npt
+
+from src.models.thermal import ECMLumped, ECMRadial
 
 
 def calc_cell_temp(t_prev: float, dt: float, temp_prev: float, v: float, i_app: float, rho: float, vol: float,
                    c_p: float, ocv: float, docvdtemp: float, h: float, area: float, temp_amb: float) -> float:
     """
-    Solves for the heat balance using the ODE rk4 solver for the ECM model.
+    Solves for the heat balance of the lumped thermal ECM model. Since the applied current, terminal voltage, and OCV
+    are held constant over the time step, the heat balance is linear in temperature and is integrated exactly (see
+    ECMLumped.temp_next). The inputs can also be numpy arrays for a batch of battery cells.
     :param t_prev: time at the previous time step [s]
     :param dt: time difference between the current and the previous time steps [s]
     :param temp_prev: temperature at the previous time step [K]
@@ -29,7 +33,28 @@ def calc_cell_temp(t_prev: float, dt: float, temp_prev: float, v: float, i_app:
     :param temp_amb: ambient temperature [K]
     :return: (float) Battery cell temperature [K]
     """
-    t_model = ECMLumped()
-    func_heat_balance = t_model.heat_balance(v=V, i_app=i_app, rho=rho, vol=vol, c_p=c_p, ocv=ocv, docvdtemp=docvdtemp,
-                                             h=h, area=area,temp_amb=temp_amb)
-    return rk4(func=func_heat_balance, t_prev=t_prev, y_prev=temp_prev, step_size=dt)
+    return ECMLumped.temp_next(dt=dt, temp_prev=temp_prev, i_app=i_app, v=v, ocv=ocv, docvdtemp=docvdtemp,
+                               rho=rho, vol=vol, c_p=c_p, h=h, area=area, temp_amb=temp_amb)
+
+
+def calc_cell_temp_radial(model: ECMRadial, dt: float, temp_prev: npt.ArrayLike, v: npt.ArrayLike,
+                          i_app: npt.ArrayLike, ocv: npt.ArrayLike, docvdtemp: npt.ArrayLike, vol: float,
+                          temp_amb: float) -> np.ndarray:
+    """
+    Solves for the radial temperature distribution in the battery cell(s) for the next time step. The heat generation is
+    calculated from the ECM (ECMLumped.heat_generation) using the volume-averaged temperature. The inputs can be
+    numpy arrays for a batch of battery cells, which are then solved together.
+    :param model: ECMRadial model object
+    :param dt: time difference between the current and the previous time steps [s]
+    :param temp_prev: node temperatures at the previous time step [K], with shape (..., num_nodes)
+    :param v: Battery cell potential at the current time step [V]
+    :param i_app: Applied battery current [A]
+    :param ocv: Open-circiut potential [V]
+    :param docvdtemp: change of OCV with respect to the change in temperature [V/K]
+    :param vol: battery cell volume, m3
+    :param temp_amb: ambient temperature [K]
+    :return: node temperatures [K] at the next time step
+    """
+    heat_gen = ECMLumped.heat_generation(i_app=i_app, temp=model.avg_temp(temp_prev), v=v, ocv=ocv,
+                                         docvdtemp=docvdtemp)
+    return model.temp_next(dt=dt, temp_prev=temp_prev, heat_gen=heat_gen, vol=vol, temp_amb=temp_amb)
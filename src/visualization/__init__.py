@@ -3,7 +3,7 @@ Package header for the visualization namespace.
 Provide classes and functionality for storing, visualization, post-processing, and post-analysis of simulation results.
 """
 
-__all__ = ['sol_and_plot_objects']
+__all__ = ['sol_and_plot_objects', 'recorders', 'solution_store', 'differential_analysis']
 
 __author__ = 'Moin Ahmed'
 __copyright__ = 'Copywrite 2023 by Moin Ahmed. All rights reserved.'
@@ -0,0 +1,182 @@
+""" differential_analysis
+Contains the functionality for the incremental capacity analysis (ICA, dQ/dV) and the differential voltage analysis
+(DVA, dV/dQ) of the Solution objects, e.g., to track the battery cell degradation over the charge cycles.
+
+The incremental capacity is calculated using the fixed-voltage binning: the capacity increment of each sampling
+interval is added to the voltage bin of the interval (using np.bincount), and the sum in each bin is divided by the bin
+width. This is O(n), and, since the capacity is integrated over the bins rather than differentiated, it is robust to
+the voltage noise. The differential voltage is calculated using the windowed (moving) linear regression of the voltage
+on the capacity, which is also O(n) using the cumulative sums.
+
+The capacity is taken from array_cap_discharge if it changes over the Solution (discharge), and otherwise (e.g., for the
+charge Solutions) it is the charge throughput calculated from array_I and array_t.
+"""
+
+__all__ = ['calc_capacity', 'ica', 'dva', 'batch_ica', 'find_peaks', 'PEAK_DTYPE']
+
+__author__ = 'Moin Ahmed'
+__copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
+__status__ = 'development'
+
+from typing import Iterable, Optional
+
+import numpy as np
+import numpy.typing as npt
+import scipy.integrate
+import scipy.signal
+
+from src.visualization.sol_and_plot_objects import Solution
+
+PEAK_DTYPE = np.dtype([('solution', np.int64), ('position', np.float64), ('height', np.float64),
+                       ('area', np.float64)])
+
+
+def calc_capacity(sol: Solution) -> np.ndarray:
+    """
+    Returns the capacity [A hr] at each time point of the Solution object, which is the discharge capacity if it
+    changes over the Solution, and the charge throughput (integral of the absolute current) otherwise.
+    :param sol: Solution object
+    :return: (np.ndarray) capacity [A hr]
+    """
+    array_cap = np.asarray(sol.array_cap_discharge, dtype=float)
+    if (array_cap.size == np.size(sol.array_V)) and (array_cap.size > 0) and (np.ptp(array_cap) > 0):
+        return array_cap
+    if np.size(sol.array_I) != np.size(sol.array_V):
+        raise ValueError('The Solution needs array_cap_discharge or array_I with the same size as array_V.')
+    return scipy.integrate.cumulative_trapezoid(np.abs(sol.array_I), sol.array_t, initial=0.0) / 3600
+
+
+def _bin_intervals(array_V: np.ndarray, array_cap: np.ndarray, V_min: float, dV: float,
+                   num_bins: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the voltage bin index of each sampling interval (num_bins for the intervals outside the voltage range) and
+    the absolute capacity increment of each sampling interval.
+    """
+    V_mid = 0.5 * (array_V[1:] + array_V[:-1])
+    index = np.floor((V_mid - V_min) / dV).astype(np.int64)
+    index[(index < 0) | (index >= num_bins)] = num_bins
+    return index, np.abs(np.diff(array_cap))
+
+
+def _smooth(array_: np.ndarray, smoothing_bins: int) -> np.ndarray:
+    """
+    Smooths the last axis of the array with a moving average over smoothing_bins bins.
+    """
+    if smoothing_bins <= 1:
+        return array_
+    kernel = np.ones(smoothing_bins) / smoothing_bins
+    return np.apply_along_axis(lambda row: np.convolve(row, kernel, mode='same'), -1, array_)
+
+
+def ica(sol: Solution, dV: float = 0.005, V_min: Optional[float] = None, V_max: Optional[float] = None,
+        smoothing_bins: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calculates the incremental capacity, dQ/dV, using the fixed-voltage binning.
+    :param sol: Solution object
+    :param dV: width of the voltage bins [V]
+    :param V_min: lower bound of the voltage range [V]. By default, the minimum voltage of the Solution.
+    :param V_max: upper bound of the voltage range [V]. By default, the maximum voltage of the Solution.
+    :param smoothing_bins: if more than one, dQ/dV is smoothed using the moving average over this number of bins
+    :return: (tuple) voltages at the bin centers [V], and dQ/dV [A hr / V]
+    """
+    array_V, dQdV = batch_ica([sol], dV=dV, V_min=V_min, V_max=V_max, smoothing_bins=smoothing_bins)
+    return array_V, dQdV[0]
+
+
+def batch_ica(sols: Iterable[Solution], dV: float = 0.005, V_min: Optional[float] = None,
+              V_max: Optional[float] = None, smoothing_bins: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calculates the incremental capacity of many Solution objects on a common voltage grid. The sampling intervals of all
+    the Solution objects are binned together in one pass.
+    :param sols: Solution objects
+    :param dV: width of the voltage bins [V]
+    :param V_min: lower bound of the voltage range [V]. By default, the minimum voltage of the Solution objects.
+    :param V_max: upper bound of the voltage range [V]. By default, the maximum voltage of the Solution objects.
+    :param smoothing_bins: if more than one, dQ/dV is smoothed using the moving average over this number of bins
+    :return: (tuple) voltages at the bin centers [V], and dQ/dV [A hr / V] with a row for each Solution object
+    """
+    if dV <= 0:
+        raise ValueError('dV needs to be positive.')
+    sols = list(sols)
+    list_V = [np.asarray(sol.array_V, dtype=float) for sol in sols]
+    list_cap = [calc_capacity(sol) for sol in sols]
+    V_min = min(float(np.min(array_V)) for array_V in list_V) if V_min is None else V_min
+    V_max = max(float(np.max(array_V)) for array_V in list_V) if V_max is None else V_max
+    num_bins = max(int(np.ceil((V_max - V_min) / dV - 1e-9)), 1)
+
+    list_index, list_dQ = [], []
+    for k, (array_V, array_cap) in enumerate(zip(list_V, list_cap)):
+        index, dQ = _bin_intervals(array_V, array_cap, V_min=V_min, dV=dV, num_bins=num_bins)
+        list_index.append(index + k * (num_bins + 1))  # an overflow bin for each Solution
+        list_dQ.append(dQ)
+    index = np.concatenate(list_index) if list_index else np.array([], dtype=np.int64)
+    dQ = np.concatenate(list_dQ) if list_dQ else np.array([])
+    sums = np.bincount(index, weights=dQ, minlength=len(sols) * (num_bins + 1)).reshape(len(sols), num_bins + 1)
+    array_V = V_min + dV * (np.arange(num_bins) + 0.5)
+    return array_V, _smooth(sums[:, :num_bins] / dV, smoothing_bins)
+
+
+def dva(sol: Solution, window: int = 21) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calculates the differential voltage, dV/dQ, using the linear regression of the voltage on the capacity over a moving
+    window of samples.
+    :param sol: Solution object
+    :param window: number of samples in the moving window (odd)
+    :return: (tuple) capacity [A hr] and dV/dQ [V / A hr] at the window centers
+    """
+    if (window < 3) or (window % 2 == 0):
+        raise ValueError('window needs to be an odd number of at least three.')
+    array_cap = calc_capacity(sol)
+    array_V = np.asarray(sol.array_V, dtype=float)
+    if array_V.size < window:
+        return np.array([]), np.array([])
+    # the capacity and voltage are centered to limit the cancellation in the differences of the cumulative sums
+    x = array_cap - np.mean(array_cap)
+    y = array_V - np.mean(array_V)
+
+    def window_sum(array_: np.ndarray) -> np.ndarray:
+        cumsum = np.concatenate(([0.0], np.cumsum(array_)))
+        return cumsum[window:] - cumsum[:-window]
+
+    s_x, s_y = window_sum(x), window_sum(y)
+    s_xx, s_xy = window_sum(x * x), window_sum(x * y)
+    var_x = window * s_xx - s_x * s_x
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dVdQ = np.where(var_x > 0, (window * s_xy - s_x * s_y) / var_x, np.nan)
+    half = window // 2
+    return array_cap[half:array_cap.size - half], dVdQ
+
+
+def find_peaks(x: npt.ArrayLike, y: npt.ArrayLike, prominence: Optional[float] = None,
+               solution_index: int = 0) -> np.ndarray:
+    """
+    Finds the peaks of the ICA or DVA curve (or of each row of the batch ICA curves) and returns their positions,
+    heights, and areas. The area of a peak is the integral of the curve between the bases of the peak (see
+    scipy.signal.peak_prominences), or the minima between the adjacent peaks if they are closer.
+    :param x: voltages or capacities of the curve
+    :param y: curve values, or the 2-D array with a row for each curve (e.g., from batch_ica)
+    :param prominence: minimum prominence of the peaks. By default, 5% of the maximum of each curve.
+    :param solution_index: index stored in the solution field for the 1-D curves
+    :return: (np.ndarray) structured array with the PEAK_DTYPE fields: solution (row index), position, height, and area
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    rows = y.reshape(1, -1) if y.ndim == 1 else y
+    list_peaks = []
+    for k, row in enumerate(rows):
+        row = np.nan_to_num(row)
+        prominence_row = 0.05 * float(np.max(np.abs(row), initial=0.0)) if prominence is None else prominence
+        index, properties = scipy.signal.find_peaks(row, prominence=prominence_row)
+        peaks = np.empty(index.size, dtype=PEAK_DTYPE)
+        peaks['solution'] = solution_index if y.ndim == 1 else k
+        peaks['position'] = x[index]
+        peaks['height'] = row[index]
+        # the peak bounds are its bases, limited to the minima between the adjacent peaks so that the overlapping
+        # peaks do not share their areas
+        valleys = np.array([i + np.argmin(row[i:j + 1]) for i, j in zip(index[:-1], index[1:])], dtype=np.int64)
+        left = np.maximum(properties['left_bases'], np.concatenate(([0], valleys)))
+        right = np.minimum(properties['right_bases'], np.concatenate((valleys, [row.size - 1])))
+        cumulative_area = scipy.integrate.cumulative_trapezoid(row, x, initial=0.0)
+        peaks['area'] = cumulative_area[right] - cumulative_area[left]
+        list_peaks.append(peaks)
+    return np.concatenate(list_peaks) if list_peaks else np.empty(0, dtype=PEAK_DTYPE)
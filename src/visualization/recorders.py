@@ -0,0 +1,305 @@
+""" recorders
+Contains the classes for recording the solver outputs into the Solution objects.
+
+The SolutionRecorder stores the outputs in preallocated numpy buffers, which grow geometrically when full, so that
+recording n time steps costs O(n) (unlike Solution.update_arrays, which copies the arrays at every call). The recorded
+columns and their dtype are configurable to reduce the memory of the long simulations.
+
+Error bounds of the reduced-precision (float32) recording: each recorded value is rounded once to the nearest float32,
+so its relative error is at most 2**-24 (about 6e-8), i.e., at most 0.3 uV for the voltage below 5 V and 6e-8 for
+the SOC. The errors do not accumulate since the solver state is kept in float64. The time column is recorded in
+float64 by default since the absolute error of a float32 time grows with the time, e.g., up to 36 ms after a week
+(6e5 s).
+
+The recording policies (RecordingPolicy) decide which of the time steps are recorded so that the solver time step (the
+accuracy) and the output size are independent: every n-th step (EveryNthStep), the values on a fixed output time grid
+(OutputGrid), or only the steps where the values change beyond the tolerances (Deadband). The first and last (e.g., the
+cut-off) time steps are always recorded.
+"""
+
+__all__ = ['SolutionRecorder', 'RecordingPolicy', 'EveryNthStep', 'OutputGrid', 'Deadband', 'COLUMNS']
+
+__author__ = 'Moin Ahmed'
+__copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
+__status__ = 'development'
+
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from src.visualization.sol_and_plot_objects import Solution
+
+COLUMNS = ('t', 'I', 'soc', 'V', 'cap_discharge', 'temp')  # in the order of the arguments of SolutionRecorder.record
+
+
+class RecordingPolicy:
+    """
+    Base class for the recording policies. The policy receives the values of every time step, as the tuple (t, i_app,
+    soc, v, cap_discharge, temp), and returns the list of the value tuples to record. The first time step is always
+    recorded, and the last time step is recorded by flush, if it has not been already.
+    """
+    def start(self) -> None:
+        self._last = None  # values of the last time step
+        self._is_last_recorded = False
+
+    def select(self, values: tuple) -> list[tuple]:
+        """
+        Returns the list of the value tuples to record for the time step.
+        :param values: values of the time step
+        :return: (list) value tuples to record
+        """
+        is_first = self._last is None
+        records = [values] if is_first else self._select(values)
+        self._last = values
+        self._is_last_recorded = bool(records) and (records[-1] is values)
+        return records
+
+    def _select(self, values: tuple) -> list[tuple]:
+        raise NotImplementedError
+
+    def flush(self) -> list[tuple]:
+        """
+        Returns the last time step if it has not been recorded.
+        """
+        return [] if (self._last is None or self._is_last_recorded) else [self._last]
+
+
+class EveryNthStep(RecordingPolicy):
+    """
+    Records every n-th time step.
+    """
+    def __init__(self, n: int) -> None:
+        """
+        Class constructor.
+        :param n: recording interval in the number of the time steps
+        """
+        if n < 1:
+            raise ValueError('n needs to be positive.')
+        self.n = n
+        self.start()
+
+    def start(self) -> None:
+        super().start()
+        self.__num_steps = 0
+
+    def _select(self, values: tuple) -> list[tuple]:
+        self.__num_steps += 1
+        return [values] if self.__num_steps % self.n == 0 else []
+
+
+class OutputGrid(RecordingPolicy):
+    """
+    Records the values at the fixed output times, t_start + k * dt_output, which are linearly interpolated between the
+    solver time steps.
+    """
+    def __init__(self, dt_output: float, t_start: float = 0.0) -> None:
+        """
+        Class constructor.
+        :param dt_output: time interval of the output grid [s]
+        :param t_start: time of the first output grid point [s]
+        """
+        if dt_output <= 0:
+            raise ValueError('dt_output needs to be positive.')
+        self.dt_output = dt_output
+        self.t_start = t_start
+        self.start()
+
+    def start(self) -> None:
+        super().start()
+        self.__k_next = 0  # index of the next output grid point
+
+    def select(self, values: tuple) -> list[tuple]:
+        if self._last is None:  # the first time step is recorded, and the output grid continues from its time
+            self.__k_next = max(int(np.floor((values[0] - self.t_start) / self.dt_output)) + 1, 0)
+        return super().select(values)
+
+    def _select(self, values: tuple) -> list[tuple]:
+        records = []
+        last = self._last
+        t_last, t = last[0], values[0]
+        t_next = self.t_start + self.__k_next * self.dt_output
+        while t_next <= t:
+            if t_next == t:
+                records.append(values)
+            elif t_next > t_last:
+                w = (t_next - t_last) / (t - t_last)
+                records.append((t_next,) + tuple(None if (value is None or value_last is None) else
+                                                 value_last + (value - value_last) * w
+                                                 for value_last, value in zip(last[1:], values[1:])))
+            self.__k_next += 1
+            t_next = self.t_start + self.__k_next * self.dt_output
+        return records
+
+
+class Deadband(RecordingPolicy):
+    """
+    Records the time step when the current, SOC, or voltage changes by more than its tolerance from the last recorded
+    time step (deadband compression). The time step before is recorded as well, so that the step changes (e.g., of the
+    current) are kept sharp. The tolerances that are None are not checked.
+    """
+    def __init__(self, tol_V: Optional[float] = None, tol_I: Optional[float] = None,
+                 tol_soc: Optional[float] = None) -> None:
+        """
+        Class constructor.
+        :param tol_V: voltage tolerance [V]
+        :param tol_I: current tolerance [A]
+        :param tol_soc: SOC tolerance
+        """
+        self.__tols = [(index, tol) for index, tol in ((3, tol_V), (1, tol_I), (2, tol_soc)) if tol is not None]
+        if not self.__tols:
+            raise ValueError('At least one tolerance needs to be specified.')
+        self.start()
+
+    def start(self) -> None:
+        super().start()
+        self.__recorded = None  # values of the last recorded time step
+
+    def _select(self, values: tuple) -> list[tuple]:
+        recorded = self.__recorded
+        if not any(np.any(np.abs(values[index] - recorded[index]) > tol) for index, tol in self.__tols):
+            return []
+        records = [values] if self._is_last_recorded else [self._last, values]
+        self.__recorded = values
+        return records
+
+    def select(self, values: tuple) -> list[tuple]:
+        if self._last is None:
+            self.__recorded = values
+        return super().select(values)
+
+
+class SolutionRecorder:
+    """
+    Records the solver outputs at each time step into growable numpy buffers and returns them as a Solution object. The
+    columns are t, I, soc, V, cap_discharge, and temp (only recorded for the non-isothermal simulations), which are
+    stored as the array_<column> attributes of the Solution object. The columns that are not recorded are empty arrays
+    in the Solution object.
+
+    The recorded values can be floats or numpy arrays (e.g., for a batch of battery cells), in which case the recorded
+    array has an additional leading axis for the time steps.
+
+    If a recording policy is provided, only the time steps selected by the policy are recorded (see RecordingPolicy).
+
+    The recorder is used by the solvers as:
+
+    recorder.start()
+    recorder.record(t=..., i_app=..., soc=..., v=..., cap_discharge=..., temp=...)  # at each time step
+    sol = recorder.stop()
+    """
+    def __init__(self, dtype: npt.DTypeLike = np.float64, columns: Optional[Iterable[str]] = None,
+                 time_dtype: npt.DTypeLike = np.float64, capacity: int = 1024,
+                 policy: Optional[RecordingPolicy] = None) -> None:
+        """
+        Class constructor.
+        :param dtype: dtype of the recorded columns, except for the time column (e.g., np.float32)
+        :param columns: names of the columns to record (see COLUMNS). All columns are recorded if None.
+        :param time_dtype: dtype of the time column
+        :param capacity: initial number of the time steps that the buffers can store
+        :param policy: recording policy. All time steps are recorded if None.
+        """
+        columns = COLUMNS if columns is None else tuple(columns)
+        unknown_columns = [column for column in columns if column not in COLUMNS]
+        if unknown_columns:
+            raise ValueError(f'Unknown column(s) {unknown_columns}. The columns need to be from {COLUMNS}.')
+        if capacity < 1:
+            raise ValueError('capacity needs to be positive.')
+        self.dtype = np.dtype(dtype)
+        self.time_dtype = np.dtype(time_dtype)
+        self.columns = tuple(column for column in COLUMNS if column in columns)
+        self.initial_capacity = capacity
+        self.policy = policy
+        self.__indices = [COLUMNS.index(column) for column in self.columns]
+        self.start()
+
+    def start(self) -> None:
+        """
+        Clears the recorded values.
+        """
+        self.__buffers = None  # list of the (column index, buffer) allocated at the first record
+        self.__num_records = 0
+        self.__capacity = self.initial_capacity
+        if self.policy is not None:
+            self.policy.start()
+
+    def __len__(self) -> int:
+        return self.__num_records
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory used by the buffers [bytes].
+        """
+        return 0 if self.__buffers is None else sum(buffer.nbytes for _, buffer in self.__buffers)
+
+    def __allocate(self, values: tuple) -> None:
+        self.__buffers = []
+        for index in self.__indices:
+            if values[index] is None:  # e.g., the temperature of the isothermal simulations
+                continue
+            dtype = self.time_dtype if index == 0 else self.dtype
+            self.__buffers.append((index, np.empty((self.__capacity,) + np.shape(values[index]), dtype=dtype)))
+
+    def __grow(self) -> None:
+        self.__capacity *= 2
+        buffers = []
+        for index, buffer in self.__buffers:
+            buffer_new = np.empty((self.__capacity,) + buffer.shape[1:], dtype=buffer.dtype)
+            buffer_new[:self.__num_records] = buffer
+            buffers.append((index, buffer_new))
+        self.__buffers = buffers
+
+    def record(self, t: float, i_app: Union[float, np.ndarray], soc: Union[float, np.ndarray],
+               v: Union[float, np.ndarray], cap_discharge: Union[float, np.ndarray],
+               temp: Optional[Union[float, np.ndarray]] = None) -> None:
+        """
+        Records the values of the time step.
+        :param t: time [s]
+        :param i_app: applied current [A]
+        :param soc: state-of-charge
+        :param v: terminal voltage [V]
+        :param cap_discharge: discharge capacity [A hr]
+        :param temp: battery cell temperature [K] (None for the isothermal simulations)
+        """
+        values = (t, i_app, soc, v, cap_discharge, temp)
+        if self.policy is None:
+            self._append(values)
+        else:
+            for values_selected in self.policy.select(values):
+                self._append(values_selected)
+
+    def _append(self, values: tuple) -> None:
+        """
+        Appends the values of the selected time step to the buffers.
+        """
+        if self.__buffers is None:
+            self.__allocate(values)
+        elif self.__num_records == self.__capacity:
+            self.__grow()
+        n = self.__num_records
+        for index, buffer in self.__buffers:
+            buffer[n] = values[index]
+        self.__num_records = n + 1
+
+    def stop(self) -> Solution:
+        """
+        Returns the recorded values as a Solution object and clears the recorder. The buffers are trimmed to the number
+        of the recorded time steps.
+        :return: (Solution) Solution object
+        """
+        if self.policy is not None:
+            for values in self.policy.flush():
+                self._append(values)
+        sol = self._to_solution()
+        self.start()
+        return sol
+
+    def _to_solution(self) -> Solution:
+        """
+        Returns the Solution object of the recorded values, with the buffers trimmed to the number of the records.
+        """
+        arrays = {}
+        for index, buffer in (self.__buffers or []):
+            buffer.resize((self.__num_records,) + buffer.shape[1:], refcheck=False)
+            arrays[f'array_{COLUMNS[index]}'] = buffer
+        return Solution(**arrays)
@@ -18,6 +18,9 @@ import matplotlib as mpl
 import matplotlib.pyplot as plt
 import scipy.interpolate
 
+from src.calc_helpers.instrumentation import InstrumentationReport
+from src.observers.realtime import RealTimeReport
+
 
 @dataclass
 class Solution:
@@ -30,6 +33,15 @@ class Solution:
     array_V: np.ndarray = field(default_factory=lambda: np.array([]))  # np array containing the terminal potential [V]
     array_cap_discharge: np.ndarray = field(default_factory=lambda: np.array([]))  # np array containing the discharge
     # capacity [Ahr]
+    array_temp: np.ndarray = field(default_factory=lambda: np.array([]))  # np array containing the temperature [K]
+    array_cov: np.ndarray = field(default_factory=lambda: np.array([]))  # np array containing the state covariance
+    # matrices of the observers (e.g., DTSolver.smoothSPKF), with the shape (number of time values, Nx, Nx)
+    array_R0: np.ndarray = field(default_factory=lambda: np.array([]))  # np array containing the R0 estimates [ohms] of
+    # the joint observers (e.g., DTSolver.solveJointSPKF)
+    array_Q: np.ndarray = field(default_factory=lambda: np.array([]))  # np array containing the capacity estimates
+    # [A hr] of the joint observers
+    report: Optional[InstrumentationReport] = None  # instrumentation report of the solver run (if requested)
+    realtime_report: Optional[RealTimeReport] = None  # latency report of the real-time observer run (if any)
 
     @classmethod
     def read_from_csv_file(cls, filepath: str) -> Self:
@@ -66,7 +78,8 @@ class Solution:
         plt.rc('axes', labelweight='bold')
         plt.rcParams['font.size'] = 15
 
-    def update_arrays(self, t: float, i_app: float, soc: float, v: float, cap_discharge: float) -> None:
+    def update_arrays(self, t: float, i_app: float, soc: float, v: float, cap_discharge: float,
+                      temp: Optional[float] = None) -> None:
         """
         Updates the instance's arrays with the new data values
         :param t: time value [s]
@@ -74,12 +87,15 @@ class Solution:
         :param soc: state-of-charge
         :param v: terminal voltage [V]
         :param cap_discharge: discharge capacity [A hr]
+        :param temp: battery cell temperature [K]. It is only stored if it is not None.
         """
         self.array_t = np.append(self.array_t, t)
         self.array_I = np.append(self.array_I, i_app)
         self.array_soc = np.append(self.array_soc, soc)
         self.array_V = np.append(self.array_V, v)
         self.array_cap_discharge = np.append(self.array_cap_discharge, cap_discharge)
+        if temp is not None:
+            self.array_temp = np.append(self.array_temp, temp)
 
     def mse(self, sol_exp: Self) -> float:
         """
@@ -0,0 +1,271 @@
+""" solution_store
+Contains the out-of-core, append-only storage of the solver outputs in the memory-mapped files, for the simulations
+whose outputs do not fit in the memory (e.g., the years-long aging studies or the large battery packs).
+
+A store is a directory with one raw binary file per column (<column>.bin), the metadata file (meta.json) with the
+dtypes and the shapes of the columns, and the commit file (commit.json) with the number of the committed records. The
+column files grow in fixed-size segments of segment_size records, and the records are appended to their memory maps.
+The flush writes the memory maps to the disk and then replaces the commit file atomically, so that:
+
+1. After a crash, the records up to the last flush are recovered (the uncommitted tail, which may be torn, is dropped
+and is overwritten by the next appends). If a column file is shorter than the committed records, e.g., after the
+disk was filled, the records are recovered up to the last complete segment of all the column files.
+2. The readers (SolutionStore.read), also in the other processes, see the committed prefix of the records, which does
+not change since the store is append-only.
+
+The MemmapRecorder records the solver outputs into a store, e.g., DTSolver.solve(..., recorder=MemmapRecorder(path)),
+and returns the Solution object whose arrays are the read-only memory maps of the store.
+"""
+
+__all__ = ['SolutionStore', 'MemmapRecorder']
+
+__author__ = 'Moin Ahmed'
+__copyright__ = 'Copyright 2023 by Moin Ahmed. All rights reserved.'
+__status__ = 'development'
+
+import json
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from src.visualization.recorders import COLUMNS, RecordingPolicy, SolutionRecorder
+from src.visualization.sol_and_plot_objects import Solution
+
+META_FILE = 'meta.json'
+COMMIT_FILE = 'commit.json'
+
+
+def _write_json_atomic(path: str, obj: dict) -> None:
+    """
+    Writes the json file atomically, i.e., the readers see either the old or the new file.
+    """
+    path_tmp = path + '.tmp'
+    with open(path_tmp, 'w') as f:
+        json.dump(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path_tmp, path)
+
+
+class SolutionStore:
+    """
+    Append-only store of the columns in the memory-mapped files (see the module docstring). Each record has one value
+    per column, which can be a float or a numpy array of a fixed shape (e.g., for a batch of battery cells).
+
+    The stores are created using SolutionStore.create, reopened for appending after a crash using SolutionStore.open,
+    and read using SolutionStore.read.
+    """
+
+    def __init__(self, directory: str, meta: dict, num_records: int) -> None:
+        """
+        Class constructor. Use SolutionStore.create or SolutionStore.open instead.
+        :param directory: directory of the store
+        :param meta: metadata of the store
+        :param num_records: number of the committed records
+        """
+        self.directory = directory
+        self.segment_size = meta['segment_size']
+        self.columns = tuple(meta['columns'])
+        self.__dtypes = {name: np.dtype(meta['columns'][name]['dtype']) for name in self.columns}
+        self.__shapes = {name: tuple(meta['columns'][name]['shape']) for name in self.columns}
+        self.__num_records = num_records
+        self.__num_committed = num_records
+        self.__capacity = 0
+        self.__maps = {}
+        self.__grow(capacity=max(-(-num_records // self.segment_size), 1) * self.segment_size)
+
+    @classmethod
+    def create(cls, directory: str, columns: dict[str, tuple[npt.DTypeLike, tuple]],
+               segment_size: int = 4096) -> 'SolutionStore':
+        """
+        Creates the empty store in the directory, replacing the existing store.
+        :param directory: directory of the store, which is created if needed
+        :param columns: dictionary of the column name and the tuple of its dtype and the shape of its values (() for the
+        floats), e.g., {'t': (np.float64, ()), 'V': (np.float32, ())}
+        :param segment_size: number of the records by which the column files grow
+        :return: (SolutionStore) store opened for appending
+        """
+        if segment_size < 1:
+            raise ValueError('segment_size needs to be positive.')
+        os.makedirs(directory, exist_ok=True)
+        meta_old = cls.__read_json(os.path.join(directory, META_FILE))
+        for name in (meta_old or {}).get('columns', {}):
+            path = cls.__column_path(directory, name)
+            if os.path.exists(path):
+                os.remove(path)
+        meta = {'segment_size': segment_size,
+                'columns': {name: {'dtype': np.dtype(dtype).str, 'shape': list(shape)}
+                            for name, (dtype, shape) in columns.items()}}
+        _write_json_atomic(os.path.join(directory, COMMIT_FILE), {'num_records': 0})
+        _write_json_atomic(os.path.join(directory, META_FILE), meta)
+        return cls(directory=directory, meta=meta, num_records=0)
+
+    @classmethod
+    def open(cls, directory: str) -> 'SolutionStore':
+        """
+        Opens the existing store for appending, e.g., after a crash. The uncommitted records are dropped.
+        :param directory: directory of the store
+        :return: (SolutionStore) store opened for appending
+        """
+        meta, num_records = cls.__recover(directory)
+        store = cls(directory=directory, meta=meta, num_records=num_records)
+        store.flush()
+        return store
+
+    @classmethod
+    def read(cls, directory: str) -> Solution:
+        """
+        Reads the committed records of the store. The reading is safe while the store is being appended (also by the
+        other processes).
+        :param directory: directory of the store
+        :return: (Solution) Solution object whose array_<column> attributes are the read-only memory maps of the columns
+        """
+        meta, num_records = cls.__recover(directory)
+        arrays = {}
+        for name, column in meta['columns'].items():
+            dtype, shape = np.dtype(column['dtype']), (num_records,) + tuple(column['shape'])
+            arrays[f'array_{name}'] = np.memmap(cls.__column_path(directory, name), dtype=dtype, mode='r',
+                                                shape=shape) if num_records > 0 else np.empty(shape, dtype=dtype)
+        return Solution(**arrays)
+
+    @classmethod
+    def __read_json(cls, path: str) -> Optional[dict]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def __column_path(cls, directory: str, name: str) -> str:
+        return os.path.join(directory, f'{name}.bin')
+
+    @classmethod
+    def __recover(cls, directory: str) -> tuple[dict, int]:
+        """
+        Returns the metadata and the number of the recoverable records of the store, i.e., the committed records, or
+        the records up to the last complete segment if a column file is shorter than the committed records.
+        """
+        meta = cls.__read_json(os.path.join(directory, META_FILE))
+        if meta is None:
+            raise FileNotFoundError(f'No SolutionStore in {directory}.')
+        num_records = cls.__read_json(os.path.join(directory, COMMIT_FILE))['num_records']
+        for name, column in meta['columns'].items():
+            path = cls.__column_path(directory, name)
+            record_size = np.dtype(column['dtype']).itemsize * int(np.prod(column['shape']))
+            num_available = os.path.getsize(path) // record_size if os.path.exists(path) else 0
+            if num_available < num_records:
+                num_records = num_available - num_available % meta['segment_size']
+        return meta, num_records
+
+    def __len__(self) -> int:
+        return self.__num_records
+
+    @property
+    def num_committed(self) -> int:
+        """
+        Number of the committed records, which are seen by the readers and recovered after a crash.
+        """
+        return self.__num_committed
+
+    def __grow(self, capacity: int) -> None:
+        """
+        Grows the column files to the capacity (in the number of the records) and maps them.
+        """
+        for name in self.columns:
+            if name in self.__maps:
+                self.__maps[name].flush()
+            path = self.__column_path(self.directory, name)
+            record_size = self.__dtypes[name].itemsize * int(np.prod(self.__shapes[name]))
+            with open(path, 'ab') as f:
+                f.truncate(max(capacity * record_size, os.path.getsize(path)))
+            self.__maps[name] = np.memmap(path, dtype=self.__dtypes[name], mode='r+',
+                                          shape=(capacity,) + self.__shapes[name])
+        self.__capacity = capacity
+
+    def append(self, values: dict[str, npt.ArrayLike]) -> None:
+        """
+        Appends the record. It is committed by the next flush.
+        :param values: dictionary of the column name and its value
+        """
+        n = self.__num_records
+        if n == self.__capacity:
+            self.__grow(capacity=self.__capacity + self.segment_size)
+        for name in self.columns:
+            self.__maps[name][n] = values[name]
+        self.__num_records = n + 1
+
+    def flush(self) -> None:
+        """
+        Writes the appended records to the disk and commits them.
+        """
+        for memmap in self.__maps.values():
+            memmap.flush()
+        _write_json_atomic(os.path.join(self.directory, COMMIT_FILE), {'num_records': self.__num_records})
+        self.__num_committed = self.__num_records
+
+    def close(self) -> None:
+        """
+        Flushes and unmaps the column files.
+        """
+        self.flush()
+        self.__maps = {}
+        self.__capacity = 0
+
+
+class MemmapRecorder(SolutionRecorder):
+    """
+    Records the solver outputs into the SolutionStore, instead of the memory buffers of the SolutionRecorder. The store
+    is created (replacing the existing store in the directory) at the first record after start, committed every
+    flush_every records, and closed by stop, which returns the Solution object of the read-only memory maps of the
+    store. The columns, dtypes, and recording policies are the same as those of the SolutionRecorder.
+    """
+    def __init__(self, directory: str, dtype: npt.DTypeLike = np.float64, columns: Optional[Iterable[str]] = None,
+                 time_dtype: npt.DTypeLike = np.float64, segment_size: int = 4096, flush_every: Optional[int] = None,
+                 policy: Optional[RecordingPolicy] = None) -> None:
+        """
+        Class constructor.
+        :param directory: directory of the store
+        :param dtype: dtype of the recorded columns, except for the time column (e.g., np.float32)
+        :param columns: names of the columns to record (see COLUMNS). All columns are recorded if None.
+        :param time_dtype: dtype of the time column
+        :param segment_size: number of the records by which the column files grow
+        :param flush_every: number of the records between the commits. By default, the segment_size.
+        :param policy: recording policy. All time steps are recorded if None.
+        """
+        if (flush_every is not None) and (flush_every < 1):
+            raise ValueError('flush_every needs to be positive.')
+        self.directory = directory
+        self.segment_size = segment_size
+        self.flush_every = segment_size if flush_every is None else flush_every
+        self.store = None
+        super().__init__(dtype=dtype, columns=columns, time_dtype=time_dtype, capacity=segment_size, policy=policy)
+
+    def start(self) -> None:
+        """
+        Starts a new recording. The existing store is replaced at the first record.
+        """
+        super().start()
+        self.store = None
+
+    def __len__(self) -> int:
+        return 0 if self.store is None else len(self.store)
+
+    def _append(self, values: tuple) -> None:
+        if self.store is None:
+            self.store = SolutionStore.create(
+                directory=self.directory, segment_size=self.segment_size,
+                columns={column: (self.time_dtype if column == 't' else self.dtype, np.shape(values[index]))
+                         for column, index in ((column, COLUMNS.index(column)) for column in self.columns)
+                         if values[index] is not None})
+        self.store.append({column: values[COLUMNS.index(column)] for column in self.store.columns})
+        if len(self.store) % self.flush_every == 0:
+            self.store.flush()
+
+    def _to_solution(self) -> Solution:
+        if self.store is None:
+            return Solution()
+        self.store.close()
+        return SolutionStore.read(self.directory)
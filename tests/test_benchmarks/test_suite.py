@@ -0,0 +1,38 @@
+"""
+Contains the unittest for the benchmark suite
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from benchmarks import suite
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    baseline = {'results': {'a[n=1]': {'min': 1.0}, 'b[n=1]': {'min': 1.0}, 'c[n=1]': {'min': 1.0},
+                            'd[n=1]': {'min': 1.0}}}
+    current = {'results': {'a[n=1]': {'min': 1.05}, 'b[n=1]': {'min': 1.5}, 'c[n=1]': {'min': 0.5},
+                           'e[n=1]': {'min': 1.0}}}
+
+    def test_compare(self):
+        rows = {row['name']: row['status'] for row in suite.compare(baseline=self.baseline, current=self.current,
+                                                                      threshold=0.1)}
+        self.assertEqual({'a[n=1]': 'ok', 'b[n=1]': 'regression', 'c[n=1]': 'improvement', 'd[n=1]': 'missing',
+                          'e[n=1]': 'new'}, rows)
+
+    def test_run(self):
+        results = suite.run(pattern='solution_mse[num_points=10000]', repeat=1, verbose=False)
+        self.assertEqual(['solution_mse[num_points=10000]'], list(results['results']))
+        self.assertGreater(results['results']['solution_mse[num_points=10000]']['min'], 0.0)
+
+    def test_main_compare(self):
+        with tempfile.TemporaryDirectory() as dir_name:
+            filepath_base = os.path.join(dir_name, 'baseline.json')
+            filepath_curr = os.path.join(dir_name, 'current.json')
+            for filepath, results in [(filepath_base, self.baseline), (filepath_curr, self.current)]:
+                with open(filepath, 'w') as f:
+                    json.dump(results, f)
+            self.assertEqual(1, suite.main(['compare', filepath_base, filepath_curr, '--threshold', '0.1']))
+            self.assertEqual(0, suite.main(['compare', filepath_base, filepath_curr, '--threshold', '1.0']))
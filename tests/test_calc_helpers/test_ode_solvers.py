@@ -0,0 +1,90 @@
+"""
+Contains the unittests for the ode solvers
+"""
+
+import unittest
+
+import numpy as np
+import scipy.linalg
+
+from src.calc_helpers.ode_solvers import rk4, rk45, integrate_fixed_step, integrate_rk45
+from src.calc_helpers.ode_solvers import TDMAsolver, batch_TDMAsolver
+
+
+def func_decay(y, t):
+    return -0.5 * y + np.sin(t)
+
+
+def exact_decay(y_init, t):
+    # exact solution of dy/dt = -0.5 y + sin(t)
+    return (y_init + 0.8) * np.exp(-0.5 * t) + 0.4 * np.sin(t) - 0.8 * np.cos(t)
+
+
+class TestBatchIntegrators(unittest.TestCase):
+    array_t = np.linspace(0.0, 10.0, 101)
+    y_init = np.array([0.0, 1.0, 2.0, -3.0])
+
+    def test_rk4_array_state(self):
+        res = rk4(func=func_decay, t_prev=0.0, y_prev=self.y_init, step_size=0.1)
+        for i, y_init in enumerate(self.y_init):
+            self.assertAlmostEqual(rk4(func=func_decay, t_prev=0.0, y_prev=y_init, step_size=0.1), res[i])
+
+    def test_rk45(self):
+        y_next, error = rk45(func=func_decay, t_prev=0.0, y_prev=self.y_init, step_size=0.1)
+        self.assertTrue(np.allclose(exact_decay(self.y_init, 0.1), y_next, atol=1e-9))
+        self.assertTrue(np.all(np.abs(error) < 1e-7))
+
+    def test_integrate_fixed_step(self):
+        out = np.empty((len(self.array_t), len(self.y_init)))
+        res = integrate_fixed_step(func=func_decay, array_t=self.array_t, y_init=self.y_init, method='rk4', out=out)
+        self.assertIs(out, res)
+        self.assertTrue(np.allclose(exact_decay(self.y_init, self.array_t[:, None]), res, atol=1e-6))
+
+        res_euler = integrate_fixed_step(func=func_decay, array_t=self.array_t, y_init=self.y_init, method='euler')
+        self.assertTrue(np.allclose(exact_decay(self.y_init, self.array_t[:, None]), res_euler, atol=0.1))
+
+        with self.assertRaises(ValueError):
+            integrate_fixed_step(func=func_decay, array_t=self.array_t, y_init=self.y_init, method='rk10')
+
+    def test_integrate_rk45(self):
+        array_t = np.array([0.0, 0.5, 3.0, 10.0])
+        res = integrate_rk45(func=func_decay, array_t=array_t, y_init=self.y_init, rtol=1e-8, atol=1e-10)
+        self.assertEqual((len(array_t), len(self.y_init)), res.shape)
+        self.assertTrue(np.allclose(exact_decay(self.y_init, array_t[:, None]), res, atol=1e-7))
+
+
+class TestTDMASolvers(unittest.TestCase):
+    rng = np.random.default_rng(0)
+    num_systems = 50
+    n = 20
+    l_diag = rng.uniform(-1.0, 0.0, (num_systems, n - 1))
+    u_diag = rng.uniform(-1.0, 0.0, (num_systems, n - 1))
+    diag = rng.uniform(2.5, 3.0, (num_systems, n))
+    col_vec = rng.uniform(-1.0, 1.0, (num_systems, n))
+
+    def solve_banded(self, i):
+        ab = np.zeros((3, self.n))
+        ab[0, 1:] = self.u_diag[i]
+        ab[1] = self.diag[i]
+        ab[2, :-1] = self.l_diag[i]
+        return scipy.linalg.solve_banded((1, 1), ab, self.col_vec[i])
+
+    def test_TDMAsolver(self):
+        res = TDMAsolver(l_diag=[1, 1], diag=[4, 4, 4], u_diag=[1, 1], col_vec=[5, 6, 5])
+        self.assertTrue(np.allclose(np.array([1.0, 1.0, 1.0]), res))
+        self.assertTrue(np.allclose(self.solve_banded(0), TDMAsolver(l_diag=self.l_diag[0], diag=self.diag[0],
+                                                                     u_diag=self.u_diag[0], col_vec=self.col_vec[0])))
+
+    def test_batch_TDMAsolver(self):
+        res = batch_TDMAsolver(l_diag=self.l_diag, diag=self.diag, u_diag=self.u_diag, col_vec=self.col_vec)
+        self.assertEqual((self.num_systems, self.n), res.shape)
+        for i in range(self.num_systems):
+            self.assertTrue(np.allclose(self.solve_banded(i), res[i]))
+
+    def test_batch_TDMAsolver_broadcasting(self):
+        # one matrix for many right-hand side vectors
+        res = batch_TDMAsolver(l_diag=self.l_diag[0], diag=self.diag[0], u_diag=self.u_diag[0],
+                               col_vec=self.col_vec)
+        for i in range(self.num_systems):
+            self.assertTrue(np.allclose(np.linalg.solve(np.diag(self.diag[0]) + np.diag(self.l_diag[0], -1) +
+                                                        np.diag(self.u_diag[0], 1), self.col_vec[i]), res[i]))
@@ -2,13 +2,17 @@
 Contains the unittest for the classes in the battery_objects module
 """
 
+import pickle
 import unittest
 
-from src import ParameterSet, BatteryCell
+import numpy as np
 
+from src import ParameterSet, BatteryCell, BatteryPack
+from src.core.battery_objects import CompiledParameterSet, ARRHENIUS_CACHE_SIZE, _calc_arrhenius_factor_of_bin
 
-R0_ref = 0.02
-R1_ref = 0.05
+
+R0 = 0.02
+R1 = 0.05
 C1 = 0.003
 Q = 1.65
 
@@ -64,6 +68,52 @@ class TestParameterSets(unittest.TestCase):
         param = ParameterSet(R0=R0, R1=R1, C1=C1, Q=Q, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
         self.assertEqual(func_eta(0.5), param.func_eta(0.5))
 
+    def test_nrc_parameters(self):
+        param = ParameterSet(R0=R0, R1=np.array([R1, 0.01]), C1=np.array([C1, 100.0]), Q=Q, func_SOC_OCV=func_SOC_OCV,
+                             func_eta=func_eta)
+        self.assertEqual(2, param.num_rc)
+        self.assertEqual(1, ParameterSet(R0=R0, R1=R1, C1=C1, Q=Q, func_SOC_OCV=func_SOC_OCV,
+                                         func_eta=func_eta).num_rc)
+        with self.assertRaises(ValueError):
+            ParameterSet(R0=R0, R1=np.array([R1, 0.01]), C1=C1, Q=Q, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
+        with self.assertRaises(TypeError):
+            ParameterSet(R0=R0, R1=np.array([1, 2]), C1=np.array([1, 2]), Q=Q, func_SOC_OCV=func_SOC_OCV,
+                         func_eta=func_eta)
+
+    def test_thermal_parameters(self):
+        param = ParameterSet(R0=R0, R1=R1, C1=C1, Q=Q, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
+        self.assertFalse(param.is_thermal)
+        self.assertEqual(R0, param.calc_R0(temp=273.15))
+
+        param = ParameterSet(R0=R0, R1=R1, C1=C1, Q=Q, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta,
+                             T_ref=298.15, Ea_R0=20000.0, Ea_R1=30000.0, rho=2047.0, vol=3.45e-5, c_p=1109.0,
+                             h=10.0, A=0.00637)
+        self.assertTrue(param.is_thermal)
+        self.assertEqual(2047.0, param.rho)
+        self.assertEqual(1109.0, param.c_p)
+        self.assertAlmostEqual(R0, param.calc_R0(temp=298.15))
+        self.assertAlmostEqual(R1, param.calc_R1(temp=298.15))
+        self.assertAlmostEqual(R0 * np.exp(20000.0 / 8.3145 * (1 / 273.15 - 1 / 298.15)), param.calc_R0(temp=273.15),
+                               places=6)
+        self.assertLess(param.calc_R1(temp=313.15), R1)
+
+    def test_arrhenius_cache(self):
+        param = ParameterSet(R0=R0, R1=R1, C1=C1, Q=Q, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta,
+                             T_ref=298.15, Ea_R0=20000.0)
+        self.assertEqual(param.calc_R0(temp=300.0), param.calc_R0(temp=300.0 + 0.1 * param.temp_bin_width))
+        param.Ea_R0 = 30000.0  # the activation energy is a part of the cache key
+        self.assertAlmostEqual(R0 * np.exp(30000.0 / 8.3145 * (1 / 300.0 - 1 / 298.15)), param.calc_R0(temp=300.0),
+                               places=6)
+        # the binning error is within the documented bound
+        temp = 300.0 + 0.499 * param.temp_bin_width
+        factor_exact = np.exp(30000.0 / 8.3145 * (1 / temp - 1 / 298.15))
+        self.assertLess(abs(param.calc_R0(temp=temp) / R0 / factor_exact - 1),
+                        30000.0 / (8.3145 * temp ** 2) * param.temp_bin_width / 2)
+        # the cache size is bounded
+        for temp in np.linspace(250.0, 400.0, 2 * ARRHENIUS_CACHE_SIZE):
+            param.calc_R0(temp=temp)
+        self.assertLessEqual(_calc_arrhenius_factor_of_bin.cache_info().currsize, ARRHENIUS_CACHE_SIZE)
+
 
 class TestBatteryCell(unittest.TestCase):
     soc_init = 0.5
@@ -83,7 +133,137 @@ class TestBatteryCell(unittest.TestCase):
         with self.assertRaises(TypeError):
             BatteryCell(param=self.param, soc_init=None)
 
+    def test_numpy_scalars(self):
+        b_cell = BatteryCell(param=self.param, soc_init=np.float32(0.5), temp_init=np.float64(298.15))
+        self.assertIs(float, type(b_cell.soc))
+        self.assertIs(float, type(b_cell.temp))
+        b_cell.soc = np.float32(0.25)
+        self.assertEqual(0.25, b_cell.soc)
+        with self.assertRaises(TypeError):
+            b_cell.soc = np.array([0.25])
+
+    def test_trusted(self):
+        b_cell = BatteryCell(param=self.param, soc_init=self.soc_init, temp_init=298.15)
+        with b_cell.trusted():
+            b_cell.soc = 1  # not checked in the trusted mode
+            b_cell.temp = 300
+        self.assertEqual(1, b_cell.soc)
+        # the checks are restored on exit
+        with self.assertRaises(TypeError):
+            b_cell.soc = 1
+        with self.assertRaises(TypeError):
+            b_cell.temp = 300
+
+    def test_temp_init(self):
+        self.assertIsNone(BatteryCell(param=self.param, soc_init=self.soc_init).temp)
+        b_cell = BatteryCell(param=self.param, soc_init=self.soc_init, temp_init=308.15)
+        self.assertEqual(308.15, b_cell.temp)
 
 
+class TestCompiledParameterSet(unittest.TestCase):
+    param = ParameterSet(R0=R0, R1=np.array([R1, 0.01]), C1=np.array([C1, 1000.0]), Q=Q, func_SOC_OCV=func_SOC_OCV,
+                         func_eta=func_eta, V_min=2.5, V_max=4.2)
 
+    def test_voltage_limits(self):
+        self.assertEqual(2.5, self.param.V_min)
+        self.assertEqual(4.2, self.param.V_max)
+        param = ParameterSet(R0=R0, R1=R1, C1=C1, Q=Q, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta, V_min=2.5,
+                             V_max=4.2)
+        del param.V_max
+        self.assertIsNone(param.V_max)
+        self.assertEqual(2.5, param.V_min)
+
+    def test_compile(self):
+        record = self.param.compile()
+        self.assertEqual(R0, record.R0)
+        self.assertTrue(np.array_equal(self.param.R1, record.R1))
+        self.assertEqual(2, record.num_rc)
+        self.assertIs(func_SOC_OCV, record.func_SOC_OCV)
+        self.assertIsNone(record.T_ref)
+        with self.assertRaises(AttributeError):
+            record.R0 = 0.1
+        with self.assertRaises(ValueError):
+            record.R1[0] = 0.1
+        # the record is a snapshot
+        param = ParameterSet(R0=R0, R1=R1, C1=C1, Q=Q, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
+        record = param.compile()
+        param.R0 = 0.5
+        self.assertEqual(R0, record.R0)
+
+    def test_arrhenius(self):
+        param = ParameterSet(R0=R0, R1=R1, C1=C1, Q=Q, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta, T_ref=298.15,
+                             Ea_R0=20000.0, Ea_R1=30000.0)
+        record = param.compile()
+        for temp in (273.15, 298.15, 313.15):
+            self.assertEqual(param.calc_R0(temp=temp), record.calc_R0(temp=temp))
+            self.assertEqual(param.calc_R1(temp=temp), record.calc_R1(temp=temp))
+            self.assertEqual(param.calc_C1(temp=temp), record.calc_C1(temp=temp))
+        self.assertEqual(R0, self.param.compile().calc_R0(temp=273.15))
+
+        # the snapshot uses the temperature bin width of the ParameterSet, also through to_parameter_set
+        param.temp_bin_width = 1.0
+        record = param.compile()
+        self.assertEqual(1.0, record.temp_bin_width)
+        param_default = ParameterSet(R0=R0, R1=R1, C1=C1, Q=Q, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta,
+                                     T_ref=298.15, Ea_R0=20000.0, Ea_R1=30000.0)
+        self.assertNotEqual(param_default.calc_R0(temp=300.4), param.calc_R0(temp=300.4))
+        for temp in (300.4, 310.7):
+            self.assertEqual(param.calc_R0(temp=temp), record.calc_R0(temp=temp))
+            self.assertEqual(param.calc_R1(temp=temp), record.calc_R1(temp=temp))
+        param_copy = record.to_parameter_set()
+        self.assertEqual(1.0, param_copy.temp_bin_width)
+        self.assertEqual(record, param_copy.compile())
+        self.assertNotEqual(record, param_default.compile())
+
+    def test_hash(self):
+        record = self.param.compile()
+        self.assertEqual(record, self.param.compile())
+        self.assertEqual(hash(record), hash(self.param.compile()))
+        self.assertEqual(1, len({record, self.param.compile()}))
+        self.assertEqual(record, pickle.loads(pickle.dumps(record)))
+        param = ParameterSet(R0=0.03, R1=np.array([R1, 0.01]), C1=np.array([C1, 1000.0]), Q=Q,
+                             func_SOC_OCV=func_SOC_OCV, func_eta=func_eta, V_min=2.5, V_max=4.2)
+        self.assertNotEqual(record, param.compile())
+
+    def test_structured_array(self):
+        records = [self.param.compile(), self.param.compile()]
+        array_ = CompiledParameterSet.to_structured_array(records)
+        self.assertEqual((2,), array_.shape)
+        self.assertEqual((2,), array_['R1'][0].shape)
+        self.assertTrue(np.isnan(array_['T_ref'][0]))
+        records_new = CompiledParameterSet.from_structured_array(array_, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
+        self.assertEqual(records, records_new)
+        self.assertEqual(self.param.compile(), records_new[0].to_parameter_set().compile())
+        with self.assertRaises(ValueError):
+            CompiledParameterSet.to_structured_array(
+                [records[0], ParameterSet(R0=R0, R1=R1, C1=C1, Q=Q, func_SOC_OCV=func_SOC_OCV,
+                                          func_eta=func_eta).compile()])
+
+
+class TestBatteryPack(unittest.TestCase):
+    param = ParameterSet(R0=R0, R1=R1, C1=C1, Q=Q, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
+
+    def test_constructor(self):
+        pack = BatteryPack(param=self.param, num_series=3, num_parallel=2, soc_init=0.5)
+        self.assertEqual((3, 2), pack.shape)
+        self.assertEqual(6, pack.num_cells)
+        self.assertTrue(np.all(pack.R0 == R0))
+        self.assertTrue(np.all(pack.soc == 0.5))
+        with self.assertRaises(TypeError):
+            BatteryPack(param=None, num_series=3, num_parallel=2, soc_init=0.5)
+        with self.assertRaises(ValueError):
+            BatteryPack(param=self.param, num_series=0, num_parallel=2, soc_init=0.5)
+        with self.assertRaises(ValueError):
+            BatteryPack(param=self.param, num_series=3, num_parallel=2, soc_init=np.array([0.5, 0.6, 0.7]))
 
+    def test_sample(self):
+        pack1 = BatteryPack.sample(param=self.param, num_series=10, num_parallel=5, soc_init=0.5, std_R0=0.1,
+                                   std_Q=0.05, seed=1)
+        pack2 = BatteryPack.sample(param=self.param, num_series=10, num_parallel=5, soc_init=0.5, std_R0=0.1,
+                                   std_Q=0.05, seed=1)
+        self.assertTrue(np.array_equal(pack1.R0, pack2.R0))
+        self.assertFalse(np.all(pack1.Q == Q))
+        self.assertTrue(np.all(pack1.soc == 0.5))
+        pack1.soc = pack1.soc - 0.1
+        pack1.reset()
+        self.assertTrue(np.all(pack1.soc == 0.5))
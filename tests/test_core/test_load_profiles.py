@@ -0,0 +1,97 @@
+"""
+Contains the unittest for the synthetic load profiles
+"""
+
+import unittest
+
+import numpy as np
+
+from src import ParameterSet, BatteryCell, BatteryPack, CustomStep, DTSolver, PackSolver, array_safe
+from src.core.load_profiles import LoadProfile, constant_current, pulse_train, hppc, cccv, random_drive, \
+    iter_random_drive
+
+
+@array_safe
+def func_SOC_OCV(soc):
+    return 3.2 + 0.8 * soc
+
+
+@array_safe
+def func_eta(i_app):
+    return np.ones_like(i_app, dtype=float) if np.ndim(i_app) else 1.0
+
+
+class TestLoadProfile(unittest.TestCase):
+    def test_constructor(self):
+        with self.assertRaises(ValueError):
+            LoadProfile(array_t=[0.0, 1.0], array_I=[1.0])
+        with self.assertRaises(ValueError):
+            LoadProfile(array_t=[0.0, 0.0], array_I=[1.0, 1.0])
+        with self.assertRaises(ValueError):
+            LoadProfile.from_segments(durations=[0.0], currents=[1.0])
+
+    def test_pulse_train(self):
+        profile = pulse_train(I_pulse=2.0, t_pulse=10.0, t_rest=20.0, num_pulses=3)
+        self.assertTrue(np.array_equal([0.0, 10.0, 30.0, 40.0, 60.0, 70.0, 90.0], profile.array_t))
+        self.assertTrue(np.array_equal([2.0, 0.0, 2.0, 0.0, 2.0, 0.0, 0.0], profile.array_I))
+        self.assertEqual(90.0, profile.duration)
+        self.assertAlmostEqual(60.0 / 3600, profile.charge_throughput)
+        self.assertTrue(np.array_equal([2.0, 2.0, 0.0, 2.0, 0.0], profile.get_current([0.0, 9.9, 10.0, 35.0, 100.0])))
+
+    def test_hppc(self):
+        profile = hppc(I_discharge=2.0, I_charge=1.5, num_repeats=2, I_soc_step=1.0, t_soc_step=360.0)
+        self.assertEqual(2 * (10 + 40 + 10 + 3600 + 360 + 3600), profile.duration)
+        self.assertTrue(np.array_equal([2.0, 0.0, -1.5, 0.0, 1.0, 0.0, 2.0], profile.array_I[:7]))
+        # the SOC step and its rest are skipped by default
+        self.assertEqual(10 + 40 + 10 + 3600, hppc(I_discharge=2.0, I_charge=1.5).duration)
+
+    def test_cccv(self):
+        profile = cccv(I_charge=1.65, t_cc=1000.0, tau=600.0, I_cutoff=0.05)
+        self.assertTrue(np.all(profile.array_I < 0))
+        self.assertTrue(np.all(np.diff(profile.array_I) >= 0))
+        self.assertAlmostEqual(0.05, -profile.array_I[-1], places=3)
+        with self.assertRaises(ValueError):
+            cccv(I_charge=1.0, t_cc=1000.0, tau=600.0, I_cutoff=2.0)
+
+    def test_concatenate_and_repeat(self):
+        profile = constant_current(current=1.0, duration=10.0) + constant_current(current=-1.0, duration=5.0)
+        self.assertTrue(np.array_equal([0.0, 10.0, 15.0], profile.array_t))
+        self.assertTrue(np.array_equal([1.0, -1.0, -1.0], profile.array_I))
+        profile_repeated = profile.repeat(3)
+        self.assertEqual(45.0, profile_repeated.duration)
+        profile_concatenated = LoadProfile.concatenate([profile] * 3)
+        self.assertTrue(np.array_equal(profile_concatenated.array_t, profile_repeated.array_t))
+        self.assertTrue(np.array_equal(profile_concatenated.array_I, profile_repeated.array_I))
+
+    def test_chunks(self):
+        profile = pulse_train(I_pulse=2.0, t_pulse=10.0, t_rest=20.0, num_pulses=3)
+        chunks = list(profile.chunks(chunk_duration=25.0))
+        self.assertEqual(4, len(chunks))
+        self.assertEqual(profile.duration, sum(chunk.duration for chunk in chunks))
+        profile_joined = LoadProfile.concatenate(chunks)
+        t = np.linspace(0.0, 90.0, 1000)
+        self.assertTrue(np.array_equal(profile.get_current(t), profile_joined.get_current(t)))
+
+    def test_random_drive(self):
+        profile = random_drive(duration=86400.0, dt=1.0, I_mean=1.0, I_std=0.5, tau=30.0, I_min=-1.0, seed=1)
+        self.assertEqual(86401, len(profile))
+        self.assertAlmostEqual(1.0, np.mean(profile.array_I), delta=0.05)
+        self.assertGreaterEqual(np.min(profile.array_I), -1.0)
+        # seeded reproducibility, and the lazily generated chunks match the profile generated at once
+        profile_chunks = LoadProfile.concatenate(iter_random_drive(duration=86400.0, chunk_duration=3600.0, dt=1.0,
+                                                                   I_mean=1.0, I_std=0.5, tau=30.0, I_min=-1.0,
+                                                                   seed=1))
+        self.assertTrue(np.array_equal(profile.array_t, profile_chunks.array_t))
+        self.assertTrue(np.array_equal(profile.array_I, profile_chunks.array_I))
+        self.assertFalse(np.array_equal(profile.array_I, random_drive(duration=86400.0, seed=2).array_I))
+
+    def test_custom_step(self):
+        profile = pulse_train(I_pulse=1.65, t_pulse=60.0, t_rest=60.0, num_pulses=5, I_rest=-0.5)
+        cycling_step = profile.to_custom_step(V_min=2.5, V_max=4.2, SOC_LIB=0.9)
+        self.assertIsInstance(cycling_step, CustomStep)
+        param = ParameterSet(R0=0.02, R1=0.05, C1=1500.0, Q=1.65, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
+        sol = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.9)).solve(cycling_step=cycling_step, dt=1.0)
+        self.assertTrue(np.array_equal(profile.get_current(sol.array_t[1:]), sol.array_I[1:]))
+        b_pack = BatteryPack(param=param, num_series=2, num_parallel=1, soc_init=0.9)
+        sol_pack = PackSolver(battery_pack=b_pack).solve(cycling_step=cycling_step, dt=1.0)
+        self.assertTrue(np.allclose(sol.array_t, sol_pack.array_t))
@@ -0,0 +1,64 @@
+"""
+Contains the unittest for the parameter function protocol
+"""
+
+import unittest
+import warnings
+
+import numpy as np
+
+from src.core.battery_objects import ParameterSet
+from src.core.parameter_functions import array_safe, is_array_safe, vectorize_parameter_function
+from src.core.parameter_tables import ParameterTable
+from src.exceptions_and_warnings.warnings import ScalarOnlyFunctionWarning
+from parameter_sets import Calce123
+
+
+def func_eta_scalar(i_app):
+    if i_app <= 0:
+        return 1.0
+    else:
+        return 0.9995
+
+
+@array_safe
+def func_SOC_OCV(soc):
+    return 3.2 + 0.8 * soc
+
+
+class TestParameterFunctions(unittest.TestCase):
+    def test_is_array_safe(self):
+        self.assertTrue(is_array_safe(func_SOC_OCV))
+        self.assertTrue(is_array_safe(np.exp))
+        self.assertTrue(is_array_safe(ParameterTable(array_soc=np.linspace(0, 1, 3), values=np.ones(3))))
+        self.assertTrue(is_array_safe(Calce123.func_SOC_OCV))
+        self.assertTrue(is_array_safe(Calce123.func_eta))
+        self.assertFalse(is_array_safe(func_eta_scalar))
+        self.assertFalse(is_array_safe(None))
+
+    def test_vectorize_array_safe(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            self.assertIs(func_SOC_OCV, vectorize_parameter_function(func_SOC_OCV))
+
+    def test_vectorize_scalar_only(self):
+        with self.assertWarns(ScalarOnlyFunctionWarning):
+            func = vectorize_parameter_function(func_eta_scalar, name='func_eta', array_probe=np.linspace(-1, 1, 10))
+        self.assertTrue(is_array_safe(func))
+        array_i = np.array([-1.0, 0.0, 0.5, 2.0])
+        self.assertTrue(np.array_equal(np.array([func_eta_scalar(i) for i in array_i]), func(array_i)))
+        self.assertEqual(0.9995, func(1.0))
+
+    def test_calce_func_eta(self):
+        array_i = np.array([-1.0, 0.0, 1.0])
+        self.assertTrue(np.array_equal(np.array([1.0, 1.0, 0.9995]), Calce123.func_eta(array_i)))
+        self.assertIsInstance(Calce123.func_eta(-1.0), float)
+        self.assertEqual(0.9995, Calce123.func_eta(1.0))
+
+    def test_parameter_set(self):
+        param = ParameterSet(R0=0.01, R1=0.01, C1=1000.0, Q=1.0, func_SOC_OCV=func_SOC_OCV,
+                             func_eta=Calce123.func_eta)
+        self.assertTrue(param.is_array_safe)
+        param = ParameterSet(R0=0.01, R1=0.01, C1=1000.0, Q=1.0, func_SOC_OCV=func_SOC_OCV,
+                             func_eta=func_eta_scalar)
+        self.assertFalse(param.is_array_safe)
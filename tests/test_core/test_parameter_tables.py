@@ -0,0 +1,63 @@
+"""
+Contains the unittest for the ParameterTable class
+"""
+
+import unittest
+
+import numpy as np
+import scipy.interpolate
+
+from src.core.parameter_tables import ParameterTable
+
+
+class TestParameterTable(unittest.TestCase):
+    array_soc = np.linspace(0.0, 1.0, 11)
+    array_temp = np.linspace(263.15, 323.15, 7)
+    values = np.random.default_rng(0).uniform(0.01, 0.05, (11, 7))
+
+    def test_constructor(self):
+        with self.assertRaises(ValueError):
+            ParameterTable(array_soc=np.array([0.0, 0.2, 1.0]), values=np.ones(3))
+        with self.assertRaises(ValueError):
+            ParameterTable(array_soc=self.array_soc, values=np.ones((11, 6)), array_temp=self.array_temp)
+        with self.assertRaises(ValueError):
+            ParameterTable(array_soc=self.array_soc, values=np.ones((11, 7)), array_temp=self.array_temp,
+                           rc_axis=True)
+        table = ParameterTable(array_soc=self.array_soc, values=np.ones((11, 7, 2)), array_temp=self.array_temp,
+                               rc_axis=True)
+        self.assertEqual(2, table.num_rc)
+        self.assertTrue(table.is_temp_dependent)
+
+    def test_bilinear(self):
+        table = ParameterTable(array_soc=self.array_soc, values=self.values, array_temp=self.array_temp)
+        func_ref = scipy.interpolate.RegularGridInterpolator((self.array_soc, self.array_temp), self.values)
+        rng = np.random.default_rng(1)
+        soc = rng.uniform(0.0, 1.0, 50)
+        temp = rng.uniform(263.15, 323.15, 50)
+        self.assertTrue(np.allclose(func_ref(np.column_stack([soc, temp])), table(soc, temp)))
+        for soc_, temp_ in zip(soc[:10], temp[:10]):
+            value = table(float(soc_), float(temp_))
+            self.assertIsInstance(value, float)
+            self.assertAlmostEqual(func_ref([soc_, temp_])[0], value)
+        # grid points and the boundary values outside the grid
+        self.assertAlmostEqual(self.values[3, 2], table(0.3, float(self.array_temp[2])))
+        self.assertAlmostEqual(self.values[-1, 0], table(1.2, 250.0))
+        self.assertTrue(np.allclose(self.values[[0, -1], -1], table(np.array([-0.1, 1.1]), 400.0)))
+        with self.assertRaises(ValueError):
+            table(0.5)
+
+    def test_soc_only_and_rc_axis(self):
+        table = ParameterTable(array_soc=self.array_soc, values=self.values[:, 0])
+        self.assertAlmostEqual(np.interp(0.37, self.array_soc, self.values[:, 0]), table(0.37))
+        self.assertAlmostEqual(table(0.37), table(0.37, 300.0))
+        table_rc = ParameterTable(array_soc=self.array_soc, values=np.stack([self.values, 2 * self.values], axis=-1),
+                                  array_temp=self.array_temp, rc_axis=True)
+        value = table_rc(0.37, 290.0)
+        self.assertEqual((2,), value.shape)
+        self.assertAlmostEqual(2 * value[0], value[1])
+        self.assertEqual((5, 2), table_rc(np.linspace(0.1, 0.9, 5), 290.0).shape)
+        self.assertTrue(np.allclose(value, table_rc(np.array([0.37]), 290.0)[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,9 @@ Provides the unittests for the ECM model objects.
 
 import unittest
 
-from src.models.battery import Thevenin1RC
+import numpy as np
+
+from src.models.battery import Thevenin1RC, TheveninNRC
 
 
 class TestThevenin1RC(unittest.TestCase):
@@ -31,3 +33,41 @@ class TestThevenin1RC(unittest.TestCase):
         res1 = Thevenin1RC.v(i_app=self.i_app, OCV=self.OCV, R0=self.R0, R1=self.R1, i_R1=0.15758923573245104)
         self.assertEqual(3.7935362152853505, res1)
 
+
+class TestTheveninNRC(unittest.TestCase):
+    dt = 0.1
+    i_app = 1.656
+    R0 = 0.002
+    R = np.array([0.02, 0.01, 0.005])
+    C = np.array([50.0, 500.0, 5000.0])
+    OCV = 3.8
+
+    def test_discretize(self):
+        a, b = TheveninNRC.discretize(dt=self.dt, R=self.R, C=self.C)
+        self.assertTrue(np.allclose(np.exp(-self.dt / (self.R * self.C)), a))
+        self.assertTrue(np.allclose(1 - a, b))
+
+        # coefficients for many dt values are stacked along the leading axis
+        a, b = TheveninNRC.discretize(dt=np.array([0.1, 1.0]), R=self.R, C=self.C)
+        self.assertEqual((2, 3), a.shape)
+
+    def test_reduces_to_1RC(self):
+        a, b = TheveninNRC.discretize(dt=self.dt, R=self.R[:1], C=self.C[:1])
+        i_R = TheveninNRC.i_R_next(a=a, b=b, i_app=self.i_app, i_R_prev=np.zeros(1))
+        self.assertAlmostEqual(Thevenin1RC.i_R1_next(dt=self.dt, i_app=self.i_app, i_R1_prev=0.0, R1=self.R[0],
+                                                     C1=self.C[0]), i_R[0])
+        self.assertAlmostEqual(Thevenin1RC.v(i_app=self.i_app, OCV=self.OCV, R0=self.R0, R1=self.R[0], i_R1=i_R[0]),
+                               TheveninNRC.v(i_app=self.i_app, OCV=self.OCV, R0=self.R0, R=self.R[:1], i_R=i_R))
+
+    def test_batch(self):
+        a, b = TheveninNRC.discretize(dt=self.dt, R=self.R, C=self.C)
+        array_i_app = np.array([0.0, 1.0, 2.0, -1.0])
+        i_R = TheveninNRC.i_R_next(a=a, b=b, i_app=array_i_app, i_R_prev=np.zeros((4, 3)))
+        v = TheveninNRC.v(i_app=array_i_app, OCV=self.OCV, R0=self.R0, R=self.R, i_R=i_R)
+        self.assertEqual((4, 3), i_R.shape)
+        self.assertEqual((4,), v.shape)
+        for i, i_app in enumerate(array_i_app):
+            i_R_single = TheveninNRC.i_R_next(a=a, b=b, i_app=i_app, i_R_prev=np.zeros(3))
+            self.assertTrue(np.allclose(i_R_single, i_R[i]))
+            self.assertAlmostEqual(TheveninNRC.v(i_app=i_app, OCV=self.OCV, R0=self.R0, R=self.R, i_R=i_R_single),
+                                   v[i])
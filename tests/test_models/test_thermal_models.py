@@ -0,0 +1,111 @@
+"""
+Provides the unittests for the thermal model objects.
+"""
+
+import unittest
+
+import numpy as np
+
+from src.models.thermal import ECMLumped, ECMRadial
+from src.solvers.thermal_solvers import calc_cell_temp_radial
+from src.calc_helpers.ode_solvers import rk4
+
+
+class TestECMLumped(unittest.TestCase):
+    dt = 10.0
+    temp_prev = 298.15
+    i_app = 5.0
+    v = 3.1
+    ocv = 3.3
+    docvdtemp = -1e-4
+    rho = 2047.0
+    vol = 3.45e-5
+    c_p = 1109.0
+    h = 10.0
+    area = 0.00637
+    temp_amb = 298.15
+
+    def test_heat_generation(self):
+        res = ECMLumped.heat_generation(i_app=self.i_app, temp=self.temp_prev, v=self.v, ocv=self.ocv,
+                                        docvdtemp=self.docvdtemp)
+        self.assertAlmostEqual(5.0 * 0.2 + 5.0 * 298.15 * 1e-4, res)
+
+    def test_temp_next(self):
+        res = ECMLumped.temp_next(dt=self.dt, temp_prev=self.temp_prev, i_app=self.i_app, v=self.v, ocv=self.ocv,
+                                  docvdtemp=self.docvdtemp, rho=self.rho, vol=self.vol, c_p=self.c_p, h=self.h,
+                                  area=self.area, temp_amb=self.temp_amb)
+        func_heat_balance = ECMLumped().heat_balance(v=self.v, i_app=self.i_app, rho=self.rho, vol=self.vol,
+                                                     c_p=self.c_p, ocv=self.ocv, docvdtemp=self.docvdtemp, h=self.h,
+                                                     area=self.area, temp_amb=self.temp_amb)
+        res_rk4 = rk4(func=func_heat_balance, t_prev=0.0, y_prev=self.temp_prev, step_size=self.dt)
+        self.assertIsInstance(res, float)
+        self.assertAlmostEqual(res_rk4, res, places=8)
+
+    def test_temp_next_no_heat_transfer(self):
+        # with no current and no heat transfer, the temperature remains constant.
+        res = ECMLumped.temp_next(dt=self.dt, temp_prev=self.temp_prev, i_app=0.0, v=self.v, ocv=self.ocv,
+                                  docvdtemp=self.docvdtemp, rho=self.rho, vol=self.vol, c_p=self.c_p, h=0.0,
+                                  area=self.area, temp_amb=self.temp_amb)
+        self.assertEqual(self.temp_prev, res)
+
+    def test_temp_next_array(self):
+        array_i_app = np.array([0.0, 1.0, 5.0])
+        res = ECMLumped.temp_next(dt=self.dt, temp_prev=np.full(3, self.temp_prev), i_app=array_i_app, v=self.v,
+                                  ocv=self.ocv, docvdtemp=self.docvdtemp, rho=self.rho, vol=self.vol, c_p=self.c_p,
+                                  h=self.h, area=self.area, temp_amb=self.temp_amb)
+        for i, i_app in enumerate(array_i_app):
+            self.assertAlmostEqual(ECMLumped.temp_next(dt=self.dt, temp_prev=self.temp_prev, i_app=i_app, v=self.v,
+                                                       ocv=self.ocv, docvdtemp=self.docvdtemp, rho=self.rho,
+                                                       vol=self.vol, c_p=self.c_p, h=self.h, area=self.area,
+                                                       temp_amb=self.temp_amb), res[i])
+
+
+class TestECMRadial(unittest.TestCase):
+    radius = 0.013
+    length = 0.065
+    vol = np.pi * radius ** 2 * length
+    k = 0.5
+    rho = 2047.0
+    c_p = 1109.0
+    h = 30.0
+    temp_amb = 298.15
+    model = ECMRadial(radius=radius, k=k, rho=rho, c_p=c_p, h=h, num_nodes=40)
+
+    def test_steady_state(self):
+        heat_gen = 5.0  # [W]
+        temp = np.full(self.model.num_nodes, self.temp_amb)
+        for _ in range(50):
+            temp = self.model.temp_next(dt=1e4, temp_prev=temp, heat_gen=heat_gen, vol=self.vol,
+                                        temp_amb=self.temp_amb)
+        q = heat_gen / self.vol
+        temp_exact = self.temp_amb + q * self.radius / (2 * self.h) + \
+            q * (self.radius ** 2 - self.model.array_r ** 2) / (4 * self.k)
+        self.assertTrue(np.allclose(temp_exact, temp, atol=0.05))
+        self.assertGreater(self.model.core_temp(temp), self.model.surface_temp(temp, temp_amb=self.temp_amb))
+        self.assertAlmostEqual(self.temp_amb + q * self.radius / (2 * self.h),
+                               self.model.surface_temp(temp, temp_amb=self.temp_amb), places=3)
+
+    def test_batch(self):
+        array_heat_gen = np.array([0.0, 1.0, 5.0])
+        temp_prev = np.full((3, self.model.num_nodes), self.temp_amb)
+        res = self.model.temp_next(dt=10.0, temp_prev=temp_prev, heat_gen=array_heat_gen, vol=self.vol,
+                                   temp_amb=self.temp_amb)
+        self.assertEqual((3, self.model.num_nodes), res.shape)
+        self.assertTrue(np.allclose(self.temp_amb, res[0]))
+        for i, heat_gen in enumerate(array_heat_gen):
+            self.assertTrue(np.allclose(self.model.temp_next(dt=10.0, temp_prev=temp_prev[i], heat_gen=heat_gen,
+                                                             vol=self.vol, temp_amb=self.temp_amb), res[i]))
+
+    def test_lumped_limit(self):
+        # for large thermal conductivities, the radial model reduces to the lumped model
+        model = ECMRadial(radius=self.radius, k=1e4, rho=self.rho, c_p=self.c_p, h=self.h, num_nodes=5)
+        area = 2 * np.pi * self.radius * self.length  # only the curved surface is cooled in the radial model
+        temp_radial = np.full(model.num_nodes, self.temp_amb)
+        temp_lumped = self.temp_amb
+        for _ in range(100):
+            temp_radial = calc_cell_temp_radial(model=model, dt=1.0, temp_prev=temp_radial, v=3.0, i_app=10.0,
+                                                ocv=3.3, docvdtemp=0.0, vol=self.vol, temp_amb=self.temp_amb)
+            temp_lumped = ECMLumped.temp_next(dt=1.0, temp_prev=temp_lumped, i_app=10.0, v=3.0, ocv=3.3,
+                                              docvdtemp=0.0, rho=self.rho, vol=self.vol, c_p=self.c_p, h=self.h,
+                                              area=area, temp_amb=self.temp_amb)
+        self.assertAlmostEqual(temp_lumped, model.avg_temp(temp_radial), places=2)
@@ -7,6 +7,7 @@ import unittest
 import numpy as np
 
 from src import NormalRandomVector, SPKF
+from src.observers.kalman_filter import rts_smooth
 
 
 class TestSPKFProperties(unittest.TestCase):
@@ -188,3 +189,93 @@ class TestSPKFSolve(unittest.TestCase):
         SigmaX = spkf_instance1._SPKF__cov_measurement_update(Lx, SigmaY=SigmaY)
         self.assertAlmostEqual(cov_update_actual, spkf_instance1.x.get_cov()[0, 0])
 
+    def test_trusted(self):
+        # the trusted fast path gives the same states, covariances, cross-covariances, and gains as the default steps
+        def create_spkf():
+            x = NormalRandomVector(vector_init=np.array([[0.5], [0.1]]), cov_init=np.array([[0.1, 0.02], [0.02, 0.2]]))
+            w = NormalRandomVector(vector_init=np.array([[0.0]]), cov_init=np.array([[1e-2]]))
+            v = NormalRandomVector(vector_init=np.array([[0.0]]), cov_init=np.array([[0.5]]))
+            return SPKF(x=x, w=w, v=v, y_dim=1, func_f=lambda x_k, u_k, w_k: np.vstack([x_k[:1] - 0.1 * (u_k + w_k),
+                                                                                          0.9 * x_k[1:] + u_k + w_k]),
+                        func_h=lambda x_k, u_k, v_k: np.exp(x_k[0]) - 0.5 * x_k[1] - u_k + v_k)
+
+        spkf_default, spkf_trusted = create_spkf(), create_spkf()
+        with spkf_trusted.trusted():
+            for k in range(20):
+                spkf_default.solve(u=np.sin(k), y_true=1.5 + 0.1 * k)
+                spkf_trusted.solve(u=np.sin(k), y_true=1.5 + 0.1 * k)
+                for name in ('vector', 'cov'):
+                    self.assertTrue(np.allclose(getattr(spkf_default.x, name), getattr(spkf_trusted.x, name),
+                                                rtol=1e-12, atol=0.0))
+                self.assertTrue(np.allclose(spkf_default.cross_cov, spkf_trusted.cross_cov, rtol=1e-12, atol=0.0))
+                self.assertTrue(np.allclose(spkf_default.gain, spkf_trusted.gain, rtol=1e-12, atol=0.0))
+                self.assertEqual((2, 1), spkf_trusted.x.get_vector().shape)
+        # the default steps are used after the exit
+        spkf_trusted.x.set_vector(np.array([[0.5], [0.1]]))
+        with self.assertRaises(TypeError):
+            spkf_trusted.x.set_vector([0.5, 0.1])
+
+
+
+class TestRTSSmoother(unittest.TestCase):
+    def test_linear_model(self):
+        # scalar random walk, x[k] = x[k-1] + w, y[k] = x[k] + v, for which the SPKF is the exact Kalman filter
+        rng = np.random.default_rng(0)
+        n, cov_w, cov_v = 200, 1e-2, 1.0
+        array_x_true = np.cumsum(np.sqrt(cov_w) * rng.standard_normal(n))
+        array_y = array_x_true + np.sqrt(cov_v) * rng.standard_normal(n)
+
+        x = NormalRandomVector(vector_init=np.array([[0.0]]), cov_init=np.array([[1.0]]))
+        w = NormalRandomVector(vector_init=np.array([[0.0]]), cov_init=np.array([[cov_w]]))
+        v = NormalRandomVector(vector_init=np.array([[0.0]]), cov_init=np.array([[cov_v]]))
+        spkf_instance = SPKF(x=x, w=w, v=v, y_dim=1, func_f=lambda x_k, u_k, w_k: x_k + w_k,
+                             func_h=lambda x_k, u_k, v_k: x_k + v_k)
+        array_x, array_cov = np.zeros((n, 1)), np.ones((n, 1, 1))
+        array_x_pred, array_cov_pred, array_cross_cov = np.zeros((n, 1)), np.ones((n, 1, 1)), np.zeros((n, 1, 1))
+        for k in range(1, n):
+            prediction = spkf_instance.predict(u=0.0)
+            array_x_pred[k], array_cov_pred[k] = spkf_instance.x.get_vector()[:, 0], spkf_instance.x.get_cov()
+            array_cross_cov[k] = spkf_instance.cross_cov
+            spkf_instance.update(array_y[k], *prediction)
+            array_x[k], array_cov[k] = spkf_instance.x.get_vector()[:, 0], spkf_instance.x.get_cov()
+        array_x_smooth, array_cov_smooth = rts_smooth(array_x=array_x, array_cov=array_cov,
+                                                      array_x_pred=array_x_pred, array_cov_pred=array_cov_pred,
+                                                      array_cross_cov=array_cross_cov)
+
+        # the RTS recursion of the linear Kalman smoother
+        x_ref, cov_ref = array_x[-1, 0], array_cov[-1, 0, 0]
+        for k in range(n - 2, -1, -1):
+            gain = array_cov[k, 0, 0] / array_cov_pred[k + 1, 0, 0]
+            x_ref = array_x[k, 0] + gain * (x_ref - array_x_pred[k + 1, 0])
+            cov_ref = array_cov[k, 0, 0] + gain ** 2 * (cov_ref - array_cov_pred[k + 1, 0, 0])
+            self.assertAlmostEqual(x_ref, array_x_smooth[k, 0])
+            self.assertAlmostEqual(cov_ref, array_cov_smooth[k, 0, 0])
+
+        self.assertEqual(array_x[-1, 0], array_x_smooth[-1, 0])
+        self.assertTrue(np.all(array_cov_smooth[:, 0, 0] <= array_cov[:, 0, 0] + 1e-12))
+        rmse_filter = np.sqrt(np.mean((array_x[:, 0] - array_x_true) ** 2))
+        rmse_smoother = np.sqrt(np.mean((array_x_smooth[:, 0] - array_x_true) ** 2))
+        self.assertLess(rmse_smoother, rmse_filter)
+
+    def test_mean_steps(self):
+        # the mean-only steps of the degraded real-time observers keep the covariance and the Kalman gain
+        x = NormalRandomVector(vector_init=np.array([[0.0]]), cov_init=np.array([[1.0]]))
+        w = NormalRandomVector(vector_init=np.array([[0.0]]), cov_init=np.array([[1e-2]]))
+        v = NormalRandomVector(vector_init=np.array([[0.0]]), cov_init=np.array([[1.0]]))
+        spkf_instance = SPKF(x=x, w=w, v=v, y_dim=1, func_f=lambda x_k, u_k, w_k: x_k + u_k + w_k,
+                             func_h=lambda x_k, u_k, v_k: x_k + 2 * u_k + v_k)
+        with self.assertRaises(ValueError):
+            spkf_instance.update_mean(y_true=1.0)
+        spkf_instance.solve(u=0.0, y_true=1.0)
+        self.assertAlmostEqual(1.01 / 2.01, spkf_instance.gain[0, 0])
+        cov, gain = spkf_instance.x.get_cov(), spkf_instance.gain
+        x_prev = spkf_instance.x.get_vector()[0, 0]
+
+        spkf_instance.predict_mean(u=0.5)
+        self.assertAlmostEqual(x_prev + 0.5, spkf_instance.x.get_vector()[0, 0])
+        spkf_instance.update_mean(y_true=3.0, u_h=0.25)
+        self.assertAlmostEqual(x_prev + 0.5 + gain[0, 0] * (3.0 - x_prev - 0.5 - 0.5),
+                               spkf_instance.x.get_vector()[0, 0])
+        self.assertEqual((1, 1), spkf_instance.x.get_vector().shape)
+        self.assertTrue(np.array_equal(cov, spkf_instance.x.get_cov()))
+        self.assertIs(gain, spkf_instance.gain)
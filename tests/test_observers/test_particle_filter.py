@@ -0,0 +1,61 @@
+"""
+Contains the unit test for the particle filter
+"""
+
+import unittest
+
+import numpy as np
+
+from src import NormalRandomVector
+from src.observers.particle_filter import ParticleFilter
+
+
+def create_particle_filter(num_particles, seed=0, resample_threshold=0.5):
+    # scalar random walk, x[k] = x[k-1] + w, y[k] = x[k] + v
+    w = NormalRandomVector(vector_init=np.array([[0.0]]), cov_init=np.array([[1e-2]]))
+    v = NormalRandomVector(vector_init=np.array([[0.0]]), cov_init=np.array([[1.0]]))
+    particles = np.random.default_rng(seed).standard_normal((1, num_particles))
+    return ParticleFilter(particles=particles, w=w, v=v, func_f=lambda x_k, u_k, w_k: x_k + w_k,
+                          func_h=lambda x_k, u_k, v_k: x_k + v_k, resample_threshold=resample_threshold, seed=seed)
+
+
+class TestParticleFilter(unittest.TestCase):
+    def test_constructor(self):
+        pf = create_particle_filter(num_particles=100)
+        self.assertEqual(100, pf.num_particles)
+        self.assertAlmostEqual(1.0, np.sum(pf.weights))
+        self.assertAlmostEqual(100.0, pf.effective_sample_size)
+        with self.assertRaises(ValueError):
+            ParticleFilter(particles=np.zeros(10), w=pf.w, v=pf.v, func_f=pf.func_f, func_h=pf.func_h)
+
+    def test_kalman_filter(self):
+        # for the linear Gaussian model, the particle filter approximates the Kalman filter
+        rng = np.random.default_rng(1)
+        array_y = np.cumsum(0.1 * rng.standard_normal(100)) + rng.standard_normal(100)
+        pf = create_particle_filter(num_particles=20000)
+        x, P = 0.0, 1.0
+        for y in array_y:
+            pf.solve(u=0.0, y_true=y)
+            P += 1e-2
+            gain = P / (P + 1.0)
+            x, P = x + gain * (y - x), (1 - gain) * P
+        self.assertAlmostEqual(x, pf.x_mean[0, 0], delta=0.05)
+        self.assertAlmostEqual(P, pf.x_cov[0, 0], delta=0.2 * P)
+        self.assertGreater(pf.num_resamples, 0)
+
+    def test_resample(self):
+        pf = create_particle_filter(num_particles=1000, resample_threshold=0.0)
+        pf.update(y_true=2.0)
+        self.assertEqual(0, pf.num_resamples)
+        x_mean = pf.x_mean[0, 0]
+        pf.resample()
+        self.assertEqual(1000, pf.num_particles)
+        self.assertTrue(np.allclose(1e-3, pf.weights))
+        self.assertAlmostEqual(x_mean, pf.x_mean[0, 0], delta=0.05)
+
+    def test_seed(self):
+        pf1, pf2 = create_particle_filter(num_particles=100, seed=3), create_particle_filter(num_particles=100, seed=3)
+        for pf in (pf1, pf2):
+            for y in (0.5, 1.0, 1.5):
+                pf.solve(u=0.0, y_true=y)
+        self.assertTrue(np.array_equal(pf1.particles, pf2.particles))
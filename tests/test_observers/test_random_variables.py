@@ -53,4 +53,54 @@ class TestNormalRandomVector(unittest.TestCase):
     def test_constructor_with_invalid_cov3(self):
         cov = np.array([[1, 2], [1, 2]])
         with self.assertRaises(ValueError):
-            NormalRandomVector(vector_init=self.mean, cov_init=cov)
\ No newline at end of file
+            NormalRandomVector(vector_init=self.mean, cov_init=cov)
+
+    def test_trusted(self):
+        x = NormalRandomVector(vector_init=np.array([[1.0], [2.0]]), cov_init=np.eye(2))
+        with x.trusted():
+            x.set_vector(np.array([[3.0], [4.0]]))
+            x.set_cov(2 * np.eye(2))
+            x.set_vector([5.0, 6.0])  # not checked in the trusted mode
+            with x.trusted():
+                pass
+            x.set_cov(np.eye(3))  # the nested context manager does not restore the checks
+        self.assertTrue(np.array_equal(np.eye(3), x.get_cov()))
+        # the checks are restored on exit, also if an exception is raised
+        with self.assertRaises(TypeError):
+            x.set_vector([5.0, 6.0])
+        with self.assertRaises(RuntimeError):
+            with x.trusted():
+                raise RuntimeError
+        x.set_vector(np.array([[1.0], [2.0]]))
+        with self.assertRaises(ValueError):
+            x.set_cov(np.eye(3))
+
+    def test_sample(self):
+        mean = np.array([[1.0], [2.0]])
+        cov = np.array([[1.0, 0.8], [0.8, 2.0]])
+        rv = NormalRandomVector(vector_init=mean, cov_init=cov, seed=0)
+        samples = rv.sample(num_samples=100000)
+        self.assertEqual((2, 100000), samples.shape)
+        self.assertTrue(np.allclose(mean[:, 0], np.mean(samples, axis=1), atol=2e-2))
+        self.assertTrue(np.allclose(cov, np.cov(samples), atol=3e-2))
+        # the seeded samples are reproducible
+        self.assertTrue(np.array_equal(NormalRandomVector(vector_init=mean, cov_init=cov, seed=1).sample(10),
+                                       NormalRandomVector(vector_init=mean, cov_init=cov, seed=1).sample(10)))
+
+    def test_cov_sqrt(self):
+        rv = NormalRandomVector(vector_init=np.zeros((2, 1)), cov_init=np.eye(2))
+        self.assertTrue(np.array_equal(np.eye(2), rv.cov_sqrt))
+        rv.set_cov(cov_new=np.diag([4.0, 9.0]))  # the cached factor is updated with the covariance
+        self.assertTrue(np.allclose(np.diag([2.0, 3.0]), rv.cov_sqrt))
+        # the singular covariance matrix (positive semi-definite) falls back to the eigendecomposition
+        rv = NormalRandomVector(vector_init=self.mean, cov_init=self.cov)
+        self.assertTrue(np.allclose(self.cov, rv.cov_sqrt @ rv.cov_sqrt.T))
+        samples = rv.sample(num_samples=5)
+        self.assertTrue(np.allclose(samples - samples[0], (self.mean - self.mean[0])))
+
+    def test_create_samples(self):
+        self.assertEqual((3, 1), NormalRandomVector.create_unit_normal_rv_sample(vector_size=3).shape)
+        samples = NormalRandomVector.create_normal_rv_sample(mean=np.array([1.0, -1.0]), cov=np.diag([1e-4, 1e-4]),
+                                                             num_samples=1000, rng=np.random.default_rng(0))
+        self.assertEqual((2, 1000), samples.shape)
+        self.assertTrue(np.allclose([1.0, -1.0], np.mean(samples, axis=1), atol=1e-3))
@@ -0,0 +1,97 @@
+"""
+Contains the unit test for the real-time harness of the observers
+"""
+
+import unittest
+
+import numpy as np
+
+from src.observers.realtime import RealTimeHarness, RealTimeReport
+
+
+class FakeClock:
+    """
+    Clock whose time only advances when sleeping or with the advance method, so that the latencies are deterministic.
+    """
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, dt: float) -> None:
+        self.now += dt
+
+    advance = sleep
+
+
+def create_harness(clock, slow_step=5, degraded=True):
+    # the full steps take 10 ms, except the slow step of 350 ms, and the degraded steps take 1 ms
+    steps = []
+
+    def func_step(k):
+        steps.append((k, 'full'))
+        clock.advance(0.35 if k == slow_step else 0.01)
+
+    def func_degraded_step(k):
+        steps.append((k, 'degraded'))
+        clock.advance(0.001)
+
+    harness = RealTimeHarness(func_step=func_step, func_degraded_step=func_degraded_step if degraded else None,
+                              rate=10.0, clock=clock, sleep=clock.sleep)
+    return harness, steps
+
+
+class TestRealTimeHarness(unittest.TestCase):
+    def test_constructor(self):
+        harness = RealTimeHarness(func_step=lambda k: None, rate=20.0)
+        self.assertEqual(0.05, harness.period)
+        self.assertEqual(0.05, harness.deadline)
+        self.assertAlmostEqual(0.005, harness.max_lag)
+        with self.assertRaises(ValueError):
+            RealTimeHarness(func_step=lambda k: None, rate=0.0)
+
+    def test_fixed_rate(self):
+        clock = FakeClock()
+        harness, steps = create_harness(clock=clock, slow_step=-1)
+        report = harness.run(num_steps=10, start=1)
+        self.assertEqual([(k, 'full') for k in range(1, 11)], steps)
+        self.assertAlmostEqual(0.91, clock.now)  # the steps are released every 100 ms
+        self.assertTrue(np.allclose(0.01, report.array_latency))
+        self.assertEqual(0, report.num_deadline_misses)
+        self.assertEqual(0, report.num_degraded_steps)
+
+    def test_slow_step(self):
+        clock = FakeClock()
+        harness, steps = create_harness(clock=clock)
+        report = harness.run(num_steps=12)
+        # the steps released during the slow step are degraded until the harness catches up
+        self.assertEqual([6, 7, 8], [k for k, step in steps if step == 'degraded'])
+        self.assertEqual(3, report.num_degraded_steps)
+        self.assertTrue(np.array_equal(np.isin(np.arange(12), [6, 7, 8]), report.array_degraded))
+        self.assertEqual(3, report.num_deadline_misses)
+        self.assertTrue(np.array_equal(np.isin(np.arange(12), [5, 6, 7]), report.array_missed))
+        self.assertTrue(np.allclose([0.01] * 5 + [0.35, 0.251, 0.152, 0.053] + [0.01] * 3, report.array_latency))
+        self.assertTrue(np.allclose([0.01] * 5 + [0.35, 0.001, 0.001, 0.001] + [0.01] * 3, report.array_exec_time))
+        self.assertAlmostEqual(0.35, report.max_latency)
+        self.assertAlmostEqual(0.01, report.p50)
+        self.assertAlmostEqual(np.percentile(report.array_latency, 99), report.p99)
+        self.assertIn('deadline misses: 3, degraded steps: 3', report.summary())
+
+    def test_slow_step_without_degradation(self):
+        clock = FakeClock()
+        harness, steps = create_harness(clock=clock, degraded=False)
+        report = harness.run(num_steps=12)
+        self.assertEqual(0, report.num_degraded_steps)
+        self.assertTrue(np.allclose([0.01] * 5 + [0.35, 0.26, 0.17, 0.08] + [0.01] * 3, report.array_latency))
+        self.assertEqual(3, report.num_deadline_misses)
+
+    def test_empty_report(self):
+        report = RealTimeReport(period=0.1, deadline=0.1)
+        self.assertEqual(0, report.num_steps)
+        self.assertEqual(0.0, report.p99)
+        self.assertEqual(0.0, report.max_latency)
+
+
+if __name__ == '__main__':
+    unittest.main()
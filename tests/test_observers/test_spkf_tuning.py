@@ -0,0 +1,104 @@
+"""
+Contains the unit test for the SPKF covariance tuning
+"""
+
+import unittest
+
+import numpy as np
+
+from src import ParameterSet, ParameterTable, BatteryCell, CustomStep, DTSolver, Solution
+from src.exceptions_and_warnings.exceptions import CannotPerformCalculations
+from src.observers.spkf_tuning import TUNING_DTYPE, grid_search_candidates, random_search_candidates, tune_spkf, \
+    _run_batch_spkf, _iter_batch_spkf
+from parameter_sets.Calce123 import func_SOC_OCV, func_eta
+
+PARAM = ParameterSet(R0=0.005, R1=np.array([0.01, 0.005]), C1=np.array([1000.0, 100.0]), Q=1.1,
+                     func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
+
+
+def create_sol_exp():
+    """
+    Returns the synthetic measurements, with the voltage sensor noise, and the true SOC.
+    """
+    array_t = np.arange(0.0, 600.0)
+    array_I = np.where(np.arange(array_t.size) % 200 < 100, 1.0, -0.5)
+    sol_true = DTSolver(battery_cell=BatteryCell(param=PARAM, soc_init=0.8)).solve(
+        cycling_step=CustomStep(array_t, array_I, V_min=2.0, V_max=4.5, SOC_LIB_min=0.0, SOC_LIB_max=1.0,
+                                SOC_LIB=0.8), dt=1.0)
+    array_V = sol_true.array_V + 0.01 * np.random.default_rng(0).standard_normal(sol_true.array_V.size)
+    return Solution(array_t=sol_true.array_t, array_I=sol_true.array_I, array_V=array_V), sol_true.array_soc
+
+
+class TestSPKFTuning(unittest.TestCase):
+    def test_candidates(self):
+        candidates = grid_search_candidates(cov_soc=[1e-6, 1e-4], cov_current=1e-6, cov_process=[1e-6, 1e-5, 1e-4],
+                                            cov_sensor=1e-4)
+        self.assertEqual(TUNING_DTYPE, candidates.dtype)
+        self.assertEqual(6, candidates.size)
+        self.assertEqual({1e-6, 1e-5, 1e-4}, set(candidates['cov_process']))
+        candidates = random_search_candidates(100, cov_soc=(1e-6, 1e-2), cov_current=(1e-6, 1e-6),
+                                              cov_process=(1e-8, 1e-4), cov_sensor=(1e-5, 1e-3), seed=0)
+        self.assertTrue(np.all((candidates['cov_soc'] >= 1e-6) & (candidates['cov_soc'] <= 1e-2)))
+        self.assertTrue(np.allclose(1e-6, candidates['cov_current']))
+        self.assertTrue(np.array_equal(candidates, random_search_candidates(
+            100, cov_soc=(1e-6, 1e-2), cov_current=(1e-6, 1e-6), cov_process=(1e-8, 1e-4), cov_sensor=(1e-5, 1e-3),
+            seed=0)))
+        with self.assertRaises(ValueError):
+            grid_search_candidates(cov_soc=[0.0], cov_current=1e-6, cov_process=1e-6, cov_sensor=1e-4)
+
+    def test_batch_spkf(self):
+        # the batch SPKF of the whole grid gives the same SOC as the sequential replay of each grid point
+        sol_exp, _ = create_sol_exp()
+        candidates = grid_search_candidates(cov_soc=[1e-6, 1e-3], cov_current=[1e-6, 1e-4], cov_process=[1e-6, 1e-4],
+                                            cov_sensor=[1e-5, 1e-3])
+        array_soc_batch = np.array([x[:, 0] for _, x, _, _, _ in _iter_batch_spkf(
+            battery_cell=BatteryCell(param=PARAM, soc_init=0.7), sol_exp=sol_exp, candidates=candidates)])
+        self.assertEqual((sol_exp.array_t.size - 1, candidates.size), array_soc_batch.shape)
+        for m, candidate in enumerate(candidates):
+            sol = DTSolver(battery_cell=BatteryCell(param=PARAM, soc_init=0.7)).solveSPKF(
+                sol_exp=sol_exp, V_min=1, V_max=5, SOC_LIB_min=0.0, SOC_LIB_max=1.0, SOC_LIB=0.7,
+                **{name: float(candidate[name]) for name in ('cov_soc', 'cov_current', 'cov_process', 'cov_sensor')})
+            self.assertTrue(np.allclose(sol.array_soc, array_soc_batch[:, m], rtol=0.0, atol=1e-9))
+        # the single candidate gives the same metrics as in the batch
+        rmse_soc, rmse_V, nis_mean, _ = _run_batch_spkf(battery_cell=BatteryCell(param=PARAM, soc_init=0.7),
+                                                        sol_exp=sol_exp, candidates=candidates,
+                                                        array_soc_ref=np.append(0.7, array_soc_batch[:, 0]))
+        self.assertLess(rmse_soc[0], 1e-12)
+        rmse_V_1 = _run_batch_spkf(battery_cell=BatteryCell(param=PARAM, soc_init=0.7), sol_exp=sol_exp,
+                                   candidates=candidates[3:4], array_soc_ref=None)[1]
+        self.assertAlmostEqual(rmse_V[3], rmse_V_1[0], places=12)
+
+    def test_tune_spkf(self):
+        sol_exp, array_soc_true = create_sol_exp()
+        candidates = grid_search_candidates(cov_soc=[1e-4, 1e-2], cov_current=1e-6, cov_process=[1e-6, 1e-4, 1e-2],
+                                            cov_sensor=[1e-6, 1e-4, 1e-2])
+        result = tune_spkf(battery_cell=BatteryCell(param=PARAM, soc_init=0.7), sol_exp=sol_exp,
+                           candidates=candidates, array_soc_ref=array_soc_true)
+        self.assertEqual(candidates.size, result.table.size)
+        self.assertTrue(np.all(np.diff(result.table['score']) >= 0))
+        self.assertEqual(0.0, np.min(np.log(result.table['rmse_soc'] / np.min(result.table['rmse_soc']))))
+        self.assertLess(result.table['rmse_soc'][0], np.median(result.table['rmse_soc']))
+        self.assertLess(abs(np.log(result.table['nis_mean'][0])), 1.0)
+
+        # the best covariances can be passed to solveSPKF
+        sol = DTSolver(battery_cell=BatteryCell(param=PARAM, soc_init=0.7)).solveSPKF(
+            sol_exp=sol_exp, V_min=1, V_max=5, SOC_LIB_min=0.0, SOC_LIB_max=1.0, SOC_LIB=0.7, **result.best)
+        self.assertAlmostEqual(result.table['rmse_soc'][0],
+                               np.sqrt(np.mean((sol.array_soc - array_soc_true[1:]) ** 2)))
+
+        # without the reference SOC, the candidates are scored by the voltage innovations
+        result = tune_spkf(battery_cell=BatteryCell(param=PARAM, soc_init=0.7), sol_exp=sol_exp,
+                           candidates=candidates)
+        self.assertTrue(np.all(np.isnan(result.table['rmse_soc'])))
+        self.assertTrue(np.all(np.isfinite(result.table['score'])))
+
+    def test_invalid_inputs(self):
+        sol_exp, array_soc_true = create_sol_exp()
+        candidates = grid_search_candidates(cov_soc=1e-4, cov_current=1e-6, cov_process=1e-6, cov_sensor=1e-4)
+        param = ParameterSet(R0=ParameterTable(array_soc=np.linspace(0, 1, 3), values=np.full(3, 0.005)), R1=0.01,
+                             C1=1000.0, Q=1.1, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
+        with self.assertRaises(CannotPerformCalculations):
+            tune_spkf(battery_cell=BatteryCell(param=param, soc_init=0.7), sol_exp=sol_exp, candidates=candidates)
+        with self.assertRaises(ValueError):
+            tune_spkf(battery_cell=BatteryCell(param=PARAM, soc_init=0.7), sol_exp=sol_exp, candidates=candidates,
+                      array_soc_ref=array_soc_true[:10])
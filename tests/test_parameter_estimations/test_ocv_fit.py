@@ -0,0 +1,98 @@
+"""
+Provides the unittest for the OCV fitting
+"""
+
+import importlib.util
+import os
+import tempfile
+import unittest
+import warnings
+
+import numpy as np
+
+from src import ParameterSet, BatteryCell, DischargeStep, DTSolver, Solution
+from src.core.parameter_functions import is_array_safe
+from src.exceptions_and_warnings.warnings import NonMonotoneOCVWarning
+from src.parameter_estimations.ocv_fit import ChebyshevOCV, MonotoneCubicOCV, extract_ocv_data, fit_chebyshev, \
+    fit_monotone_cubic, load_ocv_curve, write_parameter_set_module
+
+
+def func_OCV_true(soc):
+    return 3.0 + 0.5 * soc + 0.2 * np.tanh(8 * (soc - 0.5))
+
+
+class TestOCVFit(unittest.TestCase):
+    array_soc = np.linspace(0.0, 1.0, 2001)
+    array_ocv = func_OCV_true(array_soc) + 5e-4 * np.random.default_rng(0).standard_normal(array_soc.size)
+
+    def test_chebyshev(self):
+        curve = fit_chebyshev(self.array_soc, func_OCV_true(self.array_soc), degree=30)
+        self.assertTrue(is_array_safe(curve))
+        self.assertTrue(curve.is_monotone())
+        self.assertLess(np.max(np.abs(curve(self.array_soc) - func_OCV_true(self.array_soc))), 2e-3)
+        for soc in (0.0, 0.3, 0.77, 1.0):
+            self.assertIsInstance(curve(soc), float)
+            self.assertAlmostEqual(float(curve(np.array([soc]))[0]), curve(soc), places=12)
+        self.assertEqual(curve(1.0), curve(1.2))  # clamped outside the SOC range
+
+    def test_chebyshev_non_monotone(self):
+        with self.assertWarns(NonMonotoneOCVWarning):
+            fit_chebyshev(self.array_soc, 3.5 + 0.1 * np.sin(6 * self.array_soc), degree=8)
+
+    def test_monotone_cubic(self):
+        curve = fit_monotone_cubic(self.array_soc, self.array_ocv, num_points=101)
+        self.assertTrue(curve.is_monotone())
+        self.assertLess(np.max(np.abs(curve(self.array_soc) - func_OCV_true(self.array_soc))), 2e-3)
+        self.assertTrue(np.allclose(curve.array_ocv, curve(curve.array_soc)))
+        soc = np.random.default_rng(1).uniform(-0.1, 1.1, 100)
+        self.assertTrue(np.allclose(curve(soc), [curve(float(soc_)) for soc_ in soc], rtol=0.0, atol=1e-12))
+        # non-monotone data are made monotone
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            curve = fit_monotone_cubic(self.array_soc, 3.5 + 0.1 * np.sin(6 * self.array_soc), num_points=51)
+        self.assertTrue(curve.is_monotone())
+
+    def test_save_and_load(self):
+        for curve in (fit_chebyshev(self.array_soc, self.array_ocv, degree=20, check_monotone=False),
+                      fit_monotone_cubic(self.array_soc, self.array_ocv, num_points=51)):
+            with tempfile.TemporaryDirectory() as temp_dir:
+                filepath = os.path.join(temp_dir, 'ocv.npz')
+                curve.save(filepath)
+                curve_loaded = load_ocv_curve(filepath)
+            self.assertEqual(curve, curve_loaded)
+            self.assertEqual(hash(curve), hash(curve_loaded))
+
+    def test_write_parameter_set_module(self):
+        curve = fit_monotone_cubic(self.array_soc, self.array_ocv, num_points=21)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            filepath = os.path.join(temp_dir, 'FittedCell.py')
+            write_parameter_set_module(filepath, curve, description='Fitted parameters', R0=0.02, Q=1.1)
+            spec = importlib.util.spec_from_file_location('FittedCell', filepath)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        self.assertEqual(0.02, module.R0)
+        self.assertEqual(1.1, module.Q)
+        self.assertIsInstance(module.func_SOC_OCV, MonotoneCubicOCV)
+        self.assertEqual(curve, module.func_SOC_OCV)
+
+    def test_extract_ocv_data(self):
+        # low-rate discharge simulated with the true OCV, with negative currents for the discharge in the Solution
+        param = ParameterSet(R0=0.02, R1=0.001, C1=10.0, Q=1.0, func_SOC_OCV=func_OCV_true, func_eta=lambda i: 1.0)
+        sol = DTSolver(battery_cell=BatteryCell(param=param, soc_init=1.0)).solve(
+            cycling_step=DischargeStep(discharge_current=0.05, V_min=2.0, SOC_LIB_min=0.05, SOC_LIB=1.0), dt=10.0)
+        sol_exp = Solution(array_t=sol.array_t, array_I=sol.array_I, array_V=sol.array_V)
+        array_soc, array_ocv = extract_ocv_data(sol_exp, Q=1.0, soc_init=1.0, R0=0.02)
+        self.assertTrue(np.allclose(sol.array_soc, array_soc, atol=1e-3))
+        curve = fit_monotone_cubic(array_soc, array_ocv, num_points=41, soc_min=0.1, soc_max=1.0)
+        soc = np.linspace(0.1, 1.0, 100)
+        self.assertLess(np.max(np.abs(curve(soc) - func_OCV_true(soc))), 5e-3)
+        with self.assertRaises(ValueError):
+            extract_ocv_data(sol_exp)
+
+    def test_solver(self):
+        curve = ChebyshevOCV(coeffs=[3.6, 0.4], soc_min=0.0, soc_max=1.0)
+        self.assertAlmostEqual(3.4, curve(0.25))
+        param = ParameterSet(R0=0.02, R1=0.001, C1=10.0, Q=1.0, func_SOC_OCV=curve, func_eta=lambda i: 1.0)
+        sol = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.9)).solve(
+            cycling_step=DischargeStep(discharge_current=1.0, V_min=3.3, SOC_LIB_min=0.0, SOC_LIB=0.9), dt=1.0)
+        self.assertLess(sol.array_V[-1], 3.3 + 1e-2)
@@ -0,0 +1,130 @@
+"""
+Provides the unittest for the aging solver
+"""
+
+import unittest
+
+import numpy as np
+
+from src import ParameterSet, ParameterTable, BatteryCell, DischargeStep, ChargeStep, RestStep, CustomStep
+from src import DTSolver, array_safe
+from src.exceptions_and_warnings.exceptions import CannotPerformCalculations
+from src.solvers.aging_solvers import AgingSolver, PowerLawDegradation, solve_constant_current_step
+
+R0 = 0.02
+R1 = 0.05
+C1 = 1500.0
+Q = 1.65
+
+
+@array_safe
+def func_SOC_OCV(soc):
+    return 3.2 + 0.8 * soc - 0.1 * np.exp(-20 * soc)
+
+
+@array_safe
+def func_eta(i_app):
+    return np.where(np.asarray(i_app) <= 0, 1.0, 0.9995)[()]
+
+
+def func_eta_scalar(i_app):
+    return 1.0 if i_app <= 0 else 0.9995
+
+
+def create_cell(func_eta_=func_eta, soc_init=0.9):
+    param = ParameterSet(R0=R0, R1=R1, C1=C1, Q=Q, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta_)
+    return BatteryCell(param=param, soc_init=soc_init)
+
+
+def create_cycle():
+    return [ChargeStep(charge_current=1.65, V_max=3.95, SOC_LIB_max=1.0, SOC_LIB=0.0),
+            RestStep(rest_time=600, SOC_LIB=0.0),
+            DischargeStep(discharge_current=1.65, V_min=3.3, SOC_LIB_min=0.0, SOC_LIB=0.0),
+            RestStep(rest_time=600, SOC_LIB=0.0)]
+
+
+class TestConstantCurrentStep(unittest.TestCase):
+    def compare(self, cycling_step, soc_init):
+        b_cell = create_cell(soc_init=soc_init)
+        sol = solve_constant_current_step(param=b_cell.param.compile(), soc_init=soc_init, cycling_step=cycling_step,
+                                          dt=1.0)
+        sol_dt = DTSolver(battery_cell=b_cell).solve(cycling_step=cycling_step, dt=1.0)
+        self.assertEqual(sol_dt.array_t.size, sol.array_t.size)
+        self.assertTrue(np.allclose(sol_dt.array_t, sol.array_t))
+        self.assertTrue(np.allclose(sol_dt.array_I, sol.array_I))
+        self.assertTrue(np.allclose(sol_dt.array_soc, sol.array_soc, atol=1e-10))
+        self.assertTrue(np.allclose(sol_dt.array_V, sol.array_V, atol=1e-8))
+        self.assertTrue(np.allclose(sol_dt.array_cap_discharge, sol.array_cap_discharge, atol=1e-10))
+
+    def test_discharge(self):
+        self.compare(DischargeStep(discharge_current=1.65, V_min=3.3, SOC_LIB_min=0.0, SOC_LIB=0.0), soc_init=0.9)
+
+    def test_charge(self):
+        self.compare(ChargeStep(charge_current=1.0, V_max=3.95, SOC_LIB_max=1.0, SOC_LIB=0.0), soc_init=0.1)
+
+    def test_rest(self):
+        self.compare(RestStep(rest_time=300, SOC_LIB=0.0), soc_init=0.5)
+
+    def test_unreachable_cut_off(self):
+        b_cell = create_cell()
+        with self.assertRaises(CannotPerformCalculations):
+            solve_constant_current_step(param=b_cell.param.compile(), soc_init=0.9, dt=1.0,
+                                        cycling_step=ChargeStep(charge_current=1.65, V_max=10.0, SOC_LIB_max=1.0,
+                                                                SOC_LIB=0.0))
+
+
+class TestAgingSolver(unittest.TestCase):
+    law = PowerLawDegradation(k_cal_Q=1e-3, k_cyc_Q=1e-3, k_cal_R0=1e-3, k_cyc_R0=2e-3)
+
+    def test_power_law(self):
+        self.assertEqual((1.0, 1.0), PowerLawDegradation()(t=1e6, charge_throughput=100.0))
+        capacity_fraction, R0_factor = self.law(t=86400.0, charge_throughput=10.0)
+        self.assertAlmostEqual(1 - 1e-3 - 1e-2, capacity_fraction)
+        self.assertAlmostEqual(1 + 1e-3 + 2e-2, R0_factor)
+
+    def test_solve(self):
+        b_cell = create_cell()
+        sol = AgingSolver(battery_cell=b_cell, cycling_steps=create_cycle(), degradation_law=self.law).solve(
+            num_cycles=20, trace_every=10)
+        self.assertEqual(20, sol.summary.size)
+        self.assertTrue(np.array_equal(np.arange(1, 21), sol.array_cycle))
+        self.assertEqual(Q, sol.array_capacity[0])
+        self.assertTrue(np.all(np.diff(sol.array_capacity) < 0))
+        self.assertTrue(np.all(np.diff(sol.summary['R0']) > 0))
+        self.assertTrue(np.all(np.diff(sol.summary['t']) > 0))
+        # the first cycle starts from the initial SOC of 0.9, the later cycles from the end of the discharge
+        self.assertTrue(np.all(sol.summary['energy_discharge'][1:] < sol.summary['energy_charge'][1:]))
+        self.assertEqual([1, 11], sorted(sol.traces))
+        self.assertEqual(4, len(sol.traces[11]))
+        # the input battery cell is not changed
+        self.assertEqual(Q, b_cell.param.Q)
+        self.assertEqual(R0, b_cell.param.R0)
+        self.assertEqual(0.9, b_cell.soc)
+
+    def test_fallback(self):
+        # the scalar-only func_eta is solved using the DTSolver, which gives the same results
+        sol = AgingSolver(battery_cell=create_cell(), cycling_steps=create_cycle(), degradation_law=self.law).solve(
+            num_cycles=3)
+        sol_dt = AgingSolver(battery_cell=create_cell(func_eta_=func_eta_scalar), cycling_steps=create_cycle(),
+                             degradation_law=self.law).solve(num_cycles=3)
+        for name in ('Q', 'cap_charge', 'cap_discharge', 'energy_discharge', 'soc'):
+            self.assertTrue(np.allclose(sol_dt.summary[name], sol.summary[name], atol=1e-8))
+
+    def test_custom_step(self):
+        step = CustomStep(array_t=np.arange(0.0, 601.0), array_I=np.full(601, 1.0), V_min=2.5, V_max=4.2,
+                          SOC_LIB_min=0.0, SOC_LIB_max=1.0, SOC_LIB=0.0)
+        sol = AgingSolver(battery_cell=create_cell(), cycling_steps=[step], degradation_law=self.law).solve(
+            num_cycles=2)
+        self.assertTrue(np.allclose(600.0 / 3600, sol.array_cap_discharge, rtol=1e-2))
+
+    def test_invalid_inputs(self):
+        param = ParameterSet(R0=ParameterTable(array_soc=np.linspace(0, 1, 3), values=np.full(3, R0)), R1=R1, C1=C1,
+                             Q=Q, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
+        with self.assertRaises(CannotPerformCalculations):
+            AgingSolver(battery_cell=BatteryCell(param=param, soc_init=0.9), cycling_steps=create_cycle(),
+                        degradation_law=self.law)
+        with self.assertRaises(ValueError):
+            AgingSolver(battery_cell=create_cell(), cycling_steps=[], degradation_law=self.law)
+        with self.assertRaises(CannotPerformCalculations):
+            AgingSolver(battery_cell=create_cell(), cycling_steps=create_cycle(),
+                        degradation_law=PowerLawDegradation(k_cyc_Q=1.0)).solve(num_cycles=5)
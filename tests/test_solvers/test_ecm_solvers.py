@@ -4,11 +4,15 @@ Provides the unittest for ECM solvers
 
 import unittest
 import pickle
+import sys
+import tracemalloc
 
 import numpy as np
 
-from src import ParameterSet, BatteryCell, DischargeStep, CustomStep, Solution
-from src import DTSolver
+from src import ParameterSet, BatteryCell, DischargeStep, RestStep, CustomStep, Solution, array_safe
+from src import DTSolver, Instrumentation, NormalRandomVector, SPKF
+from src.core.parameter_tables import ParameterTable
+from src.exceptions_and_warnings.exceptions import CannotPerformCalculations
 
 R0 = 0.02
 R1 = 0.05
@@ -87,3 +91,450 @@ class TestDTSolver(unittest.TestCase):
             std_sol = pickle.load(file)
 
         self.assertTrue(np.allclose(sol.array_V, std_sol))
+
+    def test_non_isothermal_solver(self):
+        param = ParameterSet(R0=R0, R1=R1, C1=C1, Q=Q, func_SOC_OCV=lambda soc: 3.2 + 0.8 * soc, func_eta=func_eta,
+                             T_ref=298.15, Ea_R0=20000.0, Ea_R1=20000.0, rho=2047.0, vol=3.45e-5, c_p=1109.0,
+                             h=10.0, A=0.00637, func_docvdtemp=lambda soc: -1e-4)
+        cycling_step = DischargeStep(discharge_current=discharge_current, V_min=3.3, SOC_LIB_min=SOC_LIB_min,
+                                     SOC_LIB=SOC_LIB)
+
+        solver = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.9), isothermal=False)
+        sol = solver.solve(cycling_step=cycling_step, dt=1.0)
+        self.assertEqual(len(sol.array_t), len(sol.array_temp))
+        self.assertEqual(298.15, sol.array_temp[0])
+        self.assertTrue(np.all(np.diff(sol.array_temp) > 0.0))  # the battery cell heats up during the discharge
+        self.assertLess(sol.array_V[-1], 3.3)
+
+        # the isothermal simulation does not store the temperature
+        sol_isothermal = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.9)).solve(
+            cycling_step=cycling_step, dt=1.0)
+        self.assertEqual(0, len(sol_isothermal.array_temp))
+
+    def test_non_isothermal_solver_snapshot(self):
+        # the changes to the ParameterSet during the solve do not affect the non-isothermal simulation
+        def create_param(func_SOC_OCV_):
+            return ParameterSet(R0=R0, R1=R1, C1=1500.0, Q=Q, func_SOC_OCV=func_SOC_OCV_, func_eta=func_eta,
+                                T_ref=298.15, Ea_R0=20000.0, Ea_R1=20000.0, rho=2047.0, vol=3.45e-5, c_p=1109.0,
+                                h=10.0, A=0.00637)
+
+        def func_SOC_OCV_changes_param(soc):
+            if soc < 0.85:
+                b_cell.param.R0 = 10 * R0
+                b_cell.param.R1 = 10 * R1
+                b_cell.param.Ea_R0 = 50000.0
+            return 3.2 + 0.8 * soc
+
+        cycling_step = DischargeStep(discharge_current=discharge_current, V_min=3.3, SOC_LIB_min=SOC_LIB_min,
+                                     SOC_LIB=SOC_LIB)
+        sol_ref = DTSolver(battery_cell=BatteryCell(param=create_param(lambda soc: 3.2 + 0.8 * soc), soc_init=0.9),
+                           isothermal=False).solve(cycling_step=cycling_step, dt=1.0)
+        b_cell = BatteryCell(param=create_param(func_SOC_OCV_changes_param), soc_init=0.9)
+        sol = DTSolver(battery_cell=b_cell, isothermal=False).solve(cycling_step=cycling_step, dt=1.0)
+        self.assertEqual(10 * R0, b_cell.param.R0)
+        self.assertTrue(np.array_equal(sol_ref.array_V, sol.array_V))
+        self.assertTrue(np.array_equal(sol_ref.array_temp, sol.array_temp))
+
+    def test_nrc_solver(self):
+        cycling_step = DischargeStep(discharge_current=discharge_current, V_min=3.3, SOC_LIB_min=SOC_LIB_min,
+                                     SOC_LIB=SOC_LIB)
+
+        def solve(R1_, C1_):
+            param = ParameterSet(R0=R0, R1=R1_, C1=C1_, Q=Q, func_SOC_OCV=lambda soc: 3.2 + 0.8 * soc,
+                                 func_eta=func_eta)
+            return DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.9)).solve(cycling_step=cycling_step,
+                                                                                     dt=1.0)
+
+        # a single RC pair given as an array is the same as the first order Thevenin model
+        sol_1rc = solve(R1, C1)
+        sol_nrc = solve(np.array([R1]), np.array([C1]))
+        self.assertTrue(np.allclose(sol_1rc.array_V, sol_nrc.array_V))
+
+        # an additional RC pair leads to additional voltage drop and hence earlier cut-off
+        sol_2rc = solve(np.array([R1, 0.03]), np.array([C1, 1000.0]))
+        self.assertLess(len(sol_2rc.array_t), len(sol_1rc.array_t))
+        self.assertLess(sol_2rc.array_V[-1], 3.3)
+
+    def test_nrc_spkf(self):
+        from parameter_sets.Calce123 import R0, R1, C1, Q, func_SOC_OCV, func_eta
+
+        sol_exp = Solution().read_from_csv_file(filepath='tests/test_solvers/A1-A123-Dynamics.csv')
+        sol_exp = Solution(array_t=sol_exp.array_t[:200], array_I=sol_exp.array_I[:200], array_V=sol_exp.array_V[:200])
+        param = ParameterSet(R0=R0, R1=np.array([R1, 0.01]), C1=np.array([C1, 1000.0]), Q=Q,
+                             func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
+        solver = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.38775))
+        sol = solver.solveSPKF(sol_exp=sol_exp, cov_soc=1e-6, cov_current=1e-6, cov_sensor=1e-6, cov_process=1e-6,
+                               V_min=1, V_max=4, SOC_LIB_min=0.0, SOC_LIB_max=1.0, SOC_LIB=0.38775)
+        self.assertEqual(len(sol_exp.array_t) - 1, len(sol.array_t))
+        self.assertTrue(np.all(np.isfinite(sol.array_V)))
+
+        # the state equation coefficients cached for each dt are recomputed for the new parameter snapshot
+        kwargs = dict(sol_exp=sol_exp, cov_soc=1e-6, cov_current=1e-6, cov_sensor=1e-6, cov_process=1e-6, V_min=1,
+                      V_max=4, SOC_LIB_min=0.0, SOC_LIB_max=1.0, SOC_LIB=0.38775)
+        solver.b_cell.soc = 0.38775
+        solver.b_cell.param.Q = 0.5 * Q
+        sol_q = solver.solveSPKF(**kwargs)
+        sol_q_new = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.38775)).solveSPKF(**kwargs)
+        self.assertTrue(np.array_equal(sol_q_new.array_soc, sol_q.array_soc))
+        self.assertFalse(np.array_equal(sol.array_soc, sol_q.array_soc))
+
+    def test_trusted(self):
+        # the trusted mode, which skips the setter checks and runs the SPKF fast path, gives the same results
+        from parameter_sets.Calce123 import R0, R1, C1, Q, func_SOC_OCV, func_eta
+
+        sol_exp = Solution().read_from_csv_file(filepath='tests/test_solvers/A1-A123-Dynamics.csv')
+        sol_exp = Solution(array_t=sol_exp.array_t[:200], array_I=sol_exp.array_I[:200], array_V=sol_exp.array_V[:200])
+        param = ParameterSet(R0=R0, R1=np.array([R1, 0.01]), C1=np.array([C1, 1000.0]), Q=Q,
+                             func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
+        kwargs = dict(sol_exp=sol_exp, cov_soc=1e-6, cov_current=1e-6, cov_sensor=1e-6, cov_process=1e-6)
+        sols = {}
+        for trusted in (False, True):
+            b_cell = BatteryCell(param=param, soc_init=0.38775)
+            sols[trusted] = DTSolver(battery_cell=b_cell).solveSPKF(V_min=1, V_max=4, SOC_LIB_min=0.0, SOC_LIB_max=1.0,
+                                                                    SOC_LIB=0.38775, trusted=trusted, **kwargs)
+            sols[trusted, 'smooth'] = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.38775)).smoothSPKF(
+                trusted=trusted, **kwargs)
+            sols[trusted, 'solve'] = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.9)).solve(
+                cycling_step=self.standard_cycler, dt=1.0, trusted=trusted)
+            sols[trusted, 'joint'] = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.38775)).solveJointSPKF(
+                cov_R0=1e-6, cov_Q=1e-3, cov_R0_process=1e-10, cov_Q_process=1e-8, trusted=trusted, **kwargs)
+            # the checks are restored after the solve
+            with self.assertRaises(TypeError):
+                b_cell.soc = 1
+        for key in (False, 'smooth', 'solve', 'joint'):
+            sol, sol_trusted = (sols[key], sols[True]) if key is False else (sols[False, key], sols[True, key])
+            self.assertTrue(np.allclose(sol.array_soc, sol_trusted.array_soc, rtol=0.0, atol=1e-12))
+            self.assertTrue(np.allclose(sol.array_V, sol_trusted.array_V, rtol=0.0, atol=1e-12))
+        self.assertTrue(np.allclose(sols[False, 'joint'].array_R0, sols[True, 'joint'].array_R0, rtol=0.0, atol=1e-12))
+
+        # the default mode still checks the random vectors of the filter
+        spkf = SPKF(x=NormalRandomVector(vector_init=np.zeros((3, 1)), cov_init=np.eye(3)),
+                    w=NormalRandomVector(vector_init=np.zeros((1, 1)), cov_init=np.eye(1)),
+                    v=NormalRandomVector(vector_init=np.zeros((1, 1)), cov_init=np.eye(1)), y_dim=1,
+                    func_f=None, func_h=None)
+        with spkf.trusted():
+            spkf.x.set_cov(np.eye(2))
+        spkf.x.set_cov(np.eye(3))
+        with self.assertRaises(TypeError):
+            spkf.x.set_vector([0.0, 0.0, 0.0])
+        with self.assertRaises(ValueError):
+            spkf.x.set_cov(np.eye(2))
+
+    def test_smooth_spkf(self):
+        from parameter_sets.Calce123 import func_SOC_OCV, func_eta
+
+        # synthetic measurements of a known SOC trajectory, with the voltage sensor noise
+        param = ParameterSet(R0=0.005, R1=0.01, C1=1000.0, Q=1.1, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
+        array_t = np.arange(0.0, 1500.0)
+        array_I = np.where(np.arange(array_t.size) % 300 < 150, 1.0, -0.5)
+        sol_true = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.8)).solve(
+            cycling_step=CustomStep(array_t, array_I, V_min=2.0, V_max=4.5, SOC_LIB_min=0.0, SOC_LIB_max=1.0,
+                                    SOC_LIB=0.8), dt=1.0)
+        array_V = sol_true.array_V + 0.01 * np.random.default_rng(0).standard_normal(sol_true.array_V.size)
+        sol_exp = Solution(array_t=sol_true.array_t, array_I=sol_true.array_I, array_V=array_V)
+        kwargs = dict(cov_soc=1e-2, cov_current=1e-6, cov_process=1e-4, cov_sensor=1e-4)
+
+        sol_filter = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.6)).solveSPKF(
+            sol_exp=sol_exp, V_min=1, V_max=5, SOC_LIB_min=0.0, SOC_LIB_max=1.0, SOC_LIB=0.6, **kwargs)
+        sol = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.6)).smoothSPKF(
+            sol_exp=sol_exp, instrumentation=Instrumentation(), **kwargs)
+        self.assertTrue(np.array_equal(sol_exp.array_t, sol.array_t))
+        self.assertEqual((sol_exp.array_t.size, 2, 2), sol.array_cov.shape)
+        self.assertEqual(sol_exp.array_t.size - 1, sol.report.counters['kf_predict'])
+        self.assertEqual(1, sol.report.counters['rts_smooth'])
+        # the smoother and the filter agree at the last time value, and the smoother is more accurate before it
+        self.assertAlmostEqual(sol_filter.array_soc[-1], sol.array_soc[-1])
+        rmse_filter = np.sqrt(np.mean((sol_filter.array_soc - sol_true.array_soc[1:]) ** 2))
+        rmse_smoother = np.sqrt(np.mean((sol.array_soc - sol_true.array_soc) ** 2))
+        self.assertLess(rmse_smoother, 0.5 * rmse_filter)
+        self.assertTrue(np.all(sol.array_cov[:, 0, 0] > 0))
+
+    def test_joint_spkf(self):
+        from parameter_sets.Calce123 import func_SOC_OCV, func_eta
+
+        # synthetic measurements of the discharge pulses, followed by the charge pulses and the rests
+        param = ParameterSet(R0=0.01, R1=0.01, C1=1000.0, Q=1.1, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
+        array_t = np.arange(0.0, 6000.0, 2.0)
+        k = np.arange(array_t.size)
+        array_I = np.where(k % 100 < 50, 1.0, np.where(k % 100 < 75, -0.3, 0.0))
+        sol_true = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.95)).solve(
+            cycling_step=CustomStep(array_t, array_I, V_min=2.0, V_max=4.5, SOC_LIB_min=0.0, SOC_LIB_max=1.0,
+                                    SOC_LIB=0.95), dt=2.0)
+        array_V = sol_true.array_V + 0.005 * np.random.default_rng(0).standard_normal(sol_true.array_V.size)
+        sol_exp = Solution(array_t=sol_true.array_t, array_I=sol_true.array_I, array_V=array_V)
+
+        # the initial SOC, R0, and Q are wrong
+        b_cell = BatteryCell(param=ParameterSet(R0=0.02, R1=0.01, C1=1000.0, Q=1.4, func_SOC_OCV=func_SOC_OCV,
+                                                func_eta=func_eta), soc_init=0.9)
+        sol = DTSolver(battery_cell=b_cell).solveJointSPKF(sol_exp=sol_exp, cov_soc=1e-2, cov_current=1e-6,
+                                                           cov_process=1e-4, cov_sensor=2.5e-5, cov_R0=1e-4, cov_Q=0.1,
+                                                           cov_R0_process=1e-10, cov_Q_process=1e-8)
+        self.assertEqual(sol_exp.array_t.size, sol.array_R0.size)
+        self.assertEqual((sol_exp.array_t.size, 4, 4), sol.array_cov.shape)
+        self.assertEqual(0.02, sol.array_R0[0])
+        self.assertEqual(1.4, sol.array_Q[0])
+        self.assertAlmostEqual(0.01, sol.array_R0[-1], delta=0.001)
+        self.assertAlmostEqual(1.1, sol.array_Q[-1], delta=0.02)
+        self.assertLess(np.max(np.abs(sol.array_soc[-500:] - sol_true.array_soc[-500:])), 0.01)
+        self.assertLess(np.sqrt(np.mean((sol.array_V[-500:] - sol_true.array_V[-500:]) ** 2)), 0.005)
+        # the parameter set is not changed
+        self.assertEqual(0.02, b_cell.param.R0)
+        self.assertEqual(1.4, b_cell.param.Q)
+
+    def test_realtime_spkf(self):
+        from unittest import mock
+        from parameter_sets.Calce123 import func_SOC_OCV, func_eta
+        from tests.test_observers.test_realtime import FakeClock
+
+        param = ParameterSet(R0=0.005, R1=0.01, C1=1000.0, Q=1.1, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
+        array_t = np.arange(0.0, 300.0)
+        array_I = np.where(np.arange(array_t.size) % 100 < 50, 1.0, -0.5)
+        sol_true = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.8)).solve(
+            cycling_step=CustomStep(array_t, array_I, V_min=2.0, V_max=4.5, SOC_LIB_min=0.0, SOC_LIB_max=1.0,
+                                    SOC_LIB=0.8), dt=1.0)
+        array_V = sol_true.array_V + 0.01 * np.random.default_rng(0).standard_normal(sol_true.array_V.size)
+        sol_exp = Solution(array_t=sol_true.array_t, array_I=sol_true.array_I, array_V=array_V)
+        kwargs = dict(sol_exp=sol_exp, cov_soc=1e-2, cov_current=1e-6, cov_process=1e-4, cov_sensor=1e-4)
+
+        # without the overruns, the results are the same as those of solveSPKF
+        clock = FakeClock()
+        sol = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.7)).solveRealTimeSPKF(
+            clock=clock, sleep=clock.sleep, **kwargs)
+        sol_spkf = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.7)).solveSPKF(
+            V_min=2.0, V_max=4.5, SOC_LIB_min=0.0, SOC_LIB_max=1.0, SOC_LIB=0.7, **kwargs)
+        self.assertEqual(sol_exp.array_t.size, sol.array_soc.size)
+        self.assertTrue(np.allclose(sol_spkf.array_soc, sol.array_soc[1:], rtol=0, atol=1e-12))
+        num_steps = sol_exp.array_t.size - 1
+        self.assertAlmostEqual((num_steps - 1) * 0.1, clock.now)  # the steps are released every 100 ms
+        self.assertEqual(num_steps, sol.realtime_report.num_steps)
+        self.assertEqual(0, sol.realtime_report.num_deadline_misses)
+
+        # the 150th SPKF step is slow, after which the steps are degraded
+        solve = SPKF.solve
+
+        def slow_solve(spkf, u, y_true):
+            slow_solve.num_calls += 1
+            solve(spkf, u=u, y_true=y_true)
+            clock.advance(0.35 if slow_solve.num_calls == 150 else 0.0)
+
+        for degradation in ('skip_covariance', 'open_loop', None):
+            clock = FakeClock()
+            slow_solve.num_calls = 0
+            with mock.patch.object(SPKF, 'solve', slow_solve):
+                sol_degraded = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.7)).solveRealTimeSPKF(
+                    clock=clock, sleep=clock.sleep, degradation=degradation, **kwargs)
+            report = sol_degraded.realtime_report
+            # the steps released during the slow step also miss their deadlines
+            self.assertEqual(3, report.num_deadline_misses)
+            self.assertAlmostEqual(0.35, report.max_latency)
+            self.assertTrue(np.array_equal(sol.array_soc[:151], sol_degraded.array_soc[:151]))
+            if degradation is None:
+                self.assertEqual(0, report.num_degraded_steps)
+                self.assertTrue(np.array_equal(sol.array_soc, sol_degraded.array_soc))
+            else:
+                self.assertEqual(3, report.num_degraded_steps)
+                self.assertTrue(np.array_equal(np.isin(np.arange(1, num_steps + 1), [151, 152, 153]),
+                                               report.array_degraded))
+                self.assertFalse(np.array_equal(sol.array_soc, sol_degraded.array_soc))
+                self.assertLess(np.max(np.abs(sol.array_soc - sol_degraded.array_soc)), 0.01)
+        with self.assertRaises(ValueError):
+            DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.7)).solveRealTimeSPKF(degradation='x', **kwargs)
+
+    def test_zoh(self):
+        @array_safe
+        def func_ocv(soc):
+            return 3.5 + 0.5 * soc
+
+        @array_safe
+        def func_eta_one(i):
+            return np.ones_like(i)
+
+        # the step response of the 1RC model on the non-uniform time values
+        param = ParameterSet(R0=0.02, R1=0.01, C1=2000.0, Q=1.5, func_SOC_OCV=func_ocv, func_eta=func_eta_one)
+        array_t = np.sort(np.append(0.0, np.random.default_rng(0).uniform(0.0, 600.0, 50)))
+        array_I = np.full(array_t.size, 1.2)
+        cycling_step = CustomStep(array_t, array_I, V_min=2.0, V_max=4.5, SOC_LIB_min=0.0, SOC_LIB_max=1.0,
+                                  SOC_LIB=0.9)
+        b_cell = BatteryCell(param=param, soc_init=0.9)
+        sol = DTSolver(battery_cell=b_cell).solveZOH(cycling_step=cycling_step, instrumentation=Instrumentation())
+        array_soc = 0.9 - 1.2 * array_t / (3600 * 1.5)
+        array_V = func_ocv(array_soc) - 0.01 * 1.2 * (1 - np.exp(-array_t / (0.01 * 2000.0))) - 0.02 * 1.2
+        self.assertTrue(np.array_equal(array_t, sol.array_t))
+        self.assertTrue(np.array_equal(array_I, sol.array_I))
+        self.assertTrue(np.allclose(array_soc, sol.array_soc, rtol=0, atol=1e-12))
+        self.assertTrue(np.allclose(array_V, sol.array_V, rtol=0, atol=1e-12))
+        self.assertEqual(array_soc[-1], b_cell.soc)
+        self.assertIn('discretization', sol.report.phase_times)
+
+        # the charge pulse followed by the rest, on the n-RC model, with the voltage limit
+        param = ParameterSet(R0=0.02, R1=np.array([0.01, 0.02]), C1=np.array([2000.0, 20000.0]), Q=1.5,
+                             func_SOC_OCV=func_ocv, func_eta=func_eta_one)
+        array_I = np.where(array_t < 300.0, -1.2, 0.0)
+        t_off = array_t[array_t >= 300.0][0]  # the current is held until the first time value after 300 s
+        tau = np.array([20.0, 400.0])
+        array_i_R = -1.2 * (1 - np.exp(-np.minimum(array_t, t_off)[:, np.newaxis] / tau)) * \
+            np.exp(-np.maximum(array_t - t_off, 0.0)[:, np.newaxis] / tau)
+        array_soc = 0.5 + 1.2 * np.minimum(array_t, t_off) / (3600 * 1.5)
+        array_V = func_ocv(array_soc) - array_i_R @ np.array([0.01, 0.02]) - 0.02 * array_I
+        cycling_step = CustomStep(array_t, array_I, V_min=2.0, V_max=4.5, SOC_LIB_min=0.0, SOC_LIB_max=1.0,
+                                  SOC_LIB=0.5)
+        sol = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.5)).solveZOH(cycling_step=cycling_step)
+        self.assertTrue(np.allclose(array_V, sol.array_V, rtol=0, atol=1e-12))
+        self.assertTrue(np.allclose(1.2 * np.minimum(array_t, t_off) / 3600, sol.array_cap_discharge))
+        cycling_step.V_max = 3.8
+        sol = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.5)).solveZOH(cycling_step=cycling_step)
+        n = np.argmax(array_V > 3.8) + 1
+        self.assertEqual(n, sol.array_t.size)
+        self.assertTrue(np.allclose(array_V[:n], sol.array_V, rtol=0, atol=1e-12))
+
+        with self.assertRaises(CannotPerformCalculations):
+            DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.5, temp_init=298.15),
+                     isothermal=False, temp_amb=298.15).solveZOH(cycling_step=cycling_step)
+
+    def test_particle_filter(self):
+        from parameter_sets.Calce123 import func_SOC_OCV, func_eta
+
+        param = ParameterSet(R0=0.005, R1=0.01, C1=1000.0, Q=1.1, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
+        array_t = np.arange(0.0, 600.0)
+        array_I = np.where(np.arange(array_t.size) % 200 < 100, 1.0, -0.5)
+        sol_true = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.8)).solve(
+            cycling_step=CustomStep(array_t, array_I, V_min=2.0, V_max=4.5, SOC_LIB_min=0.0, SOC_LIB_max=1.0,
+                                    SOC_LIB=0.8), dt=1.0)
+        array_V = sol_true.array_V + 0.01 * np.random.default_rng(0).standard_normal(sol_true.array_V.size)
+        sol_exp = Solution(array_t=sol_true.array_t, array_I=sol_true.array_I, array_V=array_V)
+
+        def solve(seed):
+            # the initial SOC is uniformly distributed (non-Gaussian)
+            return DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.5)).solvePF(
+                sol_exp=sol_exp, num_particles=2000, cov_soc=1e-2, cov_current=1e-6, cov_process=1e-4,
+                cov_sensor=1e-4, soc_samples=np.linspace(0.2, 1.0, 1000), seed=seed, instrumentation=Instrumentation())
+
+        sol = solve(seed=0)
+        self.assertTrue(np.array_equal(sol_exp.array_t, sol.array_t))
+        self.assertEqual((sol_exp.array_t.size, 2, 2), sol.array_cov.shape)
+        self.assertEqual(sol_exp.array_t.size - 1, sol.report.counters['pf_predict'])
+        self.assertAlmostEqual(0.6, sol.array_soc[0], delta=0.02)
+        self.assertLess(np.max(np.abs(sol.array_soc[100:] - sol_true.array_soc[100:])), 0.02)
+        self.assertTrue(np.array_equal(sol.array_soc, solve(seed=0).array_soc))
+
+    def test_non_isothermal_solver_without_thermal_parameters(self):
+        with self.assertRaises(CannotPerformCalculations):
+            DTSolver(battery_cell=self.b_cell, isothermal=False)
+
+    def test_instrumentation(self):
+        cycling_step = DischargeStep(discharge_current=discharge_current, V_min=3.3, SOC_LIB_min=SOC_LIB_min,
+                                     SOC_LIB=SOC_LIB)
+        param = ParameterSet(R0=R0, R1=R1, C1=C1, Q=Q, func_SOC_OCV=lambda soc: 3.2 + 0.8 * soc, func_eta=func_eta)
+        sol_ref = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.9)).solve(cycling_step=cycling_step, dt=1.0)
+        self.assertIsNone(sol_ref.report)
+
+        sol = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.9)).solve(
+            cycling_step=cycling_step, dt=1.0, instrumentation=Instrumentation(profile=True, trace_memory=True))
+        self.assertTrue(np.array_equal(sol_ref.array_V, sol.array_V))
+        num_steps = len(sol.array_t) - 1
+        self.assertEqual(num_steps, sol.report.num_steps)
+        for phase in ['current_lookup', 'soc_update', 'ocv', 'state_update', 'solution_append']:
+            self.assertEqual(num_steps, sol.report.counters[phase])
+            self.assertGreater(sol.report.phase_times[phase], 0.0)
+        self.assertLessEqual(sum(sol.report.phase_times.values()), sol.report.wall_time)
+        self.assertGreater(sol.report.steps_per_second, 0.0)
+        self.assertGreater(sol.report.peak_memory, 0)
+        self.assertIn('solve', sol.report.profile)
+        self.assertIn('steps per second', sol.report.summary())
+
+    def test_instrumentation_with_exception(self):
+        # the profiling and the memory tracing are stopped when the solve raises
+        def func_SOC_OCV_raises(soc):
+            if soc < 0.8:
+                raise ValueError('SOC outside of the OCV data.')
+            return 3.2 + 0.8 * soc
+
+        cycling_step = DischargeStep(discharge_current=discharge_current, V_min=3.3, SOC_LIB_min=SOC_LIB_min,
+                                     SOC_LIB=SOC_LIB)
+        param = ParameterSet(R0=R0, R1=R1, C1=C1, Q=Q, func_SOC_OCV=func_SOC_OCV_raises, func_eta=func_eta)
+        solver = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.9))
+        with self.assertRaises(ValueError):
+            solver.solve(cycling_step=cycling_step, dt=1.0,
+                         instrumentation=Instrumentation(profile=True, trace_memory=True))
+        self.assertIsNone(sys.getprofile())
+        self.assertFalse(tracemalloc.is_tracing())
+        # the later solve is not instrumented
+        solver.b_cell.soc = 0.95
+        self.assertIsNone(solver.solve(cycling_step=RestStep(rest_time=10, SOC_LIB=SOC_LIB), dt=1.0).report)
+
+    def test_instrumentation_keeps_caller_tracing(self):
+        cycling_step = RestStep(rest_time=10, SOC_LIB=SOC_LIB)
+        tracemalloc.start()
+        try:
+            sol = DTSolver(battery_cell=BatteryCell(param=self.param, soc_init=soc_init)).solve(
+                cycling_step=cycling_step, dt=1.0, instrumentation=Instrumentation(trace_memory=True))
+            self.assertIsNotNone(sol.report.peak_memory)
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+    def test_spkf_instrumentation(self):
+        sol_exp = Solution().read_from_csv_file(filepath='tests/test_solvers/A1-A123-Dynamics.csv')
+        sol_exp = Solution(array_t=sol_exp.array_t[:50], array_I=sol_exp.array_I[:50], array_V=sol_exp.array_V[:50])
+        param = ParameterSet(R0=0.225, R1=0.001, C1=0.03, Q=1.1, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
+        sol = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.38775)).solveSPKF(
+            sol_exp=sol_exp, cov_soc=1e-6, cov_current=1e-6, cov_sensor=1e-6, cov_process=1e-6, V_min=1, V_max=5,
+            SOC_LIB_min=0.0, SOC_LIB_max=1.0, SOC_LIB=0.38775, instrumentation=Instrumentation())
+        self.assertEqual(49, sol.report.num_steps)
+        self.assertEqual(49, sol.report.counters['kf_predict'])
+        self.assertEqual(49, sol.report.counters['kf_update'])
+
+    def test_parameter_tables(self):
+        cycling_step = DischargeStep(discharge_current=discharge_current, V_min=3.3, SOC_LIB_min=SOC_LIB_min,
+                                     SOC_LIB=SOC_LIB)
+        array_soc, array_temp = np.linspace(0.0, 1.0, 11), np.linspace(273.15, 323.15, 6)
+
+        def solve(R0_, R1_, C1_, temp_init=None):
+            param = ParameterSet(R0=R0_, R1=R1_, C1=C1_, Q=Q, func_SOC_OCV=lambda soc: 3.2 + 0.8 * soc,
+                                 func_eta=func_eta)
+            return DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.9, temp_init=temp_init)).solve(
+                cycling_step=cycling_step, dt=1.0)
+
+        # constant tables are the same as the constant parameters
+        sol_ref = solve(R0, R1, C1)
+        sol = solve(ParameterTable(array_soc, np.full((11, 6), R0), array_temp),
+                    ParameterTable(array_soc, np.full((11, 6), R1), array_temp),
+                    ParameterTable(array_soc, np.full((11, 6), C1), array_temp), temp_init=298.15)
+        self.assertTrue(np.allclose(sol_ref.array_V, sol.array_V))
+        sol = solve(R0, ParameterTable(array_soc, np.full((11, 1), R1), rc_axis=True),
+                    ParameterTable(array_soc, np.full((11, 1), C1), rc_axis=True))
+        self.assertTrue(np.allclose(sol_ref.array_V, sol.array_V))
+
+        # R0 increasing at the low SOC and the low temperatures leads to an earlier cut-off
+        array_R0 = R0 * (1 + 2 * (1 - array_soc)[:, np.newaxis]) * np.exp(0.02 * (298.15 - array_temp))
+        table_R0 = ParameterTable(array_soc, array_R0, array_temp)
+        sol_warm = solve(table_R0, R1, C1, temp_init=318.15)
+        sol_cold = solve(table_R0, R1, C1, temp_init=278.15)
+        self.assertLess(len(sol_cold.array_t), len(sol_warm.array_t))
+        self.assertLess(len(sol_warm.array_t), len(sol_ref.array_t))
+
+        # the temperature is required for the temperature-dependent tables
+        with self.assertRaises(CannotPerformCalculations):
+            solve(table_R0, R1, C1)
+
+    def test_parameter_tables_spkf(self):
+        from parameter_sets.Calce123 import R0, R1, C1, Q, func_SOC_OCV, func_eta
+
+        sol_exp = Solution().read_from_csv_file(filepath='tests/test_solvers/A1-A123-Dynamics.csv')
+        sol_exp = Solution(array_t=sol_exp.array_t[:200], array_I=sol_exp.array_I[:200], array_V=sol_exp.array_V[:200])
+        array_soc = np.linspace(0.0, 1.0, 11)
+
+        def solve(R0_, R1_, C1_):
+            param = ParameterSet(R0=R0_, R1=R1_, C1=C1_, Q=Q, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
+            solver = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.38775))
+            return solver.solveSPKF(sol_exp=sol_exp, cov_soc=1e-6, cov_current=1e-6, cov_sensor=1e-6,
+                                    cov_process=1e-6, V_min=1, V_max=4, SOC_LIB_min=0.0, SOC_LIB_max=1.0,
+                                    SOC_LIB=0.38775)
+
+        sol_ref = solve(R0, R1, C1)
+        sol = solve(ParameterTable(array_soc, np.full(11, R0)), ParameterTable(array_soc, np.full(11, R1)), C1)
+        self.assertTrue(np.allclose(sol_ref.array_V, sol.array_V))
+        self.assertTrue(np.allclose(sol_ref.array_soc, sol.array_soc))
+        sol = solve(R0, ParameterTable(array_soc, np.full((11, 2), [R1, 0.01]), rc_axis=True),
+                    ParameterTable(array_soc, np.full((11, 2), [C1, 1000.0]), rc_axis=True))
+        self.assertEqual(len(sol_ref.array_t), len(sol.array_t))
@@ -0,0 +1,114 @@
+"""
+Provides the unittest for the battery pack solvers
+"""
+
+import unittest
+
+import numpy as np
+
+from src import ParameterSet, BatteryCell, BatteryPack, DischargeStep, CustomStep
+from src import DTSolver, PackSolver, array_safe
+
+R0 = 0.02
+R1 = 0.05
+C1 = 1500.0
+Q = 1.65
+soc_init = 0.9
+
+discharge_current = 1.656
+V_min = 3.3
+SOC_LIB = 1.0
+SOC_LIB_min = 0.0
+
+
+@array_safe
+def func_SOC_OCV(soc):
+    return 3.2 + 0.8 * soc
+
+
+@array_safe
+def func_eta(i_app):
+    return np.ones_like(i_app, dtype=float) if np.ndim(i_app) else 1.0
+
+
+class TestPackSolver(unittest.TestCase):
+    param = ParameterSet(R0=R0, R1=R1, C1=C1, Q=Q, func_SOC_OCV=func_SOC_OCV, func_eta=func_eta)
+
+    def test_constructor(self):
+        with self.assertRaises(TypeError):
+            PackSolver(battery_pack=None)
+
+    def test_single_cell(self):
+        # the 1s1p battery pack is the same as a single battery cell
+        cycling_step = DischargeStep(discharge_current=discharge_current, V_min=V_min, SOC_LIB_min=SOC_LIB_min,
+                                     SOC_LIB=SOC_LIB)
+        sol_cell = DTSolver(battery_cell=BatteryCell(param=self.param, soc_init=soc_init)).solve(
+            cycling_step=cycling_step, dt=1.0)
+        pack = BatteryPack(param=self.param, num_series=1, num_parallel=1, soc_init=soc_init)
+        sol_pack = PackSolver(battery_pack=pack).solve(cycling_step=cycling_step, dt=1.0)
+        self.assertEqual(len(sol_cell.array_t), len(sol_pack.array_t))
+        self.assertTrue(np.allclose(sol_cell.array_V, sol_pack.array_V))
+        self.assertTrue(np.allclose(sol_cell.array_soc, sol_pack.array_soc))
+        self.assertTrue(np.allclose(sol_cell.array_I, sol_pack.array_I))
+        self.assertTrue(np.allclose(sol_cell.array_cap_discharge, sol_pack.array_cap_discharge))
+
+    def test_single_cell_custom_step(self):
+        # the CustomStep with the charge and discharge currents, to compare the cap_discharge in both directions
+        array_t = np.arange(0.0, 1201.0)
+        array_I = np.where(array_t < 600, 1.65, -1.0)
+        cycling_step = CustomStep(array_t=array_t, array_I=array_I, V_min=2.5, V_max=4.5, SOC_LIB_min=0.0,
+                                  SOC_LIB_max=1.0, SOC_LIB=SOC_LIB)
+        sol_cell = DTSolver(battery_cell=BatteryCell(param=self.param, soc_init=soc_init)).solve(
+            cycling_step=cycling_step, dt=1.0)
+        pack = BatteryPack(param=self.param, num_series=1, num_parallel=1, soc_init=soc_init)
+        sol_pack = PackSolver(battery_pack=pack).solve(cycling_step=cycling_step, dt=1.0)
+        self.assertTrue(np.allclose(sol_cell.array_V, sol_pack.array_V))
+        self.assertTrue(np.allclose(sol_cell.array_cap_discharge, sol_pack.array_cap_discharge))
+
+    def test_identical_cells(self):
+        # identical battery cells share the pack current equally and the pack voltage scales with num_series
+        cycling_step = DischargeStep(discharge_current=3 * discharge_current, V_min=V_min, SOC_LIB_min=SOC_LIB_min,
+                                     SOC_LIB=SOC_LIB)
+        sol_cell = DTSolver(battery_cell=BatteryCell(param=self.param, soc_init=soc_init)).solve(
+            cycling_step=DischargeStep(discharge_current=discharge_current, V_min=V_min, SOC_LIB_min=SOC_LIB_min,
+                                       SOC_LIB=SOC_LIB), dt=1.0)
+        pack = BatteryPack(param=self.param, num_series=4, num_parallel=3, soc_init=soc_init)
+        solver = PackSolver(battery_pack=pack)
+        sol_pack = solver.solve(cycling_step=cycling_step, dt=1.0)
+        self.assertTrue(np.allclose(4 * sol_cell.array_V, sol_pack.array_V))
+        self.assertTrue(np.allclose(solver.i_cells, discharge_current))
+        self.assertTrue(np.allclose(pack.soc, sol_cell.array_soc[-1]))
+
+    def test_current_sharing(self):
+        pack = BatteryPack(param=self.param, num_series=2, num_parallel=3, soc_init=soc_init,
+                           R0=np.array([[0.01, 0.02, 0.04], [0.02, 0.02, 0.02]]))
+        cycling_step = CustomStep(array_t=np.array([0.0, 100.0]), array_I=np.array([3.0, 3.0]), V_max=4.2, V_min=2.5,
+                                  SOC_LIB_min=SOC_LIB_min, SOC_LIB_max=SOC_LIB, SOC_LIB=soc_init)
+        solver = PackSolver(battery_pack=pack)
+        solver.solve(cycling_step=cycling_step, dt=1.0)
+        # the parallel currents add up to the pack current and the low resistance battery cells carry more current
+        self.assertTrue(np.allclose(np.sum(solver.i_cells, axis=1), 3.0))
+        self.assertTrue(np.all(np.diff(solver.i_cells[0]) < 0))
+        self.assertTrue(np.allclose(solver.i_cells[1], 1.0))
+        self.assertGreater(pack.soc[1, 0], pack.soc[0, 0])
+
+    def test_weakest_cell_cutoff(self):
+        # the battery pack discharge stops when the weakest battery cell reaches V_min
+        cycling_step = DischargeStep(discharge_current=discharge_current, V_min=V_min, SOC_LIB_min=SOC_LIB_min,
+                                     SOC_LIB=SOC_LIB)
+        sol_uniform = PackSolver(BatteryPack(param=self.param, num_series=3, num_parallel=1,
+                                             soc_init=soc_init)).solve(cycling_step=cycling_step, dt=1.0)
+        sol_weak = PackSolver(BatteryPack(param=self.param, num_series=3, num_parallel=1,
+                                          soc_init=np.array([[soc_init], [soc_init], [0.6]]))).solve(
+            cycling_step=cycling_step, dt=1.0)
+        self.assertLess(len(sol_weak.array_t), len(sol_uniform.array_t))
+        self.assertGreater(sol_weak.array_V[-1], 3 * V_min)
+
+    def test_large_pack(self):
+        pack = BatteryPack.sample(param=self.param, num_series=100, num_parallel=50, soc_init=0.5, std_R0=0.05,
+                                  std_Q=0.02, seed=0)
+        cycling_step = CustomStep(array_t=np.arange(0.0, 600.0, 10.0), array_I=np.tile([50.0, -25.0], 30),
+                                  V_max=4.2, V_min=2.5, SOC_LIB_min=SOC_LIB_min, SOC_LIB_max=SOC_LIB, SOC_LIB=0.5)
+        sol = PackSolver(battery_pack=pack).solve(cycling_step=cycling_step, dt=1.0)
+        self.assertEqual(pack.shape, (100, 50))
+        self.assertTrue(np.all(np.isfinite(sol.array_V)))
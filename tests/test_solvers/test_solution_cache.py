@@ -0,0 +1,152 @@
+"""
+Provides the unittest for the SolutionCache
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src import ParameterSet, BatteryCell, DischargeStep, CustomStep, DTSolver, Solution
+from src.solvers.solution_cache import SolutionCache, hash_simulation_inputs
+
+R0 = 0.02
+R1 = 0.05
+C1 = 1500.0
+Q = 1.65
+OCV_SLOPE = 0.8
+
+
+def func_SOC_OCV(soc):
+    return 3.2 + OCV_SLOPE * soc
+
+
+def func_eta(i_app):
+    return 1.0
+
+
+def ocv_helper(soc):
+    return 3.2 + OCV_SLOPE * soc
+
+
+def func_SOC_OCV_helper(soc):
+    return ocv_helper(soc)
+
+
+def func_SOC_OCV_recursive(soc, num_calls=2):
+    return func_SOC_OCV_recursive(soc, num_calls - 1) if num_calls > 0 else ocv_helper(soc)
+
+
+def create_solver(soc_init: float = 0.9, R0_: float = R0, func_ocv=func_SOC_OCV) -> DTSolver:
+    param = ParameterSet(R0=R0_, R1=R1, C1=C1, Q=Q, func_SOC_OCV=func_ocv, func_eta=func_eta)
+    return DTSolver(battery_cell=BatteryCell(param=param, soc_init=soc_init))
+
+
+def create_step(discharge_current: float = 1.65) -> DischargeStep:
+    return DischargeStep(discharge_current=discharge_current, V_min=3.3, SOC_LIB_min=0.0, SOC_LIB=1.0)
+
+
+def solve_cached(cache_dir: str) -> float:
+    sol = SolutionCache(cache_dir=cache_dir).solve(solver=create_solver(), cycling_step=create_step(), dt=1.0)
+    return float(sol.array_V[-1])
+
+
+class TestSolutionCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = self.temp_dir.name
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_hash(self):
+        key = hash_simulation_inputs(solver=create_solver(), cycling_step=create_step(), dt=1.0)
+        self.assertEqual(key, hash_simulation_inputs(solver=create_solver(), cycling_step=create_step(), dt=1.0))
+        self.assertNotEqual(key, hash_simulation_inputs(solver=create_solver(), cycling_step=create_step(), dt=0.5))
+        self.assertNotEqual(key, hash_simulation_inputs(solver=create_solver(R0_=0.03), cycling_step=create_step(),
+                                                        dt=1.0))
+        self.assertNotEqual(key, hash_simulation_inputs(solver=create_solver(soc_init=0.8), cycling_step=create_step(),
+                                                        dt=1.0))
+        self.assertNotEqual(key, hash_simulation_inputs(solver=create_solver(), cycling_step=create_step(1.0), dt=1.0))
+        # the OCV function with a different captured variable
+        slope = 0.7
+        key_closure = hash_simulation_inputs(solver=create_solver(func_ocv=lambda soc: 3.2 + slope * soc),
+                                             cycling_step=create_step(), dt=1.0)
+        slope = 0.8
+        self.assertNotEqual(key_closure, hash_simulation_inputs(
+            solver=create_solver(func_ocv=lambda soc: 3.2 + slope * soc), cycling_step=create_step(), dt=1.0))
+        # the helper function used by the OCV function is hashed as well (its code is changed to mimic the edit)
+        key_helper = hash_simulation_inputs(solver=create_solver(func_ocv=func_SOC_OCV_helper),
+                                            cycling_step=create_step(), dt=1.0)
+        code_helper = ocv_helper.__code__
+        try:
+            ocv_helper.__code__ = (lambda soc: 3.3 + OCV_SLOPE * soc).__code__
+            self.assertNotEqual(key_helper, hash_simulation_inputs(solver=create_solver(func_ocv=func_SOC_OCV_helper),
+                                                                   cycling_step=create_step(), dt=1.0))
+        finally:
+            ocv_helper.__code__ = code_helper
+        self.assertEqual(key_helper, hash_simulation_inputs(solver=create_solver(func_ocv=func_SOC_OCV_helper),
+                                                            cycling_step=create_step(), dt=1.0))
+        # the recursive functions are hashed once
+        self.assertEqual(hash_simulation_inputs(solver=create_solver(func_ocv=func_SOC_OCV_recursive),
+                                                cycling_step=create_step(), dt=1.0),
+                         hash_simulation_inputs(solver=create_solver(func_ocv=func_SOC_OCV_recursive),
+                                                cycling_step=create_step(), dt=1.0))
+        # current arrays of the custom steps
+        array_t = np.arange(10.0)
+        step1 = CustomStep(array_t=array_t, array_I=np.ones(10), V_min=3.0, V_max=4.2, SOC_LIB_min=0.0,
+                           SOC_LIB_max=1.0, SOC_LIB=0.9)
+        step2 = CustomStep(array_t=array_t, array_I=np.full(10, 2.0), V_min=3.0, V_max=4.2, SOC_LIB_min=0.0,
+                           SOC_LIB_max=1.0, SOC_LIB=0.9)
+        self.assertNotEqual(hash_simulation_inputs(solver=create_solver(), cycling_step=step1, dt=1.0),
+                            hash_simulation_inputs(solver=create_solver(), cycling_step=step2, dt=1.0))
+
+    def test_hit(self):
+        cache = SolutionCache(cache_dir=self.cache_dir)
+        solver = create_solver()
+        sol = cache.solve(solver=solver, cycling_step=create_step(), dt=1.0)
+        soc_final = solver.b_cell.soc
+        self.assertEqual((0, 1), (cache.num_hits, cache.num_misses))
+
+        solver = create_solver()
+        sol_cached = cache.solve(solver=solver, cycling_step=create_step(), dt=1.0)
+        self.assertEqual((1, 1), (cache.num_hits, cache.num_misses))
+        self.assertIsInstance(sol_cached.array_V, np.memmap)
+        self.assertIsInstance(sol_cached, Solution)
+        self.assertTrue(np.array_equal(sol.array_V, sol_cached.array_V))
+        self.assertTrue(np.array_equal(sol.array_soc, sol_cached.array_soc))
+        self.assertEqual(0, sol_cached.array_temp.size)
+        self.assertEqual(soc_final, solver.b_cell.soc)
+
+    def test_lru_eviction(self):
+        cache = SolutionCache(cache_dir=self.cache_dir)
+        sol = Solution(array_t=np.arange(1000.0), array_V=np.ones(1000))
+        cache.put('a', sol)
+        entry_size = cache.size
+        cache.max_size = int(2.5 * entry_size)
+        time.sleep(0.01)
+        cache.put('b', sol)
+        time.sleep(0.01)
+        self.assertIsNotNone(cache.get('a'))  # 'a' is now more recently used than 'b'
+        time.sleep(0.01)
+        cache.put('c', sol)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+        self.assertLessEqual(cache.size, cache.max_size)
+        self.assertIsNone(cache.get('b'))
+        cache.clear()
+        self.assertEqual([], os.listdir(self.cache_dir))
+
+    def test_concurrent_writers(self):
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(solve_cached, [self.cache_dir] * 8))
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertEqual(1, len(os.listdir(self.cache_dir)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Contains the unittest for the incremental capacity and differential voltage analysis
+"""
+
+import unittest
+
+import numpy as np
+import scipy.special
+
+from src.visualization.sol_and_plot_objects import Solution
+from src.visualization.differential_analysis import calc_capacity, ica, dva, batch_ica, find_peaks
+
+
+def create_charge_solution(shift: float = 0.0, noise: float = 0.0, seed: int = 0) -> Solution:
+    """
+    Creates a charge Solution whose capacity, Q(V), has two sigmoid steps with 0.4 and 0.6 A hr at 3.3 and 3.45 V
+    (plus the shift), i.e., the ICA peaks with these areas.
+    """
+    array_V = np.linspace(3.0, 3.7, 20001)
+    array_cap = 0.4 * scipy.special.expit((array_V - 3.3 - shift) / 0.005) + \
+        0.6 * scipy.special.expit((array_V - 3.45 - shift) / 0.005) + 0.1 * (array_V - 3.0)
+    array_cap -= array_cap[0]
+    array_t = np.linspace(0.0, 36000.0, array_V.size)
+    array_V = array_V + noise * np.random.default_rng(seed).standard_normal(array_V.size)
+    return Solution(array_t=array_t, array_V=array_V, array_cap_discharge=array_cap)
+
+
+class TestDifferentialAnalysis(unittest.TestCase):
+    def test_calc_capacity(self):
+        array_t = np.linspace(0.0, 3600.0, 101)
+        sol = Solution(array_t=array_t, array_I=np.full(101, -2.0), array_V=np.linspace(3.0, 3.6, 101),
+                       array_cap_discharge=np.zeros(101))
+        self.assertTrue(np.allclose(2.0 * array_t / 3600, calc_capacity(sol)))
+        with self.assertRaises(ValueError):
+            calc_capacity(Solution(array_V=np.ones(3)))
+
+    def test_ica(self):
+        array_V, dQdV = ica(create_charge_solution(), dV=0.002)
+        self.assertAlmostEqual(calc_capacity(create_charge_solution())[-1], np.sum(dQdV) * 0.002)
+        peaks = find_peaks(array_V, dQdV)
+        self.assertEqual(2, peaks.size)
+        self.assertTrue(np.allclose([3.3, 3.45], peaks['position'], atol=2e-3))
+        self.assertTrue(np.allclose([0.4, 0.6], peaks['area'], rtol=0.1))
+
+    def test_ica_noise(self):
+        # the binning integrates the capacity, so the peaks are found despite the voltage noise
+        array_V, dQdV = ica(create_charge_solution(noise=2e-3), dV=0.005, smoothing_bins=3)
+        peaks = find_peaks(array_V, dQdV, prominence=2.0)
+        self.assertEqual(2, peaks.size)
+        self.assertTrue(np.allclose([3.3, 3.45], peaks['position'], atol=5e-3))
+
+    def test_batch_ica(self):
+        sols = [create_charge_solution(shift=shift) for shift in (0.0, 0.01, 0.02)]
+        array_V, dQdV = batch_ica(sols, dV=0.002, V_min=3.0, V_max=3.7)
+        self.assertEqual((3, array_V.size), dQdV.shape)
+        for k, sol in enumerate(sols):
+            self.assertTrue(np.allclose(ica(sol, dV=0.002, V_min=3.0, V_max=3.7)[1], dQdV[k]))
+        peaks = find_peaks(array_V, dQdV)
+        self.assertTrue(np.array_equal([0, 0, 1, 1, 2, 2], peaks['solution']))
+        self.assertTrue(np.allclose([3.3, 3.45, 3.31, 3.46, 3.32, 3.47], peaks['position'], atol=2e-3))
+
+    def test_dva(self):
+        array_cap = np.linspace(0.0, 1.0, 1001)
+        sol = Solution(array_t=np.arange(1001.0), array_V=3.0 + 0.5 * array_cap,
+                       array_cap_discharge=array_cap)
+        array_Q, dVdQ = dva(sol, window=11)
+        self.assertEqual(1001 - 10, dVdQ.size)
+        self.assertTrue(np.allclose(array_cap[5:-5], array_Q))
+        self.assertTrue(np.allclose(0.5, dVdQ))
+        with self.assertRaises(ValueError):
+            dva(sol, window=10)
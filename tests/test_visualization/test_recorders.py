@@ -0,0 +1,142 @@
+"""
+Contains the unittest for the SolutionRecorder class
+"""
+
+import unittest
+
+import numpy as np
+
+from src import ParameterSet, BatteryCell, BatteryPack, DischargeStep, CustomStep, DTSolver, PackSolver, Solution
+from src.visualization.recorders import SolutionRecorder, EveryNthStep, OutputGrid, Deadband
+from parameter_sets import Calce123
+
+
+class TestSolutionRecorder(unittest.TestCase):
+    def test_constructor(self):
+        with self.assertRaises(ValueError):
+            SolutionRecorder(columns=['t', 'current'])
+        with self.assertRaises(ValueError):
+            SolutionRecorder(capacity=0)
+        self.assertEqual(('t', 'soc', 'V'), SolutionRecorder(columns=['V', 't', 'soc']).columns)
+
+    def test_record(self):
+        recorder = SolutionRecorder(capacity=2)
+        for k in range(10):
+            recorder.record(t=float(k), i_app=-1.0, soc=1 - 0.1 * k, v=3.0 + k, cap_discharge=0.0)
+        self.assertEqual(10, len(recorder))
+        sol = recorder.stop()
+        self.assertIsInstance(sol, Solution)
+        self.assertTrue(np.array_equal(np.arange(10.0), sol.array_t))
+        self.assertTrue(np.allclose(1 - 0.1 * np.arange(10), sol.array_soc))
+        self.assertTrue(np.array_equal(3.0 + np.arange(10), sol.array_V))
+        self.assertEqual(0, sol.array_temp.size)  # temp is None
+        self.assertEqual(0, len(recorder))  # cleared after stop
+
+    def test_dtype_and_columns(self):
+        recorder = SolutionRecorder(dtype=np.float32, columns=['t', 'soc', 'V'])
+        for k in range(100):
+            recorder.record(t=float(k), i_app=1.0, soc=0.5, v=3.3, cap_discharge=1.0, temp=298.15)
+        self.assertEqual(1024 * (8 + 4 + 4), recorder.nbytes)  # initial capacity of 1024 time steps
+        sol = recorder.stop()
+        self.assertEqual(np.float64, sol.array_t.dtype)
+        self.assertEqual(np.float32, sol.array_V.dtype)
+        self.assertEqual(0, sol.array_I.size)
+        self.assertEqual(0, sol.array_cap_discharge.size)
+        self.assertEqual(0, sol.array_temp.size)
+
+    def test_array_values(self):
+        recorder = SolutionRecorder(columns=['t', 'soc'])
+        for k in range(5):
+            recorder.record(t=float(k), i_app=0.0, soc=np.full((2, 3), k, dtype=float), v=0.0, cap_discharge=0.0)
+        sol = recorder.stop()
+        self.assertEqual((5, 2, 3), sol.array_soc.shape)
+        self.assertTrue(np.array_equal(np.arange(5.0), sol.array_soc[:, 1, 2]))
+
+    def test_dtsolver(self):
+        param = ParameterSet(R0=Calce123.R0, R1=Calce123.R1, C1=Calce123.C1, Q=Calce123.Q,
+                             func_SOC_OCV=Calce123.func_SOC_OCV, func_eta=Calce123.func_eta)
+        sol_exp = Solution.read_from_csv_file(filepath='tests/test_solvers/A1-A123-Dynamics.csv')
+        cycling_step = CustomStep(array_t=sol_exp.array_t, array_I=sol_exp.array_I, V_min=2.0, V_max=4.0,
+                                  SOC_LIB_min=0.0, SOC_LIB_max=1.0, SOC_LIB=0.38775)
+        sol_64 = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.38775)).solve(cycling_step=cycling_step,
+                                                                                         dt=5.0)
+        recorder = SolutionRecorder(dtype=np.float32, columns=['t', 'soc', 'V'])
+        sol_32 = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.38775)).solve(cycling_step=cycling_step,
+                                                                                         dt=5.0, recorder=recorder)
+        self.assertTrue(np.array_equal(sol_64.array_t, sol_32.array_t))
+        # rounded once to float32, i.e., the relative error is at most 2 ** -24
+        self.assertLessEqual(np.max(np.abs(sol_32.array_V - sol_64.array_V) / np.abs(sol_64.array_V)), 2 ** -24)
+        self.assertLessEqual(np.max(np.abs(sol_32.array_soc - sol_64.array_soc)), 2 ** -24)
+        self.assertEqual(0, sol_32.array_I.size)
+        self.assertLess(sol_32.array_V.nbytes + sol_32.array_soc.nbytes + sol_32.array_t.nbytes,
+                        0.4 * (5 * sol_64.array_V.nbytes) + 1)
+
+    def test_pack_solver(self):
+        param = ParameterSet(R0=0.02, R1=0.05, C1=1500.0, Q=1.65, func_SOC_OCV=Calce123.func_SOC_OCV,
+                             func_eta=Calce123.func_eta)
+        b_pack = BatteryPack(param=param, num_series=2, num_parallel=3, soc_init=0.9)
+        cycling_step = DischargeStep(discharge_current=3.0, V_min=6.0, SOC_LIB_min=0.0, SOC_LIB=0.9)
+        sol = PackSolver(battery_pack=b_pack).solve(cycling_step=cycling_step, dt=10.0,
+                                                    recorder=SolutionRecorder(dtype=np.float32, columns=['t', 'V']))
+        self.assertEqual(np.float32, sol.array_V.dtype)
+        self.assertEqual(sol.array_t.size, sol.array_V.size)
+        self.assertEqual(0, sol.array_soc.size)
+
+
+class TestRecordingPolicy(unittest.TestCase):
+    param = ParameterSet(R0=Calce123.R0, R1=Calce123.R1, C1=Calce123.C1, Q=Calce123.Q,
+                         func_SOC_OCV=Calce123.func_SOC_OCV, func_eta=Calce123.func_eta)
+    cycling_step = DischargeStep(discharge_current=1.1, V_min=2.5, SOC_LIB_min=0.0, SOC_LIB=0.9)
+
+    def solve(self, policy=None, dt=1.0) -> Solution:
+        solver = DTSolver(battery_cell=BatteryCell(param=self.param, soc_init=0.9))
+        return solver.solve(cycling_step=self.cycling_step, dt=dt, recorder=SolutionRecorder(policy=policy))
+
+    def test_constructors(self):
+        with self.assertRaises(ValueError):
+            EveryNthStep(n=0)
+        with self.assertRaises(ValueError):
+            OutputGrid(dt_output=0.0)
+        with self.assertRaises(ValueError):
+            Deadband()
+
+    def test_every_nth_step(self):
+        sol_full = self.solve()
+        sol = self.solve(policy=EveryNthStep(n=7))
+        num_steps = sol_full.array_t.size - 1
+        self.assertEqual(num_steps // 7 + 1 + int(num_steps % 7 != 0), sol.array_t.size)
+        self.assertTrue(np.array_equal(sol_full.array_V[:-1:7], sol.array_V[:-1]))
+        # the cut-off time step is kept
+        self.assertEqual(sol_full.array_t[-1], sol.array_t[-1])
+        self.assertEqual(sol_full.array_V[-1], sol.array_V[-1])
+        self.assertLess(sol.array_V[-1], self.cycling_step.V_min)
+
+    def test_output_grid(self):
+        sol_full = self.solve(dt=0.5)
+        sol = self.solve(policy=OutputGrid(dt_output=60.0), dt=0.5)
+        self.assertTrue(np.allclose(60.0, np.diff(sol.array_t[:-1])))
+        self.assertEqual(sol_full.array_t[-1], sol.array_t[-1])
+        self.assertTrue(np.allclose(np.interp(sol.array_t, sol_full.array_t, sol_full.array_V), sol.array_V))
+        # interpolation between the solver time steps that do not fall on the output grid
+        recorder = SolutionRecorder(columns=['t', 'V'], policy=OutputGrid(dt_output=1.0))
+        for t in (0.0, 0.4, 1.6, 2.0, 2.5):
+            recorder.record(t=t, i_app=0.0, soc=0.5, v=t * 2, cap_discharge=0.0)
+        sol = recorder.stop()
+        self.assertTrue(np.allclose([0.0, 1.0, 2.0, 2.5], sol.array_t))
+        self.assertTrue(np.allclose([0.0, 2.0, 4.0, 5.0], sol.array_V))
+
+    def test_deadband(self):
+        sol_full = self.solve(dt=0.5)
+        sol = self.solve(policy=Deadband(tol_V=5e-3, tol_I=1e-3), dt=0.5)
+        self.assertLess(sol.array_t.size, sol_full.array_t.size / 10)
+        self.assertEqual(sol_full.array_t[-1], sol.array_t[-1])
+        # the voltage between the recorded points is within the tolerance of the last recorded point
+        array_V_held = sol.array_V[np.searchsorted(sol.array_t, sol_full.array_t, side='right') - 1]
+        self.assertLessEqual(np.max(np.abs(array_V_held - sol_full.array_V)), 5e-3 + 1e-12)
+        # the step change of the current is kept sharp
+        recorder = SolutionRecorder(columns=['t', 'I'], policy=Deadband(tol_I=0.1))
+        for t in range(10):
+            recorder.record(t=float(t), i_app=1.0 if t >= 5 else 0.0, soc=0.5, v=3.0, cap_discharge=0.0)
+        sol = recorder.stop()
+        self.assertTrue(np.array_equal([0.0, 4.0, 5.0, 9.0], sol.array_t))
+        self.assertTrue(np.array_equal([0.0, 0.0, 1.0, 1.0], sol.array_I))
@@ -0,0 +1,173 @@
+"""
+Contains the unittest for the memory-mapped SolutionStore and the MemmapRecorder
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+import numpy as np
+
+from src import ParameterSet, BatteryCell, CustomStep, DTSolver, Solution
+from src.visualization.recorders import SolutionRecorder, EveryNthStep
+from src.visualization.solution_store import SolutionStore, MemmapRecorder
+from parameter_sets import Calce123
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# script run in a separate process which appends the records (t = k, V = 3 + k / 1e5) to the store in the directory
+# given as the first argument and flushes them every flush_every records
+WRITER_SCRIPT = textwrap.dedent('''
+    import os
+    import sys
+    import time
+    import numpy as np
+    from src.visualization.solution_store import SolutionStore
+
+    directory, num_records, flush_every, crash = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), sys.argv[4] == '1'
+    store = SolutionStore.create(directory, columns={'t': (np.float64, ()), 'V': (np.float32, ())}, segment_size=1000)
+    for k in range(num_records):
+        store.append({'t': float(k), 'V': 3 + k / 1e5})
+        if (k + 1) % flush_every == 0:
+            store.flush()
+            time.sleep(0.002)
+    if crash:
+        os._exit(1)  # the records after the last flush are not committed
+    store.close()
+''')
+
+
+def run_writer(directory, num_records, flush_every, crash=False):
+    return subprocess.Popen([sys.executable, '-c', WRITER_SCRIPT, directory, str(num_records), str(flush_every),
+                             '1' if crash else '0'], cwd=ROOT_DIR, env=dict(os.environ, PYTHONPATH=ROOT_DIR))
+
+
+class TestSolutionStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.temp_dir.name, 'store')
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def assert_records(self, sol, num_records):
+        self.assertEqual(num_records, sol.array_t.size)
+        self.assertTrue(np.array_equal(np.arange(num_records, dtype=float), sol.array_t))
+        self.assertTrue(np.array_equal((3 + np.arange(num_records) / 1e5).astype(np.float32), sol.array_V))
+
+    def test_append_and_read(self):
+        with self.assertRaises(ValueError):
+            SolutionStore.create(self.directory, columns={'t': (np.float64, ())}, segment_size=0)
+        with self.assertRaises(FileNotFoundError):
+            SolutionStore.read(self.directory)
+        store = SolutionStore.create(self.directory, columns={'t': (np.float64, ()), 'V': (np.float32, ()),
+                                                             'soc': (np.float64, (2,))}, segment_size=4)
+        self.assertEqual(0, SolutionStore.read(self.directory).array_t.size)
+        for k in range(10):
+            store.append({'t': float(k), 'V': 3 + k / 1e5, 'soc': [k, -k]})
+        self.assertEqual(10, len(store))
+        self.assertEqual(0, store.num_committed)
+        self.assertEqual(0, SolutionStore.read(self.directory).array_t.size)  # the records are not committed
+        store.flush()
+        self.assertEqual(10, store.num_committed)
+        sol = SolutionStore.read(self.directory)
+        self.assert_records(sol, 10)
+        self.assertTrue(np.array_equal(np.arange(10.0), sol.array_soc[:, 0]))
+        self.assertIsInstance(sol.array_V, np.memmap)
+        self.assertEqual(12 * 8, os.path.getsize(os.path.join(self.directory, 't.bin')))  # 3 segments of 4 records
+        with self.assertRaises(ValueError):
+            sol.array_t[0] = 1.0  # read-only
+        store.close()
+
+    def test_crash_recovery(self):
+        # the writer process crashes after 2500 records, of which 2000 are committed
+        self.assertEqual(1, run_writer(self.directory, num_records=2500, flush_every=1000, crash=True).wait())
+        self.assert_records(SolutionStore.read(self.directory), 2000)
+
+        # the torn tail is dropped and overwritten by the next appends
+        store = SolutionStore.open(self.directory)
+        self.assertEqual(2000, len(store))
+        for k in range(2000, 2100):
+            store.append({'t': float(k), 'V': 3 + k / 1e5})
+        store.close()
+        self.assert_records(SolutionStore.read(self.directory), 2100)
+
+        # if a column file is shorter than the committed records, the last complete segment is recovered
+        with open(os.path.join(self.directory, 'V.bin'), 'r+b') as f:
+            f.truncate(1500 * 4)
+        self.assert_records(SolutionStore.read(self.directory), 1000)
+        store = SolutionStore.open(self.directory)
+        self.assertEqual(1000, store.num_committed)
+        store.close()
+        self.assert_records(SolutionStore.read(self.directory), 1000)
+
+    def test_concurrent_readers(self):
+        # the reader sees the growing committed prefix while the writer process appends the records
+        process = run_writer(self.directory, num_records=10000, flush_every=500)
+        num_records_seen = []
+        while True:
+            finished = process.poll() is not None
+            try:
+                sol = SolutionStore.read(self.directory)
+            except FileNotFoundError:  # the store is not created yet
+                continue
+            self.assertEqual(0, sol.array_t.size % 500)
+            self.assert_records(sol, sol.array_t.size)
+            num_records_seen.append(sol.array_t.size)
+            if finished:
+                break
+        self.assertEqual(0, process.returncode)
+        self.assertEqual(10000, num_records_seen[-1])
+        self.assertEqual(sorted(num_records_seen), num_records_seen)
+        self.assertGreater(len(set(num_records_seen)), 2)
+
+
+class TestMemmapRecorder(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.temp_dir.name, 'store')
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_record(self):
+        with self.assertRaises(ValueError):
+            MemmapRecorder(self.directory, flush_every=0)
+        recorder = MemmapRecorder(self.directory, dtype=np.float32, columns=['t', 'soc', 'V'], segment_size=4,
+                                  flush_every=3)
+        for k in range(10):
+            recorder.record(t=float(k), i_app=-1.0, soc=1 - 0.1 * k, v=3.0 + k, cap_discharge=0.0)
+        self.assertEqual(10, len(recorder))
+        self.assertEqual(0, recorder.nbytes)  # no memory buffers
+        self.assertEqual(9, SolutionStore.read(self.directory).array_t.size)  # committed every 3 records
+        sol = recorder.stop()
+        self.assertEqual(0, len(recorder))
+        self.assertTrue(np.array_equal(np.arange(10.0), sol.array_t))
+        self.assertEqual(np.float32, sol.array_V.dtype)
+        self.assertTrue(np.allclose(1 - 0.1 * np.arange(10), sol.array_soc))
+        self.assertEqual(0, sol.array_I.size)
+        self.assertEqual(0, sol.array_temp.size)
+        self.assertEqual(0, recorder.stop().array_t.size)
+
+    def test_dtsolver(self):
+        param = ParameterSet(R0=Calce123.R0, R1=Calce123.R1, C1=Calce123.C1, Q=Calce123.Q,
+                             func_SOC_OCV=Calce123.func_SOC_OCV, func_eta=Calce123.func_eta)
+        sol_exp = Solution.read_from_csv_file(filepath='tests/test_solvers/A1-A123-Dynamics.csv')
+        cycling_step = CustomStep(array_t=sol_exp.array_t[:2000], array_I=sol_exp.array_I[:2000], V_min=2.0,
+                                  V_max=4.0, SOC_LIB_min=0.0, SOC_LIB_max=1.0, SOC_LIB=0.38775)
+        for policy in (None, EveryNthStep(n=7)):
+            sol = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.38775)).solve(
+                cycling_step=cycling_step, dt=1.0, recorder=SolutionRecorder(policy=policy))
+            sol_memmap = DTSolver(battery_cell=BatteryCell(param=param, soc_init=0.38775)).solve(
+                cycling_step=cycling_step, dt=1.0, recorder=MemmapRecorder(self.directory, segment_size=256,
+                                                                           policy=policy))
+            for name in ('array_t', 'array_I', 'array_soc', 'array_V', 'array_cap_discharge', 'array_temp'):
+                self.assertTrue(np.array_equal(getattr(sol, name), getattr(sol_memmap, name)))
+            self.assertIsInstance(sol_memmap.array_V, np.memmap)
+
+
+if __name__ == '__main__':
+    unittest.main()